@@ -2,8 +2,9 @@ from adsk.core import CommandCreatedEventArgs, NamedValues, CommandCreatedEventH
 
 from .OnDestroyHandler import OnDestroyHandler
 from .OnExecuteHandler import OnExecuteHandler
+from .OnExecutePreviewHandler import OnExecutePreviewHandler
 from .UserParameters import UserParameters
-from .OnInputChangedHandler import OnInputChangedHandler
+from .OnInputChangedHandler import OnInputChangedHandler, VALIDATION_MESSAGES_ID, showViolations
 from .common.Common import ui, printTrace, resourceFolder
 
 
@@ -36,7 +37,7 @@ class GenerateNozzleCommand:
 
                 self._onInputChangedHandler = OnInputChangedHandler()
                 self._onExecuteHandler = OnExecuteHandler()
-                self._onExecutePreviewHandler = OnExecuteHandler()
+                self._onExecutePreviewHandler = OnExecutePreviewHandler()
                 self._onDestroyHandler = OnDestroyHandler()
                 cmd.inputChanged.add(self._onInputChangedHandler)
                 cmd.execute.add(self._onExecuteHandler)
@@ -45,5 +46,7 @@ class GenerateNozzleCommand:
 
                 for userParameter in UserParameters.getAllParameters():
                     userParameter.addToCommandInputs(cmd.commandInputs)
+                cmd.commandInputs.addTextBoxCommandInput(VALIDATION_MESSAGES_ID, 'Validation', '', 3, True)
+                showViolations(cmd.commandInputs)
             except:
                 printTrace()
@@ -2,6 +2,14 @@ from enum import Enum
 from typing import NamedTuple
 
 
+class DivergenceStyle(str, Enum):
+    CONE = 'cone'
+    # Rao thrust-optimised parabola, exitLength sets the bell length
+    BELL = 'bell'
+    # minimum-length wall from the method of characteristics, its length is fixed by the exit to throat radius ratio
+    CHARACTERISTICS = 'characteristics'
+
+
 class NozzleParameters(NamedTuple):
     name: str
     chamberLength: float
@@ -13,6 +21,35 @@ class NozzleParameters(NamedTuple):
     convergenceAngle: float
     convergenceRadius: float
     divergenceRadius: float
+    divergenceStyle: DivergenceStyle = DivergenceStyle.CONE
+    # ratio of specific heats and number of waves of a method of characteristics wall, other styles ignore them
+    gamma: float = 1.2
+    characteristicCount: int = 50
+
+
+# the lengths and the angle of a nozzle, every field of NozzleParameters that is a dimension of its sketch
+DIMENSION_FIELDS = NozzleParameters._fields[1:10]
+
+
+# thicknesses of the layers drawn around the nozzle wall, in the units of the nozzle parameters they are used with
+class WallLayers(NamedTuple):
+    innerWallThickness: float
+    channelThickness: float
+    outerWallThickness: float
+
+    def getOffsets(self) -> [float]:
+        # radius offsets of the nozzle wall, inner wall, cooling channel and outer wall layers
+        return [0, self.innerWallThickness, self.innerWallThickness + self.channelThickness,
+                self.innerWallThickness + self.channelThickness + self.outerWallThickness]
+
+
+DEFAULT_WALL_LAYERS = WallLayers(innerWallThickness=0.3, channelThickness=1.0, outerWallThickness=1.0)
+
+
+# coolant channels cut through the channel layer of a solid engine, width in the units of the nozzle parameters
+class CoolingChannels(NamedTuple):
+    count: int
+    width: float
 
 
 class NozzleDefinition(Enum):
@@ -27,13 +64,39 @@ class NozzleDefinition(Enum):
         convergenceAngle=30.0,
         convergenceRadius=13.68,
         divergenceRadius=1.96)
+    BELL = NozzleParameters(
+        name='bell',
+        chamberLength=67.23,
+        chamberCylinderLength=56.23,
+        exitLength=7.15,
+        chamberRadius=10.48 / 2,
+        throatRadius=2.62 / 2,
+        exitRadius=7.41 / 2,
+        convergenceAngle=30.0,
+        convergenceRadius=13.68,
+        divergenceRadius=1.96,
+        divergenceStyle=DivergenceStyle.BELL)
+    MINIMUM_LENGTH = NozzleParameters(
+        name='minimum length',
+        chamberLength=67.23,
+        chamberCylinderLength=56.23,
+        exitLength=31.27,
+        chamberRadius=10.48 / 2,
+        throatRadius=2.62 / 2,
+        exitRadius=6.55 / 2,
+        convergenceAngle=30.0,
+        convergenceRadius=13.68,
+        divergenceRadius=1.96,
+        divergenceStyle=DivergenceStyle.CHARACTERISTICS)
 
     @staticmethod
     def fromName(name: str) -> NozzleParameters:
-        nozzleParams = next(
-            nozzleParams for nozzleParams in NozzleDefinition if nozzleParams.value.name == name)
-        return nozzleParams.value
+        return _definitionsByName[name]
 
     @staticmethod
     def getNames() -> [str]:
-        return list(map(lambda nozzleParams: nozzleParams.value.name, NozzleDefinition))
+        return list(_definitionsByName)
+
+
+# built-in definitions only, see catalog.NozzleCatalog for the file-backed store the dialog uses
+_definitionsByName = {nozzleParams.value.name: nozzleParams.value for nozzleParams in NozzleDefinition}
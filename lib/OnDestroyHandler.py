@@ -1,6 +1,7 @@
 import adsk.core
 from adsk.core import CommandEventHandler
 
+from .common.BackgroundWorker import backgroundWorker
 from .common.Common import printTrace
 
 
@@ -10,6 +11,8 @@ class OnDestroyHandler(CommandEventHandler):
 
     def notify(self, args):
         try:
+            # results of jobs still running would arrive after the dialog is gone
+            backgroundWorker.stop()
             adsk.terminate()
         except:
             printTrace()
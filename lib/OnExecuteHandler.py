@@ -3,9 +3,14 @@ import math
 from adsk.core import Point3D, CommandEventArgs, CommandEventHandler
 from adsk.fusion import FeatureOperations, SketchPoint, Component
 
+from .OnExecutePreviewHandler import PREVIEW_CHANNEL
 from .UserParameters import UserParameters
+from .common.BackgroundWorker import backgroundWorker
 from .common.Common import printTrace, ui, design
-from .sketch.SketchUtils import createNewComponent, extrudeProfile, createXYSketch, createCylinder
+from .common.Instrumentation import instrumentation
+from .sketch.SketchUtils import createNewComponent, extrudeProfile, createXYSketch, createCylinder, getActiveSketch
+from .sketch.EngineCluster import EngineCluster
+from .sketch.EngineSolid import EngineSolid
 from .sketch.NozzleSketch import NozzleSketch, EngineSketch
 
 
@@ -16,13 +21,55 @@ class OnExecuteHandler(CommandEventHandler):
 
     def notify(self, args: CommandEventArgs):
         try:
-            # TODO: different behavior if preview (set `args.isValidResult = False` when rendering preview)
-            # ui.messageBox(args.firingEvent.name)
+            # a preview still being solved is not needed any more
+            backgroundWorker.cancel(PREVIEW_CHANNEL)
             UserParameters.updateValuesFromCommandInputs(args.firingEvent.sender.commandInputs)
-            self.run()
+            instrumentation.setEnabled(UserParameters.RECORD_TIMINGS.value.getValue())
+            instrumentation.setProfilingEnabled(UserParameters.CAPTURE_PROFILE.value.getValue())
+            violations = UserParameters.getViolations()
+            if violations:
+                ui.messageBox('The nozzle was not generated:\n{}'.format(
+                    '\n'.join(violation.message for violation in violations)))
+                return
+            with instrumentation.profile('generate'), instrumentation.stage('generate'):
+                self.run()
             args.isValidResult = True
+            self._reportDiagnostics()
         except:
             printTrace()
 
     def run(self):
-        EngineSketch(UserParameters.getNozzleParameters()).draw()
+        with instrumentation.stage('read parameters'):
+            nozzleParameters = UserParameters.getNozzleParameters()
+            wallLayers = UserParameters.getWallLayers()
+            clusterLayout = UserParameters.getClusterLayout()
+            channels = UserParameters.getCoolingChannels() if UserParameters.GENERATE_SOLID.value.getValue() else None
+        if clusterLayout.count > 1:
+            # a cluster is a new component every time, there is nothing to regenerate
+            EngineCluster(nozzleParameters, wallLayers, clusterLayout, channels).generate()
+            return
+        sketch = getActiveSketch()
+        changes = UserParameters.getChangesSinceLastGeneration(sketch.entityToken)
+        layerCurves = None
+        # a regenerated engine has no new curves, the solid already built from the sketch follows it
+        if UserParameters.isEngineChanged(changes) or not EngineSketch.isDrawn(sketch):
+            layerCurves = EngineSketch(nozzleParameters, wallLayers).draw(sketch)
+        # the solid is built again for a new engine or other channels, it is removed with the engine if that ever
+        # has to be drawn again
+        if layerCurves is None and UserParameters.isSolidChanged(changes):
+            EngineSketch.deleteDependents(sketch)
+            layerCurves = EngineSketch.getLayerCurves(sketch)
+        if channels is not None and layerCurves is not None:
+            EngineSketch.addDependents(
+                sketch, EngineSolid(nozzleParameters, wallLayers, channels).generate(sketch, layerCurves))
+        UserParameters.markGenerated(sketch.entityToken)
+
+    def _reportDiagnostics(self):
+        # the whole ring buffer is written, so the trace also holds the previous generations of this session
+        paths = []
+        if instrumentation.isEnabled():
+            paths.append(instrumentation.exportChromeTrace())
+        if instrumentation.isProfilingEnabled():
+            paths.append(instrumentation.getLastProfilePath())
+        if paths:
+            ui.messageBox('Diagnostics written to:\n{}'.format('\n'.join(paths)))
@@ -0,0 +1,49 @@
+from adsk.core import CommandEventArgs, CommandEventHandler, Command
+
+from .NozzleDefinitions import NozzleParameters, WallLayers
+from .UserParameters import UserParameters
+from .common.BackgroundWorker import backgroundWorker, CancellationToken
+from .common.Common import printTrace
+from .geometry.ContourCache import contourCache
+from .sketch.PreviewSketch import EnginePreviewSketch
+
+PREVIEW_CHANNEL = 'preview'
+
+
+class OnExecutePreviewHandler(CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args: CommandEventArgs):
+        try:
+            UserParameters.updateValuesFromCommandInputs(args.firingEvent.sender.commandInputs)
+            self.run()
+            # the preview is only an approximation, the constrained sketch is built by the execute event
+            args.isValidResult = False
+        except:
+            printTrace()
+
+    def run(self):
+        # invalid combinations are listed in the dialog instead of being previewed
+        if UserParameters.getViolations():
+            return
+        # the geometry of the latest edit is still being solved, its result asks for another preview
+        if backgroundWorker.isPending(PREVIEW_CHANNEL):
+            return
+        EnginePreviewSketch(UserParameters.getNozzleParameters(), UserParameters.getWallLayers()).draw()
+
+
+def submitPreview(command: Command):
+    # solves the preview geometry on a worker, the preview is redrawn from the cache once it is done; an edit made
+    # in the meantime replaces the job
+    nozzleParameters = UserParameters.getNozzleParameters()
+    wallLayers = UserParameters.getWallLayers()
+    backgroundWorker.submit(PREVIEW_CHANNEL, lambda token: _solvePreview(nozzleParameters, wallLayers, token),
+                            lambda layerPoints: command.doExecutePreview())
+
+
+def _solvePreview(nozzleParameters: NozzleParameters, wallLayers: WallLayers, token: CancellationToken) -> list:
+    # worker thread; a job replaced while its contour is solved stops before the wall offsets
+    contourCache.getContour(nozzleParameters, degrees=False)
+    token.raiseIfCancelled()
+    return EnginePreviewSketch(nozzleParameters, wallLayers).getLayerPoints()
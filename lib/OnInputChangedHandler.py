@@ -1,8 +1,12 @@
-from adsk.core import InputChangedEventHandler, InputChangedEventArgs
+from adsk.core import InputChangedEventHandler, InputChangedEventArgs, TextBoxCommandInput
 
+from .OnExecutePreviewHandler import PREVIEW_CHANNEL, submitPreview
 from .UserParameters import UserParameters
+from .common.BackgroundWorker import backgroundWorker
 from .common.Common import printTrace
 
+VALIDATION_MESSAGES_ID = 'validationMessagesId'
+
 
 class OnInputChangedHandler(InputChangedEventHandler):
     def __init__(self):
@@ -12,6 +16,37 @@ class OnInputChangedHandler(InputChangedEventHandler):
         try:
             # update parameters according to the selected thread definition
             if args.input.id == UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getId():
+                UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.setValueFromCommandInput(args.input)
                 UserParameters.applySelectedNozzleDefinition()
+            elif args.input.id != VALIDATION_MESSAGES_ID:
+                UserParameters.fromId(args.input.id).setValueFromCommandInput(args.input)
+            # sized designs follow every target edit, the sizing is cached so returning to a value is instant
+            isSized = UserParameters.SIZE_FROM_TARGETS.value.getValue() and (
+                UserParameters.isSizingInput(args.input.id) or
+                args.input.id in (UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getId(),
+                                  UserParameters.CONVERGENCE_ANGLE.value.getId()))
+            if isSized:
+                UserParameters.applySizing()
+            UserParameters.applyCharacteristicLength()
+            # the walls follow the geometry they cool, so every engine input sizes them again
+            isWallSized = UserParameters.SIZE_WALLS.value.getValue() and (
+                isSized or UserParameters.isWallSizingInput(args.input.id) or
+                UserParameters.isEngineInput(args.input.id))
+            if isWallSized:
+                UserParameters.applyWallSizing()
+            # Fusion asks for a preview right after this event, it waits for the geometry solved in the background;
+            # inputs the preview is not drawn from leave its geometry in the cache, so nothing is solved for them
+            if showViolations(args.inputs):
+                backgroundWorker.cancel(PREVIEW_CHANNEL)
+            elif isSized or isWallSized or UserParameters.isEngineInput(args.input.id):
+                submitPreview(args.inputs.command)
         except:
             printTrace()
+
+
+def showViolations(commandInputs) -> list:
+    # every edit is checked in closed form, so an invalid combination is reported before Fusion tries to solve it
+    messages = TextBoxCommandInput.cast(commandInputs.itemById(VALIDATION_MESSAGES_ID))
+    violations = UserParameters.getViolations()
+    messages.formattedText = '<br>'.join(violation.message for violation in violations) or 'Parameters are valid'
+    return violations
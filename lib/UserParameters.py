@@ -1,17 +1,29 @@
+import math
 from enum import Enum
+from typing import Callable
 
 from adsk.core import ValueInput, CommandInputs, BoolValueCommandInput, IntegerSliderCommandInput, ValueCommandInput, \
     CommandInput, DropDownStyles, DropDownCommandInput
 
-from .NozzleDefinitions import NozzleDefinition, NozzleParameters
+from .NozzleDefinitions import NozzleDefinition, NozzleParameters, DivergenceStyle, WallLayers, CoolingChannels, \
+    DEFAULT_WALL_LAYERS
+from .analysis.CoolingThermal import sizeWallLayers, DEFAULT_GAS, DEFAULT_COOLANT, DEFAULT_MATERIAL, \
+    DEFAULT_COOLANT_VELOCITY, DEFAULT_COOLANT_PRESSURE, MINIMUM_WALL_THICKNESS
+from .analysis.EngineSizing import SizingTargets, sizingCache
+from .catalog.NozzleCatalog import nozzleCatalog
 from .common.Common import unitsMgr, resourceFolder, ui
+from .geometry.CharacteristicNozzle import MINIMUM_CHARACTERISTIC_COUNT
+from .geometry.ClusterLayout import ClusterLayout, ClusterPattern, validateClusterLayout
+from .geometry.NozzleContour import resolveExitLength
+from .geometry.ParameterValidator import Violation, validateParameters, validateChannels
 
 
 class _UserParameter:
     def __init__(self, id: str, name: str):
         self._id = id
         self._name = name
-        pass
+        # parameters start dirty as nothing has been generated from them yet
+        self._isDirty = True
 
     def getValue(self):
         pass
@@ -28,25 +40,45 @@ class _UserParameter:
     def getId(self) -> str:
         return self._id
 
+    def isDirty(self) -> bool:
+        return self._isDirty
+
+    def clearDirty(self):
+        self._isDirty = False
+
+    def _setDirtyIfChanged(self, previousValue, value):
+        if previousValue != value:
+            self._isDirty = True
+
 
 class _UserDimensionParameter(_UserParameter):
     def __init__(self, id, name: str, unitType: str, initValue: float):
         super().__init__(id, name)
         self._unitType = unitType
         self._valueInSelfUnits = initValue
+        self._valueInInternalUnits = None
         self._commandInput = ValueCommandInput.cast(None)
 
     def getValue(self) -> float:
-        # dimensions must be used with internal units
-        return unitsMgr.convert(self._valueInSelfUnits, self._unitType, unitsMgr.internalUnits)
+        # dimensions must be used with internal units, the conversion is cached until the value changes
+        if self._valueInInternalUnits is None:
+            self._valueInInternalUnits = unitsMgr.convert(self._valueInSelfUnits, self._unitType,
+                                                          unitsMgr.internalUnits)
+        return self._valueInInternalUnits
 
     def setValue(self, value):
+        self._setDirtyIfChanged(self._valueInSelfUnits, value)
         self._valueInSelfUnits = value
-        self._commandInput.value = unitsMgr.convert(value, self._unitType, unitsMgr.internalUnits)
+        self._valueInInternalUnits = None
+        self._commandInput.value = self.getValue()
 
     def setValueFromCommandInput(self, commandInput: ValueCommandInput):
         # evaluateExpression returns value in internal units
         valueInInternalUnits = unitsMgr.evaluateExpression(commandInput.expression, self._unitType)
+        if valueInInternalUnits == self._valueInInternalUnits:
+            return
+        self._isDirty = True
+        self._valueInInternalUnits = valueInInternalUnits
         self._valueInSelfUnits = unitsMgr.convert(valueInInternalUnits, unitsMgr.internalUnits, self._unitType)
 
     def addToCommandInputs(self, commandInputs: CommandInputs):
@@ -54,6 +86,29 @@ class _UserDimensionParameter(_UserParameter):
                                     ValueInput.createByReal(self.getValue()))
 
 
+class _UserNumberParameter(_UserParameter):
+    # unitless value, the unit is part of the name, e.g. performance targets in SI
+    def __init__(self, id: str, name: str, initValue: float):
+        super().__init__(id, name)
+        self._value = initValue
+        self._commandInput = ValueCommandInput.cast(None)
+
+    def getValue(self) -> float:
+        return self._value
+
+    def setValue(self, value: float):
+        self._setDirtyIfChanged(self._value, value)
+        self._value = value
+        self._commandInput.value = value
+
+    def setValueFromCommandInput(self, commandInput: ValueCommandInput):
+        self._setDirtyIfChanged(self._value, commandInput.value)
+        self._value = commandInput.value
+
+    def addToCommandInputs(self, commandInputs: CommandInputs):
+        self._commandInput = commandInputs.addValueInput(self._id, self._name, '', ValueInput.createByReal(self._value))
+
+
 class _UserBoolParameter(_UserParameter):
     def __init__(self, id: str, name: str, initValue: bool):
         super().__init__(id, name)
@@ -63,6 +118,7 @@ class _UserBoolParameter(_UserParameter):
         return self._value
 
     def setValueFromCommandInput(self, commandInput: BoolValueCommandInput):
+        self._setDirtyIfChanged(self._value, commandInput.value)
         self._value = commandInput.value
 
     def addToCommandInputs(self, commandInputs: CommandInputs):
@@ -70,44 +126,57 @@ class _UserBoolParameter(_UserParameter):
 
 
 class _UserIntegerSliderParameter(_UserParameter):
-    def __init__(self, id: str, name: str, min: int, max: int):
+    def __init__(self, id: str, name: str, min: int, max: int, initValue: int = None):
         super().__init__(id, name)
         self._min = min
         self._max = max
-        self._value = min
+        self._value = min if initValue is None else initValue
+        self._commandInput = IntegerSliderCommandInput.cast(None)
 
     def getValue(self) -> int:
         return self._value
 
+    def setValue(self, value: int):
+        self._setDirtyIfChanged(self._value, value)
+        self._value = value
+        self._commandInput.valueOne = value
+
     def setValueFromCommandInput(self, commandInput: IntegerSliderCommandInput):
+        self._setDirtyIfChanged(self._value, commandInput.valueOne)
         self._value = commandInput.valueOne
 
     def addToCommandInputs(self, commandInputs: CommandInputs):
-        commandInputs.addIntegerSliderCommandInput(self._id, self._name, self._min, self._max, False)
+        slider = commandInputs.addIntegerSliderCommandInput(self._id, self._name, self._min, self._max, False)
+        slider.valueOne = self._value
+        self._commandInput = slider
 
 
 class UserDropDownParameter(_UserParameter):
-    def __init__(self, id: str, name: str, dropDownOptions: [str], defaultOption: str):
+    def __init__(self, id: str, name: str, getDropDownOptions: Callable[[], list], defaultOption: str):
         super().__init__(id, name)
         self._dropDownInput: DropDownCommandInput = DropDownCommandInput.cast(None)
-        self._dropDownOptions = dropDownOptions
+        # options are only read once the dialog is built, so nothing is loaded when the add-in starts
+        self._getDropDownOptions = getDropDownOptions
         self._defaultOption = defaultOption
+        self._selectedOption = defaultOption
 
     def getValue(self) -> str:
-        return self._dropDownInput.selectedItem.name
+        return self._selectedOption
 
-    def setValueFromCommandInput(self, commandInput: IntegerSliderCommandInput):
-        pass
+    def setValueFromCommandInput(self, commandInput: DropDownCommandInput):
+        selectedOption = commandInput.selectedItem.name
+        self._setDirtyIfChanged(self._selectedOption, selectedOption)
+        self._selectedOption = selectedOption
 
     def addToCommandInputs(self, commandInputs: CommandInputs):
         self._dropDownInput = commandInputs.addDropDownCommandInput(self._id, self._name,
                                                                     DropDownStyles.TextListDropDownStyle)
-        for option in self._dropDownOptions:
-            self._dropDownInput.listItems.add(option, option == self._defaultOption)
+        for option in self._getDropDownOptions():
+            self._dropDownInput.listItems.add(option, option == self._selectedOption)
 
 
 class UserParameters(Enum):
-    NOZZLE_DEFINITION_DROPDOWN = UserDropDownParameter('nozzleDefinitionDropdownId', 'Nozzle Definition', NozzleDefinition.getNames(), NozzleDefinition.DEFAULT.value.name)
+    NOZZLE_DEFINITION_DROPDOWN = UserDropDownParameter('nozzleDefinitionDropdownId', 'Nozzle Definition', nozzleCatalog.getNames, NozzleDefinition.DEFAULT.value.name)
     CHAMBER_LENGTH = _UserDimensionParameter('chamberLengthId', 'chamberLength', 'mm', NozzleDefinition.DEFAULT.value.chamberLength)
     CHAMBER_CYLINDER_LENGTH = _UserDimensionParameter('chamberCylinderId', 'chamberCylinderLength', 'mm', NozzleDefinition.DEFAULT.value.chamberCylinderLength)
     EXIT_LENGTH = _UserDimensionParameter('exitLengthId', 'exitLength', 'mm', NozzleDefinition.DEFAULT.value.exitLength)
@@ -117,12 +186,45 @@ class UserParameters(Enum):
     CONVERGENCE_ANGLE = _UserDimensionParameter('convergenceAngleId', 'convergenceAngle', 'deg', NozzleDefinition.DEFAULT.value.convergenceAngle)
     CONVERGENCE_RADIUS = _UserDimensionParameter('convergenceRadiusId', 'convergenceRadius', 'mm', NozzleDefinition.DEFAULT.value.convergenceRadius)
     DIVERGENCE_RADIUS = _UserDimensionParameter('divergenceRadiusId', 'divergenceRadius', 'mm', NozzleDefinition.DEFAULT.value.divergenceRadius)
+    # waves of a method of characteristics wall, its gamma is the GAMMA of the sizing targets
+    CHARACTERISTIC_COUNT = _UserIntegerSliderParameter('characteristicCountId', 'Characteristics', MINIMUM_CHARACTERISTIC_COUNT, 200, NozzleDefinition.DEFAULT.value.characteristicCount)
+    INNER_WALL_THICKNESS = _UserDimensionParameter('innerWallThicknessId', 'innerWallThickness', 'mm', DEFAULT_WALL_LAYERS.innerWallThickness)
+    CHANNEL_THICKNESS = _UserDimensionParameter('channelThicknessId', 'channelThickness', 'mm', DEFAULT_WALL_LAYERS.channelThickness)
+    OUTER_WALL_THICKNESS = _UserDimensionParameter('outerWallThicknessId', 'outerWallThickness', 'mm', DEFAULT_WALL_LAYERS.outerWallThickness)
+    # solid engine with coolant channels, see sketch.EngineSolid
+    GENERATE_SOLID = _UserBoolParameter('generateSolidId', 'Generate solid', False)
+    CHANNEL_COUNT = _UserIntegerSliderParameter('channelCountId', 'Cooling channels', 0, 200)
+    CHANNEL_WIDTH = _UserDimensionParameter('channelWidthId', 'channelWidth', 'mm', 1.0)
+    # engines of a cluster, one engine is generated when the count is 1
+    CLUSTER_COUNT = _UserIntegerSliderParameter('clusterCountId', 'Cluster engines', 1, 16)
+    CLUSTER_RADIUS = _UserDimensionParameter('clusterRadiusId', 'clusterRadius', 'mm', 30.0)
+    CLUSTER_PATTERN = UserDropDownParameter('clusterPatternId', 'Cluster pattern', lambda: [pattern.value for pattern in ClusterPattern], ClusterPattern.RING.value)
+    # sizing from performance targets, see analysis.EngineSizing
+    SIZE_FROM_TARGETS = _UserBoolParameter('sizeFromTargetsId', 'Size from targets', False)
+    THRUST = _UserNumberParameter('thrustId', 'thrust (N)', 1000.0)
+    CHAMBER_PRESSURE = _UserNumberParameter('chamberPressureId', 'chamberPressure (Pa)', 2.0e6)
+    AMBIENT_PRESSURE = _UserNumberParameter('ambientPressureId', 'ambientPressure (Pa)', 101325.0)
+    # 0 expands to the ambient pressure, vacuum engines need one
+    EXIT_PRESSURE = _UserNumberParameter('exitPressureId', 'exitPressure (Pa)', 0.0)
+    GAMMA = _UserNumberParameter('gammaId', 'gamma', 1.2)
+    CHARACTERISTIC_VELOCITY = _UserNumberParameter('characteristicVelocityId', 'c* (m/s)', 1500.0)
+    CHARACTERISTIC_LENGTH = _UserNumberParameter('characteristicLengthId', 'L* (m)', 1.0)
+    # wall layers from the cooling model with the gamma, chamber pressure and c* above, see analysis.CoolingThermal
+    SIZE_WALLS = _UserBoolParameter('sizeWallsId', 'Size walls', False)
+    CHAMBER_TEMPERATURE = _UserNumberParameter('chamberTemperatureId', 'chamberTemperature (K)', DEFAULT_GAS.chamberTemperature)
+    COOLANT_FLOW = _UserNumberParameter('coolantFlowId', 'coolant flow (kg/s)', DEFAULT_COOLANT.massFlowRate)
+    COOLANT_HEAT_TRANSFER = _UserNumberParameter('coolantHeatTransferId', 'coolant h (W/m2K)', DEFAULT_COOLANT.heatTransferCoefficient)
+    WALL_TEMPERATURE_LIMIT = _UserNumberParameter('wallTemperatureLimitId', 'wall limit (K)', DEFAULT_MATERIAL.maximumTemperature)
+    # diagnostics, see common.Instrumentation
+    RECORD_TIMINGS = _UserBoolParameter('recordTimingsId', 'Record timings', False)
+    CAPTURE_PROFILE = _UserBoolParameter('captureProfileId', 'Capture profile', False)
 
     @staticmethod
     def applySelectedNozzleDefinition():
         name = UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getValue()
-        nozzleDefinition = NozzleDefinition.fromName(name)
+        nozzleDefinition = nozzleCatalog.get(name)
         UserParameters.CHAMBER_LENGTH.value.setValue(nozzleDefinition.chamberLength)
+        UserParameters.CHAMBER_CYLINDER_LENGTH.value.setValue(nozzleDefinition.chamberCylinderLength)
         UserParameters.EXIT_LENGTH.value.setValue(nozzleDefinition.exitLength)
         UserParameters.CHAMBER_RADIUS.value.setValue(nozzleDefinition.chamberRadius)
         UserParameters.THROAT_RADIUS.value.setValue(nozzleDefinition.throatRadius)
@@ -130,11 +232,78 @@ class UserParameters(Enum):
         UserParameters.CONVERGENCE_ANGLE.value.setValue(nozzleDefinition.convergenceAngle)
         UserParameters.CONVERGENCE_RADIUS.value.setValue(nozzleDefinition.convergenceRadius)
         UserParameters.DIVERGENCE_RADIUS.value.setValue(nozzleDefinition.divergenceRadius)
+        # the definition's own net, so getNozzleParameters does not pair its divergence style with other settings
+        UserParameters.GAMMA.value.setValue(nozzleDefinition.gamma)
+        UserParameters.CHARACTERISTIC_COUNT.value.setValue(nozzleDefinition.characteristicCount)
+
+    @staticmethod
+    def isSizingInput(id: str) -> bool:
+        return _parametersById.get(id) in _sizingParameters
+
+    @staticmethod
+    def applySizing():
+        # fills the nozzle geometry from the performance targets, keeping the selected angle and divergence style
+        global _isSizingValid
+        name = UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getValue()
+        targets = SizingTargets(*(parameter.getValue() for parameter in _sizingParameters[1:7]),
+                                exitPressure=UserParameters.EXIT_PRESSURE.value.getValue() or None)
+        # the nozzle has to expand, a design that does not is left as it is and getViolations reports the targets
+        exitPressure = targets.ambientPressure if targets.exitPressure is None else targets.exitPressure
+        _isSizingValid = 0 < exitPressure < targets.chamberPressure
+        if not _isSizingValid:
+            return
+        nozzleParameters = sizingCache.getSizing(
+            targets, name, nozzleCatalog.get(name).divergenceStyle,
+            math.degrees(UserParameters.CONVERGENCE_ANGLE.value.getValue())).nozzleParameters
+        UserParameters.CHAMBER_LENGTH.value.setValue(float(nozzleParameters.chamberLength))
+        UserParameters.CHAMBER_CYLINDER_LENGTH.value.setValue(float(nozzleParameters.chamberCylinderLength))
+        UserParameters.EXIT_LENGTH.value.setValue(float(nozzleParameters.exitLength))
+        UserParameters.CHAMBER_RADIUS.value.setValue(float(nozzleParameters.chamberRadius))
+        UserParameters.THROAT_RADIUS.value.setValue(float(nozzleParameters.throatRadius))
+        UserParameters.EXIT_RADIUS.value.setValue(float(nozzleParameters.exitRadius))
+        UserParameters.CONVERGENCE_RADIUS.value.setValue(float(nozzleParameters.convergenceRadius))
+        UserParameters.DIVERGENCE_RADIUS.value.setValue(float(nozzleParameters.divergenceRadius))
+
+    @staticmethod
+    def isWallSizingInput(id: str) -> bool:
+        return _parametersById.get(id) in _wallSizingParameters
+
+    @staticmethod
+    def applyWallSizing():
+        # fills the wall layers from the cooling model, the layers stay at the minimum thickness where the wall cannot
+        # be kept below its limit, which getViolations reports
+        global _isWallSizingFeasible
+        gas = DEFAULT_GAS._replace(gamma=UserParameters.GAMMA.value.getValue(),
+                                   chamberPressure=UserParameters.CHAMBER_PRESSURE.value.getValue(),
+                                   chamberTemperature=UserParameters.CHAMBER_TEMPERATURE.value.getValue(),
+                                   characteristicVelocity=UserParameters.CHARACTERISTIC_VELOCITY.value.getValue())
+        coolant = DEFAULT_COOLANT._replace(
+            massFlowRate=UserParameters.COOLANT_FLOW.value.getValue(),
+            heatTransferCoefficient=UserParameters.COOLANT_HEAT_TRANSFER.value.getValue())
+        material = DEFAULT_MATERIAL._replace(maximumTemperature=UserParameters.WALL_TEMPERATURE_LIMIT.value.getValue())
+        # the geometry is in internal units, the model in SI
+        wallSizing = sizeWallLayers(
+            UserParameters.getNozzleParameters(), gas, coolant, material, DEFAULT_COOLANT_VELOCITY,
+            DEFAULT_COOLANT_PRESSURE, minimumThickness=unitsMgr.convert(MINIMUM_WALL_THICKNESS, 'mm',
+                                                                        unitsMgr.internalUnits),
+            lengthScale=unitsMgr.convert(1.0, unitsMgr.internalUnits, 'm'), degrees=False)
+        _isWallSizingFeasible = wallSizing.isFeasible
+        for parameter, thickness in zip(_wallLayerParameters, wallSizing.wallLayers):
+            parameter.setValue(unitsMgr.convert(thickness, unitsMgr.internalUnits, 'mm'))
+
+    @staticmethod
+    def applyCharacteristicLength():
+        # a method of characteristics wall is as long as its net, the dialog shows that length instead of the input
+        nozzleParameters = UserParameters.getNozzleParameters()
+        if nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+            UserParameters.EXIT_LENGTH.value.setValue(
+                unitsMgr.convert(nozzleParameters.exitLength, unitsMgr.internalUnits, 'mm'))
 
     @staticmethod
     def getNozzleParameters() -> NozzleParameters:
-        return NozzleParameters(
-            UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getValue(),
+        name = UserParameters.NOZZLE_DEFINITION_DROPDOWN.value.getValue()
+        return resolveExitLength(NozzleParameters(
+            name,
             UserParameters.CHAMBER_LENGTH.value.getValue(),
             UserParameters.CHAMBER_CYLINDER_LENGTH.value.getValue(),
             UserParameters.EXIT_LENGTH.value.getValue(),
@@ -143,19 +312,136 @@ class UserParameters(Enum):
             UserParameters.EXIT_RADIUS.value.getValue(),
             UserParameters.CONVERGENCE_ANGLE.value.getValue(),
             UserParameters.CONVERGENCE_RADIUS.value.getValue(),
-            UserParameters.DIVERGENCE_RADIUS.value.getValue())
+            UserParameters.DIVERGENCE_RADIUS.value.getValue(),
+            nozzleCatalog.get(name).divergenceStyle,
+            UserParameters.GAMMA.value.getValue(),
+            UserParameters.CHARACTERISTIC_COUNT.value.getValue()))
+
+    @staticmethod
+    def getWallLayers() -> WallLayers:
+        return WallLayers(
+            UserParameters.INNER_WALL_THICKNESS.value.getValue(),
+            UserParameters.CHANNEL_THICKNESS.value.getValue(),
+            UserParameters.OUTER_WALL_THICKNESS.value.getValue())
+
+    @staticmethod
+    def getCoolingChannels() -> CoolingChannels:
+        return CoolingChannels(UserParameters.CHANNEL_COUNT.value.getValue(),
+                               UserParameters.CHANNEL_WIDTH.value.getValue())
+
+    @staticmethod
+    def getClusterLayout() -> ClusterLayout:
+        return ClusterLayout(UserParameters.CLUSTER_COUNT.value.getValue(),
+                             UserParameters.CLUSTER_RADIUS.value.getValue(),
+                             ClusterPattern(UserParameters.CLUSTER_PATTERN.value.getValue()))
+
+    @staticmethod
+    def getViolations() -> [Violation]:
+        # checked before anything is drawn, limits in the messages are shown in millimetres
+        nozzleParameters = UserParameters.getNozzleParameters()
+        formatLength = lambda value: unitsMgr.formatInternalValue(value, 'mm')
+        wallLayers = UserParameters.getWallLayers()
+        outerRadius = max(nozzleParameters.chamberRadius, nozzleParameters.exitRadius) + wallLayers.getOffsets()[-1]
+        violations = validateParameters(nozzleParameters, degrees=False, formatLength=formatLength) + \
+            validateClusterLayout(UserParameters.getClusterLayout(), outerRadius, formatLength)
+        if UserParameters.SIZE_FROM_TARGETS.value.getValue() and not _isSizingValid:
+            violations.append(Violation('sizingExitPressure', 'exitPressure',
+                                        'exitPressure, or ambientPressure when it is 0, must be greater than zero and '
+                                        'smaller than chamberPressure'))
+        if UserParameters.SIZE_WALLS.value.getValue() and not _isWallSizingFeasible:
+            violations.append(Violation('wallTemperatureLimit', 'innerWallThickness',
+                                        'the inner wall runs above the wall limit even at {}, it needs more coolant '
+                                        'flow or heat transfer'.format(formatLength(
+                                            wallLayers.innerWallThickness))))
+        if UserParameters.GENERATE_SOLID.value.getValue():
+            violations += validateChannels(nozzleParameters, wallLayers, UserParameters.getCoolingChannels(),
+                                           formatLength)
+        return violations
 
     @staticmethod
     def getAllParameters() -> [_UserParameter]:
-        return list(map(lambda param: param.value, UserParameters))
+        return list(_parametersById.values())
 
     @staticmethod
     def fromId(id: str) -> _UserParameter:
-        return next(param for param in UserParameters.getAllParameters() if param.getId() == id)
+        return _parametersById[id]
 
     @staticmethod
     def updateValuesFromCommandInputs(commandInputs: CommandInputs):
         for i in range(commandInputs.count):
             commandInput = commandInputs.item(i)
-            userParameter = UserParameters.fromId(commandInput.id)
-            userParameter.setValueFromCommandInput(commandInput)
+            # inputs that only display something, such as the validation messages, have no parameter
+            userParameter = _parametersById.get(commandInput.id)
+            if userParameter is not None:
+                userParameter.setValueFromCommandInput(commandInput)
+
+    @staticmethod
+    def getDirtyParameters() -> [_UserParameter]:
+        return [param for param in _parametersById.values() if param.isDirty()]
+
+    @staticmethod
+    def getChangesSinceLastGeneration(target: str) -> {str: (object, object)}:
+        # parameter id -> (value generated into `target`, current value), every parameter if nothing was generated
+        # there yet; the dirty flags only cover the target generated last
+        generatedValues = _generatedValues.get(target)
+        if generatedValues is not None and target == _lastGeneratedTarget and not UserParameters.getDirtyParameters():
+            return {}
+        currentValues = {id: param.getValue() for id, param in _parametersById.items()}
+        if generatedValues is None:
+            return {id: (None, value) for id, value in currentValues.items()}
+        return {id: (generatedValues[id], value) for id, value in currentValues.items() if generatedValues[id] != value}
+
+    @staticmethod
+    def isEngineChanged(changes: {str: (object, object)}) -> bool:
+        # the sketch depends on the nozzle geometry and wall layers only
+        return any(id in _engineParameterIds for id in changes)
+
+    @staticmethod
+    def isSolidChanged(changes: {str: (object, object)}) -> bool:
+        return any(id in _solidParameterIds for id in changes)
+
+    @staticmethod
+    def isEngineInput(id: str) -> bool:
+        return id in _engineParameterIds
+
+    @staticmethod
+    def markGenerated(target: str):
+        global _lastGeneratedTarget
+        _generatedValues[target] = {id: param.getValue() for id, param in _parametersById.items()}
+        _lastGeneratedTarget = target
+        for param in _parametersById.values():
+            param.clearDirty()
+
+
+_parametersById = {param.value.getId(): param.value for param in UserParameters}
+# the toggle followed by the first six targets in SizingTargets order and the exit pressure
+_sizingParameters = [UserParameters.SIZE_FROM_TARGETS.value, UserParameters.THRUST.value,
+                     UserParameters.CHAMBER_PRESSURE.value, UserParameters.AMBIENT_PRESSURE.value,
+                     UserParameters.GAMMA.value, UserParameters.CHARACTERISTIC_VELOCITY.value,
+                     UserParameters.CHARACTERISTIC_LENGTH.value, UserParameters.EXIT_PRESSURE.value]
+# the toggle followed by the inputs of the cooling model, which also uses the gamma, chamber pressure and c* targets
+_wallSizingParameters = [UserParameters.SIZE_WALLS.value, UserParameters.CHAMBER_TEMPERATURE.value,
+                         UserParameters.COOLANT_FLOW.value, UserParameters.COOLANT_HEAT_TRANSFER.value,
+                         UserParameters.WALL_TEMPERATURE_LIMIT.value, UserParameters.GAMMA.value,
+                         UserParameters.CHAMBER_PRESSURE.value, UserParameters.CHARACTERISTIC_VELOCITY.value]
+_wallLayerParameters = [UserParameters.INNER_WALL_THICKNESS.value, UserParameters.CHANNEL_THICKNESS.value,
+                        UserParameters.OUTER_WALL_THICKNESS.value]
+# whether the targets of the last applySizing could be sized
+_isSizingValid = True
+# whether the last applyWallSizing kept the inner wall below its limit
+_isWallSizingFeasible = True
+# inputs the engine sketch is drawn from, see getNozzleParameters and getWallLayers; GAMMA is a sizing target too
+_engineParameterIds = {param.getId() for param in [
+    UserParameters.NOZZLE_DEFINITION_DROPDOWN.value, UserParameters.CHAMBER_LENGTH.value,
+    UserParameters.CHAMBER_CYLINDER_LENGTH.value, UserParameters.EXIT_LENGTH.value,
+    UserParameters.CHAMBER_RADIUS.value, UserParameters.THROAT_RADIUS.value, UserParameters.EXIT_RADIUS.value,
+    UserParameters.CONVERGENCE_ANGLE.value, UserParameters.CONVERGENCE_RADIUS.value,
+    UserParameters.DIVERGENCE_RADIUS.value, UserParameters.CHARACTERISTIC_COUNT.value, UserParameters.GAMMA.value,
+    UserParameters.INNER_WALL_THICKNESS.value, UserParameters.CHANNEL_THICKNESS.value,
+    UserParameters.OUTER_WALL_THICKNESS.value]}
+# inputs the solid is built from on top of the engine, see getCoolingChannels
+_solidParameterIds = {param.getId() for param in [
+    UserParameters.GENERATE_SOLID.value, UserParameters.CHANNEL_COUNT.value, UserParameters.CHANNEL_WIDTH.value]}
+# target (a sketch entity token) -> parameter id -> value, see markGenerated
+_generatedValues = {}
+_lastGeneratedTarget: str = None
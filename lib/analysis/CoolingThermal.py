@@ -0,0 +1,184 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from .IsentropicFlow import solveFlow
+from ..NozzleDefinitions import NozzleParameters, WallLayers
+from ..catalog.ResultStore import ResultStore
+from ..geometry.ContourCache import contourCache
+from ..geometry.NozzleContour import NozzleContour, solveContour, sampleContour
+
+# Regenerative cooling of the layered wall EngineSketch draws: hot gas, inner wall, coolant channel, outer wall.
+# Gas-side heat transfer follows Bartz's correlation, the inner wall conducts, and the coolant picks up heat while it
+# runs from the exit towards the injector. All properties are SI, `lengthScale` converts contour lengths to metres.
+
+
+class GasProperties(NamedTuple):
+    gamma: float
+    viscosity: float
+    specificHeat: float
+    prandtl: float
+    chamberPressure: float
+    chamberTemperature: float
+    characteristicVelocity: float
+
+
+class CoolantProperties(NamedTuple):
+    massFlowRate: float
+    specificHeat: float
+    density: float
+    inletTemperature: float
+    heatTransferCoefficient: float
+
+
+class WallMaterial(NamedTuple):
+    conductivity: float
+    maximumTemperature: float
+    allowableStress: float
+
+
+# properties the dialog does not ask for: a hydrocarbon and oxygen gas, water coolant and a copper wall
+DEFAULT_GAS = GasProperties(gamma=1.2, viscosity=1e-4, specificHeat=2000.0, prandtl=0.8, chamberPressure=2.0e6,
+                            chamberTemperature=3000.0, characteristicVelocity=1500.0)
+DEFAULT_COOLANT = CoolantProperties(massFlowRate=0.05, specificHeat=4186.0, density=1000.0, inletTemperature=293.0,
+                                    heatTransferCoefficient=1.0e5)
+DEFAULT_MATERIAL = WallMaterial(conductivity=350.0, maximumTemperature=800.0, allowableStress=70e6)
+DEFAULT_COOLANT_VELOCITY = 10.0
+DEFAULT_COOLANT_PRESSURE = 3.0e6
+# thinnest layer sizeWallLayers returns, in mm
+MINIMUM_WALL_THICKNESS = 0.3
+
+
+class WallSizing(NamedTuple):
+    wallLayers: WallLayers
+    # False where even an inner wall of minimumThickness runs above the material limit, its layers are still drawn
+    # with that thickness
+    isFeasible: np.ndarray
+
+
+# arrays aligned with the contour stations, shape (..., stations)
+class ThermalDistribution(NamedTuple):
+    axialPosition: np.ndarray
+    radius: np.ndarray
+    gasHeatTransferCoefficient: np.ndarray
+    heatFlux: np.ndarray
+    adiabaticWallTemperature: np.ndarray
+    gasSideWallTemperature: np.ndarray
+    coolantSideWallTemperature: np.ndarray
+    coolantTemperature: np.ndarray
+
+
+def solveThermal(points: np.ndarray, throatPoint: np.ndarray, throatCurvatureRadius, innerWallThickness,
+                 gas: GasProperties, coolant: CoolantProperties, material: WallMaterial,
+                 lengthScale: float = 1e-3, iterations: int = 20) -> ThermalDistribution:
+    flow = solveFlow(points, throatPoint, gas.gamma)
+    gamma = gas.gamma
+    radius = flow.radius * lengthScale
+    throatDiameter = 2 * throatPoint[..., 0, None] * lengthScale
+    throatCurvatureRadius = np.asarray(throatCurvatureRadius, dtype=float)[..., None] * lengthScale
+    wallResistance = np.asarray(innerWallThickness, dtype=float)[..., None] * lengthScale / material.conductivity
+    stagnationFactor = 1 + (gamma - 1) / 2 * flow.mach ** 2
+
+    recoveryFactor = gas.prandtl ** (1 / 3)
+    adiabaticWallTemperature = gas.chamberTemperature * (1 + recoveryFactor * (gamma - 1) / 2 * flow.mach ** 2) / \
+        stagnationFactor
+    bartzCoefficient = 0.026 / throatDiameter ** 0.2 * \
+        gas.viscosity ** 0.2 * gas.specificHeat / gas.prandtl ** 0.6 * \
+        (gas.chamberPressure / gas.characteristicVelocity) ** 0.8 * \
+        (throatDiameter / throatCurvatureRadius) ** 0.1 * \
+        (1 / flow.areaRatio) ** 0.9
+
+    # heated wall area of every station: half of the segment on either side of it
+    segmentLengths = np.hypot(np.diff(points[..., 0], axis=-1), np.diff(points[..., 1], axis=-1)) * lengthScale
+    stationLengths = np.zeros_like(radius)
+    stationLengths[..., :-1] += segmentLengths / 2
+    stationLengths[..., 1:] += segmentLengths / 2
+    wettedArea = 2 * math.pi * radius * stationLengths
+    coolantCapacity = coolant.massFlowRate * coolant.specificHeat
+
+    coolantTemperature = np.full_like(radius, coolant.inletTemperature)
+    gasSideWallTemperature = np.full_like(radius, coolant.inletTemperature)
+    for _ in range(iterations):
+        # Bartz property correction, evaluated at the current wall temperature estimate
+        correction = 1 / ((0.5 * gasSideWallTemperature / gas.chamberTemperature * stagnationFactor + 0.5) ** 0.68 *
+                          stagnationFactor ** 0.12)
+        gasHeatTransferCoefficient = bartzCoefficient * correction
+        heatFlux = (adiabaticWallTemperature - coolantTemperature) / \
+            (1 / gasHeatTransferCoefficient + wallResistance + 1 / coolant.heatTransferCoefficient)
+        gasSideWallTemperature = adiabaticWallTemperature - heatFlux / gasHeatTransferCoefficient
+        # the coolant enters at the exit (last station), so march the absorbed heat from the end of the arrays
+        absorbedHeat = np.flip(np.cumsum(np.flip(heatFlux * wettedArea, axis=-1), axis=-1), axis=-1)
+        coolantTemperature = coolant.inletTemperature + (absorbedHeat - heatFlux * wettedArea / 2) / coolantCapacity
+
+    return ThermalDistribution(
+        axialPosition=flow.axialPosition,
+        radius=flow.radius,
+        gasHeatTransferCoefficient=gasHeatTransferCoefficient,
+        heatFlux=heatFlux,
+        adiabaticWallTemperature=adiabaticWallTemperature,
+        gasSideWallTemperature=gasSideWallTemperature,
+        coolantSideWallTemperature=coolantTemperature + heatFlux / coolant.heatTransferCoefficient,
+        coolantTemperature=coolantTemperature)
+
+
+def solveContourThermal(nozzleParameters: NozzleParameters, wallLayers: WallLayers, gas: GasProperties,
+                        coolant: CoolantProperties, material: WallMaterial, pointsPerSegment: int = 64,
+                        lengthScale: float = 1e-3, degrees: bool = True,
+                        store: ResultStore = None) -> ThermalDistribution:
+    # with a store the distribution is kept on disk, see IsentropicFlow.solveContourFlow
+    if store is not None:
+        return store.getOrCompute(
+            'thermal', nozzleParameters, lambda: solveContourThermal(nozzleParameters, wallLayers, gas, coolant,
+                                                                     material, pointsPerSegment, lengthScale, degrees),
+            ThermalDistribution, wallLayers=wallLayers, gas=gas, coolant=coolant, material=material,
+            pointsPerSegment=pointsPerSegment, lengthScale=lengthScale, degrees=degrees)
+    contour, points = _getContourPoints(nozzleParameters, pointsPerSegment, degrees)
+    return solveThermal(points, contour.minimumRadiusPoint, contour.divergenceRadius, wallLayers.innerWallThickness,
+                        gas, coolant, material, lengthScale)
+
+
+def sizeWallLayers(nozzleParameters: NozzleParameters, gas: GasProperties, coolant: CoolantProperties,
+                   material: WallMaterial, coolantVelocity: float, coolantPressure: float,
+                   minimumThickness: float = MINIMUM_WALL_THICKNESS, pointsPerSegment: int = 64,
+                   lengthScale: float = 1e-3, iterations: int = 5, degrees: bool = True) -> WallSizing:
+    # WallLayers in contour units and whether they keep the wall below its limit. The inner wall is as thick as it can
+    # be while the hottest station stays below the material limit, the channel carries the coolant at
+    # `coolantVelocity` through the throat annulus, and the outer wall holds `coolantPressure` as a thin-walled
+    # cylinder around the chamber.
+    contour, points = _getContourPoints(nozzleParameters, pointsPerSegment, degrees)
+    innerWallThickness = np.full(np.shape(contour.minimumRadius), float(minimumThickness))
+    for _ in range(iterations):
+        thermal = solveThermal(points, contour.minimumRadiusPoint, contour.divergenceRadius, innerWallThickness,
+                               gas, coolant, material, lengthScale)
+        # largest wall resistance that still keeps the gas-side wall at the material limit at every station
+        limitHeatFlux = thermal.gasHeatTransferCoefficient * \
+            np.maximum(thermal.adiabaticWallTemperature - material.maximumTemperature, 1e-9)
+        resistance = (thermal.adiabaticWallTemperature - thermal.coolantTemperature) / limitHeatFlux - \
+            1 / thermal.gasHeatTransferCoefficient - 1 / coolant.heatTransferCoefficient
+        thickness = np.min(resistance, axis=-1) * material.conductivity / lengthScale
+        innerWallThickness = np.maximum(thickness, minimumThickness)
+    isFeasible = thickness >= minimumThickness
+
+    channelArea = coolant.massFlowRate / (coolant.density * coolantVelocity) / lengthScale ** 2
+    channelInnerRadius = contour.minimumRadius + innerWallThickness
+    channelThickness = np.sqrt(channelInnerRadius ** 2 + channelArea / math.pi) - channelInnerRadius
+    outerWallRadius = contour.chamberStart[..., 0] + innerWallThickness + channelThickness
+    outerWallThickness = np.maximum(coolantPressure * outerWallRadius / material.allowableStress, minimumThickness)
+    wallLayers = WallLayers(_toScalar(innerWallThickness), _toScalar(channelThickness), _toScalar(outerWallThickness))
+    return WallSizing(wallLayers, _toScalar(isFeasible))
+
+
+def _getContourPoints(nozzleParameters: NozzleParameters, pointsPerSegment: int,
+                      degrees: bool) -> (NozzleContour, np.ndarray):
+    if np.ndim(nozzleParameters.throatRadius):
+        contour = solveContour(nozzleParameters, degrees=degrees)
+        return contour, sampleContour(contour, pointsPerSegment)
+    contour = contourCache.getContour(nozzleParameters, degrees=degrees)
+    return contour, contourCache.getPoints(nozzleParameters, pointsPerSegment=pointsPerSegment, degrees=degrees)
+
+
+def _toScalar(values: np.ndarray):
+    if np.ndim(values) != 0:
+        return values
+    return bool(values) if np.asarray(values).dtype == bool else float(values)
@@ -0,0 +1,301 @@
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle, DIMENSION_FIELDS
+from ..catalog.ResultStore import ResultStore, getResultKey
+from ..geometry.NozzleContour import NozzleContour, solveContour, sampleContour, computeMetrics
+from ..geometry.ParameterValidator import isFeasible
+
+# Design-space sweeps without Fusion. A sampling (grid, random or Latin hypercube) hands out the swept parameters
+# chunk by chunk, each chunk is solved as one batch in a worker process and the metrics are written into a folder of
+# .npy columns (one memory-mapped file per field, see loadSweep), so neither the samples nor the results of a
+# million-point sweep have to fit in memory at once. Values are in the units of NozzleDefinition (mm and degrees)
+# unless `degrees` is False.
+
+SWEEP_FIELDS = DIMENSION_FIELDS
+
+
+class SweepMetric(NamedTuple):
+    name: str
+    dtype: str
+
+
+METRICS = (
+    SweepMetric('throatRadius', '<f8'),
+    SweepMetric('expansionRatio', '<f8'),
+    SweepMetric('contractionRatio', '<f8'),
+    SweepMetric('length', '<f8'),
+    SweepMetric('chamberCylinderLength', '<f8'),
+    # gas volume and wall area from the injector face to the exit plane
+    SweepMetric('volume', '<f8'),
+    SweepMetric('wettedArea', '<f8'),
+    SweepMetric('feasible', '|b1'),
+)
+
+# random samples are drawn in fixed blocks, so a sweep gives the same designs whatever its chunk size or worker count
+_RANDOM_BLOCK_SIZE = 65536
+_MANIFEST_NAME = 'sweep.json'
+
+
+# Samplings ------------------------------------------------------------------------------------------------------------
+
+
+class ParameterGrid:
+    # every combination of the given values, the last field varies fastest, e.g.
+    # ParameterGrid(throatRadius=np.linspace(1, 2, 100), convergenceAngle=[20, 30, 45])
+    def __init__(self, **values: Sequence[float]):
+        _checkFields(values)
+        self._fields = tuple(values)
+        self._values = [np.asarray(fieldValues, dtype=float).ravel() for fieldValues in values.values()]
+        self._shape = tuple(len(fieldValues) for fieldValues in self._values)
+
+    def getFields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def getCount(self) -> int:
+        return int(np.prod(self._shape, dtype=np.int64))
+
+    def getColumns(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        indices = np.unravel_index(np.arange(start, stop), self._shape)
+        return {field: fieldValues[index] for field, fieldValues, index in zip(self._fields, self._values, indices)}
+
+    def getSettings(self) -> dict:
+        # everything that decides the samples, for result keys
+        return {'sampling': 'grid', 'fields': self._fields, 'values': self._values}
+
+
+class RandomSampling:
+    # `count` uniform samples between the (minimum, maximum) bounds of every field
+    def __init__(self, count: int, seed: int = 0, **ranges: Tuple[float, float]):
+        _checkRanges(ranges)
+        self._count = count
+        self._seed = seed
+        self._fields = tuple(ranges)
+        self._ranges = np.asarray(list(ranges.values()), dtype=float)
+
+    def getFields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def getCount(self) -> int:
+        return self._count
+
+    def getColumns(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        unit = getUniformSamples(self._seed, start, stop, len(self._fields))
+        values = self._ranges[:, 0] + unit * (self._ranges[:, 1] - self._ranges[:, 0])
+        return dict(zip(self._fields, values.T))
+
+    def getSettings(self) -> dict:
+        return {'sampling': 'random', 'count': self._count, 'seed': self._seed, 'fields': self._fields,
+                'ranges': self._ranges}
+
+
+class LatinHypercubeSampling:
+    # `count` samples with exactly one sample in each of `count` equal strata of every field
+    def __init__(self, count: int, seed: int = 0, **ranges: Tuple[float, float]):
+        _checkRanges(ranges)
+        self._count = count
+        self._seed = seed
+        self._fields = tuple(ranges)
+        self._ranges = np.asarray(list(ranges.values()), dtype=float)
+        # stratum of every sample per field, the only state that grows with the sweep (4 bytes per sample and field)
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1,)))
+        self._strata = np.stack([rng.permutation(count).astype(np.int32) for _ in self._fields], axis=-1)
+
+    def getFields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def getCount(self) -> int:
+        return self._count
+
+    def getColumns(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        unit = getUniformSamples(self._seed, start, stop, len(self._fields))
+        unit = (self._strata[start:stop] + unit) / self._count
+        values = self._ranges[:, 0] + unit * (self._ranges[:, 1] - self._ranges[:, 0])
+        return dict(zip(self._fields, values.T))
+
+    def getSettings(self) -> dict:
+        return {'sampling': 'latin hypercube', 'count': self._count, 'seed': self._seed, 'fields': self._fields,
+                'ranges': self._ranges}
+
+
+def getUniformSamples(seed: int, start: int, stop: int, dimension: int) -> np.ndarray:
+    # uniform [0, 1) samples start..stop of the sequence for `seed`, shape (stop - start, dimension)
+    blocks = []
+    for block in range(start // _RANDOM_BLOCK_SIZE, (stop - 1) // _RANDOM_BLOCK_SIZE + 1 if stop > start else 0):
+        blockStart = block * _RANDOM_BLOCK_SIZE
+        values = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0, block))).random(
+            (_RANDOM_BLOCK_SIZE, dimension))
+        blocks.append(values[max(start - blockStart, 0):stop - blockStart])
+    return np.concatenate(blocks) if blocks else np.empty((0, dimension))
+
+
+# Evaluation -----------------------------------------------------------------------------------------------------------
+
+
+def evaluateDesigns(base: NozzleParameters, columns: Dict[str, np.ndarray], pointsPerSegment: int = 16,
+                    degrees: bool = True) -> Dict[str, np.ndarray]:
+    # metrics of `base` with the swept fields replaced by the columns, one value per design
+    count = len(next(iter(columns.values())))
+    nozzleParameters = base._replace(**{field: np.broadcast_to(np.asarray(columns.get(field, getattr(base, field)),
+                                                                          dtype=float), (count,))
+                                        for field in SWEEP_FIELDS})
+    with np.errstate(all='ignore'):
+        if base.divergenceStyle != DivergenceStyle.CHARACTERISTICS:
+            contour = solveContour(nozzleParameters, degrees=degrees)
+            return _getMetrics(nozzleParameters, contour, sampleContour(contour, pointsPerSegment), degrees)
+        # method of characteristics walls are solved one design at a time
+        designs = [_evaluateDesign(nozzleParameters._replace(**{field: getattr(nozzleParameters, field)[i]
+                                                              for field in SWEEP_FIELDS}), pointsPerSegment, degrees)
+                   for i in range(count)]
+    return {metric.name: np.array([design[metric.name] for design in designs], dtype=metric.dtype)
+            for metric in METRICS}
+
+
+def _evaluateDesign(nozzleParameters: NozzleParameters, pointsPerSegment: int, degrees: bool) -> Dict[str, object]:
+    try:
+        contour = solveContour(nozzleParameters, degrees=degrees)
+        return _getMetrics(nozzleParameters, contour, sampleContour(contour, pointsPerSegment), degrees)
+    except (ValueError, ArithmeticError):
+        return {metric.name: False if metric.name == 'feasible' else math.nan for metric in METRICS}
+
+
+def _getMetrics(nozzleParameters: NozzleParameters, contour: NozzleContour, points: np.ndarray,
+                degrees: bool) -> Dict[str, np.ndarray]:
+    metrics = computeMetrics(contour)
+    radius, axial = points[..., 0], points[..., 1]
+    startRadius, endRadius = radius[..., :-1], radius[..., 1:]
+    axialSteps = np.abs(np.diff(axial, axis=-1))
+    # the polyline revolved about the axis is a stack of conical frustums
+    volume = math.pi / 3 * np.sum(axialSteps * (startRadius ** 2 + startRadius * endRadius + endRadius ** 2), axis=-1)
+    wettedArea = math.pi * np.sum((startRadius + endRadius) * np.hypot(np.diff(radius, axis=-1), axialSteps), axis=-1)
+    feasible = np.isfinite(volume) & np.isfinite(wettedArea) & isFeasible(nozzleParameters, degrees)
+    return {
+        'throatRadius': metrics.throatRadius,
+        'expansionRatio': metrics.expansionRatio,
+        'contractionRatio': metrics.contractionRatio,
+        'length': metrics.length,
+        'chamberCylinderLength': metrics.chamberCylinderLength,
+        'volume': volume,
+        'wettedArea': wettedArea,
+        'feasible': feasible,
+    }
+
+
+# Sweeps ---------------------------------------------------------------------------------------------------------------
+
+
+def runSweep(sampling, base: NozzleParameters, path: str, workers: int = None, chunkSize: int = 16384,
+             pointsPerSegment: int = 16, degrees: bool = True,
+             onProgress: Callable[[int, int], None] = None) -> Dict[str, np.ndarray]:
+    # evaluates every sample of `sampling` (ParameterGrid, RandomSampling or LatinHypercubeSampling) on `workers`
+    # processes, all cores by default, and writes the swept fields and METRICS as columns into the folder `path`.
+    # workers=1 evaluates in this process, which is also the only mode that works inside Fusion 360.
+    workers = workers or os.cpu_count() or 1
+    count = sampling.getCount()
+    columns = _createColumns(path, sampling, base, count, pointsPerSegment, degrees)
+    chunks = ((start, min(start + chunkSize, count)) for start in range(0, count, chunkSize))
+    done = 0
+
+    def write(start: int, stop: int, inputs: Dict[str, np.ndarray], metrics: Dict[str, np.ndarray]):
+        nonlocal done
+        for name, values in list(inputs.items()) + list(metrics.items()):
+            columns[name][start:stop] = values
+        done += stop - start
+        if onProgress is not None:
+            onProgress(done, count)
+
+    if workers == 1:
+        for start, stop in chunks:
+            inputs = sampling.getColumns(start, stop)
+            write(start, stop, inputs, evaluateDesigns(base, inputs, pointsPerSegment, degrees))
+    else:
+        # a bounded number of chunks in flight keeps the samples and results waiting in memory small
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for start, stop in chunks:
+                inputs = sampling.getColumns(start, stop)
+                pending.append((start, stop, inputs,
+                                executor.submit(evaluateDesigns, base, inputs, pointsPerSegment, degrees)))
+                if len(pending) >= 2 * workers:
+                    start, stop, inputs, future = pending.popleft()
+                    write(start, stop, inputs, future.result())
+            while pending:
+                start, stop, inputs, future = pending.popleft()
+                write(start, stop, inputs, future.result())
+
+    for column in columns.values():
+        column.flush()
+    _writeManifest(path, dict(_readManifest(path), isComplete=True))
+    return loadSweep(path)
+
+
+def runStoredSweep(sampling, base: NozzleParameters, store: ResultStore, workers: int = None, chunkSize: int = 16384,
+                   pointsPerSegment: int = 16, degrees: bool = True,
+                   onProgress: Callable[[int, int], None] = None) -> Dict[str, np.ndarray]:
+    # runSweep into an entry of `store`; a sweep run before with the same sampling, base design and settings is read
+    # back from its memory-mapped columns instead. Chunk size and worker count do not change the results, so they are
+    # not part of the key.
+    key = getResultKey('sweep', base, sampling=sampling.getSettings(), pointsPerSegment=pointsPerSegment,
+                       degrees=degrees)
+    columns = store.get(key)
+    if columns is None:
+        columns = store.write(key, lambda path: runSweep(sampling, base, path, workers, chunkSize, pointsPerSegment,
+                                                         degrees, onProgress), 'sweep')
+    return columns
+
+
+def loadSweep(path: str) -> Dict[str, np.ndarray]:
+    # read-only memory maps of every column of a sweep folder, by field name
+    manifest = _readManifest(path)
+    return {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in manifest['columns']}
+
+
+def loadSweepManifest(path: str) -> dict:
+    return _readManifest(path)
+
+
+def _createColumns(path: str, sampling, base: NozzleParameters, count: int, pointsPerSegment: int,
+                   degrees: bool) -> Dict[str, np.ndarray]:
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    dtypes = [(field, '<f8') for field in sampling.getFields()] + [(metric.name, metric.dtype) for metric in METRICS]
+    _writeManifest(path, {
+        'count': count,
+        'columns': [name for name, _ in dtypes],
+        'base': {field: float(getattr(base, field)) for field in SWEEP_FIELDS},
+        'divergenceStyle': DivergenceStyle(base.divergenceStyle).value,
+        'pointsPerSegment': pointsPerSegment,
+        'degrees': degrees,
+        'isComplete': False,
+    })
+    return {name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+', dtype=dtype, shape=(count,))
+            for name, dtype in dtypes}
+
+
+def _readManifest(path: str) -> dict:
+    with open(os.path.join(path, _MANIFEST_NAME)) as file:
+        return json.load(file)
+
+
+def _writeManifest(path: str, manifest: dict):
+    with open(os.path.join(path, _MANIFEST_NAME), 'w') as file:
+        json.dump(manifest, file, indent=1)
+
+
+def _checkFields(fields):
+    for field in fields:
+        if field not in SWEEP_FIELDS:
+            raise ValueError('Cannot sweep {}, sweepable fields are {}'.format(field, ', '.join(SWEEP_FIELDS)))
+
+
+def _checkRanges(ranges: dict):
+    _checkFields(ranges)
+    for field, (minimum, maximum) in ranges.items():
+        if not minimum <= maximum:
+            raise ValueError('The range of {} is empty: {} to {}'.format(field, minimum, maximum))
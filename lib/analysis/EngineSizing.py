@@ -0,0 +1,216 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle
+from ..geometry.BellContour import getBellLength, getConicalLength
+from ..geometry.CharacteristicNozzle import getMinimumLength
+from ..geometry.ContourCache import LruCache
+from ..geometry.GasDynamics import areaRatio, machFromAreaRatio
+from ..geometry.NozzleContour import solveContour, sampleContour
+from ..geometry.ParameterValidator import BELL_AREA_RATIOS
+
+# Sizes a nozzle from performance targets: the throat from thrust and chamber pressure, the exit from the expansion to
+# the exit pressure, the chamber from the contraction ratio and the chamber volume from L*. Bells can only be drawn for
+# the area ratios of Rao's charts, so their expansion is kept inside them and the exit pressure follows; the pressure
+# a design reaches is in EngineSizing.exitPressure. Every target may be an array and all designs are sized in one
+# batch. Targets are SI, `lengthScale` converts the geometry units to metres (the default gives the mm of
+# NozzleDefinition) and angles are in degrees.
+
+STANDARD_GRAVITY = 9.80665
+# points per contour segment used to integrate the volume of the converging section
+VOLUME_POINTS_PER_SEGMENT = 64
+
+
+class SizingTargets(NamedTuple):
+    thrust: float
+    chamberPressure: float
+    ambientPressure: float
+    gamma: float
+    characteristicVelocity: float
+    # chamber volume over throat area, injector face to throat
+    characteristicLength: float
+    # chamber over throat area, None uses the Huzel and Huang correlation with the throat diameter
+    contractionRatio: float = None
+    # None expands to the ambient pressure, which has to be given for vacuum engines
+    exitPressure: float = None
+
+
+class EngineSizing(NamedTuple):
+    nozzleParameters: NozzleParameters
+    thrustCoefficient: np.ndarray
+    expansionRatio: np.ndarray
+    contractionRatio: np.ndarray
+    exitMach: np.ndarray
+    # the target exit pressure, or the pressure a bell kept inside the chart area ratios expands to
+    exitPressure: np.ndarray
+    massFlowRate: np.ndarray
+    specificImpulse: np.ndarray
+    chamberVolume: np.ndarray
+
+
+class EnginePerformance(NamedTuple):
+    thrust: np.ndarray
+    thrustCoefficient: np.ndarray
+    expansionRatio: np.ndarray
+    exitMach: np.ndarray
+    exitPressure: np.ndarray
+    massFlowRate: np.ndarray
+    specificImpulse: np.ndarray
+    characteristicLength: np.ndarray
+
+
+def sizeEngine(targets: SizingTargets, name: str = 'sized', divergenceStyle: DivergenceStyle = DivergenceStyle.CONE,
+               convergenceAngle=30.0, throatArcRatio=1.5, convergenceArcFraction=0.5,
+               lengthScale: float = 1e-3) -> EngineSizing:
+    # throatArcRatio: divergenceRadius over throat radius, convergenceArcFraction: convergenceRadius as a fraction of
+    # the largest one that fits the drop from chamber to throat radius
+    thrust, chamberPressure, ambientPressure, gamma, characteristicVelocity, characteristicLength = (
+        np.asarray(value, dtype=float) for value in targets[:6])
+    exitPressure = ambientPressure if targets.exitPressure is None else np.asarray(targets.exitPressure, dtype=float)
+
+    exitMach = _getExitMach(exitPressure / chamberPressure, gamma)
+    expansionRatio = areaRatio(exitMach, gamma)
+    if divergenceStyle == DivergenceStyle.BELL:
+        isClamped = (expansionRatio < BELL_AREA_RATIOS[0]) | (expansionRatio > BELL_AREA_RATIOS[1])
+        expansionRatio = np.clip(expansionRatio, *BELL_AREA_RATIOS)
+        exitMach = np.where(isClamped, machFromAreaRatio(expansionRatio, gamma), exitMach)
+        exitPressure = np.where(isClamped, chamberPressure * _getPressureRatio(exitMach, gamma), exitPressure)
+    thrustCoefficient = getThrustCoefficient(exitPressure / chamberPressure, ambientPressure / chamberPressure,
+                                             expansionRatio, gamma)
+    throatArea = thrust / (thrustCoefficient * chamberPressure)
+    throatRadius = np.sqrt(throatArea / math.pi) / lengthScale
+    contractionRatio = getContractionRatio(2 * throatRadius * lengthScale) if targets.contractionRatio is None else \
+        np.asarray(targets.contractionRatio, dtype=float)
+    chamberRadius = throatRadius * np.sqrt(contractionRatio)
+    exitRadius = throatRadius * np.sqrt(expansionRatio)
+    if divergenceStyle == DivergenceStyle.BELL:
+        exitLength = getBellLength(throatRadius, exitRadius)
+    elif divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+        exitLength = np.vectorize(getMinimumLength, otypes=[float])(throatRadius, exitRadius, gamma)
+    else:
+        exitLength = getConicalLength(throatRadius, exitRadius)
+
+    # the converging section is fixed by the radii and arcs, the chamber cylinder takes the rest of the volume
+    angle = np.radians(convergenceAngle)
+    divergenceRadius = throatArcRatio * throatRadius
+    exitAngle = np.arctan2(exitRadius - throatRadius, exitLength) if divergenceStyle == DivergenceStyle.CONE else 0.0
+    convergenceLineEndX = throatRadius + divergenceRadius * (np.cos(exitAngle) - np.cos(angle))
+    convergenceRadius = convergenceArcFraction * (chamberRadius - convergenceLineEndX) / (1 - np.cos(angle))
+    parameters = NozzleParameters(name, 0.0, 0.0, exitLength, chamberRadius, throatRadius, exitRadius,
+                                  convergenceAngle, convergenceRadius, divergenceRadius, divergenceStyle, gamma)
+    chamberVolume = characteristicLength * throatArea / lengthScale ** 3
+    convergingLength, convergingVolume = _getConvergingSection(parameters)
+    chamberCylinderLength = (chamberVolume - convergingVolume) / (math.pi * chamberRadius ** 2)
+    nozzleParameters = parameters._replace(chamberLength=chamberCylinderLength + convergingLength,
+                                           chamberCylinderLength=chamberCylinderLength)
+
+    massFlowRate = chamberPressure * throatArea / characteristicVelocity
+    return EngineSizing(
+        nozzleParameters=nozzleParameters,
+        thrustCoefficient=thrustCoefficient,
+        expansionRatio=expansionRatio,
+        contractionRatio=contractionRatio,
+        exitMach=exitMach,
+        exitPressure=exitPressure,
+        massFlowRate=massFlowRate,
+        specificImpulse=characteristicVelocity * thrustCoefficient / STANDARD_GRAVITY,
+        chamberVolume=chamberVolume)
+
+
+def getPerformance(nozzleParameters: NozzleParameters, chamberPressure, ambientPressure, gamma,
+                   characteristicVelocity, lengthScale: float = 1e-3) -> EnginePerformance:
+    # the forward problem: what a drawn nozzle delivers at the given conditions, ideal flow without separation
+    chamberPressure, ambientPressure, gamma = (np.asarray(value, dtype=float)
+                                               for value in (chamberPressure, ambientPressure, gamma))
+    throatRadius = np.asarray(nozzleParameters.throatRadius, dtype=float)
+    expansionRatio = (np.asarray(nozzleParameters.exitRadius, dtype=float) / throatRadius) ** 2
+    exitMach = machFromAreaRatio(expansionRatio, gamma)
+    pressureRatio = _getPressureRatio(exitMach, gamma)
+    thrustCoefficient = getThrustCoefficient(pressureRatio, ambientPressure / chamberPressure, expansionRatio, gamma)
+    throatArea = math.pi * (throatRadius * lengthScale) ** 2
+    convergingLength, convergingVolume = _getConvergingSection(nozzleParameters)
+    cylinderLength = np.asarray(nozzleParameters.chamberLength, dtype=float) - convergingLength
+    chamberVolume = (convergingVolume + math.pi * np.asarray(nozzleParameters.chamberRadius) ** 2 * cylinderLength) * \
+        lengthScale ** 3
+    return EnginePerformance(
+        thrust=thrustCoefficient * chamberPressure * throatArea,
+        thrustCoefficient=thrustCoefficient,
+        expansionRatio=expansionRatio,
+        exitMach=exitMach,
+        exitPressure=pressureRatio * chamberPressure,
+        massFlowRate=chamberPressure * throatArea / np.asarray(characteristicVelocity, dtype=float),
+        specificImpulse=np.asarray(characteristicVelocity, dtype=float) * thrustCoefficient / STANDARD_GRAVITY,
+        characteristicLength=chamberVolume / throatArea)
+
+
+def getThrustCoefficient(exitPressureRatio, ambientPressureRatio, expansionRatio, gamma) -> np.ndarray:
+    # pressure ratios are over the chamber pressure
+    gamma = np.asarray(gamma, dtype=float)
+    momentum = 2 * gamma ** 2 / (gamma - 1) * (2 / (gamma + 1)) ** ((gamma + 1) / (gamma - 1)) * \
+        (1 - np.asarray(exitPressureRatio, dtype=float) ** ((gamma - 1) / gamma))
+    return np.sqrt(momentum) + (np.asarray(exitPressureRatio) - ambientPressureRatio) * expansionRatio
+
+
+def getContractionRatio(throatDiameter) -> np.ndarray:
+    # Huzel and Huang's fit of flown engines, throat diameter in metres
+    return 8.0 * (np.asarray(throatDiameter, dtype=float) * 100) ** -0.6 + 1.25
+
+
+def _getExitMach(pressureRatio, gamma) -> np.ndarray:
+    # isentropic expansion from the chamber to `pressureRatio` of its pressure
+    return np.sqrt(2 / (gamma - 1) * (np.asarray(pressureRatio, dtype=float) ** (-(gamma - 1) / gamma) - 1))
+
+
+def _getPressureRatio(mach, gamma) -> np.ndarray:
+    # static over chamber pressure
+    return (1 + (gamma - 1) / 2 * mach ** 2) ** (-gamma / (gamma - 1))
+
+
+def _getConvergingSection(nozzleParameters: NozzleParameters) -> (np.ndarray, np.ndarray):
+    # axial length and volume from the chamber end to the throat point. The converging section of curved divergent
+    # styles does not depend on their wall, so method of characteristics designs are solved as bells, which batch.
+    if nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+        nozzleParameters = nozzleParameters._replace(divergenceStyle=DivergenceStyle.BELL)
+    with np.errstate(all='ignore'):
+        contour = solveContour(nozzleParameters)
+        points = sampleContour(contour, VOLUME_POINTS_PER_SEGMENT)
+    # chamber line, convergence arc, convergence line and throat arc are the first four segments
+    segmentLength = VOLUME_POINTS_PER_SEGMENT - 1
+    points = points[..., segmentLength:4 * segmentLength + 1, :]
+    startRadius, endRadius = points[..., :-1, 0], points[..., 1:, 0]
+    axialSteps = np.abs(np.diff(points[..., 1], axis=-1))
+    volume = math.pi / 3 * np.sum(axialSteps * (startRadius ** 2 + startRadius * endRadius + endRadius ** 2), axis=-1)
+    return contour.chamberEnd[..., 1] - contour.throatPoint[..., 1], volume
+
+
+class SizingCache:
+    # sized designs by their quantized targets and options, so dialog edits that return to an earlier value and
+    # repeated sizing of a single design skip the contour integration
+    def __init__(self, maxSize: int = 256):
+        self._cache = LruCache(maxSize)
+
+    def getSizing(self, targets: SizingTargets, name: str = 'sized',
+                  divergenceStyle: DivergenceStyle = DivergenceStyle.CONE, convergenceAngle: float = 30.0,
+                  throatArcRatio: float = 1.5, convergenceArcFraction: float = 0.5,
+                  lengthScale: float = 1e-3) -> EngineSizing:
+        options = (divergenceStyle, convergenceAngle, throatArcRatio, convergenceArcFraction, lengthScale)
+        key = (self._quantize(tuple(targets) + options[1:]), divergenceStyle)
+        sizing = self._cache.get(key, lambda: sizeEngine(targets, name, *options))
+        return sizing._replace(nozzleParameters=sizing.nozzleParameters._replace(name=name))
+
+    def clear(self):
+        self._cache.clear()
+
+    def getStatistics(self):
+        return self._cache.getStatistics()
+
+    @staticmethod
+    def _quantize(values: tuple) -> tuple:
+        # 12 significant digits, targets span pascals to meganewtons so an absolute tolerance would not fit them all
+        return tuple(None if value is None else float('{:.12g}'.format(float(value))) for value in values)
+
+
+# shared by the dialog
+sizingCache = SizingCache()
@@ -0,0 +1,80 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters
+from ..catalog.ResultStore import ResultStore
+from ..geometry.ContourCache import contourCache
+from ..geometry.GasDynamics import machFromAreaRatio
+from ..geometry.NozzleContour import NozzleContour, solveContour, sampleContour
+
+
+# Quasi one-dimensional isentropic flow at every contour station. All fields are arrays aligned with the contour
+# points (shape (..., stations)), pressure, temperature and density are the stagnation values times the isentropic
+# ratios, so they are plain ratios unless chamber conditions are given.
+class FlowDistribution(NamedTuple):
+    axialPosition: np.ndarray
+    radius: np.ndarray
+    areaRatio: np.ndarray
+    mach: np.ndarray
+    pressure: np.ndarray
+    temperature: np.ndarray
+    density: np.ndarray
+    isSupersonic: np.ndarray
+
+
+def solveFlow(points: np.ndarray, throatPoint: np.ndarray, gamma: float, chamberPressure: float = 1.0,
+              chamberTemperature: float = 1.0, chamberDensity: float = 1.0) -> FlowDistribution:
+    # points: (..., stations, 2) sketch coordinates, throatPoint: (..., 2) radius and axial position of the throat
+    radius = points[..., 0]
+    axialPosition = points[..., 1]
+    throatRadius = throatPoint[..., 0, None]
+    # stations downstream of the throat (towards the exit plane at y = 0) are on the supersonic branch
+    isSupersonic = axialPosition < throatPoint[..., 1, None]
+    areaRatio = (radius / throatRadius) ** 2
+    mach = machFromAreaRatio(areaRatio, gamma, isSupersonic)
+
+    temperatureRatio = 1.0 / (1 + (gamma - 1) / 2 * mach ** 2)
+    return FlowDistribution(
+        axialPosition=axialPosition,
+        radius=radius,
+        areaRatio=areaRatio,
+        mach=mach,
+        pressure=chamberPressure * temperatureRatio ** (gamma / (gamma - 1)),
+        temperature=chamberTemperature * temperatureRatio,
+        density=chamberDensity * temperatureRatio ** (1 / (gamma - 1)),
+        isSupersonic=isSupersonic)
+
+
+def solveContourFlow(nozzleParameters: NozzleParameters, gamma: float, pointsPerSegment: int = 64,
+                     chamberPressure: float = 1.0, chamberTemperature: float = 1.0, chamberDensity: float = 1.0,
+                     degrees: bool = True, store: ResultStore = None) -> FlowDistribution:
+    # single designs go through the shared cache, parameter arrays are solved as one batch. With a store the
+    # distribution is kept on disk and read back memory-mapped by later calls with the same arguments.
+    if store is not None:
+        return store.getOrCompute(
+            'flow', nozzleParameters, lambda: solveContourFlow(nozzleParameters, gamma, pointsPerSegment,
+                                                               chamberPressure, chamberTemperature, chamberDensity,
+                                                               degrees),
+            FlowDistribution, gamma=gamma, pointsPerSegment=pointsPerSegment, chamberPressure=chamberPressure,
+            chamberTemperature=chamberTemperature, chamberDensity=chamberDensity, degrees=degrees)
+    if np.ndim(nozzleParameters.throatRadius):
+        contour = solveContour(nozzleParameters, degrees=degrees)
+        points = sampleContour(contour, pointsPerSegment)
+    else:
+        contour = contourCache.getContour(nozzleParameters, degrees=degrees)
+        points = contourCache.getPoints(nozzleParameters, pointsPerSegment=pointsPerSegment, degrees=degrees)
+    return solveFlow(points, _getThroatPoint(contour), gamma, chamberPressure, chamberTemperature, chamberDensity)
+
+
+def getMassFlowRate(throatRadius, chamberPressure, chamberTemperature, gamma: float, gasConstant: float) -> np.ndarray:
+    # choked mass flow through the throat
+    throatArea = math.pi * np.asarray(throatRadius, dtype=float) ** 2
+    flowFunction = math.sqrt(gamma / gasConstant) * (2 / (gamma + 1)) ** ((gamma + 1) / (2 * (gamma - 1)))
+    return throatArea * chamberPressure * flowFunction / np.sqrt(chamberTemperature)
+
+
+def _getThroatPoint(contour: NozzleContour) -> np.ndarray:
+    # the sonic station is the narrowest point of the contour, on the arc upstream of the throat point
+    return contour.minimumRadiusPoint
@@ -0,0 +1,317 @@
+import math
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import Callable, Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from .DesignSweep import SWEEP_FIELDS, getUniformSamples
+from .EngineSizing import STANDARD_GRAVITY, getThrustCoefficient
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle
+from ..geometry.CharacteristicNozzle import getMinimumLength
+from ..geometry.GasDynamics import machFromAreaRatio
+from ..geometry.NozzleContour import solveContour, computeMetrics
+from ..geometry.ParameterValidator import isFeasible
+
+# Monte Carlo tolerance analysis: the toleranced fields of a design are drawn from their distributions, every chunk of
+# samples is solved as one batch and its metrics are kept as one column per metric (8 bytes per sample and metric,
+# memory-mapped into a folder), so the working set of a million-sample run does not grow with the count.
+# Statistics are taken over the feasible samples: exact percentiles from the columns, and linear sensitivities from
+# regression sums accumulated chunk by chunk. Deviations are in the units of the design (mm and degrees unless
+# `degrees` is False), thrust in newtons with `lengthScale` converting the geometry units to metres.
+
+DEFAULT_PERCENTILES = (1.0, 5.0, 50.0, 95.0, 99.0)
+GEOMETRY_METRICS = ('throatRadius', 'throatArea', 'exitArea', 'expansionRatio', 'contractionRatio', 'length')
+# only evaluated when operating conditions are given
+PERFORMANCE_METRICS = ('thrustCoefficient', 'thrust', 'massFlowRate', 'specificImpulse')
+# runs without a path write their columns into a new folder in here, which their result removes (see ToleranceResult)
+DEFAULT_COLUMNS_PATH = os.path.join(tempfile.gettempdir(), 'NozzleGenerator', 'tolerances')
+# method of characteristics nets are only solved at radius ratios on a grid of this step, see _getCharacteristicLength
+RADIUS_RATIO_STEP = 1e-3
+
+
+class ToleranceDistribution(str, Enum):
+    # the deviation is three standard deviations, a machining tolerance held by 99.7% of the parts
+    NORMAL = 'normal'
+    # anywhere within plus or minus the deviation
+    UNIFORM = 'uniform'
+    # within plus or minus the deviation, most likely at the nominal value
+    TRIANGULAR = 'triangular'
+
+
+class Tolerance(NamedTuple):
+    deviation: float
+    distribution: ToleranceDistribution = ToleranceDistribution.NORMAL
+    # shift of the distribution's centre from the nominal value, e.g. for a process that cuts oversize
+    bias: float = 0.0
+
+
+class OperatingConditions(NamedTuple):
+    chamberPressure: float
+    ambientPressure: float
+    gamma: float
+    characteristicVelocity: float
+
+
+class MetricStatistics(NamedTuple):
+    nominal: float
+    mean: float
+    standardDeviation: float
+    # percentile -> value
+    percentiles: Dict[float, float]
+    # toleranced field -> change of the metric per unit change of the field, from a linear fit over the samples
+    sensitivities: Dict[str, float]
+    # toleranced field -> fraction of the metric's variance it explains, the squared standardized coefficients of the
+    # fit; they add up to about the fit's R squared, close to 1 while the metric is near linear over the tolerances
+    varianceContributions: Dict[str, float]
+
+
+class ToleranceResult(NamedTuple):
+    count: int
+    feasibleFraction: float
+    statistics: Dict[str, MetricStatistics]
+    # the samples of every toleranced field, every metric and 'feasible', by name
+    columns: Dict[str, np.ndarray]
+    # the folder the run made for the columns when it was given no path, removed by close or once the result is
+    # garbage collected
+    scratchFolder: tempfile.TemporaryDirectory = None
+
+    def close(self):
+        # the columns are released first, a folder of mapped files cannot be removed on Windows
+        self.columns.clear()
+        if self.scratchFolder is not None:
+            self.scratchFolder.cleanup()
+
+    def __enter__(self) -> 'ToleranceResult':
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def runToleranceAnalysis(design: NozzleParameters, count: int = 10 ** 6, seed: int = 0,
+                         conditions: OperatingConditions = None, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                         workers: int = 1, chunkSize: int = 65536, path: str = None, lengthScale: float = 1e-3,
+                         degrees: bool = True, onProgress: Callable[[int, int], None] = None,
+                         **tolerances: Tolerance) -> ToleranceResult:
+    # e.g. runToleranceAnalysis(design, throatRadius=Tolerance(0.02), exitRadius=Tolerance(0.05, UNIFORM));
+    # workers=None uses all cores; inside Fusion 360 keep workers=1, which evaluates every chunk in this process.
+    # The columns are memory-mapped .npy files in the folder `path`, by default a new folder in DEFAULT_COLUMNS_PATH
+    # that belongs to the result: use it in a with statement, or close it, to remove the folder.
+    _checkTolerances(tolerances)
+    workers = workers or os.cpu_count() or 1
+    fields = tuple(tolerances)
+    metrics = GEOMETRY_METRICS + (PERFORMANCE_METRICS if conditions is not None else ())
+    scratchFolder = None
+    if path is None:
+        if not os.path.isdir(DEFAULT_COLUMNS_PATH):
+            os.makedirs(DEFAULT_COLUMNS_PATH)
+        scratchFolder = tempfile.TemporaryDirectory(dir=DEFAULT_COLUMNS_PATH)
+        path = scratchFolder.name
+    columns = _createColumns(path, fields + metrics, count)
+    sums = _RegressionSums(len(fields), len(metrics))
+    chunks = ((start, min(start + chunkSize, count)) for start in range(0, count, chunkSize))
+    done = 0
+
+    def write(start: int, stop: int, samples: Dict[str, np.ndarray]):
+        nonlocal done
+        for name, values in samples.items():
+            columns[name][start:stop] = values
+        sums.add(np.stack([samples[field] for field in fields], axis=-1),
+                 np.stack([samples[metric] for metric in metrics], axis=-1), samples['feasible'])
+        done += stop - start
+        if onProgress is not None:
+            onProgress(done, count)
+
+    arguments = (design, tolerances, seed, conditions, lengthScale, degrees)
+    if workers == 1:
+        for start, stop in chunks:
+            write(start, stop, evaluateTolerances(*arguments, start, stop))
+    else:
+        # at most two chunks per worker are submitted ahead of the one being written
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for start, stop in chunks:
+                pending.append((start, stop, executor.submit(evaluateTolerances, *arguments, start, stop)))
+                if len(pending) >= 2 * workers:
+                    start, stop, future = pending.popleft()
+                    write(start, stop, future.result())
+            while pending:
+                start, stop, future = pending.popleft()
+                write(start, stop, future.result())
+    for column in columns.values():
+        column.flush()
+
+    nominal = _evaluateMetrics(design._replace(**{field: np.array([getattr(design, field)]) for field in fields}),
+                               conditions, lengthScale, degrees)
+    slopes, contributions = sums.solve()
+    feasible = np.asarray(columns['feasible'])
+    statistics = {}
+    for index, metric in enumerate(metrics):
+        # one column at a time, so only a single copy of a column is ever made
+        values = np.asarray(columns[metric])[feasible]
+        statistics[metric] = MetricStatistics(
+            nominal=float(np.ravel(nominal[metric])[0]),
+            mean=float(np.mean(values)) if len(values) else math.nan,
+            standardDeviation=float(np.std(values)) if len(values) else math.nan,
+            percentiles=dict(zip(percentiles, np.percentile(values, percentiles).tolist())) if len(values) else
+            {percentile: math.nan for percentile in percentiles},
+            sensitivities=dict(zip(fields, slopes[:, index].tolist())),
+            varianceContributions=dict(zip(fields, contributions[:, index].tolist())))
+    return ToleranceResult(count, float(np.count_nonzero(feasible)) / count if count else math.nan, statistics,
+                           columns, scratchFolder)
+
+
+def evaluateTolerances(design: NozzleParameters, tolerances: Dict[str, Tolerance], seed: int,
+                       conditions: OperatingConditions, lengthScale: float, degrees: bool, start: int,
+                       stop: int) -> Dict[str, np.ndarray]:
+    # samples start..stop of the run, the toleranced fields, metrics and 'feasible' by name
+    samples = sampleTolerances(design, tolerances, seed, start, stop)
+    nozzleParameters = design._replace(**samples)
+    with np.errstate(all='ignore'):
+        metrics = _evaluateMetrics(nozzleParameters, conditions, lengthScale, degrees)
+        feasible = np.broadcast_to(isFeasible(nozzleParameters, degrees), (stop - start,)).copy()
+    # metrics that no toleranced field moves come back as scalars
+    metrics = {name: np.broadcast_to(values, feasible.shape) for name, values in metrics.items()}
+    for values in metrics.values():
+        feasible &= np.isfinite(values)
+    return dict(samples, **metrics, feasible=feasible)
+
+
+def sampleTolerances(design: NozzleParameters, tolerances: Dict[str, Tolerance], seed: int, start: int,
+                     stop: int) -> Dict[str, np.ndarray]:
+    # samples start..stop of every toleranced field, from the same uniform sequence as the random sweeps, so the
+    # samples do not depend on how the run is chunked. Every field takes two uniforms, which the normal distribution
+    # turns into one normal sample (Box-Muller).
+    unit = getUniformSamples(seed, start, stop, 2 * len(tolerances))
+    samples = {}
+    for index, (field, tolerance) in enumerate(tolerances.items()):
+        first, second = unit[:, 2 * index], unit[:, 2 * index + 1]
+        distribution = ToleranceDistribution(tolerance.distribution)
+        if distribution == ToleranceDistribution.NORMAL:
+            standard = np.sqrt(-2 * np.log1p(-first)) * np.cos(2 * math.pi * second)
+            deviation = tolerance.deviation / 3 * standard
+        elif distribution == ToleranceDistribution.UNIFORM:
+            deviation = tolerance.deviation * (2 * first - 1)
+        else:
+            # inverse of the symmetric triangular distribution's cumulative distribution function
+            deviation = tolerance.deviation * np.where(first < 0.5, np.sqrt(2 * first) - 1,
+                                                       1 - np.sqrt(2 * (1 - first)))
+        samples[field] = getattr(design, field) + tolerance.bias + deviation
+    return samples
+
+
+def _evaluateMetrics(nozzleParameters: NozzleParameters, conditions: OperatingConditions, lengthScale: float,
+                     degrees: bool) -> Dict[str, np.ndarray]:
+    # the metrics only depend on the throat and exit points, which a method of characteristics wall shares with a
+    # bell as long as the net, so those designs are solved as bells of that length, which batch
+    if nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+        nozzleParameters = nozzleParameters._replace(divergenceStyle=DivergenceStyle.BELL,
+                                                     exitLength=_getCharacteristicLength(nozzleParameters))
+    with np.errstate(all='ignore'):
+        contourMetrics = computeMetrics(solveContour(nozzleParameters, degrees=degrees))
+        metrics = {metric: getattr(contourMetrics, metric) for metric in GEOMETRY_METRICS}
+        if conditions is None:
+            return metrics
+        chamberPressure, ambientPressure, gamma, characteristicVelocity = conditions
+        # ideal expansion through the drawn area ratio, without separation
+        exitMach = machFromAreaRatio(metrics['expansionRatio'], gamma)
+        pressureRatio = (1 + (gamma - 1) / 2 * exitMach ** 2) ** (-gamma / (gamma - 1))
+        thrustCoefficient = getThrustCoefficient(pressureRatio, ambientPressure / chamberPressure,
+                                                 metrics['expansionRatio'], gamma)
+        throatArea = metrics['throatArea'] * lengthScale ** 2
+    return dict(metrics,
+                thrustCoefficient=thrustCoefficient,
+                thrust=thrustCoefficient * chamberPressure * throatArea,
+                massFlowRate=chamberPressure * throatArea / characteristicVelocity,
+                specificImpulse=characteristicVelocity * thrustCoefficient / STANDARD_GRAVITY)
+
+
+def _getCharacteristicLength(nozzleParameters: NozzleParameters) -> np.ndarray:
+    # exitLength of the net of every sample. A net takes milliseconds to solve, so nets are solved at the radius ratios
+    # on a grid of RADIUS_RATIO_STEP around the samples (cached by getMinimumLength) and the lengths in between are
+    # interpolated linearly, which keeps every sample independent of how the run is chunked.
+    throatRadius = np.asarray(nozzleParameters.throatRadius, dtype=float)
+    gamma, characteristicCount = float(nozzleParameters.gamma), int(nozzleParameters.characteristicCount)
+    with np.errstate(all='ignore'):
+        position = np.asarray(nozzleParameters.exitRadius, dtype=float) / throatRadius / RADIUS_RATIO_STEP
+    lower = np.floor(np.where(np.isfinite(position), position, 0.0))
+    nodes = np.unique(np.concatenate([np.ravel(lower), np.ravel(lower) + 1]))
+    lengthRatios = {}
+    for node in nodes[nodes * RADIUS_RATIO_STEP > 1]:
+        try:
+            lengthRatios[node] = getMinimumLength(1.0, node * RADIUS_RATIO_STEP, gamma, characteristicCount)
+        except (ValueError, ArithmeticError):
+            pass
+
+    def getLengthRatio(node: np.ndarray) -> np.ndarray:
+        return np.vectorize(lambda value: lengthRatios.get(value, math.nan), otypes=[float])(node)
+
+    # samples without a net on both sides come out as NaN and so infeasible
+    fraction = position - lower
+    return throatRadius * ((1 - fraction) * getLengthRatio(lower) + fraction * getLengthRatio(lower + 1))
+
+
+class _RegressionSums:
+    # running sums of a least-squares fit of every metric on the toleranced fields, over the feasible samples; the
+    # samples are centred on the first chunk's means so the sums keep their precision over a million samples
+    def __init__(self, fieldCount: int, metricCount: int):
+        self._count = 0
+        self._fieldOrigin = None
+        self._metricOrigin = None
+        self._fieldSums = np.zeros(fieldCount)
+        self._metricSums = np.zeros(metricCount)
+        self._fieldProducts = np.zeros((fieldCount, fieldCount))
+        self._crossProducts = np.zeros((fieldCount, metricCount))
+        self._metricSquares = np.zeros(metricCount)
+
+    def add(self, fields: np.ndarray, metrics: np.ndarray, feasible: np.ndarray):
+        fields, metrics = fields[feasible], metrics[feasible]
+        if not len(fields):
+            return
+        if self._fieldOrigin is None:
+            self._fieldOrigin, self._metricOrigin = fields.mean(axis=0), metrics.mean(axis=0)
+        fields = fields - self._fieldOrigin
+        metrics = metrics - self._metricOrigin
+        self._count += len(fields)
+        self._fieldSums += fields.sum(axis=0)
+        self._metricSums += metrics.sum(axis=0)
+        self._fieldProducts += fields.T @ fields
+        self._crossProducts += fields.T @ metrics
+        self._metricSquares += np.einsum('ij,ij->j', metrics, metrics)
+
+    def solve(self) -> Tuple[np.ndarray, np.ndarray]:
+        # slopes and variance fractions, shape (fields, metrics); NaN without enough samples to fit
+        shape = self._crossProducts.shape
+        if self._count <= shape[0]:
+            return np.full(shape, math.nan), np.full(shape, math.nan)
+        fieldMeans, metricMeans = self._fieldSums / self._count, self._metricSums / self._count
+        fieldCovariance = self._fieldProducts / self._count - np.outer(fieldMeans, fieldMeans)
+        crossCovariance = self._crossProducts / self._count - np.outer(fieldMeans, metricMeans)
+        metricVariance = self._metricSquares / self._count - metricMeans ** 2
+        # a field without spread (zero deviation) has no slope, lstsq leaves it at zero
+        slopes = np.linalg.lstsq(fieldCovariance, crossCovariance, rcond=None)[0]
+        with np.errstate(all='ignore'):
+            contributions = slopes ** 2 * np.diag(fieldCovariance)[:, None] / metricVariance
+        return slopes, np.where(metricVariance > 0, contributions, 0.0)
+
+
+def _createColumns(path: str, metrics: Tuple[str, ...], count: int) -> Dict[str, np.ndarray]:
+    dtypes = [(name, '<f8') for name in metrics] + [('feasible', '|b1')]
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return {name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+', dtype=dtype, shape=(count,))
+            for name, dtype in dtypes}
+
+
+def _checkTolerances(tolerances: Dict[str, Tolerance]):
+    if not tolerances:
+        raise ValueError('No toleranced fields, tolerable fields are {}'.format(', '.join(SWEEP_FIELDS)))
+    for field, tolerance in tolerances.items():
+        if field not in SWEEP_FIELDS:
+            raise ValueError('Cannot tolerance {}, tolerable fields are {}'.format(field, ', '.join(SWEEP_FIELDS)))
+        if not tolerance.deviation >= 0:
+            raise ValueError('The deviation of {} cannot be negative: {}'.format(field, tolerance.deviation))
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+from ..NozzleDefinitions import NozzleDefinition, NozzleParameters, DivergenceStyle, DIMENSION_FIELDS
+from ..geometry.ContourCache import LruCache
+
+# File-backed store of nozzle definitions, in the units of NozzleDefinition (mm and degrees). The database is opened on
+# first use and the built-in NozzleDefinition members are written over their stored rows, so a catalog kept from an
+# older version of the add-in picks up changes to them while the definitions added by the user stay. Definitions are
+# looked up through the name's primary key index and kept in an LRU cache once read, and range queries run against
+# indexed columns in SQLite, so only the matching rows are ever turned into NozzleParameters.
+
+
+def _getUserDataFolder() -> str:
+    # outside the add-in folder, which is replaced when the add-in is updated; Fusion 360 runs on Windows and macOS,
+    # anywhere else the temporary folder is used
+    if sys.platform == 'win32' and 'APPDATA' in os.environ:
+        return os.environ['APPDATA']
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    return tempfile.gettempdir()
+
+
+DEFAULT_CATALOG_PATH = os.path.join(_getUserDataFolder(), 'NozzleGenerator', 'nozzleCatalog.sqlite')
+
+_NUMERIC_FIELDS = DIMENSION_FIELDS + ('gamma', 'characteristicCount')
+_INTEGER_FIELDS = ('characteristicCount',)
+# derived from the radii when a definition is stored, so they can be indexed and queried like the parameters
+_DERIVED_FIELDS = ('expansionRatio', 'contractionRatio')
+_INDEXED_FIELDS = ('throatRadius', 'exitRadius', 'chamberRadius', 'expansionRatio', 'contractionRatio')
+_COLUMNS = NozzleParameters._fields + _DERIVED_FIELDS
+
+
+class NozzleCatalog:
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH, cacheSize: int = 256):
+        self._path = path
+        self._connection: sqlite3.Connection = None
+        self._definitions = LruCache(cacheSize)
+
+    def getPath(self) -> str:
+        return self._path
+
+    def getNames(self) -> [str]:
+        # only the name column is read, in the order the definitions were added
+        return [name for name, in self._getConnection().execute('SELECT name FROM nozzles ORDER BY rowid')]
+
+    def contains(self, name: str) -> bool:
+        return self._getConnection().execute('SELECT 1 FROM nozzles WHERE name = ?', (name,)).fetchone() is not None
+
+    def get(self, name: str) -> NozzleParameters:
+        return self._definitions.get(name, lambda: self._load(name))
+
+    def getCount(self) -> int:
+        return self._getConnection().execute('SELECT COUNT(*) FROM nozzles').fetchone()[0]
+
+    def query(self, divergenceStyle: DivergenceStyle = None, limit: int = None,
+              **ranges: Tuple[Optional[float], Optional[float]]) -> List[NozzleParameters]:
+        # ranges are inclusive (minimum, maximum) pairs by field name, either bound may be None, e.g.
+        # query(throatRadius=(1.0, 2.0), expansionRatio=(8.0, None))
+        where, arguments = self._getWhereClause(divergenceStyle, ranges)
+        sql = 'SELECT {} FROM nozzles{} ORDER BY rowid'.format(', '.join(_COLUMNS), where)
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(limit)
+        return [_toParameters(row) for row in self._getConnection().execute(sql, arguments)]
+
+    def queryNames(self, divergenceStyle: DivergenceStyle = None,
+                   **ranges: Tuple[Optional[float], Optional[float]]) -> [str]:
+        where, arguments = self._getWhereClause(divergenceStyle, ranges)
+        sql = 'SELECT name FROM nozzles{} ORDER BY rowid'.format(where)
+        return [name for name, in self._getConnection().execute(sql, arguments)]
+
+    def add(self, nozzleParameters: NozzleParameters, replace: bool = False):
+        self.addAll([nozzleParameters], replace)
+
+    def addAll(self, definitions: Iterable[NozzleParameters], replace: bool = False):
+        # one transaction for the whole batch; an existing name raises sqlite3.IntegrityError unless `replace` is set
+        definitions = list(definitions)
+        connection = self._getConnection()
+        with connection:
+            (_upsert if replace else _insert)(connection, definitions)
+        for nozzleParameters in definitions:
+            self._definitions.pop(nozzleParameters.name)
+
+    def remove(self, name: str):
+        connection = self._getConnection()
+        with connection:
+            connection.execute('DELETE FROM nozzles WHERE name = ?', (name,))
+        self._definitions.pop(name)
+
+    def importJson(self, path: str, replace: bool = False) -> int:
+        # a JSON list of objects keyed by NozzleParameters field names, divergenceStyle defaults to a cone
+        with open(path) as file:
+            records = json.load(file)
+        definitions = [NozzleParameters(**dict(record, divergenceStyle=DivergenceStyle(
+            record.get('divergenceStyle', DivergenceStyle.CONE.value)))) for record in records]
+        self.addAll(definitions, replace)
+        return len(definitions)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self._definitions.clear()
+
+    def _load(self, name: str) -> NozzleParameters:
+        row = self._getConnection().execute(
+            'SELECT {} FROM nozzles WHERE name = ?'.format(', '.join(_COLUMNS)), (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return _toParameters(row)
+
+    def _getConnection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self._path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._connection = sqlite3.connect(self._path)
+            with self._connection:
+                _createSchema(self._connection)
+                _upsert(self._connection, [definition.value for definition in NozzleDefinition])
+        return self._connection
+
+    def _getWhereClause(self, divergenceStyle: DivergenceStyle, ranges: dict) -> (str, list):
+        conditions, arguments = [], []
+        if divergenceStyle is not None:
+            conditions.append('divergenceStyle = ?')
+            arguments.append(DivergenceStyle(divergenceStyle).value)
+        for field, (minimum, maximum) in ranges.items():
+            # field names are checked against the schema since they are formatted into the SQL
+            if field not in _NUMERIC_FIELDS + _DERIVED_FIELDS:
+                raise ValueError('Cannot query nozzle definitions by {}'.format(field))
+            if minimum is not None:
+                conditions.append('{} >= ?'.format(field))
+                arguments.append(float(minimum))
+            if maximum is not None:
+                conditions.append('{} <= ?'.format(field))
+                arguments.append(float(maximum))
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return where, arguments
+
+
+def _createSchema(connection: sqlite3.Connection):
+    columns = ', '.join(['name TEXT PRIMARY KEY'] + [_getColumnDefinition(field) for field in _NUMERIC_FIELDS] +
+                        ['divergenceStyle TEXT NOT NULL'] + ['{} REAL NOT NULL'.format(field)
+                                                            for field in _DERIVED_FIELDS])
+    connection.execute('CREATE TABLE IF NOT EXISTS nozzles ({})'.format(columns))
+    # catalogs written before a field was added get its column, filled with the NozzleParameters default
+    existingColumns = {row[1] for row in connection.execute('PRAGMA table_info(nozzles)')}
+    for field in _NUMERIC_FIELDS:
+        if field not in existingColumns:
+            connection.execute('ALTER TABLE nozzles ADD COLUMN {} DEFAULT {!r}'.format(
+                _getColumnDefinition(field), NozzleParameters._field_defaults[field]))
+    for field in _INDEXED_FIELDS:
+        connection.execute('CREATE INDEX IF NOT EXISTS nozzles_{0} ON nozzles ({0})'.format(field))
+
+
+def _getColumnDefinition(field: str) -> str:
+    return '{} {} NOT NULL'.format(field, 'INTEGER' if field in _INTEGER_FIELDS else 'REAL')
+
+
+def _insert(connection: sqlite3.Connection, definitions: List[NozzleParameters]):
+    sql = 'INSERT INTO nozzles ({}) VALUES ({})'.format(', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS)))
+    connection.executemany(sql, [_toRow(nozzleParameters) for nozzleParameters in definitions])
+
+
+def _upsert(connection: sqlite3.Connection, definitions: List[NozzleParameters]):
+    # an existing row is updated in place rather than deleted and inserted again, so it keeps its rowid and place
+    sql = 'INSERT INTO nozzles ({}) VALUES ({}) ON CONFLICT (name) DO UPDATE SET {}'.format(
+        ', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS)),
+        ', '.join('{0} = excluded.{0}'.format(column) for column in _COLUMNS[1:]))
+    connection.executemany(sql, [_toRow(nozzleParameters) for nozzleParameters in definitions])
+
+
+def _toRow(nozzleParameters: NozzleParameters) -> tuple:
+    expansionRatio = (nozzleParameters.exitRadius / nozzleParameters.throatRadius) ** 2
+    contractionRatio = (nozzleParameters.chamberRadius / nozzleParameters.throatRadius) ** 2
+    values = nozzleParameters._replace(divergenceStyle=DivergenceStyle(nozzleParameters.divergenceStyle).value,
+                                       **{field: int(getattr(nozzleParameters, field)) if field in _INTEGER_FIELDS
+                                          else float(getattr(nozzleParameters, field)) for field in _NUMERIC_FIELDS})
+    return tuple(values) + (expansionRatio, contractionRatio)
+
+
+def _toParameters(row: tuple) -> NozzleParameters:
+    nozzleParameters = NozzleParameters(*row[:len(NozzleParameters._fields)])
+    return nozzleParameters._replace(divergenceStyle=DivergenceStyle(nozzleParameters.divergenceStyle))
+
+
+# shared by the command dialog, opened on first use
+nozzleCatalog = NozzleCatalog()
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters
+
+# On-disk store of computed arrays (sampled contours, flow and thermal distributions, sweep columns), keyed by a hash
+# of the nozzle parameters and the solver settings that produced them. Every entry is a folder of .npy files, one per
+# array, which are opened as read-only memory maps: a hit costs a few file opens whatever the size of the arrays, and
+# only the pages that are used are read. Entries are written to a temporary folder and renamed into place, so readers
+# never see a partial entry and concurrent writers of the same key keep one result. The least recently used entries
+# are evicted once the store grows past `maxBytes`.
+
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), 'NozzleGenerator', 'results')
+DEFAULT_MAX_BYTES = 2 ** 30
+
+# part of every key, so a change to how results are computed or laid out can retire all older entries at once
+_FORMAT_VERSION = 1
+_MANIFEST_NAME = 'entry.json'
+_ARRAY_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def getResultKey(kind: str, nozzleParameters: NozzleParameters = None, tolerance: float = 1e-9, **settings) -> str:
+    # floats are quantized to `tolerance` like the ContourCache keys, the design name does not affect results and
+    # is left out; settings may be numbers, strings, enums, NamedTuples, sequences and numpy arrays
+    description = {
+        'version': _FORMAT_VERSION,
+        'kind': kind,
+        'parameters': None if nozzleParameters is None else _describe(nozzleParameters[1:], tolerance),
+        'settings': {name: _describe(value, tolerance) for name, value in sorted(settings.items())},
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH, maxBytes: int = DEFAULT_MAX_BYTES):
+        self._path = path
+        self._maxBytes = maxBytes
+        self._lock = threading.Lock()
+        # bytes of all entries, scanned on first use and kept up to date by this instance only
+        self._size: Optional[int] = None
+
+    def getPath(self) -> str:
+        return self._path
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self._getEntryPath(key), _MANIFEST_NAME))
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        # read-only memory maps by array name, None when the key is not stored
+        entryPath = self._getEntryPath(key)
+        manifestPath = os.path.join(entryPath, _MANIFEST_NAME)
+        try:
+            with open(manifestPath) as file:
+                manifest = json.load(file)
+            arrays = {name: np.load(os.path.join(entryPath, name + '.npy'), mmap_mode='r', allow_pickle=False)
+                      for name in manifest['arrays']}
+            # the manifest's modification time is the entry's last use
+            os.utime(manifestPath)
+        except (OSError, ValueError, KeyError):
+            # missing, or evicted by another process while it was read
+            return None
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], kind: str = '') -> Dict[str, np.ndarray]:
+        def writeArrays(entryPath: str):
+            for name, values in arrays.items():
+                np.save(os.path.join(entryPath, name + '.npy'), np.asarray(values), allow_pickle=False)
+
+        return self.write(key, writeArrays, kind)
+
+    def write(self, key: str, writeEntry: Callable[[str], None], kind: str = '') -> Dict[str, np.ndarray]:
+        # writeEntry(folder) fills an empty folder with .npy files (and anything else it needs), e.g. runSweep
+        # writing its columns in place; the folder becomes the entry once it returns
+        entryPath = self._getEntryPath(key)
+        temporaryPath = os.path.join(os.path.dirname(entryPath), '.{}.{}.tmp'.format(key, uuid.uuid4().hex))
+        os.makedirs(temporaryPath)
+        try:
+            writeEntry(temporaryPath)
+            names = sorted(os.path.splitext(fileName)[0] for fileName in os.listdir(temporaryPath)
+                           if fileName.endswith('.npy'))
+            for name in names:
+                if not _ARRAY_NAME.match(name):
+                    raise ValueError('Cannot store an array named {!r}'.format(name))
+            size = _getFolderSize(temporaryPath)
+            with open(os.path.join(temporaryPath, _MANIFEST_NAME), 'w') as file:
+                json.dump({'kind': kind, 'arrays': names, 'bytes': size}, file, indent=1)
+            try:
+                os.rename(temporaryPath, entryPath)
+            except OSError:
+                # another writer stored the same key first, its arrays are the same
+                if not self.contains(key):
+                    raise
+                shutil.rmtree(temporaryPath, ignore_errors=True)
+            else:
+                self._addSize(size, key)
+        except BaseException:
+            shutil.rmtree(temporaryPath, ignore_errors=True)
+            raise
+        return self.get(key)
+
+    def getOrCompute(self, kind: str, nozzleParameters: NozzleParameters, compute: Callable[[], object],
+                     resultType: type = None, **settings):
+        # compute() returns a dict of arrays, or a NamedTuple of arrays that is rebuilt as `resultType`; fields that
+        # are None are not stored and take the NamedTuple's default
+        key = getResultKey(kind, nozzleParameters, **settings)
+        arrays = self.get(key)
+        if arrays is None:
+            result = compute()
+            values = result._asdict() if hasattr(result, '_asdict') else result
+            arrays = self.put(key, {name: value for name, value in values.items() if value is not None}, kind)
+        return arrays if resultType is None else resultType(**arrays)
+
+    def remove(self, key: str):
+        with self._lock:
+            if self._removeEntry(self._getEntryPath(key)):
+                # rescanned when next needed
+                self._size = None
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self._path, ignore_errors=True)
+            self._size = 0
+
+    def getSize(self) -> int:
+        with self._lock:
+            return self._getSize()
+
+    def getCount(self) -> int:
+        return sum(1 for _ in self._getEntries())
+
+    def _addSize(self, size: int, key: str):
+        with self._lock:
+            # a first scan already finds the new entry
+            if self._size is None:
+                self._getSize()
+            else:
+                self._size += size
+            if self._size > self._maxBytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep: str):
+        # oldest use first; the entry just written stays even when it is larger than the cap on its own
+        entries = sorted(self._getEntries(), key=lambda entry: entry[2])
+        for entryPath, size, _ in entries:
+            if self._size <= self._maxBytes:
+                return
+            if os.path.basename(entryPath) != keep and self._removeEntry(entryPath):
+                self._size -= size
+
+    def _removeEntry(self, entryPath: str) -> bool:
+        # renamed out of sight first, so readers see the whole entry or none of it. Fails while the entry's arrays
+        # are mapped on Windows, in which case it is kept until a later eviction.
+        trashPath = os.path.join(os.path.dirname(entryPath), '.{}.{}.trash'.format(os.path.basename(entryPath),
+                                                                                  uuid.uuid4().hex))
+        try:
+            os.rename(entryPath, trashPath)
+        except OSError:
+            return False
+        shutil.rmtree(trashPath, ignore_errors=True)
+        return True
+
+    def _getSize(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._getEntries())
+        return self._size
+
+    def _getEntries(self):
+        # (path, bytes, last use) of every complete entry
+        if not os.path.isdir(self._path):
+            return
+        for shard in os.scandir(self._path):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                manifestPath = os.path.join(entry.path, _MANIFEST_NAME)
+                try:
+                    with open(manifestPath) as file:
+                        size = json.load(file)['bytes']
+                    yield entry.path, size, os.path.getmtime(manifestPath)
+                except (OSError, ValueError, KeyError):
+                    continue
+
+    def _getEntryPath(self, key: str) -> str:
+        # entries are spread over 256 folders, so no folder grows too large to list quickly
+        return os.path.join(self._path, key[:2], key)
+
+
+def _describe(value, tolerance: float):
+    # JSON-able description of a key value
+    if isinstance(value, Enum):
+        return _describe(value.value, tolerance)
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return str(value) if not math.isfinite(value) else int(round(value / tolerance))
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            value = np.round(value / tolerance)
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {'dtype': value.dtype.str, 'shape': list(value.shape), 'sha256': digest}
+    if hasattr(value, '_asdict'):
+        return {'type': type(value).__name__, 'fields': _describe(tuple(value), tolerance)}
+    if isinstance(value, dict):
+        return {str(name): _describe(item, tolerance) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_describe(item, tolerance) for item in value]
+    raise TypeError('Cannot use a {} in a result key'.format(type(value).__name__))
+
+
+def _getFolderSize(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
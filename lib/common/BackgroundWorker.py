@@ -0,0 +1,162 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, NamedTuple, Optional
+
+from adsk.core import Application, CustomEventHandler, CustomEventArgs
+
+from .Common import printTrace, printException
+
+# Runs pure geometry and analysis on a thread pool so the dialog stays responsive. Jobs are submitted on a channel
+# (e.g. 'preview'), a new job cancels the one still pending or running on its channel, and results are posted back
+# through a Fusion custom event, whose handlers run on the UI thread, so callbacks may use the API. Jobs themselves
+# must not touch adsk: only numpy and the geometry package are safe off the UI thread.
+#
+# Any object with registerCustomEvent, unregisterCustomEvent and fireCustomEvent can stand in for the application,
+# tools/fakeadsk dispatches fired events when asked to, which lets the worker run outside Fusion.
+
+DEFAULT_EVENT_ID = 'NozzleGeneratorWorkerResult'
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def isCancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raiseIfCancelled(self):
+        # called by jobs between their stages, a stage itself always runs to completion
+        if self._event.is_set():
+            raise JobCancelledError()
+
+
+class _Job(NamedTuple):
+    id: int
+    channel: str
+    token: CancellationToken
+    onResult: Callable[[object], None]
+    onError: Callable[[BaseException], None]
+
+
+class _JobResult(NamedTuple):
+    job: _Job
+    value: object
+    error: Optional[BaseException]
+
+
+class BackgroundWorker:
+    def __init__(self, eventId: str = DEFAULT_EVENT_ID, maxWorkers: int = 2, application=None):
+        self._eventId = eventId
+        self._maxWorkers = maxWorkers
+        self._application = application
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._customEvent = None
+        self._eventHandler = None
+        self._jobIds = itertools.count(1)
+        # latest job and its future per channel, only touched on the UI thread
+        self._jobs: Dict[str, _Job] = {}
+        self._futures: Dict[str, Future] = {}
+        self._results = queue.SimpleQueue()
+
+    def start(self):
+        if self._executor is not None:
+            return
+        application = self._application or Application.get()
+        self._customEvent = application.registerCustomEvent(self._eventId)
+        self._eventHandler = _ResultEventHandler(self)
+        self._customEvent.add(self._eventHandler)
+        self._executor = ThreadPoolExecutor(self._maxWorkers, thread_name_prefix='NozzleWorker')
+
+    def stop(self):
+        # running jobs are cancelled and their results dropped, the add-in does not wait for them
+        if self._executor is None:
+            return
+        for channel in list(self._jobs):
+            self.cancel(channel)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+        self._customEvent.remove(self._eventHandler)
+        (self._application or Application.get()).unregisterCustomEvent(self._eventId)
+        self._customEvent = None
+        self._eventHandler = None
+
+    def isRunning(self) -> bool:
+        return self._executor is not None
+
+    def submit(self, channel: str, compute: Callable[[CancellationToken], object],
+               onResult: Callable[[object], None], onError: Callable[[BaseException], None] = printException) -> int:
+        # compute(token) runs on a worker thread, onResult(value) or onError(error) later on the UI thread
+        self.start()
+        self.cancel(channel)
+        job = _Job(next(self._jobIds), channel, CancellationToken(), onResult, onError)
+        self._jobs[channel] = job
+        self._futures[channel] = self._executor.submit(self._run, job, compute)
+        return job.id
+
+    def cancel(self, channel: str):
+        job = self._jobs.pop(channel, None)
+        if job is None:
+            return
+        job.token.cancel()
+        self._futures.pop(channel).cancel()
+
+    def isPending(self, channel: str) -> bool:
+        # True until the result of the channel's latest job has been delivered
+        return channel in self._jobs
+
+    def _run(self, job: _Job, compute: Callable[[CancellationToken], object]):
+        # worker thread
+        if job.token.isCancelled():
+            return
+        try:
+            value, error = compute(job.token), None
+        except JobCancelledError:
+            return
+        except BaseException as exception:
+            value, error = None, exception
+        if job.token.isCancelled():
+            return
+        self._results.put(_JobResult(job, value, error))
+        (self._application or Application.get()).fireCustomEvent(self._eventId, str(job.id))
+
+    def deliverResults(self):
+        # UI thread: one event may carry several results, results of jobs replaced since they finished are dropped
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            job = result.job
+            if self._jobs.get(job.channel) is not job:
+                continue
+            del self._jobs[job.channel]
+            del self._futures[job.channel]
+            if result.error is None:
+                job.onResult(result.value)
+            else:
+                job.onError(result.error)
+
+
+class _ResultEventHandler(CustomEventHandler):
+    def __init__(self, worker: BackgroundWorker):
+        super().__init__()
+        self._worker = worker
+
+    def notify(self, args: CustomEventArgs):
+        try:
+            self._worker.deliverResults()
+        except:
+            printTrace()
+
+
+# shared by the command handlers
+backgroundWorker = BackgroundWorker()
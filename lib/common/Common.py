@@ -11,3 +11,9 @@ resourceFolder = './resources'
 
 def printTrace():
     ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+def printException(exception: BaseException):
+    # for exceptions caught on another thread and handed to the UI thread
+    ui.messageBox('Failed:\n{}'.format(''.join(
+        traceback.format_exception(type(exception), exception, exception.__traceback__))))
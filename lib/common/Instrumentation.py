@@ -0,0 +1,175 @@
+import cProfile
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+# Opt-in timing of the generation stages. While enabled, every stage is recorded as a span in a fixed size ring buffer,
+# so a long session keeps only the latest generations, and the buffer can be exported as a Chrome trace
+# (chrome://tracing or https://ui.perfetto.dev) or as plain JSON. cProfile capture is enabled separately, as it slows
+# generation down considerably. Nothing is recorded while disabled and a stage costs a single check.
+
+DEFAULT_OUTPUT_FOLDER = os.path.join(tempfile.gettempdir(), 'NozzleGenerator')
+
+
+class TraceEvent(NamedTuple):
+    name: str
+    category: str
+    # perf_counter seconds
+    startTime: float
+    duration: float
+    threadId: int
+    args: dict
+
+
+class _Stage:
+    def __init__(self, instrumentation: 'Instrumentation', name: str, category: str, args: dict):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._category = category
+        self._startTime = 0.0
+        # counts added while the stage runs are exported with it
+        self.args = args
+
+    def __enter__(self) -> '_Stage':
+        self._startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is not None:
+            self.args['error'] = excType.__name__
+        self._instrumentation.addEvent(TraceEvent(self._name, self._category, self._startTime,
+                                                  time.perf_counter() - self._startTime, threading.get_ident(),
+                                                  self.args))
+        return False
+
+
+class _DisabledStage:
+    def __init__(self):
+        self.args = {}
+
+    def __enter__(self) -> '_DisabledStage':
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        # counts callers add are thrown away
+        self.args.clear()
+        return False
+
+
+class _Profile:
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._profile = cProfile.Profile()
+
+    def __enter__(self) -> '_Profile':
+        self._profile.enable()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self._profile.disable()
+        self._instrumentation._saveProfile(self._profile, self._name)
+        return False
+
+
+class Instrumentation:
+    def __init__(self, capacity: int = 4096, outputFolder: str = DEFAULT_OUTPUT_FOLDER):
+        self._events = deque(maxlen=capacity)
+        self._outputFolder = outputFolder
+        self._isEnabled = False
+        self._isProfilingEnabled = False
+        self._lastProfilePath: Optional[str] = None
+        self._disabledStage = _DisabledStage()
+        self._lock = threading.Lock()
+
+    def isEnabled(self) -> bool:
+        return self._isEnabled
+
+    def setEnabled(self, isEnabled: bool):
+        self._isEnabled = isEnabled
+
+    def isProfilingEnabled(self) -> bool:
+        return self._isProfilingEnabled
+
+    def setProfilingEnabled(self, isProfilingEnabled: bool):
+        self._isProfilingEnabled = isProfilingEnabled
+
+    def getOutputFolder(self) -> str:
+        return self._outputFolder
+
+    def stage(self, name: str, category: str = 'generation', **args):
+        # with instrumentation.stage('symmetry lines', operations=12) as stage: ... stage.args['entities'] = n
+        if not self._isEnabled:
+            return self._disabledStage
+        return _Stage(self, name, category, dict(args))
+
+    def profile(self, name: str):
+        # cProfile capture of the block, saved as <outputFolder>/<name>-<time>.prof for pstats or snakeviz
+        if not self._isProfilingEnabled:
+            return self._disabledStage
+        return _Profile(self, name)
+
+    def addEvent(self, event: TraceEvent):
+        with self._lock:
+            self._events.append(event)
+
+    def getEvents(self) -> [TraceEvent]:
+        with self._lock:
+            return list(self._events)
+
+    def getLastProfilePath(self) -> Optional[str]:
+        return self._lastProfilePath
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def toChromeTrace(self) -> dict:
+        # complete ("X") events in microseconds, nested stages share a thread and are shown inside their parent
+        events = self.getEvents()
+        origin = min((event.startTime for event in events), default=0.0)
+        processId = os.getpid()
+        return {
+            'traceEvents': [{
+                'name': event.name,
+                'cat': event.category,
+                'ph': 'X',
+                'ts': (event.startTime - origin) * 1e6,
+                'dur': event.duration * 1e6,
+                'pid': processId,
+                'tid': event.threadId,
+                'args': event.args,
+            } for event in events],
+            'displayTimeUnit': 'ms',
+        }
+
+    def exportChromeTrace(self, path: str = None) -> str:
+        path = path or self._getOutputPath('trace', 'json')
+        with open(path, 'w') as file:
+            json.dump(self.toChromeTrace(), file)
+        return path
+
+    def exportJson(self, path: str = None) -> str:
+        path = path or self._getOutputPath('timings', 'json')
+        with open(path, 'w') as file:
+            json.dump([event._asdict() for event in self.getEvents()], file, indent=1)
+        return path
+
+    def _saveProfile(self, profile: cProfile.Profile, name: str):
+        self._lastProfilePath = self._getOutputPath(name, 'prof')
+        profile.dump_stats(self._lastProfilePath)
+
+    def _getOutputPath(self, name: str, extension: str) -> str:
+        if not os.path.isdir(self._outputFolder):
+            os.makedirs(self._outputFolder)
+        now = time.time()
+        timestamp = '{}-{:03d}'.format(time.strftime('%Y%m%d-%H%M%S', time.localtime(now)), int(now * 1000) % 1000)
+        return os.path.join(self._outputFolder, '{}-{}.{}'.format(name, timestamp, extension))
+
+
+# shared by the command handlers and the sketch code
+instrumentation = Instrumentation()
@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+import numpy as np
+
+from .CfdMesh import MeshSpacing, exportCfdMesh
+from .MeshExport import exportEngineMesh
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle, WallLayers, DEFAULT_WALL_LAYERS, DIMENSION_FIELDS
+from ..analysis.DesignSweep import METRICS, evaluateDesigns
+from ..geometry.ContourCache import contourCache
+from ..geometry.WallOffset import removeRepeatedPoints
+
+# Artifacts for a stream of nozzle definitions without Fusion: the wall layer contours as CSV points, one metrics row
+# per definition and optionally a revolved mesh and an OpenFOAM mesh of the gas. Definitions are read lazily and handed
+# to the workers with a bounded number in flight, and every result is written as soon as it is in order, so memory
+# does not grow with the input beyond the folder names already used.
+# Values are in the units of NozzleDefinition (mm and degrees).
+
+METRICS_FILE_NAME = 'metrics.csv'
+CONTOUR_FILE_NAME = 'contour.csv'
+CFD_FOLDER_NAME = 'cfd'
+METRICS_COLUMNS = ('name', 'divergenceStyle') + tuple(metric.name for metric in METRICS) + ('error',)
+
+
+class BatchOptions(NamedTuple):
+    wallLayers: WallLayers = DEFAULT_WALL_LAYERS
+    pointsPerSegment: int = 32
+    # 'stl', 'obj' or None for no mesh
+    meshFormat: Optional[str] = None
+    meshSegments: int = 128
+    # spacing of an OpenFOAM mesh of the gas volume written into <name>/cfd, None for no CFD mesh
+    cfdMesh: Optional[MeshSpacing] = None
+
+
+# Reading --------------------------------------------------------------------------------------------------------------
+
+
+def readDefinitions(file: TextIO, fileFormat: str) -> Iterator[NozzleParameters]:
+    # 'csv' with a header row or 'jsonl' with one object per line, both keyed by NozzleParameters field names.
+    # divergenceStyle defaults to a cone and a missing name to the definition's position in the file.
+    if fileFormat == 'csv':
+        records = ((reader.line_num, row) for reader in [csv.DictReader(file)] for row in reader)
+    elif fileFormat == 'jsonl':
+        records = ((lineNumber, json.loads(line)) for lineNumber, line in enumerate(file, 1) if line.strip())
+    else:
+        raise ValueError('Unknown definition format: {}'.format(fileFormat))
+    for index, (lineNumber, record) in enumerate(records):
+        try:
+            yield _toParameters(record, index)
+        except (TypeError, ValueError) as error:
+            raise ValueError('Invalid nozzle definition on line {}: {}'.format(lineNumber, error)) from error
+
+
+def getFileFormat(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError('Cannot tell the format of {}, use a .csv or .jsonl file'.format(path))
+
+
+def _toParameters(record: dict, index: int) -> NozzleParameters:
+    unknownFields = set(record) - set(NozzleParameters._fields)
+    if unknownFields:
+        raise ValueError('unknown fields {}'.format(', '.join(sorted(unknownFields))))
+    missingFields = [field for field in DIMENSION_FIELDS if record.get(field) in (None, '')]
+    if missingFields:
+        raise ValueError('missing fields {}'.format(', '.join(missingFields)))
+    name = str(record.get('name') or 'nozzle{}'.format(index))
+    values = {field: float(record[field]) for field in DIMENSION_FIELDS}
+    divergenceStyle = DivergenceStyle(record.get('divergenceStyle') or DivergenceStyle.CONE.value)
+    # the method of characteristics settings are optional and fall back to the NozzleParameters defaults
+    for field, fieldType in (('gamma', float), ('characteristicCount', int)):
+        if record.get(field) not in (None, ''):
+            values[field] = fieldType(record[field])
+    return NozzleParameters(name=name, divergenceStyle=divergenceStyle, **values)
+
+
+# Generation -----------------------------------------------------------------------------------------------------------
+
+
+def generateArtifacts(nozzleParameters: NozzleParameters, outputFolder: str, options: BatchOptions) -> Dict[str, object]:
+    # writes the artifacts of one definition into <outputFolder>/<name>/ and returns its metrics row
+    row = {'name': nozzleParameters.name, 'divergenceStyle': DivergenceStyle(nozzleParameters.divergenceStyle).value}
+    try:
+        metrics = evaluateDesigns(nozzleParameters, {'throatRadius': np.array([nozzleParameters.throatRadius])},
+                                  options.pointsPerSegment)
+        row.update({name: values[0].item() for name, values in metrics.items()})
+        folder = os.path.join(outputFolder, getFolderName(nozzleParameters.name))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        _writeContour(os.path.join(folder, CONTOUR_FILE_NAME), nozzleParameters, options)
+        if options.meshFormat is not None:
+            exportEngineMesh(nozzleParameters, options.wallLayers, os.path.join(folder, 'engine.' + options.meshFormat),
+                             options.meshSegments, options.pointsPerSegment)
+        if options.cfdMesh is not None:
+            exportCfdMesh(nozzleParameters, os.path.join(folder, CFD_FOLDER_NAME), options.cfdMesh)
+    except (ValueError, ArithmeticError, OSError) as error:
+        row['error'] = '{}: {}'.format(type(error).__name__, error)
+    return row
+
+
+def generateBatch(definitions: Iterable[NozzleParameters], outputFolder: str, options: BatchOptions = BatchOptions(),
+                  workers: int = None, onResult: Callable[[Dict[str, object]], None] = None) -> int:
+    # generates every definition on `workers` processes (all cores by default, 1 runs in this process), appends the
+    # metrics rows to <outputFolder>/metrics.csv in input order and returns the number of definitions that failed
+    workers = workers or os.cpu_count() or 1
+    if not os.path.isdir(outputFolder):
+        os.makedirs(outputFolder)
+    failedCount = 0
+    folderNames = set()
+    with open(os.path.join(outputFolder, METRICS_FILE_NAME), 'w', newline='') as metricsFile:
+        writer = csv.DictWriter(metricsFile, METRICS_COLUMNS)
+        writer.writeheader()
+
+        def write(row: Dict[str, object]):
+            nonlocal failedCount
+            failedCount += 'error' in row
+            writer.writerow(row)
+            if onResult is not None:
+                onResult(row)
+
+        if workers == 1:
+            for nozzleParameters in definitions:
+                duplicateRow = _reserveFolder(nozzleParameters, folderNames)
+                write(duplicateRow or generateArtifacts(nozzleParameters, outputFolder, options))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                pending = deque()
+                for nozzleParameters in definitions:
+                    duplicateRow = _reserveFolder(nozzleParameters, folderNames)
+                    if duplicateRow is None:
+                        future = executor.submit(generateArtifacts, nozzleParameters, outputFolder, options)
+                    else:
+                        future = Future()
+                        future.set_result(duplicateRow)
+                    pending.append(future)
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    return failedCount
+
+
+def getFolderName(name: str) -> str:
+    # definition names are free text, folders only keep characters that are safe on every platform
+    return re.sub(r'[^\w.-]+', '_', name).strip('._') or 'nozzle'
+
+
+def _reserveFolder(nozzleParameters: NozzleParameters, folderNames: set) -> Optional[Dict[str, object]]:
+    # names that give the same folder, also when they only differ in case on a case-insensitive file system, would
+    # overwrite each other's artifacts; the first definition keeps the folder and the others get an error row instead
+    folderName = getFolderName(nozzleParameters.name)
+    if folderName.lower() not in folderNames:
+        folderNames.add(folderName.lower())
+        return None
+    return {'name': nozzleParameters.name, 'divergenceStyle': DivergenceStyle(nozzleParameters.divergenceStyle).value,
+            'error': 'ValueError: {!r} uses the folder {} of an earlier definition'.format(nozzleParameters.name,
+                                                                                          folderName)}
+
+
+def _writeContour(path: str, nozzleParameters: NozzleParameters, options: BatchOptions):
+    # (radius, axial) points from the chamber to the exit of every wall layer, layer 0 is the gas-side wall
+    layers = contourCache.getOffsetPoints(nozzleParameters, options.wallLayers.getOffsets(), options.pointsPerSegment)
+    buffer = io.StringIO()
+    buffer.write('layer,radius,axial\n')
+    for layer, points in enumerate(layers):
+        points = removeRepeatedPoints(points)
+        np.savetxt(buffer, np.column_stack([np.full(len(points), layer), points]), fmt=('%d', '%.9g', '%.9g'),
+                   delimiter=',')
+    with open(path, 'w') as file:
+        file.write(buffer.getvalue())
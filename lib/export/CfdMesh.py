@@ -0,0 +1,353 @@
+import json
+import math
+import os
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters
+from ..geometry.ContourCache import contourCache
+from ..geometry.WallOffset import removeRepeatedPoints
+
+# Structured quad meshes of the gas inside the nozzle, for 2D axisymmetric CFD. Every station is a straight line across
+# the flow at a fixed axial position, from the axis to the wall, and every station is split radially at the same
+# fractions of the local wall radius, so the whole mesh is defined by three 1D arrays (see AxisymmetricMesh) and any
+# slab of stations is generated on demand. The writers stream `chunkStations` stations at a time, so a 10^7 cell mesh
+# needs memory for a few of its slabs, not for the whole mesh.
+#
+# Mesh coordinates run from the injector face downstream: x is the axial distance from the injector face and r the
+# radius, in the units of the nozzle parameters; the writers scale them by `lengthScale` (mm to metres by default).
+
+POLY_MESH_FOLDER = os.path.join('constant', 'polyMesh')
+ARRAYS_MANIFEST_NAME = 'mesh.json'
+# patches of the OpenFOAM mesh, in the order their faces are written
+PATCHES = ('inlet', 'outlet', 'wall', 'front', 'back', 'axis')
+
+_PATCH_TYPES = {'inlet': 'patch', 'outlet': 'patch', 'wall': 'wall', 'front': 'wedge', 'back': 'wedge', 'axis': 'empty'}
+_LABEL_LIMIT = 2 ** 31 - 1
+
+
+class MeshSpacing(NamedTuple):
+    axialCells: int = 400
+    radialCells: int = 100
+    # strength of the axial clustering around the throat (Roberts' interior stretching), 0 spaces stations evenly
+    throatClustering: float = 3.0
+    # height of the cell at the wall over that of the cell on the axis, like blockMesh's simpleGrading; below 1 the
+    # cells are graded towards the wall
+    radialGrading: float = 0.1
+
+
+class AxisymmetricMesh(NamedTuple):
+    # node (i, j) sits at x = axialPositions[i], r = wallRadii[i] * radialFractions[j]
+    axialPositions: np.ndarray
+    wallRadii: np.ndarray
+    radialFractions: np.ndarray
+
+    @property
+    def axialCells(self) -> int:
+        return len(self.axialPositions) - 1
+
+    @property
+    def radialCells(self) -> int:
+        return len(self.radialFractions) - 1
+
+    @property
+    def cellCount(self) -> int:
+        return self.axialCells * self.radialCells
+
+    def getNodes(self, start: int, stop: int) -> np.ndarray:
+        # (x, r) of the nodes of stations start..stop, shape (stop - start, radialCells + 1, 2)
+        axial = np.broadcast_to(self.axialPositions[start:stop, None], (stop - start, len(self.radialFractions)))
+        return np.stack([axial, self.wallRadii[start:stop, None] * self.radialFractions], axis=-1)
+
+
+def buildMesh(nozzleParameters: NozzleParameters, spacing: MeshSpacing = MeshSpacing(), pointsPerSegment: int = 256,
+              degrees: bool = True) -> AxisymmetricMesh:
+    # the wall radius at every station is interpolated on the contour sampled with `pointsPerSegment`
+    if spacing.axialCells < 1 or spacing.radialCells < 1:
+        raise ValueError('A mesh needs at least one cell in each direction')
+    if not spacing.radialGrading > 0:
+        raise ValueError('radialGrading must be greater than zero')
+    contour = contourCache.getContour(nozzleParameters, degrees=degrees)
+    points = removeRepeatedPoints(contourCache.getPoints(nozzleParameters, 0.0, pointsPerSegment, degrees))
+    injectorY = float(contour.chamberStart[1])
+    # the contour runs from the injector face to the exit plane, so the axial distance increases along it
+    wallAxial = injectorY - points[:, 1]
+    if np.any(np.diff(wallAxial) < 0) or np.any(points[:, 0] <= 0):
+        raise ValueError('The nozzle wall has to move downstream and stay off the axis to be meshed')
+    length = float(wallAxial[-1])
+    throatPosition = injectorY - float(contour.minimumRadiusPoint[1])
+    axialPositions = getClusteredSpacing(spacing.axialCells, length, throatPosition, spacing.throatClustering)
+    wallRadii = np.interp(axialPositions, wallAxial, points[:, 0])
+    return AxisymmetricMesh(axialPositions, wallRadii, getGradedSpacing(spacing.radialCells, spacing.radialGrading))
+
+
+def getClusteredSpacing(cells: int, length: float, position: float, clustering: float) -> np.ndarray:
+    # cells + 1 nodes from 0 to `length`, concentrated around `position` (Roberts' transformation, see Anderson,
+    # Computational Fluid Dynamics, 5.6)
+    unit = np.linspace(0.0, 1.0, cells + 1)
+    if clustering <= 0:
+        return unit * length
+    fraction = min(max(position / length, 0.0), 1.0)
+    shift = 1 / (2 * clustering) * math.log((1 + (math.exp(clustering) - 1) * fraction) /
+                                            (1 + (math.exp(-clustering) - 1) * fraction))
+    nodes = position * (1 + np.sinh(clustering * (unit - shift)) / math.sinh(clustering * shift))
+    # exact ends, the transformation only meets them up to rounding
+    nodes[0], nodes[-1] = 0.0, length
+    return nodes
+
+
+def getGradedSpacing(cells: int, grading: float) -> np.ndarray:
+    # cells + 1 fractions from 0 to 1, cell sizes in geometric progression with last over first equal to `grading`
+    if cells == 1 or grading == 1:
+        return np.linspace(0.0, 1.0, cells + 1)
+    sizes = grading ** (np.arange(cells) / (cells - 1))
+    fractions = np.concatenate([[0.0], np.cumsum(sizes)])
+    fractions /= fractions[-1]
+    return fractions
+
+
+# OpenFOAM -------------------------------------------------------------------------------------------------------------
+
+
+def writePolyMesh(caseFolder: str, mesh: AxisymmetricMesh, wedgeAngle: float = 5.0, lengthScale: float = 1e-3,
+                  binary: bool = True, chunkStations: int = 256):
+    # constant/polyMesh of an OpenFOAM case: a wedge of `wedgeAngle` degrees about the x axis, one cell thick, split
+    # evenly by the x-y plane. The axis is collapsed, so the cells along it are prisms and the empty axis patch has
+    # no faces; the wedge and wall faces are planar.
+    counts = _getPolyMeshCounts(mesh)
+    if max(counts.labels, counts.faces + 1, counts.points) > _LABEL_LIMIT:
+        raise ValueError('The mesh is too large for 32-bit OpenFOAM labels')
+    folder = os.path.join(caseFolder, POLY_MESH_FOLDER)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    note = 'nPoints:{}  nCells:{}  nFaces:{}  nInternalFaces:{}'.format(counts.points, mesh.cellCount, counts.faces,
+                                                                     counts.internalFaces)
+    halfAngle = math.radians(wedgeAngle) / 2
+
+    with _FoamListWriter(os.path.join(folder, 'points'), 'vectorField', 'points', binary) as points:
+        points.begin(counts.points, '<f8')
+        for start in range(0, len(mesh.axialPositions), chunkStations):
+            points.write(_getWedgePoints(mesh, start, min(start + chunkStations, len(mesh.axialPositions)),
+                                         halfAngle) * lengthScale)
+
+    # faceCompactList: the offsets of every face into the point labels, then the labels
+    with _FoamListWriter(os.path.join(folder, 'faces'), 'faceCompactList', 'faces', binary) as faces:
+        faces.begin(counts.faces + 1, '<i4')
+        offset = 0
+        faces.write(np.zeros(1, dtype=np.int64))
+        for labels, _, _ in _generateFaces(mesh, chunkStations):
+            sizes = np.count_nonzero(labels >= 0, axis=-1)
+            faces.write(offset + np.cumsum(sizes))
+            offset += int(np.sum(sizes))
+        faces.begin(counts.labels, '<i4')
+        with _FoamListWriter(os.path.join(folder, 'owner'), 'labelList', 'owner', binary, note) as owner, \
+                _FoamListWriter(os.path.join(folder, 'neighbour'), 'labelList', 'neighbour', binary, note) as neighbour:
+            owner.begin(counts.faces, '<i4')
+            neighbour.begin(counts.internalFaces, '<i4')
+            for labels, owners, neighbours in _generateFaces(mesh, chunkStations):
+                faces.write(labels[labels >= 0])
+                owner.write(owners)
+                if neighbours is not None:
+                    neighbour.write(neighbours)
+
+    _writeBoundary(os.path.join(folder, 'boundary'), _getPatchSizes(mesh), counts.internalFaces)
+
+
+class _PolyMeshCounts(NamedTuple):
+    points: int
+    faces: int
+    internalFaces: int
+    # point labels of all faces
+    labels: int
+
+
+def _getPolyMeshCounts(mesh: AxisymmetricMesh) -> _PolyMeshCounts:
+    axialCells, radialCells = mesh.axialCells, mesh.radialCells
+    internalFaces = axialCells * (radialCells - 1) + (axialCells - 1) * radialCells
+    faces = internalFaces + sum(_getPatchSizes(mesh).values())
+    # faces touching the axis in an axial plane are triangles
+    triangles = axialCells + 1
+    return _PolyMeshCounts((axialCells + 1) * (2 * radialCells + 1), faces, internalFaces, 4 * faces - triangles)
+
+
+def _getPatchSizes(mesh: AxisymmetricMesh) -> dict:
+    axialCells, radialCells = mesh.axialCells, mesh.radialCells
+    return {'inlet': radialCells, 'outlet': radialCells, 'wall': axialCells, 'front': axialCells * radialCells,
+            'back': axialCells * radialCells, 'axis': 0}
+
+
+def _getWedgePoints(mesh: AxisymmetricMesh, start: int, stop: int, halfAngle: float) -> np.ndarray:
+    # every station holds its axis point, then the off-axis nodes on the front plane (z < 0), then on the back plane
+    nodes = mesh.getNodes(start, stop)
+    axial, radius = nodes[..., 1:, 0], nodes[..., 1:, 1]
+    front = np.stack([axial, radius * math.cos(halfAngle), -radius * math.sin(halfAngle)], axis=-1)
+    back = front * np.array([1.0, 1.0, -1.0])
+    axis = np.stack([nodes[:, :1, 0], np.zeros((stop - start, 1)), np.zeros((stop - start, 1))], axis=-1)
+    return np.concatenate([axis, front, back], axis=1).reshape(-1, 3)
+
+
+def _generateFaces(mesh: AxisymmetricMesh, chunkStations: int) -> Iterator[tuple]:
+    # (faces, 4) point labels padded with -1 for triangles, owners and neighbours (None for boundary faces) in
+    # polyMesh order: internal faces by owner and then neighbour, then the faces of every patch in PATCHES order.
+    # Cell (i, j) is number i * radialCells + j, j counts from the axis.
+    axialCells, radialCells = mesh.axialCells, mesh.radialCells
+    stationSize = 2 * radialCells + 1
+
+    def front(i, j):
+        return np.where(j == 0, i * stationSize, i * stationSize + j)
+
+    def back(i, j):
+        return np.where(j == 0, i * stationSize, i * stationSize + radialCells + j)
+
+    def axialFaces(i, j):
+        # across station i, normal pointing downstream; on the axis the last point repeats the first and is dropped
+        return np.stack([front(i, j), front(i, j + 1), back(i, j + 1), np.where(j == 0, -1, back(i, j))], axis=-1)
+
+    def radialFaces(i, j):
+        # at node j of cell row i, normal pointing away from the axis
+        return np.stack([front(i, j), back(i, j), back(i + 1, j), front(i + 1, j)], axis=-1)
+
+    def cells(start, stop):
+        return np.divmod(np.arange(start * radialCells, stop * radialCells), radialCells)
+
+    rows = [(start, min(start + chunkStations, axialCells)) for start in range(0, axialCells, chunkStations)]
+    for start, stop in rows:
+        i, j = cells(start, stop)
+        owner = i * radialCells + j
+        # every cell owns the face to its outer neighbour and then the face to its downstream neighbour
+        labels = np.stack([radialFaces(i, j + 1), axialFaces(i + 1, j)], axis=1).reshape(-1, 4)
+        neighbours = np.stack([owner + 1, owner + radialCells], axis=1).reshape(-1)
+        isInternal = np.stack([j < radialCells - 1, i < axialCells - 1], axis=1).reshape(-1)
+        yield labels[isInternal], np.repeat(owner, 2)[isInternal], neighbours[isInternal]
+
+    j = np.arange(radialCells)
+    inlet = axialFaces(0, j)[:, [3, 2, 1, 0]]
+    # a reversed triangle starts with its padding, which goes back to the end
+    inlet[0] = [inlet[0, 1], inlet[0, 2], inlet[0, 3], -1]
+    yield inlet, j, None
+    yield axialFaces(axialCells, j), (axialCells - 1) * radialCells + j, None
+    i = np.arange(axialCells)
+    yield radialFaces(i, radialCells), i * radialCells + radialCells - 1, None
+    for start, stop in rows:
+        i, j = cells(start, stop)
+        yield np.stack([front(i, j), front(i, j + 1), front(i + 1, j + 1), front(i + 1, j)], axis=-1), \
+            i * radialCells + j, None
+    for start, stop in rows:
+        i, j = cells(start, stop)
+        yield np.stack([back(i, j), back(i + 1, j), back(i + 1, j + 1), back(i, j + 1)], axis=-1), \
+            i * radialCells + j, None
+
+
+def _writeBoundary(path: str, patchSizes: dict, internalFaces: int):
+    # the boundary file is ASCII in both formats
+    entries = []
+    startFace = internalFaces
+    for patch in PATCHES:
+        entries.append('    {}\n    {{\n        type            {};\n        nFaces          {};\n'
+                       '        startFace       {};\n    }}\n'.format(patch, _PATCH_TYPES[patch], patchSizes[patch],
+                                                                       startFace))
+        startFace += patchSizes[patch]
+    with open(path, 'w') as file:
+        file.write(_getFoamHeader('polyBoundaryMesh', 'boundary', False))
+        file.write('{}\n(\n{})\n'.format(len(PATCHES), ''.join(entries)))
+
+
+def _getFoamHeader(className: str, objectName: str, binary: bool, note: str = None) -> str:
+    lines = ['FoamFile', '{', '    version     2.0;', '    format      {};'.format('binary' if binary else 'ascii')]
+    if binary:
+        lines.append('    arch        "LSB;label=32;scalar=64";')
+    lines += ['    class       {};'.format(className)]
+    if note is not None:
+        lines.append('    note        "{}";'.format(note))
+    lines += ['    location    "{}";'.format(POLY_MESH_FOLDER.replace(os.sep, '/')),
+              '    object      {};'.format(objectName), '}', '', '']
+    return '\n'.join(lines)
+
+
+class _FoamListWriter:
+    # writes OpenFOAM lists whose length is known up front in slabs: begin() opens a list, write() appends values,
+    # and the list is closed by the next begin() or when the file is closed
+    def __init__(self, path: str, className: str, objectName: str, binary: bool, note: str = None):
+        self._file = open(path, 'wb')
+        self._file.write(_getFoamHeader(className, objectName, binary, note).encode())
+        self._binary = binary
+        self._dtype = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self._end()
+        self._file.close()
+
+    def begin(self, count: int, dtype: str):
+        self._end()
+        self._dtype = np.dtype(dtype)
+        self._file.write('{}\n({}'.format(count, '' if self._binary else '\n').encode())
+
+    def write(self, values: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=self._dtype)
+        if self._binary:
+            self._file.write(values.tobytes())
+        elif values.ndim == 2:
+            self._file.write(''.join('({:.10g} {:.10g} {:.10g})\n'.format(*point) for point in values.tolist())
+                             .encode())
+        else:
+            self._file.write(''.join('{}\n'.format(value) for value in values.tolist()).encode())
+
+    def _end(self):
+        if self._dtype is not None:
+            self._file.write(b')\n\n')
+            self._dtype = None
+
+
+# Arrays ---------------------------------------------------------------------------------------------------------------
+
+
+def writeStructuredArrays(path: str, mesh: AxisymmetricMesh, lengthScale: float = 1e-3, chunkStations: int = 256):
+    # the structured zone as CGNS names it: CoordinateX (axial) and CoordinateY (radius) node arrays of shape
+    # (axialCells + 1, radialCells + 1) as .npy files, and a manifest with the zone size and boundary ranges
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    shape = (len(mesh.axialPositions), len(mesh.radialFractions))
+    columns = [np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+', dtype='<f8', shape=shape)
+               for name in ('CoordinateX', 'CoordinateY')]
+    for start in range(0, shape[0], chunkStations):
+        stop = min(start + chunkStations, shape[0])
+        nodes = mesh.getNodes(start, stop) * lengthScale
+        columns[0][start:stop] = nodes[..., 0]
+        columns[1][start:stop] = nodes[..., 1]
+    for column in columns:
+        column.flush()
+    axialNodes, radialNodes = shape
+    with open(os.path.join(path, ARRAYS_MANIFEST_NAME), 'w') as file:
+        json.dump({
+            'zoneType': 'Structured',
+            # array index order, the first index is the axial station
+            'indexOrder': ['axial', 'radial'],
+            'vertexSize': [axialNodes, radialNodes],
+            'cellSize': [axialNodes - 1, radialNodes - 1],
+            'coordinates': ['CoordinateX', 'CoordinateY'],
+            'axisymmetry': {'referencePoint': [0.0, 0.0], 'axisVector': [1.0, 0.0]},
+            # inclusive 0-based node ranges of every boundary
+            'boundaries': {
+                'inlet': [[0, 0], [0, radialNodes - 1]],
+                'outlet': [[axialNodes - 1, axialNodes - 1], [0, radialNodes - 1]],
+                'wall': [[0, axialNodes - 1], [radialNodes - 1, radialNodes - 1]],
+                'axis': [[0, axialNodes - 1], [0, 0]],
+            },
+            'lengthScale': lengthScale,
+        }, file, indent=1)
+
+
+def exportCfdMesh(nozzleParameters: NozzleParameters, path: str, spacing: MeshSpacing = MeshSpacing(),
+                  meshFormat: str = 'openfoam', lengthScale: float = 1e-3, degrees: bool = True):
+    # 'openfoam' writes constant/polyMesh into the case folder `path`, 'arrays' the structured zone into `path`
+    mesh = buildMesh(nozzleParameters, spacing, degrees=degrees)
+    if meshFormat == 'openfoam':
+        writePolyMesh(path, mesh, lengthScale=lengthScale)
+    elif meshFormat == 'arrays':
+        writeStructuredArrays(path, mesh, lengthScale)
+    else:
+        raise ValueError('Unknown CFD mesh format: {}'.format(meshFormat))
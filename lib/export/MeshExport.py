@@ -0,0 +1,118 @@
+import math
+import struct
+from typing import Iterator, List
+
+import numpy as np
+
+from ..NozzleDefinitions import NozzleParameters, WallLayers
+from ..geometry.ContourCache import contourCache
+from ..geometry.WallOffset import removeRepeatedPoints
+
+# Revolved triangle meshes of the engine walls, written without Fusion. The wall profiles are revolved one profile
+# edge (ring band) at a time and every band is written as soon as it is built, so only `chunkEdges` bands of facets
+# are ever held in memory no matter how fine the mesh is.
+
+STL_FACET_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+def getEngineProfiles(nozzleParameters: NozzleParameters, wallLayers: WallLayers, pointsPerSegment: int = 32,
+                      degrees: bool = True) -> List[np.ndarray]:
+    # closed (x radius, y axial) outlines of the inner wall and the outer wall, the channel between them is empty
+    layers = [removeRepeatedPoints(points) for points in
+              contourCache.getOffsetPoints(nozzleParameters, wallLayers.getOffsets(), pointsPerSegment, degrees)]
+    return [getWallProfile(layers[0], layers[1]), getWallProfile(layers[2], layers[3])]
+
+
+def getWallProfile(innerPoints: np.ndarray, outerPoints: np.ndarray) -> np.ndarray:
+    # counter-clockwise loop in the (radius, axial) plane, so revolved faces point out of the solid
+    profile = np.concatenate([innerPoints, outerPoints[::-1]])
+    signedArea = np.sum(profile[:, 0] * np.roll(profile[:, 1], -1) - np.roll(profile[:, 0], -1) * profile[:, 1])
+    return profile if signedArea > 0 else profile[::-1]
+
+
+def getFacetCount(profiles: List[np.ndarray], segments: int) -> int:
+    return sum(2 * segments * len(profile) for profile in profiles)
+
+
+def generateFacets(profile: np.ndarray, segments: int, chunkEdges: int = 64) -> Iterator[np.ndarray]:
+    # yields (facets, 3, 3) vertex arrays for `chunkEdges` edges of the closed profile at a time
+    angles = np.linspace(0.0, 2 * math.pi, segments + 1)
+    cosines, sines = np.cos(angles), np.sin(angles)
+    edgeStarts = profile
+    edgeEnds = np.roll(profile, -1, axis=0)
+    for start in range(0, len(profile), chunkEdges):
+        startRings = _revolve(edgeStarts[start:start + chunkEdges], cosines, sines)
+        endRings = _revolve(edgeEnds[start:start + chunkEdges], cosines, sines)
+        a, b = startRings[:, :-1], startRings[:, 1:]
+        c, d = endRings[:, :-1], endRings[:, 1:]
+        facets = np.concatenate([np.stack([a, b, c], axis=-2), np.stack([b, d, c], axis=-2)], axis=1)
+        yield facets.reshape(-1, 3, 3)
+
+
+def writeBinaryStl(path: str, profiles: List[np.ndarray], segments: int, chunkEdges: int = 64):
+    with open(path, 'wb') as file:
+        file.write(b'NozzleGenerator revolved mesh'.ljust(80, b' '))
+        file.write(struct.pack('<I', getFacetCount(profiles, segments)))
+        for profile in profiles:
+            for facets in generateFacets(profile, segments, chunkEdges):
+                records = np.zeros(len(facets), dtype=STL_FACET_DTYPE)
+                records['normal'] = _getNormals(facets)
+                records['vertices'] = facets
+                file.write(records.tobytes())
+
+
+def writeObj(path: str, profiles: List[np.ndarray], segments: int, chunkEdges: int = 64):
+    # OBJ shares vertices between faces, every profile point becomes one ring of `segments` vertices. Like the STL,
+    # rings are revolved and written `chunkEdges` profile points at a time together with the faces of their bands.
+    angles = np.linspace(0.0, 2 * math.pi, segments, endpoint=False)
+    cosines, sines = np.cos(angles), np.sin(angles)
+    ringOffsets = np.arange(segments)
+    nextOffsets = (ringOffsets + 1) % segments
+    with open(path, 'w') as file:
+        vertexCount = 0
+        for bodyIndex, profile in enumerate(profiles):
+            file.write('o wall{}\n'.format(bodyIndex))
+            firstRing = vertexCount + 1
+            for start in range(0, len(profile), chunkEdges):
+                rings = _revolve(profile[start:start + chunkEdges], cosines, sines)
+                np.savetxt(file, rings.reshape(-1, 3), fmt='v %.6f %.6f %.6f')
+                # 1-based first vertex of every ring of the chunk, each joined to the ring before it
+                ringStarts = vertexCount + 1 + segments * np.arange(len(rings))
+                bandEnds = ringStarts[1:] if start == 0 else ringStarts
+                _writeBandFaces(file, bandEnds - segments, bandEnds, ringOffsets, nextOffsets)
+                vertexCount += segments * len(rings)
+            # close the profile loop between its last and first ring
+            _writeBandFaces(file, np.array([vertexCount - segments + 1]), np.array([firstRing]), ringOffsets,
+                            nextOffsets)
+
+
+def exportEngineMesh(nozzleParameters: NozzleParameters, wallLayers: WallLayers, path: str, segments: int = 128,
+                     pointsPerSegment: int = 32, degrees: bool = True):
+    profiles = getEngineProfiles(nozzleParameters, wallLayers, pointsPerSegment, degrees)
+    if path.lower().endswith('.obj'):
+        writeObj(path, profiles, segments)
+    else:
+        writeBinaryStl(path, profiles, segments)
+
+
+def _revolve(points: np.ndarray, cosines: np.ndarray, sines: np.ndarray) -> np.ndarray:
+    # revolve (x radius, y axial) sketch points about the sketch's y axis, shape (points, angles, 3)
+    radius, axial = points[:, 0, None], points[:, 1, None]
+    return np.stack([radius * cosines, np.broadcast_to(axial, (len(points), len(cosines))), -radius * sines], axis=-1)
+
+
+def _getNormals(facets: np.ndarray) -> np.ndarray:
+    normals = np.cross(facets[:, 1] - facets[:, 0], facets[:, 2] - facets[:, 0])
+    lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return normals / np.where(lengths == 0, 1, lengths)
+
+
+def _writeBandFaces(file, startRings: np.ndarray, endRings: np.ndarray, ringOffsets: np.ndarray,
+                    nextOffsets: np.ndarray):
+    # 1-based OBJ indices of the quads between each pair of rings, split into triangles with the winding of
+    # generateFacets
+    startRings, endRings = startRings[:, None], endRings[:, None]
+    a, b = startRings + ringOffsets, startRings + nextOffsets
+    c, d = endRings + ringOffsets, endRings + nextOffsets
+    faces = np.concatenate([np.stack([a, b, c], axis=-1), np.stack([b, d, c], axis=-1)], axis=1)
+    np.savetxt(file, faces.reshape(-1, 3), fmt='f %d %d %d')
@@ -0,0 +1,123 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+# Rao's thrust-optimised parabolic approximation. The divergent wall is a circular arc of radius 0.382 * throatRadius
+# leaving the throat, followed by a quadratic Bezier curve from the arc's end (N) to the exit (E), whose control point
+# is the intersection of the wall tangents at N and E. The initial and exit wall angles come from Rao's charts.
+
+THROAT_ARC_RADIUS_RATIO = 0.382
+CONICAL_REFERENCE_HALF_ANGLE = math.radians(15.0)
+
+# wall angles in degrees digitised from Rao's charts, by bell length as a fraction of a 15 degree cone
+_AREA_RATIOS = np.array([4.0, 5.0, 10.0, 20.0, 30.0, 40.0, 50.0, 100.0])
+_LENGTH_FRACTIONS = np.array([0.6, 0.8, 0.9])
+_INITIAL_ANGLES = np.array([
+    [26.5, 28.0, 32.0, 35.0, 36.2, 37.1, 38.0, 40.0],
+    [21.5, 23.0, 26.3, 28.8, 30.0, 31.0, 31.5, 33.5],
+    [20.0, 21.0, 24.0, 27.0, 28.5, 29.5, 30.2, 32.0],
+])
+_EXIT_ANGLES = np.array([
+    [20.5, 20.5, 16.0, 14.5, 14.0, 13.5, 13.0, 11.2],
+    [14.0, 13.0, 11.0, 9.0, 8.5, 8.0, 7.5, 7.0],
+    [11.5, 10.5, 8.0, 7.0, 6.5, 6.0, 6.0, 6.0],
+])
+
+
+# Points use the sketch coordinates of NozzleContour: x is the radius and y the axial distance from the exit plane.
+class BellContour(NamedTuple):
+    throatArcCenter: np.ndarray
+    throatArcRadius: np.ndarray
+    inflectionPoint: np.ndarray
+    controlPoint: np.ndarray
+    exitPoint: np.ndarray
+    initialAngle: np.ndarray
+    exitAngle: np.ndarray
+    lengthFraction: np.ndarray
+
+
+def getConicalLength(throatRadius, exitRadius) -> np.ndarray:
+    return (np.asarray(exitRadius, dtype=float) - throatRadius) / math.tan(CONICAL_REFERENCE_HALF_ANGLE)
+
+
+def getBellLength(throatRadius, exitRadius, lengthFraction=0.8) -> np.ndarray:
+    return lengthFraction * getConicalLength(throatRadius, exitRadius)
+
+
+def getRaoAngles(areaRatio, lengthFraction) -> (np.ndarray, np.ndarray):
+    # returns (initialAngle, exitAngle) in radians, clamped to the range covered by the charts
+    logAreaRatio, lengthFraction = np.broadcast_arrays(
+        np.log(np.clip(areaRatio, _AREA_RATIOS[0], _AREA_RATIOS[-1])),
+        np.clip(np.asarray(lengthFraction, dtype=float), _LENGTH_FRACTIONS[0], _LENGTH_FRACTIONS[-1]))
+    upper = np.clip(np.searchsorted(_LENGTH_FRACTIONS, lengthFraction), 1, len(_LENGTH_FRACTIONS) - 1)
+    lower = upper - 1
+    weight = (lengthFraction - _LENGTH_FRACTIONS[lower]) / (_LENGTH_FRACTIONS[upper] - _LENGTH_FRACTIONS[lower])
+
+    def interpolate(table: np.ndarray) -> np.ndarray:
+        rows = np.stack([np.interp(logAreaRatio, np.log(_AREA_RATIOS), row) for row in table])
+        lowerValues = np.take_along_axis(rows, lower[None, ...], axis=0)[0]
+        upperValues = np.take_along_axis(rows, upper[None, ...], axis=0)[0]
+        return np.radians(lowerValues + weight * (upperValues - lowerValues))
+
+    return interpolate(_INITIAL_ANGLES), interpolate(_EXIT_ANGLES)
+
+
+def solveBell(throatRadius, exitRadius, bellLength, throatY=None) -> BellContour:
+    # every argument broadcasts, so a single call solves bells for whole arrays of area ratios
+    throatRadius = np.asarray(throatRadius, dtype=float)
+    exitRadius = np.asarray(exitRadius, dtype=float)
+    bellLength = np.asarray(bellLength, dtype=float)
+    throatY = bellLength if throatY is None else np.asarray(throatY, dtype=float)
+
+    areaRatio = (exitRadius / throatRadius) ** 2
+    lengthFraction = bellLength / getConicalLength(throatRadius, exitRadius)
+    initialAngle, exitAngle = getRaoAngles(areaRatio, lengthFraction)
+
+    throatArcRadius = THROAT_ARC_RADIUS_RATIO * throatRadius
+    throatArcCenterX = throatRadius + throatArcRadius
+    inflectionX = throatArcCenterX - throatArcRadius * np.cos(initialAngle)
+    inflectionAxial = throatArcRadius * np.sin(initialAngle)
+
+    # control point: intersection of the tangents at the inflection and exit points, in axial distance from the throat
+    initialSlope, exitSlope = np.tan(initialAngle), np.tan(exitAngle)
+    controlAxial = (exitRadius - inflectionX + initialSlope * inflectionAxial - exitSlope * bellLength) / \
+        (initialSlope - exitSlope)
+    controlX = inflectionX + initialSlope * (controlAxial - inflectionAxial)
+
+    return BellContour(
+        throatArcCenter=_points(throatArcCenterX, throatY),
+        throatArcRadius=np.broadcast_to(throatArcRadius, areaRatio.shape),
+        inflectionPoint=_points(inflectionX, throatY - inflectionAxial),
+        controlPoint=_points(controlX, throatY - controlAxial),
+        exitPoint=_points(exitRadius, throatY - bellLength),
+        initialAngle=initialAngle,
+        exitAngle=exitAngle,
+        lengthFraction=lengthFraction)
+
+
+def offsetBell(bell: BellContour, radiusOffset: float) -> BellContour:
+    shift = np.array([radiusOffset, 0.0])
+    return bell._replace(
+        throatArcCenter=bell.throatArcCenter + shift,
+        inflectionPoint=bell.inflectionPoint + shift,
+        controlPoint=bell.controlPoint + shift,
+        exitPoint=bell.exitPoint + shift)
+
+
+def sampleBell(bell: BellContour, pointsPerSegment: int = 16) -> np.ndarray:
+    # throat arc then parabola, from the throat to the exit, shape (..., 2 * (pointsPerSegment - 1) + 1, 2)
+    t = np.linspace(0.0, 1.0, pointsPerSegment)
+    angles = math.pi + bell.initialAngle[..., None] * t
+    radius = bell.throatArcRadius[..., None]
+    arc = _points(bell.throatArcCenter[..., None, 0] + radius * np.cos(angles),
+                  bell.throatArcCenter[..., None, 1] + radius * np.sin(angles))
+    t = t[:, None]
+    parabola = (1 - t) ** 2 * bell.inflectionPoint[..., None, :] + 2 * t * (1 - t) * bell.controlPoint[..., None, :] + \
+        t ** 2 * bell.exitPoint[..., None, :]
+    return np.concatenate([arc, parabola[..., 1:, :]], axis=-2)
+
+
+def _points(x, y) -> np.ndarray:
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    return np.stack([x, y], axis=-1)
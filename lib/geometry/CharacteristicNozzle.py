@@ -0,0 +1,145 @@
+import functools
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from .GasDynamics import machAngle, prandtlMeyerAngle, machFromPrandtlMeyerAngle, areaRatio, machFromAreaRatio
+
+# Minimum-length nozzle from the planar method of characteristics: a sharp throat corner turns the flow by half the
+# exit Prandtl-Meyer angle through `characteristicCount` waves, which reflect off the axis and are cancelled by the
+# wall. The wall is revolved as the nozzle's divergent section, which the planar net only approximates: it leaves out
+# the dr / r source term of axisymmetric flow, so the revolved wall is not exactly shock free and is longer than an
+# axisymmetric net's. The net is designed for the exit Mach number of the revolved area ratio, (exitRadius /
+# throatRadius) ** 2, and every wall height is drawn at its square root, so each station keeps the net's area ratio
+# and the wall ends at exitRadius with the exit Mach number that IsentropicFlow gives it.
+
+DEFAULT_GAMMA = 1.2
+DEFAULT_CHARACTERISTIC_COUNT = 50
+# with fewer waves the net's wall ends about 2% or more short of its exit height (see getWallRadii)
+MINIMUM_CHARACTERISTIC_COUNT = 10
+
+
+# The net is stored in flat arrays with one entry per node. Node k is the crossing of the C+ characteristic
+# leftIndex[k] (the reflection of corner wave leftIndex[k]) with corner wave rightIndex[k]; leftIndex == rightIndex
+# marks a node on the axis. Positions are in throat half heights with the throat corner at (0, 1).
+class CharacteristicNet(NamedTuple):
+    leftIndex: np.ndarray
+    rightIndex: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    theta: np.ndarray
+    nu: np.ndarray
+    mach: np.ndarray
+    wallX: np.ndarray
+    wallY: np.ndarray
+    maximumWallAngle: float
+    exitMach: float
+    gamma: float
+
+
+def getExitMach(throatRadius: float, exitRadius: float, gamma: float = DEFAULT_GAMMA) -> float:
+    # the revolved nozzle's exit area ratio is the square of its radius ratio
+    return float(machFromAreaRatio((exitRadius / throatRadius) ** 2, gamma))
+
+
+def solveCharacteristicNet(exitMach: float, gamma: float = DEFAULT_GAMMA,
+                           characteristicCount: int = DEFAULT_CHARACTERISTIC_COUNT) -> CharacteristicNet:
+    n = characteristicCount
+    maximumWallAngle = float(prandtlMeyerAngle(exitMach, gamma)) / 2
+    # flow angle of every corner wave, wave i is the i-th C- characteristic leaving the corner (1 based)
+    waveAngles = maximumWallAngle * np.arange(n + 1) / n
+
+    leftIndex, rightIndex = np.triu_indices(n, 0, n)
+    leftIndex, rightIndex = leftIndex + 1, rightIndex + 1
+    # Riemann invariants: theta + nu is constant along C- lines, theta - nu along C+ lines
+    theta = waveAngles[rightIndex] - waveAngles[leftIndex]
+    nu = waveAngles[rightIndex] + waveAngles[leftIndex]
+    mach = machFromPrandtlMeyerAngle(nu, gamma)
+    mu = machAngle(mach)
+    cornerMu = machAngle(machFromPrandtlMeyerAngle(waveAngles, gamma))
+
+    x = np.zeros_like(theta)
+    y = np.zeros_like(theta)
+    # a node only depends on its neighbours on the previous anti-diagonal (leftIndex + rightIndex - 1), so each
+    # anti-diagonal is solved as one vectorised step
+    diagonal = leftIndex + rightIndex
+    for step in range(2, 2 * n + 1):
+        nodes = np.nonzero(diagonal == step)[0]
+        left, right = leftIndex[nodes], rightIndex[nodes]
+
+        # previous node on the C- line, the throat corner for the first crossing of each wave
+        fromCorner = left == 1
+        minusParent = _nodeIndex(np.maximum(left - 1, 1), right, n)
+        minusX = np.where(fromCorner, 0.0, x[minusParent])
+        minusY = np.where(fromCorner, 1.0, y[minusParent])
+        minusAngle = np.where(fromCorner, waveAngles[right] - cornerMu[right],
+                              theta[minusParent] - mu[minusParent])
+        minusSlope = np.tan((minusAngle + theta[nodes] - mu[nodes]) / 2)
+
+        # previous node on the C+ line, the axis nodes have none and are placed on y = 0
+        onAxis = left == right
+        plusParent = _nodeIndex(left, np.maximum(right - 1, left), n)
+        plusX, plusY = x[plusParent], y[plusParent]
+        plusSlope = np.tan((theta[plusParent] + mu[plusParent] + theta[nodes] + mu[nodes]) / 2)
+
+        crossingX = (plusY - minusY + minusSlope * minusX - plusSlope * plusX) / \
+            np.where(onAxis, 1.0, minusSlope - plusSlope)
+        x[nodes] = np.where(onAxis, minusX - minusY / minusSlope, crossingX)
+        y[nodes] = np.where(onAxis, 0.0, minusY + minusSlope * (crossingX - minusX))
+
+    # the wall cancels each reflected wave where its C+ line leaves the last corner wave; every wall segment depends on
+    # the one before, so this runs as a short loop over the characteristic count
+    lastNodes = _nodeIndex(np.arange(1, n + 1), n, n)
+    wallX = np.zeros(n + 1)
+    wallY = np.ones(n + 1)
+    wallAngles = np.concatenate([[maximumWallAngle], theta[lastNodes]])
+    plusSlopes = np.tan(theta[lastNodes] + mu[lastNodes])
+    for i in range(1, n + 1):
+        node = lastNodes[i - 1]
+        wallSlope = math.tan((wallAngles[i - 1] + wallAngles[i]) / 2)
+        wallX[i] = (y[node] - wallY[i - 1] + wallSlope * wallX[i - 1] - plusSlopes[i - 1] * x[node]) / \
+            (wallSlope - plusSlopes[i - 1])
+        wallY[i] = wallY[i - 1] + wallSlope * (wallX[i] - wallX[i - 1])
+
+    return CharacteristicNet(
+        leftIndex=leftIndex.astype(np.int32),
+        rightIndex=rightIndex.astype(np.int32),
+        x=x, y=y, theta=theta, nu=nu, mach=mach,
+        wallX=wallX, wallY=wallY,
+        maximumWallAngle=maximumWallAngle, exitMach=exitMach, gamma=gamma)
+
+
+def getWallLength(net: CharacteristicNet, throatRadius: float) -> float:
+    return float(net.wallX[-1]) * throatRadius
+
+
+def getMinimumLength(throatRadius: float, exitRadius: float, gamma: float = DEFAULT_GAMMA,
+                     characteristicCount: int = DEFAULT_CHARACTERISTIC_COUNT) -> float:
+    # exitLength of the wall, which scales with the throat, so the net is solved once per radius ratio
+    return throatRadius * _getLengthRatio(exitRadius / throatRadius, gamma, characteristicCount)
+
+
+def getWallPoints(net: CharacteristicNet, throatRadius: float, throatY: float) -> np.ndarray:
+    # wall from the throat to the exit in sketch coordinates, ready to be used as spline fit points
+    return np.stack([throatRadius * getWallRadii(net), throatY - throatRadius * net.wallX], axis=-1)
+
+
+def getWallRadii(net: CharacteristicNet) -> np.ndarray:
+    # radius of every wall point in throat radii, the square root of its height so the revolved wall has the net's
+    # area ratios; the net's wall ends a little short of the exit height, so the radii are stretched from the throat
+    # to end exactly on the exit Mach number's
+    radii = np.sqrt(net.wallY)
+    exitRadius = math.sqrt(float(areaRatio(net.exitMach, net.gamma)))
+    return 1 + (radii - 1) * (exitRadius - 1) / (radii[-1] - 1)
+
+
+@functools.lru_cache(maxsize=256)
+def _getLengthRatio(radiusRatio: float, gamma: float, characteristicCount: int) -> float:
+    return getWallLength(solveCharacteristicNet(getExitMach(1.0, radiusRatio, gamma), gamma, characteristicCount), 1.0)
+
+
+def _nodeIndex(left, right, n: int):
+    # position of node (left, right) in the flat arrays, nodes are ordered by left then right
+    left = np.asarray(left)
+    return (left - 1) * n - (left - 1) * (left - 2) // 2 + (right - left)
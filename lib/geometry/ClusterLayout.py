@@ -0,0 +1,66 @@
+import math
+from enum import Enum
+from typing import List, NamedTuple
+
+import numpy as np
+
+from .ParameterValidator import Violation
+
+# Positions of the engines of a cluster in the plane normal to their axes, in the units of the nozzle parameters.
+# Every engine is an occurrence of one engine component, so a layout is only a list of translations.
+
+
+class ClusterPattern(str, Enum):
+    # every engine on a ring of the cluster radius
+    RING = 'ring'
+    # one engine on the axis and the others on the ring
+    CENTERED_RING = 'centered ring'
+    # a square grid with the cluster radius as its pitch, filled row by row and centred on the axis
+    GRID = 'grid'
+
+
+class ClusterLayout(NamedTuple):
+    count: int
+    radius: float
+    pattern: ClusterPattern = ClusterPattern.RING
+
+
+def getClusterPositions(layout: ClusterLayout) -> np.ndarray:
+    # (count, 2) engine centres, the first engine is the one closest to the cluster axis
+    count, radius = layout.count, layout.radius
+    if count <= 1:
+        return np.zeros((max(count, 0), 2))
+    if layout.pattern == ClusterPattern.GRID:
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        row, column = np.divmod(np.arange(count), columns)
+        # a partial last row is centred on the axis like the full ones
+        rowLength = np.where(row == rows - 1, count - (rows - 1) * columns, columns)
+        positions = np.stack([column - (rowLength - 1) / 2, row - (rows - 1) / 2], axis=-1) * radius
+        return positions[np.argsort(np.hypot(*positions.T), kind='stable')]
+    ringCount = count - 1 if layout.pattern == ClusterPattern.CENTERED_RING else count
+    angles = 2 * math.pi * np.arange(ringCount) / ringCount
+    positions = radius * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    if layout.pattern == ClusterPattern.CENTERED_RING:
+        positions = np.concatenate([np.zeros((1, 2)), positions])
+    return positions
+
+
+def getMinimumSpacing(layout: ClusterLayout) -> float:
+    # smallest distance between two engine axes, infinite for a single engine
+    positions = getClusterPositions(layout)
+    if len(positions) < 2:
+        return math.inf
+    distances = np.hypot(*(positions[:, None, :] - positions[None, :, :]).transpose(2, 0, 1))
+    return float(np.min(distances[np.triu_indices(len(positions), 1)]))
+
+
+def validateClusterLayout(layout: ClusterLayout, outerRadius: float,
+                          formatLength=('{:.4g}'.format)) -> List[Violation]:
+    # engines of `outerRadius` (the largest radius of the outer wall layer) must not intersect their neighbours
+    spacing = getMinimumSpacing(layout)
+    if spacing >= 2 * outerRadius:
+        return []
+    requiredRadius = layout.radius * 2 * outerRadius / spacing
+    return [Violation('clusterSpacing', 'clusterRadius', 'clusterRadius must be at least {} for engines of radius {}'
+                      .format(formatLength(requiredRadius), formatLength(outerRadius)))]
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Sequence
+
+import numpy as np
+
+from .NozzleContour import NozzleContour, ContourMetrics, solveContour, sampleContour, computeMetrics
+from .WallOffset import offsetContour
+from ..NozzleDefinitions import NozzleParameters
+
+
+class CacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxSize: int
+
+
+class LruCache:
+    # shared with the background worker; the lock is not held while a value is computed, so two threads missing the
+    # same key both compute it and the later one is kept
+    def __init__(self, maxSize: int = 256):
+        self._maxSize = maxSize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self._maxSize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def getStatistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(self._hits, self._misses, self._evictions, len(self._entries), self._maxSize)
+
+
+# Caches contours, sampled points and metrics of single designs. Parameters are quantized to `tolerance` before
+# being used as a key, so designs that only differ by float noise (e.g. after a unit round trip) share an entry.
+# The design name does not affect the geometry and is left out of the key.
+class ContourCache:
+    def __init__(self, maxSize: int = 256, tolerance: float = 1e-9):
+        self._cache = LruCache(maxSize)
+        self._tolerance = tolerance
+
+    def getContour(self, nozzleParameters: NozzleParameters, radiusOffset: float = 0.0,
+                   degrees: bool = True) -> NozzleContour:
+        key = ('contour', self._quantize(nozzleParameters, radiusOffset), degrees)
+        return self._cache.get(key, lambda: solveContour(nozzleParameters, radiusOffset, degrees))
+
+    def getMetrics(self, nozzleParameters: NozzleParameters, radiusOffset: float = 0.0,
+                   degrees: bool = True) -> ContourMetrics:
+        key = ('metrics', self._quantize(nozzleParameters, radiusOffset), degrees)
+        return self._cache.get(
+            key, lambda: computeMetrics(self.getContour(nozzleParameters, radiusOffset, degrees)))
+
+    def getPoints(self, nozzleParameters: NozzleParameters, radiusOffset: float = 0.0, pointsPerSegment: int = 16,
+                  degrees: bool = True) -> np.ndarray:
+        key = ('points', self._quantize(nozzleParameters, radiusOffset), degrees, pointsPerSegment)
+        points = self._cache.get(
+            key, lambda: sampleContour(self.getContour(nozzleParameters, radiusOffset, degrees), pointsPerSegment))
+        # cached arrays are shared between callers
+        points.flags.writeable = False
+        return points
+
+    def getOffsetPoints(self, nozzleParameters: NozzleParameters, offsets: Sequence[float], pointsPerSegment: int = 16,
+                        degrees: bool = True) -> np.ndarray:
+        # normal offsets of the gas-side contour, shape (len(offsets), points, 2)
+        offsets = tuple(float(offset) for offset in offsets)
+        key = ('offsetPoints', self._quantize(nozzleParameters, 0.0), degrees, pointsPerSegment,
+               tuple(int(round(offset / self._tolerance)) for offset in offsets))
+        points = self._cache.get(key, lambda: sampleContour(
+            offsetContour(self.getContour(nozzleParameters, degrees=degrees), offsets, pointsPerSegment),
+            pointsPerSegment))
+        points.flags.writeable = False
+        return points
+
+    def setTolerance(self, tolerance: float):
+        self._tolerance = tolerance
+        self._cache.clear()
+
+    def clear(self):
+        self._cache.clear()
+
+    def getStatistics(self) -> CacheStatistics:
+        return self._cache.getStatistics()
+
+    def _quantize(self, nozzleParameters: NozzleParameters, radiusOffset: float) -> tuple:
+        values = tuple(nozzleParameters[1:]) + (radiusOffset,)
+        return tuple(value if isinstance(value, str) else int(round(float(value) / self._tolerance))
+                     for value in values)
+
+
+# shared by the preview, export and analysis paths
+contourCache = ContourCache()
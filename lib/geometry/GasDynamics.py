@@ -0,0 +1,62 @@
+import numpy as np
+
+# Vectorised perfect-gas relations shared by the contour and flow solvers. Every function broadcasts over arrays, and
+# the inversions run a fixed number of Newton steps on the whole array at once instead of root finding per value.
+
+NEWTON_ITERATIONS = 40
+NEWTON_TOLERANCE = 1e-12
+
+
+def machAngle(mach) -> np.ndarray:
+    return np.arcsin(1.0 / np.asarray(mach, dtype=float))
+
+
+def prandtlMeyerAngle(mach, gamma) -> np.ndarray:
+    mach = np.asarray(mach, dtype=float)
+    ratio = (gamma + 1) / (gamma - 1)
+    beta = np.sqrt(np.maximum(mach ** 2 - 1, 0.0))
+    return np.sqrt(ratio) * np.arctan(beta / np.sqrt(ratio)) - np.arctan(beta)
+
+
+def machFromPrandtlMeyerAngle(nu, gamma) -> np.ndarray:
+    nu = np.asarray(nu, dtype=float)
+    # start from a supersonic guess that is monotone in nu so Newton converges for the whole array
+    mach = 1.0 + 2.0 * np.sqrt(np.maximum(nu, 0.0)) + nu
+    for _ in range(NEWTON_ITERATIONS):
+        beta = np.sqrt(np.maximum(mach ** 2 - 1, 1e-300))
+        derivative = beta / (mach * (1 + (gamma - 1) / 2 * mach ** 2))
+        step = (prandtlMeyerAngle(mach, gamma) - nu) / derivative
+        mach = np.maximum(mach - step, 1.0 + 1e-12)
+        if np.all(np.abs(step) < NEWTON_TOLERANCE):
+            break
+    return np.where(nu <= 0, 1.0, mach)
+
+
+def areaRatio(mach, gamma) -> np.ndarray:
+    # A / A* of quasi one-dimensional isentropic flow
+    mach = np.asarray(mach, dtype=float)
+    exponent = (gamma + 1) / (2 * (gamma - 1))
+    return (2 / (gamma + 1) * (1 + (gamma - 1) / 2 * mach ** 2)) ** exponent / mach
+
+
+def machFromAreaRatio(ratio, gamma, supersonic=True) -> np.ndarray:
+    # Newton on log(A / A*) against log(M), which is well conditioned on both branches; `supersonic` may be an array
+    ratio, supersonic = np.broadcast_arrays(np.maximum(np.asarray(ratio, dtype=float), 1.0),
+                                            np.asarray(supersonic, dtype=bool))
+    # low-Mach asymptote A / A* ~ 0.58 / M for the subsonic branch, a growing guess for the supersonic one
+    logMach = np.where(supersonic, np.log(1 + np.sqrt(ratio)), np.log(0.58 / ratio))
+    logMach = np.where(supersonic, np.maximum(logMach, 1e-3), np.minimum(logMach, -1e-3))
+    logRatio = np.log(ratio)
+    for _ in range(NEWTON_ITERATIONS):
+        mach = np.exp(logMach)
+        machSquared = mach ** 2
+        # d log(A / A*) / d log(M) = (M^2 - 1) / (1 + (gamma - 1) / 2 * M^2)
+        derivative = (machSquared - 1) / (1 + (gamma - 1) / 2 * machSquared)
+        derivative = np.where(np.abs(derivative) < 1e-12, np.where(supersonic, 1e-12, -1e-12), derivative)
+        step = (np.log(areaRatio(mach, gamma)) - logRatio) / derivative
+        logMach = logMach - step
+        # never let an iterate cross the sonic point onto the other branch
+        logMach = np.where(supersonic, np.maximum(logMach, 1e-9), np.minimum(logMach, -1e-9))
+        if np.all(np.abs(step) < NEWTON_TOLERANCE):
+            break
+    return np.where(ratio <= 1.0, 1.0, np.exp(logMach))
@@ -0,0 +1,219 @@
+import math
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from .BellContour import BellContour, solveBell, offsetBell, sampleBell
+from .CharacteristicNozzle import solveCharacteristicNet, getExitMach, getWallPoints, getWallLength, getMinimumLength, \
+    MINIMUM_CHARACTERISTIC_COUNT
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle
+
+
+# Closed-form equivalent of the constrained sketch drawn by NozzleSketch. Points use the same (x, y) coordinates as
+# the sketch: x is the radius and y is the axial distance from the exit plane. Every field broadcasts, so a
+# NozzleParameters holding arrays (see stackParameters) solves a whole batch of designs at once.
+class NozzleContour(NamedTuple):
+    chamberStart: np.ndarray
+    chamberEnd: np.ndarray
+    convergenceArcCenter: np.ndarray
+    convergenceLineStart: np.ndarray
+    convergenceLineEnd: np.ndarray
+    divergenceArcCenter: np.ndarray
+    minimumRadiusPoint: np.ndarray
+    throatPoint: np.ndarray
+    exitPoint: np.ndarray
+    convergenceAngle: np.ndarray
+    exitAngle: np.ndarray
+    convergenceRadius: np.ndarray
+    divergenceRadius: np.ndarray
+    # divergent section of DivergenceStyle.BELL nozzles, which replaces the exit line
+    bell: BellContour = None
+    # explicit wall points from the throat to the exit: method of characteristics walls and offset curved sections
+    divergentWall: np.ndarray = None
+
+    @property
+    def chamberCylinderLength(self) -> np.ndarray:
+        # the sketch leaves the chamber line length free, so the tangent chain decides the actual value
+        return self.chamberStart[..., 1] - self.chamberEnd[..., 1]
+
+    @property
+    def convergenceLineLength(self) -> np.ndarray:
+        return np.hypot(*np.moveaxis(self.convergenceLineStart - self.convergenceLineEnd, -1, 0))
+
+    @property
+    def exitLineLength(self) -> np.ndarray:
+        return np.hypot(*np.moveaxis(self.exitPoint - self.throatPoint, -1, 0))
+
+    @property
+    def minimumRadius(self) -> np.ndarray:
+        return self.minimumRadiusPoint[..., 0]
+
+    @property
+    def length(self) -> np.ndarray:
+        return self.chamberStart[..., 1] - self.exitPoint[..., 1]
+
+
+class ContourMetrics(NamedTuple):
+    throatRadius: np.ndarray
+    throatArea: np.ndarray
+    exitArea: np.ndarray
+    chamberArea: np.ndarray
+    expansionRatio: np.ndarray
+    contractionRatio: np.ndarray
+    length: np.ndarray
+    chamberCylinderLength: np.ndarray
+    convergenceLineLength: np.ndarray
+
+
+def stackParameters(parameterSets: Sequence[NozzleParameters]) -> NozzleParameters:
+    columns = dict(zip(NozzleParameters._fields, zip(*parameterSets)))
+    divergenceStyles = set(columns.pop('divergenceStyle'))
+    if len(divergenceStyles) != 1:
+        raise ValueError('Designs with different divergence styles cannot be solved together')
+    names = list(columns.pop('name'))
+    return NozzleParameters(name=names, divergenceStyle=divergenceStyles.pop(),
+                            **{field: np.asarray(column, dtype=float) for field, column in columns.items()})
+
+
+def resolveExitLength(nozzleParameters: NozzleParameters) -> NozzleParameters:
+    # the length of a method of characteristics wall follows from its net, whatever exitLength it was given; other
+    # styles are returned as they are
+    if nozzleParameters.divergenceStyle != DivergenceStyle.CHARACTERISTICS:
+        return nozzleParameters
+    throatRadius, exitRadius = float(nozzleParameters.throatRadius), float(nozzleParameters.exitRadius)
+    gamma, characteristicCount = float(nozzleParameters.gamma), int(nozzleParameters.characteristicCount)
+    # a design without a net keeps its exitLength, ParameterValidator reports what is wrong with it
+    if not (0 < throatRadius < exitRadius and gamma > 1 and characteristicCount >= MINIMUM_CHARACTERISTIC_COUNT):
+        return nozzleParameters
+    return nozzleParameters._replace(exitLength=getMinimumLength(throatRadius, exitRadius, gamma, characteristicCount))
+
+
+def solveContour(nozzleParameters: NozzleParameters, radiusOffset: float = 0.0,
+                 degrees: bool = True) -> NozzleContour:
+    chamberLength = np.asarray(nozzleParameters.chamberLength, dtype=float)
+    exitLength = np.asarray(nozzleParameters.exitLength, dtype=float)
+    chamberRadius = np.asarray(nozzleParameters.chamberRadius, dtype=float) + radiusOffset
+    throatRadius = np.asarray(nozzleParameters.throatRadius, dtype=float) + radiusOffset
+    exitRadius = np.asarray(nozzleParameters.exitRadius, dtype=float) + radiusOffset
+    convergenceRadius = np.asarray(nozzleParameters.convergenceRadius, dtype=float)
+    divergenceRadius = np.asarray(nozzleParameters.divergenceRadius, dtype=float)
+    convergenceAngle = np.asarray(nozzleParameters.convergenceAngle, dtype=float)
+    if degrees:
+        convergenceAngle = np.radians(convergenceAngle)
+    sinConvergence, cosConvergence = np.sin(convergenceAngle), np.cos(convergenceAngle)
+
+    # exit line: fixed at the throat point, its angle is kept from the drawn exit point
+    exitAngle = np.arctan2(exitRadius - throatRadius, exitLength)
+    throatX, throatY = throatRadius, exitLength
+    bell = None
+    divergentWall = None
+    exitPoint = _points(exitRadius, np.zeros_like(exitRadius))
+    # curved divergent sections leave the throat parallel to the axis, and are offset radially like the other layers
+    if nozzleParameters.divergenceStyle == DivergenceStyle.BELL:
+        exitAngle = np.zeros_like(exitAngle)
+        bell = offsetBell(solveBell(throatRadius - radiusOffset, exitRadius - radiusOffset, exitLength), radiusOffset)
+        exitPoint = bell.exitPoint
+    elif nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+        if exitLength.ndim:
+            raise ValueError('Method of characteristics nozzles are solved one design at a time')
+        exitAngle = np.zeros_like(exitAngle)
+        baseThroatRadius = float(throatRadius) - radiusOffset
+        gamma = float(nozzleParameters.gamma)
+        net = solveCharacteristicNet(getExitMach(baseThroatRadius, float(exitRadius) - radiusOffset, gamma), gamma,
+                                     int(nozzleParameters.characteristicCount))
+        # the wall is as long as its net, so the throat is moved up to end the wall on the exit plane
+        exitLength = np.asarray(getWallLength(net, baseThroatRadius))
+        throatY = exitLength
+        divergentWall = getWallPoints(net, baseThroatRadius, float(exitLength)) + np.array([radiusOffset, 0.0])
+        exitPoint = divergentWall[-1]
+
+    # divergence arc: tangent to the exit line at the throat point, centre on the outward normal
+    divergenceCenterX = throatX + divergenceRadius * np.cos(exitAngle)
+    divergenceCenterY = throatY + divergenceRadius * np.sin(exitAngle)
+    convergenceLineEndX = divergenceCenterX - divergenceRadius * cosConvergence
+    convergenceLineEndY = divergenceCenterY + divergenceRadius * sinConvergence
+
+    # convergence arc: tangent to the vertical chamber line, so its centre sits one radius inside the chamber wall
+    convergenceCenterX = chamberRadius - convergenceRadius
+    convergenceLineStartX = convergenceCenterX + convergenceRadius * cosConvergence
+
+    # the chamber line length is free, so slide the convergence arc along the axis until it meets the line
+    # leaving the divergence arc at the convergence angle
+    convergenceLineLength = (convergenceLineStartX - convergenceLineEndX) / sinConvergence
+    convergenceLineStartY = convergenceLineEndY + convergenceLineLength * cosConvergence
+    convergenceCenterY = convergenceLineStartY + convergenceRadius * sinConvergence
+
+    nozzleLength = chamberLength + exitLength
+    return NozzleContour(
+        chamberStart=_points(chamberRadius, nozzleLength),
+        chamberEnd=_points(chamberRadius, convergenceCenterY),
+        convergenceArcCenter=_points(convergenceCenterX, convergenceCenterY),
+        convergenceLineStart=_points(convergenceLineStartX, convergenceLineStartY),
+        convergenceLineEnd=_points(convergenceLineEndX, convergenceLineEndY),
+        divergenceArcCenter=_points(divergenceCenterX, divergenceCenterY),
+        minimumRadiusPoint=_points(divergenceCenterX - divergenceRadius, divergenceCenterY),
+        throatPoint=_points(throatX, throatY),
+        exitPoint=exitPoint,
+        convergenceAngle=convergenceAngle,
+        exitAngle=exitAngle,
+        convergenceRadius=convergenceRadius,
+        divergenceRadius=divergenceRadius,
+        bell=bell,
+        divergentWall=divergentWall)
+
+
+def computeMetrics(contour: NozzleContour) -> ContourMetrics:
+    throatRadius = contour.minimumRadius
+    throatArea = math.pi * throatRadius ** 2
+    exitArea = math.pi * contour.exitPoint[..., 0] ** 2
+    chamberArea = math.pi * contour.chamberStart[..., 0] ** 2
+    return ContourMetrics(
+        throatRadius=throatRadius,
+        throatArea=throatArea,
+        exitArea=exitArea,
+        chamberArea=chamberArea,
+        expansionRatio=exitArea / throatArea,
+        contractionRatio=chamberArea / throatArea,
+        length=contour.length,
+        chamberCylinderLength=contour.chamberCylinderLength,
+        convergenceLineLength=contour.convergenceLineLength)
+
+
+def sampleContour(contour: NozzleContour, pointsPerSegment: int = 16) -> np.ndarray:
+    # polyline from the chamber start to the exit point, shape (..., 5 * (pointsPerSegment - 1) + 1, 2) for cones,
+    # curved divergent sections replace the exit line with sampleDivergentSection
+    t = np.linspace(0.0, 1.0, pointsPerSegment)
+    convergenceAngle = contour.convergenceAngle[..., None]
+    exitAngle = contour.exitAngle[..., None]
+    segments = [
+        _sampleLine(contour.chamberStart, contour.chamberEnd, t),
+        _sampleArc(contour.convergenceArcCenter, contour.convergenceRadius, -convergenceAngle * t),
+        _sampleLine(contour.convergenceLineStart, contour.convergenceLineEnd, t),
+        _sampleArc(contour.divergenceArcCenter, contour.divergenceRadius,
+                   math.pi - convergenceAngle + (convergenceAngle + exitAngle) * t),
+        sampleDivergentSection(contour, pointsPerSegment),
+    ]
+    return np.concatenate([segments[0]] + [segment[..., 1:, :] for segment in segments[1:]], axis=-2)
+
+
+def sampleDivergentSection(contour: NozzleContour, pointsPerSegment: int = 16) -> np.ndarray:
+    # points from the throat point to the exit point
+    if contour.bell is not None:
+        return sampleBell(contour.bell, pointsPerSegment)
+    if contour.divergentWall is not None:
+        return contour.divergentWall
+    return _sampleLine(contour.throatPoint, contour.exitPoint, np.linspace(0.0, 1.0, pointsPerSegment))
+
+
+def _points(x, y) -> np.ndarray:
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    return np.stack([x, y], axis=-1)
+
+
+def _sampleLine(start: np.ndarray, end: np.ndarray, t: np.ndarray) -> np.ndarray:
+    return start[..., None, :] + (end - start)[..., None, :] * t[:, None]
+
+
+def _sampleArc(center: np.ndarray, radius: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    radius = radius[..., None]
+    return _points(center[..., None, 0] + radius * np.cos(angles), center[..., None, 1] + radius * np.sin(angles))
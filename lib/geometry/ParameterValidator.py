@@ -0,0 +1,185 @@
+import functools
+import math
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from .BellContour import getConicalLength
+from .CharacteristicNozzle import MINIMUM_CHARACTERISTIC_COUNT
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle, WallLayers, CoolingChannels
+
+# Checks a design before anything is solved. The tangent chain of NozzleContour is evaluated in closed form (no
+# divergent section is built, so every style validates as a batch) and each broken rule is reported against the
+# parameter that has to change, with the limit it has to respect. Parameter arrays validate all designs at once.
+
+# Rao's charts in BellContour cover these bell lengths (fraction of a 15 degree cone) and area ratios
+BELL_LENGTH_FRACTIONS = (0.6, 0.9)
+BELL_AREA_RATIOS = (4.0, 100.0)
+
+_POSITIVE_FIELDS = ('chamberLength', 'exitLength', 'chamberRadius', 'throatRadius', 'exitRadius',
+                    'convergenceRadius', 'divergenceRadius')
+
+
+class Violation(NamedTuple):
+    rule: str
+    field: str
+    message: str
+
+
+class _RuleResult(NamedTuple):
+    rule: str
+    field: str
+    violated: np.ndarray
+    # bound the field has to respect, formatted into the message
+    limit: np.ndarray
+    isAngle: bool = False
+
+
+_MESSAGES = {
+    'positive': '{field} must be greater than zero',
+    'cylinderNegative': 'chamberCylinderLength cannot be negative',
+    'convergenceAngleRange': 'convergenceAngle must be between 0 and {limit}',
+    'throatInsideChamber': 'throatRadius must be smaller than chamberRadius ({limit})',
+    'exitOutsideThroat': 'exitRadius must be larger than throatRadius ({limit})',
+    'cylinderInsideChamber': 'chamberCylinderLength cannot be longer than chamberLength ({limit})',
+    'divergenceRadiusFitsChamber': 'divergenceRadius must be smaller than {limit} to end the throat arc inside the chamber',
+    'convergenceRadiusFits': 'convergenceRadius must be at most {limit} for the drop from chamber to throat radius',
+    'convergingSectionFits': 'chamberLength must be at least {limit} to fit the converging section',
+    'divergenceRadiusFits': 'divergenceRadius must be at most {limit} to keep the throat off the axis',
+    'bellLengthMinimum': 'exitLength must be at least {limit} for a bell (60% of a 15 degree cone)',
+    'bellLengthMaximum': 'exitLength must be at most {limit} for a bell (90% of a 15 degree cone)',
+    'bellAreaRatioMinimum': 'exitRadius must be at least {limit} for a bell (area ratio 4)',
+    'bellAreaRatioMaximum': 'exitRadius must be at most {limit} for a bell (area ratio 100)',
+    'gammaMinimum': 'gamma must be greater than 1 for a method of characteristics wall',
+    'characteristicCountMinimum': 'characteristicCount must be at least {} for a method of characteristics wall'.format(
+        MINIMUM_CHARACTERISTIC_COUNT),
+}
+
+
+def checkParameters(nozzleParameters: NozzleParameters, degrees: bool = True) -> Dict[str, np.ndarray]:
+    # rule -> bool array over the designs, True where the design breaks the rule
+    violations = {}
+    for result in _evaluateRules(nozzleParameters, degrees):
+        key = result.rule if result.rule != 'positive' else '{}.positive'.format(result.field)
+        violations[key] = result.violated
+    return violations
+
+
+def isFeasible(nozzleParameters: NozzleParameters, degrees: bool = True) -> np.ndarray:
+    return ~functools.reduce(np.logical_or, checkParameters(nozzleParameters, degrees).values())
+
+
+def validateParameters(nozzleParameters: NozzleParameters, degrees: bool = True,
+                       formatLength: Callable[[float], str] = '{:.4g}'.format) -> List[Violation]:
+    # violations of a single design, in rule order; lengths are shown with `formatLength`, angles in degrees
+    violations = []
+    for result in _evaluateRules(nozzleParameters, degrees):
+        if not bool(result.violated):
+            continue
+        limit = float(result.limit)
+        if result.isAngle:
+            formattedLimit = '{:.4g} deg'.format(math.degrees(limit))
+        else:
+            formattedLimit = formatLength(limit)
+        violations.append(Violation(result.rule, result.field,
+                                    _MESSAGES[result.rule].format(field=result.field, limit=formattedLimit)))
+    return violations
+
+
+def validateChannels(nozzleParameters: NozzleParameters, wallLayers: WallLayers, channels: CoolingChannels,
+                     formatLength: Callable[[float], str] = '{:.4g}'.format) -> List[Violation]:
+    # channels run the whole length of the channel layer, so they have to fit side by side around its throat
+    if channels.count <= 0:
+        return []
+    if channels.width <= 0:
+        return [Violation('positive', 'channelWidth', _MESSAGES['positive'].format(field='channelWidth'))]
+    exitAngle = 0.0
+    if nozzleParameters.divergenceStyle == DivergenceStyle.CONE:
+        exitAngle = math.atan2(nozzleParameters.exitRadius - nozzleParameters.throatRadius, nozzleParameters.exitLength)
+    minimumRadius = nozzleParameters.throatRadius - nozzleParameters.divergenceRadius * (1 - math.cos(exitAngle))
+    maximumWidth = 2 * math.pi * (minimumRadius + wallLayers.innerWallThickness) / channels.count
+    if channels.width < maximumWidth:
+        return []
+    return [Violation('channelsFit', 'channelWidth', 'channelWidth must be less than {} for {} channels'.format(
+        formatLength(maximumWidth), channels.count))]
+
+
+def _evaluateRules(nozzleParameters: NozzleParameters, degrees: bool) -> List[_RuleResult]:
+    chamberLength = np.asarray(nozzleParameters.chamberLength, dtype=float)
+    chamberCylinderLength = np.asarray(nozzleParameters.chamberCylinderLength, dtype=float)
+    exitLength = np.asarray(nozzleParameters.exitLength, dtype=float)
+    chamberRadius = np.asarray(nozzleParameters.chamberRadius, dtype=float)
+    throatRadius = np.asarray(nozzleParameters.throatRadius, dtype=float)
+    exitRadius = np.asarray(nozzleParameters.exitRadius, dtype=float)
+    convergenceRadius = np.asarray(nozzleParameters.convergenceRadius, dtype=float)
+    divergenceRadius = np.asarray(nozzleParameters.divergenceRadius, dtype=float)
+    convergenceAngle = np.asarray(nozzleParameters.convergenceAngle, dtype=float)
+    if degrees:
+        convergenceAngle = np.radians(convergenceAngle)
+    isCone = nozzleParameters.divergenceStyle == DivergenceStyle.CONE
+    zero = np.zeros(np.broadcast(chamberLength, throatRadius, convergenceAngle).shape)
+
+    results = [_RuleResult('positive', field, np.asarray(getattr(nozzleParameters, field)) <= 0, zero)
+               for field in _POSITIVE_FIELDS]
+    results.append(_RuleResult('convergenceAngleRange', 'convergenceAngle',
+                               (convergenceAngle <= 0) | (convergenceAngle >= math.pi / 2), zero + math.pi / 2, True))
+    results.append(_RuleResult('throatInsideChamber', 'throatRadius', throatRadius >= chamberRadius, chamberRadius))
+    results.append(_RuleResult('exitOutsideThroat', 'exitRadius', exitRadius <= throatRadius, throatRadius))
+
+    # the tangent chain of solveContour, from the throat back to the chamber; curved divergent sections leave the
+    # throat parallel to the axis. Its rules only apply once the rules above hold, so a violation is reported against
+    # the parameter that caused it and not against everything downstream of it.
+    isChainValid = ~functools.reduce(np.logical_or, [result.violated for result in results])
+    # the requested cylinder length is drawn by the sketch but does not move the chain
+    results.append(_RuleResult('cylinderNegative', 'chamberCylinderLength', chamberCylinderLength < 0, zero))
+    results.append(_RuleResult('cylinderInsideChamber', 'chamberCylinderLength', chamberCylinderLength > chamberLength,
+                               chamberLength))
+    with np.errstate(all='ignore'):
+        exitAngle = np.arctan2(exitRadius - throatRadius, exitLength) if isCone else zero
+        sinConvergence, cosConvergence = np.sin(convergenceAngle), np.cos(convergenceAngle)
+        divergenceCenterX = throatRadius + divergenceRadius * np.cos(exitAngle)
+        convergenceLineEndX = divergenceCenterX - divergenceRadius * cosConvergence
+        convergenceLineEndY = exitLength + divergenceRadius * np.sin(exitAngle) + divergenceRadius * sinConvergence
+        convergenceLineLength = (chamberRadius - convergenceRadius * (1 - cosConvergence) - convergenceLineEndX) / \
+            sinConvergence
+        convergenceCenterY = convergenceLineEndY + convergenceLineLength * cosConvergence + \
+            convergenceRadius * sinConvergence
+        cylinderLength = chamberLength + exitLength - convergenceCenterY
+
+        isThroatValid = isChainValid & (divergenceCenterX - divergenceRadius > 0)
+        results.append(_RuleResult('divergenceRadiusFits', 'divergenceRadius', isChainValid & ~isThroatValid,
+                                   throatRadius / (1 - np.cos(exitAngle))))
+        isThroatArcValid = isThroatValid & (convergenceLineEndX < chamberRadius)
+        results.append(_RuleResult('divergenceRadiusFitsChamber', 'divergenceRadius', isThroatValid & ~isThroatArcValid,
+                                   (chamberRadius - throatRadius) / (np.cos(exitAngle) - cosConvergence)))
+        results.append(_RuleResult('convergenceRadiusFits', 'convergenceRadius',
+                                   isThroatArcValid & ~(convergenceLineLength >= 0),
+                                   (chamberRadius - convergenceLineEndX) / (1 - cosConvergence)))
+        results.append(_RuleResult('convergingSectionFits', 'chamberLength',
+                                   isThroatArcValid & (convergenceLineLength >= 0) & ~(cylinderLength >= 0),
+                                   chamberLength - cylinderLength))
+
+        if nozzleParameters.divergenceStyle == DivergenceStyle.BELL:
+            # outside its charts BellContour clamps to their edges, which is not the nozzle that was asked for
+            conicalLength = getConicalLength(throatRadius, exitRadius)
+            lengthFraction = exitLength / conicalLength
+            areaRatio = (exitRadius / throatRadius) ** 2
+            results.append(_RuleResult('bellLengthMinimum', 'exitLength',
+                                       isChainValid & (lengthFraction < BELL_LENGTH_FRACTIONS[0]),
+                                       BELL_LENGTH_FRACTIONS[0] * conicalLength))
+            results.append(_RuleResult('bellLengthMaximum', 'exitLength',
+                                       isChainValid & (lengthFraction > BELL_LENGTH_FRACTIONS[1]),
+                                       BELL_LENGTH_FRACTIONS[1] * conicalLength))
+            results.append(_RuleResult('bellAreaRatioMinimum', 'exitRadius',
+                                       isChainValid & (areaRatio < BELL_AREA_RATIOS[0]),
+                                       throatRadius * math.sqrt(BELL_AREA_RATIOS[0])))
+            results.append(_RuleResult('bellAreaRatioMaximum', 'exitRadius',
+                                       isChainValid & (areaRatio > BELL_AREA_RATIOS[1]),
+                                       throatRadius * math.sqrt(BELL_AREA_RATIOS[1])))
+        elif nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+            # exitLength is not checked, the wall is as long as its net (see NozzleContour.resolveExitLength)
+            results.append(_RuleResult('gammaMinimum', 'gamma', np.asarray(nozzleParameters.gamma) <= 1, zero + 1))
+            results.append(_RuleResult('characteristicCountMinimum', 'characteristicCount',
+                                       np.asarray(nozzleParameters.characteristicCount) < MINIMUM_CHARACTERISTIC_COUNT,
+                                       zero + MINIMUM_CHARACTERISTIC_COUNT))
+    return results
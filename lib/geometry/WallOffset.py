@@ -0,0 +1,208 @@
+import math
+from typing import Sequence
+
+import numpy as np
+
+from .NozzleContour import NozzleContour, sampleDivergentSection
+
+# Constant-thickness wall layers: every layer is the normal offset of the gas-side contour, so the wall is as thick
+# through the throat and the converging section as it is along the chamber. Lines and arcs of the tangent chain are
+# offset analytically (lines move along their normal, arcs keep their centre and change radius); curved divergent
+# sections are offset along the normals of their sample points. All layers of all designs are offset in one pass by
+# adding a leading layer axis to the contour fields, and every layer ends on the exit plane.
+#
+# Seen from outside the wall the throat is concave, so a layer thicker than the throat's radius of curvature folds over
+# itself there. The fold is trimmed where the layer crosses itself, which leaves a sharp corner just like an offset in
+# the sketch would.
+
+_MINIMUM_LENGTH = 1e-12
+_DISTANCE_TOLERANCE = 1e-9
+
+
+def offsetContour(contour: NozzleContour, offsets: Sequence[float], pointsPerSegment: int = 64) -> NozzleContour:
+    # returns a NozzleContour whose fields have a leading axis of len(offsets), offsets grow the wall outwards.
+    # Curved divergent sections come back as explicit divergentWall points that include the trimmed throat.
+    d = _getOffsets(contour, offsets)
+    dPoint = d[..., None]
+    layerShape = np.shape(d)[:1] + np.shape(contour.convergenceRadius)
+    convergenceNormal = _unitVectors(-contour.convergenceAngle)
+    shift = dPoint * np.array([1.0, 0.0])
+    convergenceLineStart = contour.convergenceLineStart + dPoint * convergenceNormal
+
+    if contour.bell is None and contour.divergentWall is None:
+        throat = _offsetConeThroat(contour, d)
+        divergentWall = None
+    else:
+        region, _ = _offsetCurvedThroat(contour, d, pointsPerSegment)
+        # the divergence arc is part of the explicit wall points, so the contour keeps it as a zero radius arc
+        throatPoint = region[..., 1, :]
+        minimumIndex = np.argmin(region[..., 0], axis=-1)[..., None, None]
+        throat = (throatPoint, throatPoint, np.zeros(layerShape),
+                  np.take_along_axis(region, minimumIndex, axis=-2)[..., 0, :], throatPoint, region[..., -1, :])
+        divergentWall = region[..., 1:, :]
+    convergenceLineEnd, divergenceArcCenter, divergenceRadius, minimumRadiusPoint, throatPoint, exitPoint = throat
+
+    return NozzleContour(
+        chamberStart=contour.chamberStart + shift,
+        chamberEnd=contour.chamberEnd + shift,
+        convergenceArcCenter=np.broadcast_to(contour.convergenceArcCenter, layerShape + (2,)),
+        convergenceLineStart=convergenceLineStart,
+        convergenceLineEnd=convergenceLineEnd,
+        divergenceArcCenter=divergenceArcCenter,
+        minimumRadiusPoint=minimumRadiusPoint,
+        throatPoint=throatPoint,
+        exitPoint=exitPoint,
+        convergenceAngle=np.broadcast_to(contour.convergenceAngle, layerShape),
+        exitAngle=np.broadcast_to(contour.exitAngle, layerShape),
+        convergenceRadius=contour.convergenceRadius + d,
+        divergenceRadius=divergenceRadius,
+        divergentWall=divergentWall)
+
+
+def findSelfIntersections(contour: NozzleContour, offsets: Sequence[float],
+                          pointsPerSegment: int = 64) -> np.ndarray:
+    # boolean array of shape (len(offsets), ...): True where a layer folds over itself at the throat and is trimmed
+    d = _getOffsets(contour, offsets)
+    if contour.bell is None and contour.divergentWall is None:
+        return np.broadcast_to(d > contour.divergenceRadius, np.shape(d)[:1] + np.shape(contour.divergenceRadius))
+    _, folded = _offsetCurvedThroat(contour, d, pointsPerSegment)
+    return folded
+
+
+def removeRepeatedPoints(points: np.ndarray, tolerance: float = 1e-9) -> np.ndarray:
+    # trimmed folds and zero radius arcs repeat points, drop them from a single (points, 2) polyline
+    keep = np.concatenate([[True], np.linalg.norm(np.diff(points, axis=0), axis=-1) > tolerance])
+    return points[keep]
+
+
+def _getOffsets(contour: NozzleContour, offsets: Sequence[float]) -> np.ndarray:
+    offsets = np.asarray(offsets, dtype=float)
+    if np.any(offsets < 0):
+        raise ValueError('Wall offsets must not be negative')
+    return offsets.reshape((-1,) + (1,) * np.ndim(contour.convergenceRadius))
+
+
+def _offsetConeThroat(contour: NozzleContour, d: np.ndarray) -> tuple:
+    dPoint = d[..., None]
+    convergenceLineEnd = contour.convergenceLineEnd + dPoint * _unitVectors(-contour.convergenceAngle)
+    throatPoint = contour.throatPoint + dPoint * _unitVectors(contour.exitAngle)
+    divergenceRadius = contour.divergenceRadius - d
+    divergenceArcCenter = np.broadcast_to(contour.divergenceArcCenter, np.shape(convergenceLineEnd))
+    minimumRadiusPoint = divergenceArcCenter - divergenceRadius[..., None] * np.array([1.0, 0.0])
+
+    # thicker than the divergence radius: the offset arc turns inside out, so the offset convergence and exit lines
+    # meet in a corner instead
+    folded = (divergenceRadius < 0)[..., None]
+    convergenceDirection = _unitVectors(math.pi / 2 - contour.convergenceAngle)
+    exitDirection = _unitVectors(contour.exitAngle - math.pi / 2)
+    corner = _intersectLines(convergenceLineEnd, convergenceDirection, throatPoint, exitDirection)
+    lineLength = np.hypot(*np.moveaxis(contour.convergenceLineStart - contour.convergenceLineEnd, -1, 0))
+    cornerDistance = np.sum((corner - convergenceLineEnd) * convergenceDirection, axis=-1)
+    if np.any(folded[..., 0] & ((corner[..., 1] <= 0) | (cornerDistance >= lineLength))):
+        raise ValueError('Wall offsets are too thick for the nozzle throat')
+
+    throatPoint = np.where(folded, corner, throatPoint)
+    # the exit line keeps its angle, so slide the offset throat point along it down to the exit plane
+    exitPoint = throatPoint + throatPoint[..., 1, None] / np.cos(contour.exitAngle)[..., None] * exitDirection
+    return (np.where(folded, corner, convergenceLineEnd), np.where(folded, corner, divergenceArcCenter),
+            np.maximum(divergenceRadius, 0.0), np.where(folded, corner, minimumRadiusPoint), throatPoint, exitPoint)
+
+
+def _offsetCurvedThroat(contour: NozzleContour, d: np.ndarray, pointsPerSegment: int) -> (np.ndarray, np.ndarray):
+    # offset points from the convergence line start to the exit: (layers, ..., points, 2), plus the folded layers
+    convergenceAngle = contour.convergenceAngle[..., None]
+    t = np.linspace(0.0, 1.0, pointsPerSegment)
+    arcDirections = _unitVectors(math.pi - convergenceAngle + (convergenceAngle + contour.exitAngle[..., None]) * t)
+    wallPoints = sampleDivergentSection(contour, pointsPerSegment)
+    base = np.concatenate([contour.convergenceLineStart[..., None, :],
+                           contour.divergenceArcCenter[..., None, :] + contour.divergenceRadius[..., None, None] *
+                           arcDirections,
+                           np.broadcast_to(wallPoints, np.shape(arcDirections)[:-2] + np.shape(wallPoints)[-2:])],
+                          axis=-2)
+
+    # bells leave the throat parallel to the axis and end at their exit angle, method of characteristics walls turn
+    # sharply at the throat and end parallel to the axis
+    tangents = _getTangents(wallPoints)
+    exitAngle = contour.bell.exitAngle if contour.bell is not None else np.zeros(np.shape(contour.exitAngle))
+    exitTangent = _unitVectors(np.asarray(exitAngle) - math.pi / 2)
+    tangents[..., -1, :] = exitTangent
+    if contour.bell is not None:
+        tangents[..., 0, :] = [0.0, -1.0]
+    normals = np.concatenate([_unitVectors(-contour.convergenceAngle)[..., None, :], -arcDirections,
+                              np.stack([-tangents[..., 1], tangents[..., 0]], axis=-1)], axis=-2)
+    region = base + d[..., None, None] * normals
+    # extend (or trim) the last offset point along the exit tangent so the layer ends on the exit plane
+    region[..., -1, :] -= (region[..., -1, 1] / exitTangent[..., 1])[..., None] * exitTangent
+
+    # a point of a folded layer lies closer to the wall than the layer thickness. The fold is cut out where the last
+    # good segment before it meets the first good segment after it; the first segment is the offset convergence line,
+    # which stays straight however far the fold reaches into it.
+    invalid = _getWallDistance(region, base) < d[..., None] * (1 - _DISTANCE_TOLERANCE)
+    folded = np.any(invalid, axis=-1)
+    count = region.shape[-2]
+    first = np.argmax(invalid, axis=-1)
+    last = count - 1 - np.argmax(invalid[..., ::-1], axis=-1)
+    if np.any(folded & ((first == 0) | (last >= count - 2))):
+        raise ValueError('Wall offsets are too thick for the nozzle throat')
+    before = _takePoints(region, np.maximum(first - 2, 0)), _takePoints(region, np.maximum(first - 1, 1))
+    after = _takePoints(region, np.minimum(last + 1, count - 2)), _takePoints(region, np.minimum(last + 2, count - 1))
+    corner = _intersectLines(before[0], before[1] - before[0], after[0], after[1] - after[0])
+    indices = np.arange(count)
+    trimmed = folded[..., None] & (indices >= first[..., None]) & (indices <= last[..., None])
+    return np.where(trimmed[..., None], corner[..., None, :], region), folded
+
+
+def _getWallDistance(points: np.ndarray, basePoints: np.ndarray, chunkSize: int = 64) -> np.ndarray:
+    # distance from every offset point to the closest segment of the base polyline it was offset from, leaving out the
+    # segments next to its own base point: their chords cut concave curves, and repeated points (where sections join)
+    # would otherwise hide a chord's neighbour. Segments are taken a chunk at a time to bound the
+    # memory of the (points, segments) distance arrays.
+    x, y = points[..., :, None, 0], points[..., :, None, 1]
+    indices = np.arange(points.shape[-2])[:, None]
+    distance = np.full(np.shape(points)[:-1], np.inf)
+    segmentCount = basePoints.shape[-2] - 1
+    for start in range(0, segmentCount, chunkSize):
+        end = min(start + chunkSize, segmentCount)
+        segmentStart = basePoints[..., None, start:end, :]
+        segmentEnd = basePoints[..., None, start + 1:end + 1, :]
+        startX, startY = segmentStart[..., 0], segmentStart[..., 1]
+        directionX, directionY = segmentEnd[..., 0] - startX, segmentEnd[..., 1] - startY
+        t = np.clip(((x - startX) * directionX + (y - startY) * directionY) /
+                    np.maximum(directionX ** 2 + directionY ** 2, _MINIMUM_LENGTH), 0.0, 1.0)
+        squaredDistance = (x - startX - t * directionX) ** 2 + (y - startY - t * directionY) ** 2
+        segments = np.arange(start, end)
+        squaredDistance = np.where(np.abs(segments - indices + 0.5) < 2, np.inf, squaredDistance)
+        distance = np.minimum(distance, np.sqrt(np.min(squaredDistance, axis=-1)))
+    return distance
+
+
+def _getTangents(points: np.ndarray) -> np.ndarray:
+    # unit tangents at the sample points, averaged from the neighbouring segments
+    segments = np.diff(points, axis=-2)
+    segments = segments / np.maximum(np.linalg.norm(segments, axis=-1, keepdims=True), _MINIMUM_LENGTH)
+    tangents = np.concatenate([segments[..., :1, :], segments[..., :-1, :] + segments[..., 1:, :],
+                               segments[..., -1:, :]], axis=-2)
+    return tangents / np.maximum(np.linalg.norm(tangents, axis=-1, keepdims=True), _MINIMUM_LENGTH)
+
+
+def _intersectLines(pointA: np.ndarray, directionA: np.ndarray, pointB: np.ndarray,
+                    directionB: np.ndarray) -> np.ndarray:
+    denominator = _cross(directionA, directionB)
+    # parallel lines only happen for a fold that has nothing left to cut, take the midpoint of the two points then
+    parallel = np.abs(denominator) < _MINIMUM_LENGTH
+    s = _cross(pointB - pointA, directionB) / np.where(parallel, 1.0, denominator)
+    return np.where(parallel[..., None], (pointA + pointB) / 2, pointA + s[..., None] * directionA)
+
+
+def _takePoints(points: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    return np.take_along_axis(points, indices[..., None, None], axis=-2)[..., 0, :]
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def _unitVectors(angles) -> np.ndarray:
+    angles = np.asarray(angles, dtype=float)
+    return np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
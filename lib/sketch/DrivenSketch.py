@@ -0,0 +1,124 @@
+import math
+from typing import List
+
+from adsk.fusion import Sketch
+
+from .SketchBuilder import DrivenDimensionHandle, SketchSplineHandle
+from .SketchUtils import moveFitPoints, deleteEntities
+from ..NozzleDefinitions import NozzleParameters, WallLayers
+
+
+class _DrivenDimension:
+    def __init__(self, handle: DrivenDimensionHandle, model):
+        # model: what getValue reads the dimension's value from, NozzleParameters or WallLayers
+        self._dimension = handle.dimension
+        self._getValue = handle.getValue
+        # angular dimensions created without a value may measure the supplement of the angle we compute
+        self._isSupplementary = False
+        if handle.isAngular:
+            measuredValue = self._dimension.entity.parameter.value
+            expectedValue = self._getValue(model)
+            self._isSupplementary = abs(measuredValue - (math.pi - expectedValue)) < abs(measuredValue - expectedValue)
+
+    def isValid(self) -> bool:
+        return self._dimension.entity is not None and self._dimension.entity.isValid
+
+    def update(self, previous, current, tolerance: float) -> bool:
+        value = self._getValue(current)
+        if abs(value - self._getValue(previous)) <= tolerance:
+            return False
+        self._dimension.entity.parameter.value = math.pi - value if self._isSupplementary else value
+        return True
+
+
+class _DrivenSpline:
+    def __init__(self, handle: SketchSplineHandle):
+        self._spline = handle.entity
+        self._points = handle.points
+
+    def isValid(self) -> bool:
+        return self._spline is not None and self._spline.isValid
+
+    def canUpdate(self, points: [(float, float)]) -> bool:
+        # fit points are moved one for one, a wall solved with another number of points needs a new spline
+        return len(points) == len(self._points)
+
+    def update(self, points: [(float, float)]) -> bool:
+        if points == self._points:
+            return False
+        moveFitPoints(self._spline, self._points, points)
+        self._points = points
+        return True
+
+
+# The dimensions an EngineSketch created, remembered so that a later generation into the same sketch only drives
+# the dimensions whose value changed instead of drawing the whole engine again. Wall layers are driven through the
+# distances of their offsets and a curved divergent section by moving the fit points of its spline. What cannot be
+# driven, another divergence style or a wall with another number of points, is removed with `delete` and drawn again.
+class DrivenSketch:
+    def __init__(self, sketch: Sketch, nozzleParameters: NozzleParameters, wallLayers: WallLayers,
+                 handles: List[DrivenDimensionHandle], layerHandles: List[DrivenDimensionHandle],
+                 spline: SketchSplineHandle, entities: list, layerCurves: list):
+        self._sketch = sketch
+        self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
+        self._drivenDimensions = [_DrivenDimension(handle, nozzleParameters) for handle in handles]
+        self._layerDimensions = [_DrivenDimension(handle, wallLayers) for handle in layerHandles]
+        self._drivenSpline = _DrivenSpline(spline) if spline is not None else None
+        self._entities = entities
+        self._layerCurves = layerCurves
+        # features and entities built from the engine afterwards, such as its solid, see addDependents
+        self._dependents = []
+
+    def isValid(self) -> bool:
+        splineIsValid = self._drivenSpline is None or self._drivenSpline.isValid()
+        return self._sketch.isValid and splineIsValid and \
+            all(dimension.isValid() for dimension in self._drivenDimensions + self._layerDimensions)
+
+    def canUpdate(self, nozzleParameters: NozzleParameters, splinePoints: [(float, float)] = None) -> bool:
+        if nozzleParameters.divergenceStyle != self._nozzleParameters.divergenceStyle:
+            return False
+        return self._drivenSpline is None or self._drivenSpline.canUpdate(splinePoints)
+
+    def update(self, nozzleParameters: NozzleParameters, wallLayers: WallLayers,
+               splinePoints: [(float, float)] = None, tolerance: float = 1e-9) -> int:
+        # returns the number of driven dimensions and moved splines
+        if nozzleParameters == self._nozzleParameters and wallLayers == self._wallLayers:
+            return 0
+        updatedCount = 0
+        self._sketch.isComputeDeferred = True
+        try:
+            for dimension in self._drivenDimensions:
+                if dimension.update(self._nozzleParameters, nozzleParameters, tolerance):
+                    updatedCount += 1
+            for dimension in self._layerDimensions:
+                if dimension.update(self._wallLayers, wallLayers, tolerance):
+                    updatedCount += 1
+            if self._drivenSpline is not None and self._drivenSpline.update(splinePoints):
+                updatedCount += 1
+        finally:
+            self._sketch.isComputeDeferred = False
+        self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
+        return updatedCount
+
+    def getLayerCurves(self) -> list:
+        # the curves of every wall layer as EngineSketch.draw returned them, they follow the driven dimensions
+        return self._layerCurves
+
+    def addDependents(self, entities: list):
+        self._dependents += entities
+
+    def deleteDependents(self):
+        deleteEntities(self._dependents)
+        self._dependents = []
+
+    def delete(self):
+        # dependents first, a feature cannot outlive the profiles it was built from
+        self.deleteDependents()
+        self._sketch.isComputeDeferred = True
+        try:
+            deleteEntities(self._entities)
+        finally:
+            self._sketch.isComputeDeferred = False
+        self._entities = []
@@ -0,0 +1,35 @@
+from adsk.fusion import Component
+
+from .EngineSolid import EngineSolid
+from .NozzleSketch import EngineSketch
+from .SketchUtils import createNewComponent, createXYSketch, addOccurrence, createTranslation
+from ..NozzleDefinitions import NozzleParameters, WallLayers, CoolingChannels
+from ..common.Instrumentation import instrumentation
+from ..geometry.ClusterLayout import ClusterLayout, getClusterPositions
+
+
+# Several identical engines on a pattern. The engine is drawn once into a new component and every other engine is an
+# occurrence of that component placed by a translation, so a cluster costs one engine plus one call per occurrence.
+# Engine axes run along the sketch y axis, the layout is spread over the model XZ plane.
+class EngineCluster:
+    def __init__(self, nozzleParameters: NozzleParameters, wallLayers: WallLayers, layout: ClusterLayout,
+                 channels: CoolingChannels = None):
+        self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
+        self._layout = layout
+        # the engine component is made solid when channels are given, every occurrence shares that solid
+        self._channels = channels
+
+    def generate(self) -> Component:
+        # returns the engine component, the first engine is the occurrence it was created with
+        positions = getClusterPositions(self._layout).tolist()
+        with instrumentation.stage('engine component'):
+            component = createNewComponent(createTranslation(positions[0][0], 0, positions[0][1]))
+            sketch = createXYSketch(component)
+            layerCurves = EngineSketch(self._nozzleParameters, self._wallLayers).draw(sketch)
+            if self._channels is not None:
+                EngineSolid(self._nozzleParameters, self._wallLayers, self._channels).generate(sketch, layerCurves)
+        with instrumentation.stage('place occurrences', occurrences=len(positions) - 1):
+            for x, z in positions[1:]:
+                addOccurrence(component, createTranslation(x, 0, z))
+        return component
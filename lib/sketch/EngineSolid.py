@@ -0,0 +1,78 @@
+import numpy as np
+
+from adsk.core import Point3D
+from adsk.fusion import Sketch
+
+from .SketchUtils import LineType, drawLine, createSketchByPlane, revolveProfiles, sweepProfile, circularPattern, \
+    getTimelinePosition, groupTimeline
+from ..NozzleDefinitions import NozzleParameters, WallLayers, CoolingChannels
+from ..common.Instrumentation import instrumentation
+from ..geometry.ContourCache import contourCache
+
+
+# Solid engine from the layered wall EngineSketch drew: the wall layers are closed at the injector face and the exit
+# and every layer profile is revolved in a single feature. One coolant channel is swept through the channel layer
+# along the inner wall and circular patterned with identical compute, so the timeline holds three features whatever
+# the channel count, grouped with the sketches they use.
+class EngineSolid:
+    def __init__(self, nozzleParameters: NozzleParameters, wallLayers: WallLayers, channels: CoolingChannels):
+        self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
+        self._channels = channels
+
+    def generate(self, sketch: Sketch, layerCurves: list) -> list:
+        # layerCurves: the curves of every wall layer as returned by EngineSketch.draw; returns the entities and
+        # features created, in order, see EngineSketch.addDependents
+        component = sketch.parentComponent
+        startPosition = getTimelinePosition()
+        with instrumentation.stage('end caps'):
+            created = self._drawEndCaps(sketch, layerCurves)
+        with instrumentation.stage('revolve'):
+            profiles = sketch.profiles
+            created.append(revolveProfiles(component, [profiles.item(i) for i in range(profiles.count)],
+                                           component.yConstructionAxis))
+        if self._channels.count > 0:
+            with instrumentation.stage('cooling channel'):
+                channelSketch = self._drawChannelSketch(component)
+                channel = sweepProfile(component, channelSketch.profiles.item(0), layerCurves[1][0])
+                created += [channelSketch, channel]
+            if self._channels.count > 1:
+                with instrumentation.stage('channel pattern', channels=self._channels.count):
+                    created.append(circularPattern(component, [channel], component.yConstructionAxis,
+                                                   self._channels.count))
+        groupTimeline(startPosition, 'Engine solid')
+        return created
+
+    def _drawEndCaps(self, sketch: Sketch, layerCurves: list) -> list:
+        # lines between the ends of neighbouring layers; they share the layers' end points, so the caps follow the
+        # wall when its dimensions are driven. The layers are sampled like the preview's, which usually cached them.
+        layerEnds = contourCache.getOffsetPoints(self._nozzleParameters, self._wallLayers.getOffsets(), 8,
+                                                 degrees=False)[:, [0, -1]]
+        layerPoints = [_getLayerEndPoints(curves, layerEnds[layer]) for layer, curves in enumerate(layerCurves)]
+        sketch.isComputeDeferred = True
+        try:
+            return [drawLine(startPoints[end], endPoints[end], LineType.NORMAL, sketch)
+                    for end in range(2) for startPoints, endPoints in zip(layerPoints[:-1], layerPoints[1:])]
+        finally:
+            sketch.isComputeDeferred = False
+
+    def _drawChannelSketch(self, component) -> Sketch:
+        # a rectangle across the channel layer in the injector face plane, centred on the sketch plane
+        nozzleLength = self._nozzleParameters.chamberLength + self._nozzleParameters.exitLength
+        innerRadius = self._nozzleParameters.chamberRadius + self._wallLayers.innerWallThickness
+        outerRadius = innerRadius + self._wallLayers.channelThickness
+        halfWidth = self._channels.width / 2
+        channelSketch = createSketchByPlane(component, component.xZConstructionPlane, nozzleLength)
+        channelSketch.sketchCurves.sketchLines.addTwoPointRectangle(
+            channelSketch.modelToSketchSpace(Point3D.create(innerRadius, nozzleLength, -halfWidth)),
+            channelSketch.modelToSketchSpace(Point3D.create(outerRadius, nozzleLength, halfWidth)))
+        return channelSketch
+
+
+def _getLayerEndPoints(curves: list, ends: np.ndarray) -> list:
+    # Fusion does not keep offset curves in chain order, so the sketch points closest to the expected ends of a layer
+    # are taken; every point is read once, it is an API call per property
+    points = [point for curve in curves for point in (curve.startSketchPoint, curve.endSketchPoint)]
+    coordinates = np.array([(geometry.x, geometry.y) for geometry in (point.geometry for point in points)])
+    distances = np.hypot(*(coordinates[None, :, :] - ends[:, None, :]).transpose(2, 0, 1))
+    return [points[index] for index in np.argmin(distances, axis=1)]
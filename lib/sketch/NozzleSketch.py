@@ -1,42 +1,137 @@
 from .SketchUtils import *
+from .SketchBuilder import SketchBuilder, Point2D, SketchPointHandle, SketchLineHandle, SketchArcHandle, \
+    SketchSplineHandle, DrivenDimensionHandle
+from .DrivenSketch import DrivenSketch
 import math
 
-from ..NozzleDefinitions import NozzleParameters
-from ..common.Common import unitsMgr
+from ..NozzleDefinitions import NozzleParameters, DivergenceStyle, WallLayers
+from ..geometry.NozzleContour import sampleDivergentSection
+from ..geometry.ContourCache import contourCache
+from ..common.Instrumentation import instrumentation
 
 
 class EngineSketch:
-    def __init__(self, nozzleParameters: NozzleParameters):
+    # sketch entity token -> dimensions of the engine previously drawn into that sketch
+    _drivenSketches = {}
+
+    def __init__(self, nozzleParameters: NozzleParameters, wallLayers: WallLayers):
         self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
         self._chamberLength = nozzleParameters.chamberLength
         self._exitLength = nozzleParameters.exitLength
         self._nozzleLength = self._chamberLength + self._exitLength
 
-    def draw(self):
+    def draw(self, sketch: Sketch = None) -> list:
+        # draws into the active sketch unless another one is given and returns the curves of every wall layer, from
+        # the chamber to the exit, or None when an engine already in the sketch was regenerated
+        sketch = sketch or getActiveSketch()
+        splinePoints = None
+        if self._nozzleParameters.divergenceStyle != DivergenceStyle.CONE:
+            splinePoints = getDivergentSplinePoints(self._nozzleParameters)
+        # an engine already drawn into this sketch is regenerated by driving its dimensions
+        drivenSketch = EngineSketch._drivenSketches.pop(sketch.entityToken, None)
+        if drivenSketch is not None and drivenSketch.isValid() and \
+                drivenSketch.canUpdate(self._nozzleParameters, splinePoints):
+            EngineSketch._drivenSketches[sketch.entityToken] = drivenSketch
+            with instrumentation.stage('drive dimensions') as stage:
+                stage.args['dimensions'] = drivenSketch.update(self._nozzleParameters, self._wallLayers, splinePoints)
+            return
+        # otherwise the previous engine and what was built from it make way for the new one
+        if drivenSketch is not None:
+            with instrumentation.stage('delete engine'):
+                drivenSketch.delete()
+        # the gas-side wall is collected first and committed in one pass, so the sketch is solved once
+        builder = SketchBuilder(sketch)
         # common construction lines
-        exitSymmetryLine = self._drawExitSymmetryLine()
-        chamberSymmetryLine = self._drawChamberSymmetryLine(exitSymmetryLine.endSketchPoint)
+        builder.setStage('symmetry lines')
+        exitSymmetryLine = self._drawExitSymmetryLine(builder)
+        chamberSymmetryLine = self._drawChamberSymmetryLine(builder, exitSymmetryLine.endSketchPoint)
         # sketch
-        innerWallThickness = 0.3
-        channelThickness = 1.0
-        outerWallThickness = 1.0
-        NozzleSketch(self._nozzleParameters, exitSymmetryLine, chamberSymmetryLine).draw()
-        NozzleSketch(self._nozzleParameters, exitSymmetryLine, chamberSymmetryLine, innerWallThickness).draw()
-        NozzleSketch(self._nozzleParameters, exitSymmetryLine, chamberSymmetryLine, innerWallThickness + channelThickness).draw()
-        NozzleSketch(self._nozzleParameters, exitSymmetryLine, chamberSymmetryLine, innerWallThickness + channelThickness + outerWallThickness).draw()
-
-    def _drawExitSymmetryLine(self) -> SketchLine:
-        endPoint = drawSketchPoint(0, self._exitLength)
-        line = drawLine(getOrigin(), endPoint, LineType.CONSTRUCTION)
-        applyVerticalConstraint(line)
-        applyLineDimension(line)
+        builder.setStage('nozzle wall')
+        nozzleSketch = NozzleSketch(self._nozzleParameters, builder, exitSymmetryLine, chamberSymmetryLine)
+        wallCurves = nozzleSketch.draw()
+        builder.commit()
+        # every other layer is a single offset of the solved wall, which keeps its thickness constant all along the
+        # contour and follows the wall when its dimensions are driven
+        directionPoint = self._getOutsidePoint()
+        layerOffsets = []
+        for layer, offset in enumerate(self._wallLayers.getOffsets()[1:], 1):
+            builder.setStage('wall layer {}'.format(layer))
+            layerOffsets.append(builder.offsetCurves(wallCurves, directionPoint, offset))
+        layerExtensions = self._extendLayerOffsets(builder, layerOffsets)
+        builder.commit()
+        layerCurves = [[curve.entity for curve in wallCurves]] + \
+            [layerOffset.entities + [extension.entity for extension in extensions]
+             for layerOffset, extensions in zip(layerOffsets, layerExtensions)]
+        # the offset distances drive the layer thicknesses
+        layerHandles = [DrivenDimensionHandle(offset.dimension, lambda w, layer=layer: w.getOffsets()[layer], False)
+                        for layer, offset in enumerate(layerOffsets, 1)]
+        EngineSketch._drivenSketches[sketch.entityToken] = DrivenSketch(
+            sketch, self._nozzleParameters, self._wallLayers, builder.getDrivenDimensions(), layerHandles,
+            nozzleSketch.getDivergentSpline(), builder.getEntities(), layerCurves)
+        return layerCurves
+
+    @staticmethod
+    def isDrawn(sketch: Sketch) -> bool:
+        # whether an engine drawn into `sketch` can still be regenerated
+        drivenSketch = EngineSketch._drivenSketches.get(sketch.entityToken)
+        return drivenSketch is not None and drivenSketch.isValid()
+
+    @staticmethod
+    def getLayerCurves(sketch: Sketch) -> list:
+        return EngineSketch._drivenSketches[sketch.entityToken].getLayerCurves()
+
+    @staticmethod
+    def addDependents(sketch: Sketch, entities: list):
+        # features and entities built from the engine in `sketch`, deleted with it when it has to be drawn again
+        drivenSketch = EngineSketch._drivenSketches.get(sketch.entityToken)
+        if drivenSketch is not None:
+            drivenSketch.addDependents(entities)
+
+    @staticmethod
+    def deleteDependents(sketch: Sketch):
+        drivenSketch = EngineSketch._drivenSketches.get(sketch.entityToken)
+        if drivenSketch is not None:
+            drivenSketch.deleteDependents()
+
+    def _getOutsidePoint(self) -> Point2D:
+        # beside the chamber line, away from the axis
+        return Point2D(2 * self._nozzleParameters.chamberRadius,
+                       self._nozzleLength - self._nozzleParameters.chamberCylinderLength / 2)
+
+    def _extendLayerOffsets(self, builder: SketchBuilder, layerOffsets: list) -> list:
+        # Fusion moves the exit end of a wall along its normal, which lifts it off the exit plane wherever the wall
+        # leaves at an angle. Each layer is continued along the exit direction back onto the plane, like the layers
+        # of WallOffset; minimum-length walls leave parallel to the axis and end on the plane already.
+        if self._nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+            return [[] for _ in layerOffsets]
+        contour = contourCache.getContour(self._nozzleParameters, degrees=False)
+        exitAngle = float(contour.bell.exitAngle if contour.bell is not None else contour.exitAngle)
+        exitX, exitY = (float(value) for value in contour.exitPoint)
+        ends, extensionEnds = [], []
+        for offset in self._wallLayers.getOffsets()[1:]:
+            end = Point2D(exitX + offset * math.cos(exitAngle), exitY + offset * math.sin(exitAngle))
+            ends.append(end)
+            extensionEnds.append(Point2D(end.x + end.y * math.tan(exitAngle), 0))
+        builder.setStage('exit plane')
+        exitPlaneLine = builder.drawLine(builder.getOrigin(), builder.drawSketchPoint(extensionEnds[-1].x, 0),
+                                         LineType.CONSTRUCTION)
+        builder.applyHorizontalConstraint(exitPlaneLine)
+        return [[builder.extendOffsetCurves(layerOffset, end, extensionEnd, exitPlaneLine)]
+                for layerOffset, end, extensionEnd in zip(layerOffsets, ends, extensionEnds)]
+
+    def _drawExitSymmetryLine(self, builder: SketchBuilder) -> SketchLineHandle:
+        endPoint = builder.drawSketchPoint(0, self._exitLength)
+        line = builder.drawLine(builder.getOrigin(), endPoint, LineType.CONSTRUCTION)
+        builder.applyVerticalConstraint(line)
+        builder.drive(builder.applyLineDimension(line), lambda p: p.exitLength)
         return line
 
-    def _drawChamberSymmetryLine(self, yAxisThroatPoint: SketchPoint) -> SketchLine:
-        endPoint = drawSketchPoint(0, self._nozzleLength)
-        line = drawLine(yAxisThroatPoint, endPoint, LineType.CONSTRUCTION)
-        applyVerticalConstraint(line)
-        applyLineDimension(line)
+    def _drawChamberSymmetryLine(self, builder: SketchBuilder, yAxisThroatPoint: SketchPointHandle) -> SketchLineHandle:
+        endPoint = builder.drawSketchPoint(0, self._nozzleLength)
+        line = builder.drawLine(yAxisThroatPoint, endPoint, LineType.CONSTRUCTION)
+        builder.applyVerticalConstraint(line)
+        builder.drive(builder.applyLineDimension(line), lambda p: p.chamberLength)
         return line
 
 
@@ -44,99 +139,125 @@ class NozzleSketch:
     def __init__(
             self,
             nozzleParameters: NozzleParameters,
-            exitSymmetryLine: SketchLine,
-            chamberSymmetryLine: SketchLine,
-            radiusOffsetInUserUnits: float = 0):
-        radiusOffset = unitsMgr.convert(radiusOffsetInUserUnits, 'mm', unitsMgr.internalUnits)
+            builder: SketchBuilder,
+            exitSymmetryLine: SketchLineHandle,
+            chamberSymmetryLine: SketchLineHandle):
+        self._builder = builder
+        self._nozzleParameters = nozzleParameters
         self._exitSymmetryLine = exitSymmetryLine
         self._chamberSymmetryLine = chamberSymmetryLine
         self._chamberLength = nozzleParameters.chamberLength
         self._chamberCylinderLength = nozzleParameters.chamberCylinderLength
         self._exitLength = nozzleParameters.exitLength
-        self._chamberRadius = nozzleParameters.chamberRadius + radiusOffset
-        self._throatRadius = nozzleParameters.throatRadius + radiusOffset
-        self._exitRadius = nozzleParameters.exitRadius + radiusOffset
+        self._chamberRadius = nozzleParameters.chamberRadius
+        self._throatRadius = nozzleParameters.throatRadius
+        self._exitRadius = nozzleParameters.exitRadius
         self._convergenceAngle = nozzleParameters.convergenceAngle
         self._convergenceRadius = nozzleParameters.convergenceRadius
         self._divergenceRadius = nozzleParameters.divergenceRadius
-        self._sketch = getActiveSketch()
         self._exitAngle = getAngleFromOppositeAdjacent(self._exitLength, self._exitRadius - self._throatRadius)
         self._nozzleLength = self._chamberLength + self._exitLength
+        self._divergentSpline: SketchSplineHandle = None
 
-    def draw(self):
+    def getDivergentSpline(self) -> SketchSplineHandle:
+        # None for cones, whose exit line is dimensioned
+        return self._divergentSpline
+
+    def draw(self) -> list:
+        # returns the wall curves from the chamber to the exit
         # construction lines
         throatRadiusLine = self._drawThroatRadiusLine(self._exitSymmetryLine.endSketchPoint)
         chamberRadiusLine = self._drawChamberRadiusLine(self._chamberSymmetryLine.endSketchPoint)
 
         # geometry lines
         throatPoint = throatRadiusLine.endSketchPoint
-        exitLine = self._drawExitLine(throatPoint, throatRadiusLine)
+        if self._nozzleParameters.divergenceStyle != DivergenceStyle.CONE:
+            exitLine = self._drawDivergentSpline(throatPoint)
+        else:
+            exitLine = self._drawExitLine(throatPoint, throatRadiusLine)
         chamberLine = self._drawChamberLine(chamberRadiusLine.endSketchPoint)
         chamberConvergenceArc = self._drawChamberConvergenceArc(chamberLine.endSketchPoint)
         chamberDivergenceArc = self._drawChamberDivergenceArc(throatPoint)
         chamberConvergenceLine = self._drawChamberConvergenceLine(chamberConvergenceArc.startSketchPoint, chamberDivergenceArc.startSketchPoint)
 
         # constraints
-        applyTangentConstraint(chamberLine, chamberConvergenceArc)
-        applyTangentConstraint(chamberConvergenceLine, chamberConvergenceArc)
-        applyTangentConstraint(chamberConvergenceLine, chamberDivergenceArc)
-        applyTangentConstraint(chamberDivergenceArc, exitLine)
-
-    def _drawExitSymmetryLine(self) -> SketchLine:
-        endPoint = drawSketchPoint(0, self._exitLength)
-        line = drawLine(getOrigin(), endPoint, LineType.CONSTRUCTION)
-        applyVerticalConstraint(line)
-        applyLineDimension(line)
-        return line
+        self._builder.applyTangentConstraint(chamberLine, chamberConvergenceArc)
+        self._builder.applyTangentConstraint(chamberConvergenceLine, chamberConvergenceArc)
+        self._builder.applyTangentConstraint(chamberConvergenceLine, chamberDivergenceArc)
+        if self._nozzleParameters.divergenceStyle == DivergenceStyle.CHARACTERISTICS:
+            # the minimum-length wall turns sharply at the throat, so the arc is made tangent to the axis direction
+            self._builder.applyTangentConstraint(chamberDivergenceArc, self._drawThroatTangentLine(throatPoint))
+        else:
+            self._builder.applyTangentConstraint(chamberDivergenceArc, exitLine)
+        return [chamberLine, chamberConvergenceArc, chamberConvergenceLine, chamberDivergenceArc, exitLine]
 
-    def _drawChamberSymmetryLine(self, yAxisThroatPoint: SketchPoint) -> SketchLine:
-        endPoint = drawSketchPoint(0, self._nozzleLength)
-        line = drawLine(yAxisThroatPoint, endPoint, LineType.CONSTRUCTION)
-        applyVerticalConstraint(line)
-        applyLineDimension(line)
+    def _drawThroatRadiusLine(self, throatYAxisPoint: SketchPointHandle) -> SketchLineHandle:
+        endPoint = self._builder.drawSketchPoint(self._throatRadius, self._exitLength)
+        line = self._builder.drawLine(throatYAxisPoint, endPoint, LineType.CONSTRUCTION)
+        self._builder.drive(self._builder.applyLineDimension(line), lambda p: p.throatRadius)
+        self._builder.applyHorizontalConstraint(line)
         return line
 
-    def _drawThroatRadiusLine(self, throatYAxisPoint: SketchPoint) -> SketchLine:
-        endPoint = drawSketchPoint(self._throatRadius, self._exitLength)
-        line = drawLine(throatYAxisPoint, endPoint, LineType.CONSTRUCTION)
-        applyLineDimension(line)
-        applyHorizontalConstraint(line)
+    def _drawChamberRadiusLine(self, chamberYAxisPoint: SketchPointHandle) -> SketchLineHandle:
+        endPoint = self._builder.drawSketchPoint(self._chamberRadius, self._nozzleLength)
+        line = self._builder.drawLine(chamberYAxisPoint, endPoint, LineType.CONSTRUCTION)
+        self._builder.drive(self._builder.applyLineDimension(line), lambda p: p.chamberRadius)
+        self._builder.applyHorizontalConstraint(line)
         return line
 
-    def _drawChamberRadiusLine(self, chamberYAxisPoint: SketchPoint) -> SketchLine:
-        endPoint = drawSketchPoint(self._chamberRadius, self._nozzleLength)
-        line = drawLine(chamberYAxisPoint, endPoint, LineType.CONSTRUCTION)
-        applyLineDimension(line)
-        applyHorizontalConstraint(line)
-        return line
-
-    def _drawExitLine(self, throatPoint: SketchPoint, throatRadiusLine: SketchLine) -> SketchLine:
-        endPoint = drawSketchPoint(self._exitRadius, 0)
-        exitLine = drawLine(throatPoint, endPoint)
-        applyAngularDimension(exitLine, throatRadiusLine)
+    def _drawExitLine(self, throatPoint: SketchPointHandle, throatRadiusLine: SketchLineHandle) -> SketchLineHandle:
+        endPoint = self._builder.drawSketchPoint(self._exitRadius, 0)
+        exitLine = self._builder.drawLine(throatPoint, endPoint)
+        exitAngleDimension = self._builder.applyAngularDimension(exitLine, throatRadiusLine)
+        self._builder.drive(exitAngleDimension, lambda p: math.atan2(p.exitLength, p.exitRadius - p.throatRadius), True)
         return exitLine
 
-    def _drawChamberLine(self, startPoint: SketchPoint) -> SketchLine:
-        endPoint = drawSketchPoint(startPoint.geometry.x, startPoint.geometry.y - self._chamberCylinderLength)
-        chamberLine = drawLine(startPoint, endPoint)
-        applyVerticalConstraint(chamberLine)
+    def _drawDivergentSpline(self, throatPoint: SketchPointHandle) -> SketchSplineHandle:
+        self._divergentSpline = self._builder.drawFixedSpline(throatPoint,
+                                                              getDivergentSplinePoints(self._nozzleParameters))
+        return self._divergentSpline
+
+    def _drawThroatTangentLine(self, throatPoint: SketchPointHandle) -> SketchLineHandle:
+        endPoint = self._builder.drawSketchPoint(throatPoint.geometry.x, throatPoint.geometry.y - 0.5)
+        line = self._builder.drawLine(throatPoint, endPoint, LineType.CONSTRUCTION)
+        self._builder.applyVerticalConstraint(line)
+        return line
+
+    def _drawChamberLine(self, startPoint: SketchPointHandle) -> SketchLineHandle:
+        endPoint = self._builder.drawSketchPoint(startPoint.geometry.x, startPoint.geometry.y - self._chamberCylinderLength)
+        chamberLine = self._builder.drawLine(startPoint, endPoint)
+        self._builder.applyVerticalConstraint(chamberLine)
         return chamberLine
 
-    def _drawChamberConvergenceArc(self, startPoint: SketchPoint) -> SketchArc:
-        return drawArc(startPoint, self._convergenceRadius, ArcOrientation.Q4)
+    def _drawChamberConvergenceArc(self, startPoint: SketchPointHandle) -> SketchArcHandle:
+        arc = self._builder.drawArc(startPoint, self._convergenceRadius, ArcOrientation.Q4)
+        self._builder.drive(arc.radiusDimension, lambda p: p.convergenceRadius)
+        return arc
 
-    def _drawChamberDivergenceArc(self, throatPoint: SketchPoint) -> SketchArc:
-        return drawArc(throatPoint, self._divergenceRadius, ArcOrientation.Q3)
+    def _drawChamberDivergenceArc(self, throatPoint: SketchPointHandle) -> SketchArcHandle:
+        arc = self._builder.drawArc(throatPoint, self._divergenceRadius, ArcOrientation.Q3)
+        self._builder.drive(arc.radiusDimension, lambda p: p.divergenceRadius)
+        return arc
 
-    def _drawChamberConvergenceLine(self, startPoint: SketchPoint, endPoint: SketchPoint) -> SketchLine:
-        yAxisNormalLineEndPoint = drawSketchPoint(endPoint.geometry.x, endPoint.geometry.y + 0.5)
-        yAxisNormalLine = drawLine(endPoint, yAxisNormalLineEndPoint, LineType.CONSTRUCTION)
-        chamberConvergenceLine = drawLine(endPoint, startPoint)
-        applyVerticalConstraint(yAxisNormalLine)
-        applyAngularDimension(chamberConvergenceLine, yAxisNormalLine, -self._convergenceAngle)
+    def _drawChamberConvergenceLine(self, startPoint: SketchPointHandle, endPoint: SketchPointHandle) -> SketchLineHandle:
+        yAxisNormalLineEndPoint = self._builder.drawSketchPoint(endPoint.geometry.x, endPoint.geometry.y + 0.5)
+        yAxisNormalLine = self._builder.drawLine(endPoint, yAxisNormalLineEndPoint, LineType.CONSTRUCTION)
+        chamberConvergenceLine = self._builder.drawLine(endPoint, startPoint)
+        self._builder.applyVerticalConstraint(yAxisNormalLine)
+        convergenceAngleDimension = self._builder.applyAngularDimension(chamberConvergenceLine, yAxisNormalLine,
+                                                                       -self._convergenceAngle)
+        self._builder.drive(convergenceAngleDimension, lambda p: -p.convergenceAngle)
         return chamberConvergenceLine
 
 
+def getDivergentSplinePoints(nozzleParameters: NozzleParameters) -> [(float, float)]:
+    # fit points of a curved divergent section after the throat point; parameters are in internal units, so the
+    # convergence angle is already in radians
+    with instrumentation.stage('divergent contour'):
+        contour = contourCache.getContour(nozzleParameters, degrees=False)
+        return [tuple(point) for point in sampleDivergentSection(contour)[1:].tolist()]
+
+
 def getAngleFromOppositeAdjacent(opposite: float, adjacent: float) -> float:
     radians = math.atan2(opposite, adjacent)
     degrees = math.degrees(radians)
@@ -0,0 +1,30 @@
+from .SketchUtils import LineType, getActiveSketch, drawPolyline
+from ..NozzleDefinitions import NozzleParameters, WallLayers
+from ..geometry.ContourCache import contourCache
+from ..geometry.WallOffset import removeRepeatedPoints
+
+
+# Cheap stand-in for EngineSketch used while the command dialog is open: the wall layers are drawn as unconstrained
+# polylines through precomputed contour points, so no dimensions or constraints have to be solved on every edit.
+class EnginePreviewSketch:
+    def __init__(self, nozzleParameters: NozzleParameters, wallLayers: WallLayers, pointsPerSegment: int = 8):
+        self._nozzleParameters = nozzleParameters
+        self._wallLayers = wallLayers
+        self._pointsPerSegment = pointsPerSegment
+        self._nozzleLength = nozzleParameters.chamberLength + nozzleParameters.exitLength
+
+    def draw(self):
+        sketch = getActiveSketch()
+        sketch.isComputeDeferred = True
+        try:
+            drawPolyline([(0, 0), (0, self._nozzleLength)], LineType.CONSTRUCTION, sketch)
+            for points in self.getLayerPoints():
+                drawPolyline(points, LineType.NORMAL, sketch)
+        finally:
+            sketch.isComputeDeferred = False
+
+    def getLayerPoints(self) -> [[(float, float)]]:
+        # parameters from the dialog are in internal units, so the convergence angle is already in radians
+        layers = contourCache.getOffsetPoints(self._nozzleParameters, self._wallLayers.getOffsets(),
+                                              self._pointsPerSegment, degrees=False)
+        return [removeRepeatedPoints(points).tolist() for points in layers]
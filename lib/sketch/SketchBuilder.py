@@ -0,0 +1,284 @@
+import math
+from enum import Enum
+from itertools import groupby
+from typing import Callable, List, NamedTuple
+
+from adsk.fusion import Sketch, SketchPoint, SketchLine, SketchArc, SketchDimension, SketchFittedSpline, SketchCurve
+
+from .SketchUtils import LineType, ArcOrientation, getActiveSketch, getOrigin, drawSketchPoint, drawLine, \
+    drawUndimensionedArc, drawFixedSpline, offsetCurves, getOffsetDimension, applyDistanceDimension, \
+    applyAngularDimension, applyVerticalConstraint, applyHorizontalConstraint, applyTangentConstraint, \
+    applyCollinearConstraint, applyCoincidentConstraint
+from ..common.Instrumentation import instrumentation
+
+
+class Point2D(NamedTuple):
+    x: float
+    y: float
+
+
+class SketchPointHandle:
+    def __init__(self, x: float, y: float, entity: SketchPoint = None):
+        self.geometry = Point2D(x, y)
+        self.entity = entity
+
+
+class SketchLineHandle:
+    def __init__(self, startPoint: SketchPointHandle, endPoint: SketchPointHandle):
+        self.startSketchPoint = startPoint
+        self.endSketchPoint = endPoint
+        self.entity: SketchLine = None
+
+
+class SketchSplineHandle:
+    def __init__(self, startSketchPoint: SketchPointHandle, endSketchPoint: SketchPointHandle,
+                 points: [(float, float)]):
+        self.startSketchPoint = startSketchPoint
+        self.endSketchPoint = endSketchPoint
+        # fit points after the start point, as drawn
+        self.points = points
+        self.entity: SketchFittedSpline = None
+
+
+class SketchDimensionHandle:
+    def __init__(self):
+        self.entity: SketchDimension = None
+
+
+class SketchArcHandle:
+    def __init__(self, startSketchPoint: SketchPointHandle, endSketchPoint: SketchPointHandle,
+                 centerSketchPoint: SketchPointHandle):
+        self.startSketchPoint = startSketchPoint
+        self.endSketchPoint = endSketchPoint
+        self.centerSketchPoint = centerSketchPoint
+        self.radiusDimension = SketchDimensionHandle()
+        self.entity: SketchArc = None
+
+
+class SketchOffsetHandle:
+    def __init__(self, curves: list, distance: float):
+        self.curves = curves
+        self.distance = distance
+        self.entities: List[SketchCurve] = []
+        self.dimension = SketchDimensionHandle()
+
+
+class DrivenDimensionHandle(NamedTuple):
+    dimension: SketchDimensionHandle
+    getValue: Callable[[object], float]
+    isAngular: bool
+
+
+class OperationKind(Enum):
+    GEOMETRY = 'geometry'
+    DIMENSION = 'dimensions'
+    CONSTRAINT = 'constraints'
+
+
+class _Operation(NamedTuple):
+    create: Callable[[Sketch], None]
+    # labels for instrumentation, see SketchBuilder.setStage
+    stage: str
+    kind: OperationKind
+
+
+# Records sketch geometry, dimensions and constraints as handles and creates them all in `commit`, against a sketch
+# resolved once, with compute deferred so Fusion solves the whole sketch a single time instead of after every call.
+class SketchBuilder:
+    def __init__(self, sketch: Sketch = None):
+        self._sketch = sketch or getActiveSketch()
+        self._operations: List[_Operation] = []
+        self._drivenDimensions: List[DrivenDimensionHandle] = []
+        # every entity created so far, in creation order, so an engine can be removed again
+        self._entities = []
+        self._origin = SketchPointHandle(0, 0, getOrigin(self._sketch))
+        self._stage = 'sketch'
+
+    def getSketch(self) -> Sketch:
+        return self._sketch
+
+    def getOrigin(self) -> SketchPointHandle:
+        return self._origin
+
+    def getOperationCount(self) -> int:
+        return len(self._operations)
+
+    def getDrivenDimensions(self) -> List[DrivenDimensionHandle]:
+        return self._drivenDimensions
+
+    def getEntities(self) -> list:
+        return self._entities
+
+    def setStage(self, stage: str):
+        # operations recorded from now on are timed under this name when they are committed
+        self._stage = stage
+
+    # Drawing ----------------------------------------------------------------------------------------------------------
+
+    def drawSketchPoint(self, x: float, y: float) -> SketchPointHandle:
+        point = SketchPointHandle(x, y)
+
+        def create(sketch: Sketch):
+            point.entity = drawSketchPoint(x, y, sketch)
+            self._entities.append(point.entity)
+
+        self._addOperation(create, OperationKind.GEOMETRY)
+        return point
+
+    def drawLine(self, startPoint: SketchPointHandle, endPoint: SketchPointHandle,
+                 lineType: LineType = LineType.NORMAL) -> SketchLineHandle:
+        line = SketchLineHandle(startPoint, endPoint)
+
+        def create(sketch: Sketch):
+            line.entity = drawLine(startPoint.entity, endPoint.entity, lineType, sketch)
+            self._entities.append(line.entity)
+
+        self._addOperation(create, OperationKind.GEOMETRY)
+        return line
+
+    def drawArc(self, startPoint: SketchPointHandle, radius: float, orientation: ArcOrientation) -> SketchArcHandle:
+        # mirrors SketchUtils.drawArc so the handles carry the coordinates Fusion will place the points at
+        startX, startY = startPoint.geometry
+        centerX = startX + radius if orientation in (ArcOrientation.Q2, ArcOrientation.Q3) else startX - radius
+        sweepAngle = math.radians(-45.0 if orientation in (ArcOrientation.Q3, ArcOrientation.Q4) else 45.0)
+        startAngle = 0.0 if startX > centerX else math.pi
+        sweepEndPoint = SketchPointHandle(centerX + radius * math.cos(startAngle + sweepAngle),
+                                          startY + radius * math.sin(startAngle + sweepAngle))
+        centerPoint = SketchPointHandle(centerX, startY)
+        # Fusion arcs run counter-clockwise, so a negative sweep ends at the arc's start point
+        if sweepAngle < 0:
+            arc = SketchArcHandle(sweepEndPoint, startPoint, centerPoint)
+        else:
+            arc = SketchArcHandle(startPoint, sweepEndPoint, centerPoint)
+
+        def create(sketch: Sketch):
+            arc.entity = drawUndimensionedArc(startPoint.entity, radius, orientation, sketch)
+            arc.centerSketchPoint.entity = arc.entity.centerSketchPoint
+            if sweepAngle < 0:
+                sweepEndPoint.entity = arc.entity.startSketchPoint
+            else:
+                sweepEndPoint.entity = arc.entity.endSketchPoint
+            self._entities += [arc.centerSketchPoint.entity, sweepEndPoint.entity, arc.entity]
+
+        self._addOperation(create, OperationKind.GEOMETRY)
+        arc.radiusDimension = self.applyDistanceDimension(startPoint, centerPoint)
+        return arc
+
+    def drawFixedSpline(self, startPoint: SketchPointHandle, points: [(float, float)]) -> SketchSplineHandle:
+        endPoint = SketchPointHandle(*points[-1])
+        spline = SketchSplineHandle(startPoint, endPoint, points)
+
+        def create(sketch: Sketch):
+            spline.entity = drawFixedSpline(startPoint.entity, points, sketch)
+            endPoint.entity = spline.entity.endSketchPoint
+            self._entities.append(spline.entity)
+
+        self._addOperation(create, OperationKind.GEOMETRY)
+        return spline
+
+    def offsetCurves(self, curves: list, directionPoint: Point2D, distance: float) -> SketchOffsetHandle:
+        # one offset of a connected chain of curves, towards the side of `directionPoint`
+        offset = SketchOffsetHandle(curves, distance)
+
+        def create(sketch: Sketch):
+            offset.entities = offsetCurves([curve.entity for curve in curves], directionPoint.x, directionPoint.y,
+                                           distance, sketch)
+            offset.dimension.entity = getOffsetDimension(sketch)
+            self._entities += offset.entities + [offset.dimension.entity]
+
+        self._addOperation(create, OperationKind.GEOMETRY)
+        return offset
+
+    def extendOffsetCurves(self, offset: SketchOffsetHandle, end: Point2D, extensionEnd: Point2D,
+                           line: SketchLineHandle) -> SketchLineHandle:
+        # continues an offset chain from its lowest end point, drawn near `end`, with a line to `extensionEnd`, kept
+        # on `line` and in the direction of the chain's last curve so it follows the offset when its distance is driven
+        startPoint = SketchPointHandle(*end)
+        # the offset curve the end point belongs to, found with it
+        lastCurve = [None]
+
+        def findEnd(sketch: Sketch):
+            # Fusion does not keep offset curves in chain order, so the end is searched among all their end points;
+            # only y is read, it is an API call per property
+            ends = [(point, curve) for curve in offset.entities
+                    for point in (curve.startSketchPoint, curve.endSketchPoint)]
+            heights = [point.geometry.y for point, _ in ends]
+            startPoint.entity, lastCurve[0] = ends[heights.index(min(heights))]
+
+        self._addOperation(findEnd, OperationKind.GEOMETRY)
+        extension = self.drawLine(startPoint, self.drawSketchPoint(*extensionEnd))
+
+        def constrain(sketch: Sketch):
+            if SketchLine.cast(lastCurve[0]) is not None:
+                applyCollinearConstraint(lastCurve[0], extension.entity, sketch)
+            else:
+                applyTangentConstraint(lastCurve[0], extension.entity, sketch)
+            applyCoincidentConstraint(extension.endSketchPoint.entity, line.entity, sketch)
+
+        self._addOperation(constrain, OperationKind.CONSTRAINT)
+        return extension
+
+    # Constraints ------------------------------------------------------------------------------------------------------
+
+    def applyLineDimension(self, line: SketchLineHandle) -> SketchDimensionHandle:
+        return self.applyDistanceDimension(line.startSketchPoint, line.endSketchPoint)
+
+    def applyDistanceDimension(self, startPoint: SketchPointHandle,
+                               endPoint: SketchPointHandle) -> SketchDimensionHandle:
+        dimension = SketchDimensionHandle()
+
+        def create(sketch: Sketch):
+            dimension.entity = applyDistanceDimension(startPoint.entity, endPoint.entity, sketch)
+            self._entities.append(dimension.entity)
+
+        self._addOperation(create, OperationKind.DIMENSION)
+        return dimension
+
+    def applyAngularDimension(self, lineA: SketchLineHandle, lineB: SketchLineHandle,
+                              angle: float = None) -> SketchDimensionHandle:
+        dimension = SketchDimensionHandle()
+
+        def create(sketch: Sketch):
+            dimension.entity = applyAngularDimension(lineA.entity, lineB.entity, angle, sketch)
+            self._entities.append(dimension.entity)
+
+        self._addOperation(create, OperationKind.DIMENSION)
+        return dimension
+
+    # records which model value a dimension represents, so the sketch can later be updated by driving the dimension
+    def drive(self, dimension: SketchDimensionHandle, getValue: Callable[[object], float], isAngular: bool = False):
+        self._drivenDimensions.append(DrivenDimensionHandle(dimension, getValue, isAngular))
+
+    def applyVerticalConstraint(self, line: SketchLineHandle):
+        self._addOperation(lambda sketch: applyVerticalConstraint(line.entity, sketch), OperationKind.CONSTRAINT)
+
+    def applyHorizontalConstraint(self, line: SketchLineHandle):
+        self._addOperation(lambda sketch: applyHorizontalConstraint(line.entity, sketch), OperationKind.CONSTRAINT)
+
+    def applyTangentConstraint(self, curveA, curveB):
+        self._addOperation(lambda sketch: applyTangentConstraint(curveA.entity, curveB.entity, sketch),
+                           OperationKind.CONSTRAINT)
+
+    # Commit -----------------------------------------------------------------------------------------------------------
+
+    def commit(self):
+        operations, self._operations = self._operations, []
+        with instrumentation.stage('commit', operations=len(operations)):
+            self._sketch.isComputeDeferred = True
+            try:
+                # runs of operations of the same stage and kind are timed together when instrumentation is enabled
+                for stage, stageOperations in groupby(operations, lambda operation: operation.stage):
+                    with instrumentation.stage(stage) as stageSpan:
+                        for kind, kindOperations in groupby(stageOperations, lambda operation: operation.kind):
+                            kindOperations = list(kindOperations)
+                            stageSpan.args[kind.value] = stageSpan.args.get(kind.value, 0) + len(kindOperations)
+                            with instrumentation.stage(kind.value, operations=len(kindOperations)):
+                                for operation in kindOperations:
+                                    operation.create(self._sketch)
+            finally:
+                # Fusion solves the sketch when compute is no longer deferred
+                with instrumentation.stage('solve'):
+                    self._sketch.isComputeDeferred = False
+
+    def _addOperation(self, create: Callable[[Sketch], None], kind: OperationKind):
+        self._operations.append(_Operation(create, self._stage, kind))
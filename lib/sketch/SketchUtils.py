@@ -1,9 +1,11 @@
 import math
 from enum import Enum
 
-from adsk.core import Point3D, ValueInput, Matrix3D, Application
-from adsk.fusion import Sketch, Component, Profile, FeatureOperations, ExtrudeFeature, SketchCurve, SketchLine, \
-    SketchPoint, DimensionOrientations, SketchArc
+from adsk.core import Point3D, ValueInput, Matrix3D, Application, ObjectCollection, Vector3D
+from adsk.fusion import Sketch, Component, Occurrence, Profile, FeatureOperations, ExtrudeFeature, SketchCurve, \
+    SketchLine, SketchPoint, DimensionOrientations, SketchArc, SketchAngularDimension, SketchLinearDimension, \
+    SketchFittedSpline, RevolveFeature, SweepFeature, CircularPatternFeature, SweepOrientationTypes, \
+    PatternComputeOptions, TimelineGroup, SketchOffsetCurvesDimension
 
 from ..common.Common import design, ui
 
@@ -27,28 +29,36 @@ def getActiveSketch() -> Sketch:
     return Sketch.cast(Application.get().activeEditObject)
 
 
-def getOrigin() -> SketchPoint:
-    return getActiveSketch().originPoint
+def getOrigin(sketch: Sketch = None) -> SketchPoint:
+    return (sketch or getActiveSketch()).originPoint
 
 
 # Drawing --------------------------------------------------------------------------------------------------------------
 
 
-def drawSketchPoint(x: float, y: float) -> SketchPoint:
-    sketch = getActiveSketch()
+def drawSketchPoint(x: float, y: float, sketch: Sketch = None) -> SketchPoint:
+    sketch = sketch or getActiveSketch()
     point = Point3D.create(x, y, 0)
     return sketch.sketchPoints.add(point)
 
 
-def drawLine(startPoint: SketchPoint, endPoint: SketchPoint, lineType: LineType = LineType.NORMAL) -> SketchLine:
-    sketch = getActiveSketch()
+def drawLine(startPoint: SketchPoint, endPoint: SketchPoint, lineType: LineType = LineType.NORMAL,
+             sketch: Sketch = None) -> SketchLine:
+    sketch = sketch or getActiveSketch()
     line = sketch.sketchCurves.sketchLines.addByTwoPoints(startPoint, endPoint)
     line.isConstruction = lineType == LineType.CONSTRUCTION
     return line
 
 
-def drawArc(startPoint: SketchPoint, radius: float, orientation: ArcOrientation) -> SketchArc:
-    sketch = getActiveSketch()
+def drawArc(startPoint: SketchPoint, radius: float, orientation: ArcOrientation, sketch: Sketch = None) -> SketchArc:
+    arc = drawUndimensionedArc(startPoint, radius, orientation, sketch)
+    applyDistanceDimension(startPoint, arc.centerSketchPoint, sketch)
+    return arc
+
+
+def drawUndimensionedArc(startPoint: SketchPoint, radius: float, orientation: ArcOrientation,
+                         sketch: Sketch = None) -> SketchArc:
+    sketch = sketch or getActiveSketch()
     startPointX, startPointY = startPoint.geometry.x, startPoint.geometry.y
     centerPoint = Point3D.create(startPointX - radius, startPointY, 0)
     sweepAngle = math.radians(45.0)
@@ -56,20 +66,83 @@ def drawArc(startPoint: SketchPoint, radius: float, orientation: ArcOrientation)
         centerPoint = Point3D.create(startPointX + radius, startPointY, 0)
     if orientation == ArcOrientation.Q3 or orientation == ArcOrientation.Q4:
         sweepAngle = math.radians(-45.0)
-    arc = sketch.sketchCurves.sketchArcs.addByCenterStartSweep(centerPoint, startPoint, sweepAngle)
-    applyDistanceDimension(startPoint, arc.centerSketchPoint)
-    return arc
+    return sketch.sketchCurves.sketchArcs.addByCenterStartSweep(centerPoint, startPoint, sweepAngle)
+
+
+def drawFixedSpline(startPoint: SketchPoint, points: [(float, float)], sketch: Sketch = None) -> SketchFittedSpline:
+    sketch = sketch or getActiveSketch()
+    fitPoints = ObjectCollection.create()
+    fitPoints.add(startPoint)
+    for x, y in points:
+        fitPoints.add(Point3D.create(x, y, 0))
+    spline = sketch.sketchCurves.sketchFittedSplines.add(fitPoints)
+    spline.isFixed = True
+    return spline
+
+
+def drawPolyline(points: [(float, float)], lineType: LineType = LineType.NORMAL, sketch: Sketch = None) -> [SketchLine]:
+    sketch = sketch or getActiveSketch()
+    sketchLines = sketch.sketchCurves.sketchLines
+    lines = []
+    startPoint = Point3D.create(points[0][0], points[0][1], 0)
+    for x, y in points[1:]:
+        line = sketchLines.addByTwoPoints(startPoint, Point3D.create(x, y, 0))
+        line.isConstruction = lineType == LineType.CONSTRUCTION
+        lines.append(line)
+        startPoint = line.endSketchPoint
+    return lines
+
+
+def offsetCurves(curves: [SketchCurve], directionX: float, directionY: float, distance: float,
+                 sketch: Sketch = None) -> [SketchCurve]:
+    sketch = sketch or getActiveSketch()
+    connectedCurves = ObjectCollection.create()
+    for curve in curves:
+        connectedCurves.add(curve)
+    offsetEntities = sketch.offset(connectedCurves, Point3D.create(directionX, directionY, 0), distance)
+    return [offsetEntities.item(i) for i in range(offsetEntities.count)]
+
+
+def getOffsetDimension(sketch: Sketch = None) -> SketchOffsetCurvesDimension:
+    # Sketch.offset only returns the curves, the distance it dimensions them with is the last dimension it added
+    sketch = sketch or getActiveSketch()
+    dimensions = sketch.sketchDimensions
+    return SketchOffsetCurvesDimension.cast(dimensions.item(dimensions.count - 1))
+
+
+def moveFitPoints(spline: SketchFittedSpline, previousPoints: [(float, float)], points: [(float, float)]) -> int:
+    # moves the fit points after the start point, which belongs to the dimensioned geometry, from the coordinates
+    # they were drawn at to new ones; the spline is only released while they move. Returns the number of moved points.
+    fitPoints = spline.fitPoints
+    movedCount = 0
+    spline.isFixed = False
+    for i, ((previousX, previousY), (x, y)) in enumerate(zip(previousPoints, points), 1):
+        if (previousX, previousY) != (x, y):
+            fitPoints.item(i).move(Vector3D.create(x - previousX, y - previousY, 0))
+            movedCount += 1
+    spline.isFixed = True
+    return movedCount
+
+
+def deleteEntities(entities: list):
+    # latest first, so dimensions and curves go before the points they use; entities Fusion already deleted along
+    # with others are skipped
+    for entity in reversed(entities):
+        if entity is not None and entity.isValid:
+            entity.deleteMe()
 
 
 # Constraints ----------------------------------------------------------------------------------------------------------
 
 
-def applyAngularDimension(lineA: SketchLine, lineB: SketchLine, angle: float = None):
-    sketch = getActiveSketch()
+def applyAngularDimension(lineA: SketchLine, lineB: SketchLine, angle: float = None,
+                          sketch: Sketch = None) -> SketchAngularDimension:
+    sketch = sketch or getActiveSketch()
     textPoint = getAngularDimensionTextPoint(lineA, lineB)
     angularDimension = sketch.sketchDimensions.addAngularDimension(lineA, lineB, textPoint, True)
     if angle is not None:
         angularDimension.parameter.value = angle
+    return angularDimension
 
 
 def getAngularDimensionTextPoint(lineA: SketchLine, lineB: SketchLine) -> Point3D:
@@ -80,15 +153,16 @@ def getAngularDimensionTextPoint(lineA: SketchLine, lineB: SketchLine) -> Point3
     return startPointA
 
 
-def applyLineDimension(line: SketchLine):
-    applyDistanceDimension(line.startSketchPoint, line.endSketchPoint)
+def applyLineDimension(line: SketchLine, sketch: Sketch = None) -> SketchLinearDimension:
+    return applyDistanceDimension(line.startSketchPoint, line.endSketchPoint, sketch)
 
 
-def applyDistanceDimension(startPoint: SketchPoint, endPoint: SketchPoint):
-    sketch = getActiveSketch()
+def applyDistanceDimension(startPoint: SketchPoint, endPoint: SketchPoint,
+                           sketch: Sketch = None) -> SketchLinearDimension:
+    sketch = sketch or getActiveSketch()
     textPoint = getDistanceDimensionTextPoint(startPoint.geometry, endPoint.geometry)
     orientation = DimensionOrientations.AlignedDimensionOrientation
-    sketch.sketchDimensions.addDistanceDimension(startPoint, endPoint, orientation, textPoint, True)
+    return sketch.sketchDimensions.addDistanceDimension(startPoint, endPoint, orientation, textPoint, True)
 
 
 def getDistanceDimensionTextPoint(p1: Point3D, p2: Point3D, distance: float = -0.05) -> Point3D:
@@ -108,32 +182,54 @@ def getDistanceDimensionTextPoint(p1: Point3D, p2: Point3D, distance: float = -0
         return Point3D.create(midPoint.x - delta_x, midPoint.y - delta_y, 0)
 
 
-def applyVerticalConstraint(line: SketchLine):
-    sketch = getActiveSketch()
+def applyVerticalConstraint(line: SketchLine, sketch: Sketch = None):
+    sketch = sketch or getActiveSketch()
     sketch.geometricConstraints.addVertical(line)
 
 
-def applyHorizontalConstraint(line: SketchLine):
-    sketch = getActiveSketch()
+def applyHorizontalConstraint(line: SketchLine, sketch: Sketch = None):
+    sketch = sketch or getActiveSketch()
     sketch.geometricConstraints.addHorizontal(line)
 
 
-def applyTangentConstraint(curveA: SketchCurve, curveB: SketchCurve):
-    sketch = getActiveSketch()
+def applyTangentConstraint(curveA: SketchCurve, curveB: SketchCurve, sketch: Sketch = None):
+    sketch = sketch or getActiveSketch()
     sketch.geometricConstraints.addTangent(curveA, curveB)
 
 
+def applyCollinearConstraint(lineA: SketchLine, lineB: SketchLine, sketch: Sketch = None):
+    sketch = sketch or getActiveSketch()
+    sketch.geometricConstraints.addCollinear(lineA, lineB)
+
+
+def applyCoincidentConstraint(point: SketchPoint, entity, sketch: Sketch = None):
+    # `entity` is another point or a curve the point is kept on
+    sketch = sketch or getActiveSketch()
+    sketch.geometricConstraints.addCoincident(point, entity)
+
+
 # Legacy ---------------------------------------------------------------------------------------------------------------
 
 
-def createNewComponent() -> Component:
+def createNewComponent(transform: Matrix3D = None) -> Component:
     allOccurrences = design.rootComponent.occurrences
-    newOccurrence = allOccurrences.addNewComponent(Matrix3D.create())
+    newOccurrence = allOccurrences.addNewComponent(transform or Matrix3D.create())
     if newOccurrence.component is None:
         raise ('New component failed to create', 'New Component Failed')
     return newOccurrence.component
 
 
+def addOccurrence(component: Component, transform: Matrix3D) -> Occurrence:
+    # another instance of an existing component, it shares the component's sketches and bodies
+    return design.rootComponent.occurrences.addExistingComponent(component, transform)
+
+
+def createTranslation(x: float, y: float, z: float) -> Matrix3D:
+    transform = Matrix3D.create()
+    transform.translation = Vector3D.create(x, y, z)
+    return transform
+
+
 def createXYSketch(component: Component) -> Sketch:
     return component.sketches.add(component.xYConstructionPlane)
 
@@ -153,9 +249,9 @@ def drawCircle(sketch: Sketch, center: Point3D, diameter: float) -> Profile:
     return sketch.profiles.item(0)
 
 
-def createSketchByPlane(component: Component, plane) -> Sketch:
+def createSketchByPlane(component: Component, plane, offset: float = 0.0) -> Sketch:
     planeInput = component.constructionPlanes.createInput()
-    planeInput.setByOffset(plane, ValueInput.createByReal(0))
+    planeInput.setByOffset(plane, ValueInput.createByReal(offset))
     plane = component.constructionPlanes.add(planeInput)
     sketch = component.sketches.add(plane)
     sketch.isVisible = False
@@ -181,3 +277,58 @@ def extrudeProfile(component: Component, profile: Profile, extentDistance: float
     extrudeInput = extrudes.createInput(profile, operation)
     extrudeInput.setDistanceExtent(False, ValueInput.createByReal(extentDistance))
     return extrudes.add(extrudeInput)
+
+
+# Features -------------------------------------------------------------------------------------------------------------
+
+
+def revolveProfiles(component: Component, profiles: [Profile], axis,
+                    operation=FeatureOperations.NewBodyFeatureOperation) -> RevolveFeature:
+    # every profile in one full revolution, a single timeline feature however many profiles there are
+    profileCollection = ObjectCollection.create()
+    for profile in profiles:
+        profileCollection.add(profile)
+    revolves = component.features.revolveFeatures
+    revolveInput = revolves.createInput(profileCollection, axis, operation)
+    revolveInput.setAngleExtent(False, ValueInput.createByReal(2 * math.pi))
+    return revolves.add(revolveInput)
+
+
+def sweepProfile(component: Component, profile: Profile, pathCurve: SketchCurve,
+                 operation=FeatureOperations.CutFeatureOperation) -> SweepFeature:
+    # the path is the chain of curves connected to `pathCurve`, the profile is kept normal to it
+    path = component.features.createPath(pathCurve)
+    sweeps = component.features.sweepFeatures
+    sweepInput = sweeps.createInput(profile, path, operation)
+    sweepInput.orientation = SweepOrientationTypes.PerpendicularOrientationType
+    return sweeps.add(sweepInput)
+
+
+def circularPattern(component: Component, features: list, axis, count: int) -> CircularPatternFeature:
+    # identical compute copies the first result instead of recomputing every instance against the body
+    entities = ObjectCollection.create()
+    for feature in features:
+        entities.add(feature)
+    patterns = component.features.circularPatternFeatures
+    patternInput = patterns.createInput(entities, axis)
+    patternInput.quantity = ValueInput.createByReal(count)
+    patternInput.totalAngle = ValueInput.createByString('360 deg')
+    patternInput.isSymmetric = False
+    patternInput.patternComputeOption = PatternComputeOptions.IdenticalPatternCompute
+    return patterns.add(patternInput)
+
+
+def getTimelinePosition() -> int:
+    # None for direct modelling designs, which have no timeline
+    timeline = design.timeline
+    return None if timeline is None else timeline.markerPosition
+
+
+def groupTimeline(startPosition: int, name: str) -> TimelineGroup:
+    # collapses the items added since `startPosition` into one group
+    timeline = design.timeline
+    if timeline is None or startPosition is None or timeline.markerPosition - startPosition < 2:
+        return None
+    group = timeline.timelineGroups.add(startPosition, timeline.markerPosition - 1)
+    group.name = name
+    return group
@@ -0,0 +1,31 @@
+import importlib.machinery
+import importlib.util
+import math
+import os
+import sys
+
+# The add-in uses relative imports throughout, so its folder is registered as the package NozzleGenerator, named after
+# the add-in's manifest whatever the checkout is called, and tests import the add-in from NozzleGenerator.lib.
+_ADD_IN_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_addInSpec = importlib.machinery.ModuleSpec('NozzleGenerator', None, is_package=True)
+_addInSpec.submodule_search_locations.append(_ADD_IN_FOLDER)
+sys.modules.setdefault('NozzleGenerator', importlib.util.module_from_spec(_addInSpec))
+# the recording adsk stand-in takes the place of Fusion's
+sys.path.insert(0, os.path.join(_ADD_IN_FOLDER, 'tools', 'fakeadsk'))
+
+
+def toInternalUnits(nozzleParameters):
+    # definitions are in mm and degrees, the sketch code works in Fusion's internal cm and radians
+    from NozzleGenerator.lib.NozzleDefinitions import DIMENSION_FIELDS
+    lengths = {field: getattr(nozzleParameters, field) / 10 for field in DIMENSION_FIELDS}
+    lengths['convergenceAngle'] = math.radians(nozzleParameters.convergenceAngle)
+    return nozzleParameters._replace(**lengths)
+
+
+def newSketch():
+    # an empty sketch of the fake design, made the active edit object like a sketch opened in Fusion
+    from adsk.core import Application
+    application = Application.get()
+    sketch = application._activeProduct._rootComponent._sketches._add()
+    application._activeEditObject = sketch
+    return sketch
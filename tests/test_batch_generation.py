@@ -0,0 +1,42 @@
+import csv
+import io
+import os
+
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.export import BatchGeneration as _batch
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+
+
+def _readMetrics(outputFolder):
+    with open(os.path.join(outputFolder, _batch.METRICS_FILE_NAME), newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def test_definitions_are_read_from_csv_and_jsonl():
+    fields = _definitions.DIMENSION_FIELDS
+    values = [str(getattr(DEFAULT, field)) for field in fields]
+    csvFile = io.StringIO('{}\n{}\n'.format(','.join(fields), ','.join(values)))
+    jsonlFile = io.StringIO('\n{{"name": "bell", "divergenceStyle": "bell", {}}}\n'.format(', '.join(
+        '"{}": {}'.format(field, getattr(DEFAULT, field)) for field in fields)))
+    fromCsv, = _batch.readDefinitions(csvFile, 'csv')
+    fromJsonl, = _batch.readDefinitions(jsonlFile, 'jsonl')
+    assert fromCsv == DEFAULT._replace(name='nozzle0')
+    assert fromJsonl == DEFAULT._replace(name='bell', divergenceStyle=_definitions.DivergenceStyle.BELL)
+    with pytest.raises(ValueError, match='line 2'):
+        list(_batch.readDefinitions(io.StringIO('throatRadius\n1.0\n'), 'csv'))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_names_that_share_a_folder_are_reported(tmp_path, workers):
+    names = ['engine a', 'engine_a', 'other', 'Engine A']
+    definitions = [DEFAULT._replace(name=name) for name in names]
+    failedCount = _batch.generateBatch(definitions, str(tmp_path), workers=workers)
+    rows = _readMetrics(str(tmp_path))
+    assert failedCount == 2
+    assert [row['name'] for row in rows] == names
+    assert [bool(row['error']) for row in rows] == [False, True, False, True]
+    assert sorted(os.listdir(str(tmp_path))) == ['engine_a', _batch.METRICS_FILE_NAME, 'other']
+    assert os.listdir(str(tmp_path / 'engine_a')) == [_batch.CONTOUR_FILE_NAME]
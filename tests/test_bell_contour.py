@@ -0,0 +1,35 @@
+import math
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib.geometry import BellContour as _bell
+
+
+def test_rao_tables_are_monotonic():
+    # longer bells turn less, larger area ratios turn more at the throat and less at the exit
+    assert np.all(np.diff(_bell._INITIAL_ANGLES, axis=1) > 0)
+    assert np.all(np.diff(_bell._EXIT_ANGLES, axis=1) <= 0)
+    assert np.all(np.diff(_bell._INITIAL_ANGLES, axis=0) < 0)
+    assert np.all(np.diff(_bell._EXIT_ANGLES, axis=0) < 0)
+
+
+def test_rao_angles_match_the_chart_points_and_are_clamped():
+    initialAngle, exitAngle = _bell.getRaoAngles([10.0, 1000.0], 0.8)
+    assert np.degrees(initialAngle) == pytest.approx([26.3, 33.5])
+    assert np.degrees(exitAngle) == pytest.approx([11.0, 7.0])
+    initialAngle, _ = _bell.getRaoAngles(50.0, [0.7, 0.85])
+    assert np.degrees(initialAngle) == pytest.approx([(38.0 + 31.5) / 2, (31.5 + 30.2) / 2])
+
+
+def test_bell_is_tangent_at_the_inflection_and_exit():
+    throatRadius, exitRadius = 1.31, 3.705
+    bellLength = _bell.getBellLength(throatRadius, exitRadius)
+    bell = _bell.solveBell(throatRadius, exitRadius, bellLength)
+    np.testing.assert_allclose(bell.exitPoint, [exitRadius, 0.0], atol=1e-12)
+    for point, angle in ((bell.inflectionPoint, bell.initialAngle), (bell.exitPoint, bell.exitAngle)):
+        direction = np.abs(bell.controlPoint - point)
+        assert math.atan2(direction[0], direction[1]) == pytest.approx(float(angle))
+    points = _bell.sampleBell(bell, 16)
+    np.testing.assert_allclose(points[0], [throatRadius, bellLength])
+    assert np.all(np.diff(points[:, 0]) > 0) and np.all(np.diff(points[:, 1]) < 0)
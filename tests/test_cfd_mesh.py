@@ -0,0 +1,140 @@
+import json
+import math
+import os
+import re
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.export import CfdMesh as _cfdMesh
+
+SPACING = _cfdMesh.MeshSpacing(axialCells=40, radialCells=12)
+WEDGE_ANGLE = 5.0
+_LIST_START = re.compile(rb'(\d+)\n\(')
+
+
+def _readList(data: bytes, position: int, dtype: str, width: int, binary: bool) -> (np.ndarray, int):
+    # an OpenFOAM list starting at or after `position`, and the position after it
+    match = _LIST_START.search(data, position)
+    count, start = int(match.group(1)), match.end()
+    if binary:
+        end = start + count * width * np.dtype(dtype).itemsize
+        return np.frombuffer(data[start:end], dtype).reshape(count, width).squeeze(-1 if width == 1 else None), end
+    lines = data[start:].split(b'\n', count + 1)[1:count + 1]
+    values = np.array([line.strip(b'()').split() for line in lines], dtype=dtype)
+    return values.reshape(count, width).squeeze(-1 if width == 1 else None), data.index(b')\n', start + 1)
+
+
+def _readPolyMesh(caseFolder: str, binary: bool) -> dict:
+    folder = os.path.join(caseFolder, _cfdMesh.POLY_MESH_FOLDER)
+    files = {}
+    for name in ('points', 'faces', 'owner', 'neighbour', 'boundary'):
+        with open(os.path.join(folder, name), 'rb') as file:
+            files[name] = file.read()
+    points, _ = _readList(files['points'], files['points'].index(b'}'), '<f8', 3, binary)
+    offsets, position = _readList(files['faces'], files['faces'].index(b'}'), '<i4', 1, binary)
+    labels, _ = _readList(files['faces'], position, '<i4', 1, binary)
+    owner, _ = _readList(files['owner'], files['owner'].index(b'}'), '<i4', 1, binary)
+    neighbour, _ = _readList(files['neighbour'], files['neighbour'].index(b'}'), '<i4', 1, binary)
+    patches = re.findall(rb'(\w+)\n    \{\n        type +\w+;\n        nFaces +(\d+);\n        startFace +(\d+);',
+                         files['boundary'])
+    return {'points': points, 'offsets': offsets, 'labels': labels, 'owner': owner, 'neighbour': neighbour,
+            'patches': {name.decode(): (int(size), int(start)) for name, size, start in patches}}
+
+
+def _getFaceVectors(polyMesh: dict) -> (np.ndarray, np.ndarray):
+    # area vectors and centres of every face, the faces are triangles and planar quads
+    points, offsets, labels = polyMesh['points'], polyMesh['offsets'], polyMesh['labels']
+    sizes = np.diff(offsets)
+    areas, centres = np.zeros((len(sizes), 3)), np.zeros((len(sizes), 3))
+    for size in np.unique(sizes):
+        faces = np.nonzero(sizes == size)[0]
+        facePoints = points[labels[offsets[faces][:, None] + np.arange(size)]]
+        centre = facePoints.mean(axis=1)
+        areas[faces] = sum(np.cross(facePoints[:, k] - centre, facePoints[:, (k + 1) % size] - centre)
+                           for k in range(size)) / 2
+        centres[faces] = centre
+    return areas, centres
+
+
+@pytest.fixture(scope='module')
+def mesh():
+    return _cfdMesh.buildMesh(_definitions.NozzleDefinition.DEFAULT.value, SPACING, pointsPerSegment=32)
+
+
+def test_spacings_end_exactly_and_follow_their_settings():
+    nodes = _cfdMesh.getClusteredSpacing(50, 10.0, 7.0, 3.0)
+    assert nodes[0] == 0.0 and nodes[-1] == 10.0
+    steps = np.diff(nodes)
+    assert np.all(steps > 0)
+    assert nodes[np.argmin(steps)] == pytest.approx(7.0, abs=steps.max())
+    fractions = _cfdMesh.getGradedSpacing(20, 0.1)
+    sizes = np.diff(fractions)
+    assert fractions[0] == 0.0 and fractions[-1] == 1.0
+    assert sizes[-1] / sizes[0] == pytest.approx(0.1)
+
+
+def test_mesh_follows_the_wall(mesh):
+    assert mesh.cellCount == SPACING.axialCells * SPACING.radialCells
+    nodes = mesh.getNodes(0, len(mesh.axialPositions))
+    np.testing.assert_allclose(nodes[:, -1, 1], mesh.wallRadii)
+    np.testing.assert_array_equal(nodes[:, 0, 1], 0.0)
+    assert mesh.wallRadii[0] == pytest.approx(_definitions.NozzleDefinition.DEFAULT.value.chamberRadius)
+    assert mesh.wallRadii[-1] == pytest.approx(_definitions.NozzleDefinition.DEFAULT.value.exitRadius)
+
+
+@pytest.mark.parametrize('binary', [True, False])
+def test_poly_mesh_cells_are_closed(tmp_path, mesh, binary):
+    _cfdMesh.writePolyMesh(str(tmp_path), mesh, WEDGE_ANGLE, lengthScale=1.0, binary=binary, chunkStations=7)
+    polyMesh = _readPolyMesh(str(tmp_path), binary)
+    owner, neighbour = polyMesh['owner'], polyMesh['neighbour']
+    internalFaces = len(neighbour)
+    assert polyMesh['offsets'][-1] == len(polyMesh['labels'])
+    assert owner.max() + 1 == mesh.cellCount
+    # internal faces go from the lower to the higher cell number, ordered by owner and then neighbour
+    assert np.all(owner[:internalFaces] < neighbour)
+    assert np.all(np.diff(owner[:internalFaces].astype(np.int64) * mesh.cellCount + neighbour) > 0)
+    # the patches follow the internal faces in order and cover every boundary face
+    startFace = internalFaces
+    for patch in _cfdMesh.PATCHES:
+        size, start = polyMesh['patches'][patch]
+        assert start == startFace
+        startFace += size
+    assert startFace == len(owner)
+
+    # the outward area vectors of every cell sum to zero, face normals point from the owner to the neighbour
+    areas, centres = _getFaceVectors(polyMesh)
+    closure = np.zeros((mesh.cellCount, 3))
+    np.add.at(closure, owner, areas)
+    np.add.at(closure, neighbour, -areas[:internalFaces])
+    assert np.abs(closure).max() < 1e-9 * np.abs(areas).max()
+    # and the divergence theorem gives every cell a positive volume, together that of the wedge
+    faceVolumes = np.einsum('ij,ij->i', centres, areas) / 3
+    volumes = np.zeros(mesh.cellCount)
+    np.add.at(volumes, owner, faceVolumes)
+    np.add.at(volumes, neighbour, -faceVolumes[:internalFaces])
+    assert volumes.min() > 0
+    startRadius, endRadius = mesh.wallRadii[:-1], mesh.wallRadii[1:]
+    wedgeVolume = math.sin(math.radians(WEDGE_ANGLE)) / 2 * np.sum(
+        np.diff(mesh.axialPositions) * (startRadius ** 2 + startRadius * endRadius + endRadius ** 2) / 3)
+    assert volumes.sum() == pytest.approx(wedgeVolume, rel=1e-9)
+
+
+def test_binary_and_ascii_poly_meshes_match(tmp_path, mesh):
+    _cfdMesh.writePolyMesh(str(tmp_path / 'binary'), mesh, lengthScale=1.0, chunkStations=5)
+    _cfdMesh.writePolyMesh(str(tmp_path / 'ascii'), mesh, lengthScale=1.0, binary=False, chunkStations=1000)
+    binary, ascii = _readPolyMesh(str(tmp_path / 'binary'), True), _readPolyMesh(str(tmp_path / 'ascii'), False)
+    for name in ('offsets', 'labels', 'owner', 'neighbour'):
+        np.testing.assert_array_equal(ascii[name], binary[name])
+    np.testing.assert_allclose(ascii['points'], binary['points'], rtol=1e-9)
+
+
+def test_structured_arrays_hold_the_nodes(tmp_path, mesh):
+    _cfdMesh.writeStructuredArrays(str(tmp_path), mesh, lengthScale=1.0, chunkStations=9)
+    with open(os.path.join(str(tmp_path), _cfdMesh.ARRAYS_MANIFEST_NAME)) as file:
+        manifest = json.load(file)
+    nodes = mesh.getNodes(0, len(mesh.axialPositions))
+    assert manifest['vertexSize'] == list(nodes.shape[:2])
+    for axis, name in enumerate(manifest['coordinates']):
+        np.testing.assert_array_equal(np.load(os.path.join(str(tmp_path), name + '.npy')), nodes[..., axis])
@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import IsentropicFlow as _flow
+from NozzleGenerator.lib.geometry import CharacteristicNozzle as _characteristics
+from NozzleGenerator.lib.geometry import GasDynamics as _gasDynamics
+from NozzleGenerator.lib.geometry import NozzleContour as _contour
+from NozzleGenerator.lib.geometry import ParameterValidator as _validator
+
+MINIMUM_LENGTH = _definitions.NozzleDefinition.MINIMUM_LENGTH.value
+
+
+def test_net_cancels_every_wave_at_the_wall():
+    exitMach = _characteristics.getExitMach(1.0, 2.5)
+    net = _characteristics.solveCharacteristicNet(exitMach, 1.2, 20)
+    assert len(net.x) == 20 * 21 // 2
+    # axis nodes lie on y = 0 with the flow parallel to it, the last one reaches the exit Mach number
+    onAxis = net.leftIndex == net.rightIndex
+    np.testing.assert_allclose(net.y[onAxis], 0.0, atol=1e-12)
+    np.testing.assert_allclose(net.theta[onAxis], 0.0, atol=1e-12)
+    assert net.mach[-1] == pytest.approx(exitMach)
+    # the wall turns back from the corner angle to the axis direction and widens to about the revolved area ratio,
+    # which its radii end on exactly
+    assert net.maximumWallAngle == pytest.approx(float(_gasDynamics.prandtlMeyerAngle(exitMach, 1.2)) / 2)
+    assert np.all(np.diff(net.wallX) > 0) and np.all(np.diff(net.wallY) > 0)
+    assert net.wallY[-1] == pytest.approx(2.5 ** 2, rel=0.01)
+    radii = _characteristics.getWallRadii(net)
+    assert radii[0] == 1.0 and radii[-1] == pytest.approx(2.5, rel=1e-12)
+    assert np.all(np.diff(radii) > 0)
+
+
+def test_drawn_wall_ends_at_the_exit_mach_number_of_the_flow():
+    # the revolved wall reaches the area ratio, and so the exit Mach number, that its net was designed for
+    contour = _contour.solveContour(MINIMUM_LENGTH)
+    assert contour.divergentWall[-1][0] == pytest.approx(MINIMUM_LENGTH.exitRadius, rel=1e-12)
+    flow = _flow.solveContourFlow(MINIMUM_LENGTH, MINIMUM_LENGTH.gamma)
+    exitAreaRatio = (contour.divergentWall[-1][0] / MINIMUM_LENGTH.throatRadius) ** 2
+    assert flow.areaRatio[-1] == pytest.approx(exitAreaRatio, rel=1e-12)
+    assert flow.mach[-1] == pytest.approx(_characteristics.getExitMach(
+        MINIMUM_LENGTH.throatRadius, MINIMUM_LENGTH.exitRadius, MINIMUM_LENGTH.gamma), rel=1e-9)
+
+
+def test_wall_ends_on_the_exit_plane_whatever_the_exit_length():
+    for exitLength in (MINIMUM_LENGTH.exitLength, 2 * MINIMUM_LENGTH.exitLength):
+        contour = _contour.solveContour(MINIMUM_LENGTH._replace(exitLength=exitLength))
+        wallLength = contour.throatPoint[1]
+        assert contour.divergentWall[-1][1] == pytest.approx(0.0, abs=1e-12)
+        np.testing.assert_allclose(contour.divergentWall[0], contour.throatPoint, atol=1e-12)
+        assert wallLength == pytest.approx(_contour.resolveExitLength(MINIMUM_LENGTH).exitLength)
+        assert contour.chamberStart[1] == pytest.approx(MINIMUM_LENGTH.chamberLength + wallLength)
+
+
+def test_offset_walls_end_on_the_exit_plane():
+    contour = _contour.solveContour(MINIMUM_LENGTH, radiusOffset=0.5)
+    assert contour.divergentWall[-1][1] == pytest.approx(0.0, abs=1e-12)
+    assert contour.divergentWall[-1][0] > MINIMUM_LENGTH.exitRadius
+
+
+def test_gamma_and_characteristic_count_change_the_wall():
+    baseLength = _contour.resolveExitLength(MINIMUM_LENGTH).exitLength
+    assert baseLength == pytest.approx(MINIMUM_LENGTH.exitLength, abs=0.01)
+    assert _contour.resolveExitLength(MINIMUM_LENGTH._replace(gamma=1.4)).exitLength != pytest.approx(baseLength)
+    coarse = _contour.solveContour(MINIMUM_LENGTH._replace(characteristicCount=20))
+    assert len(coarse.divergentWall) == 21
+    assert coarse.throatPoint[1] < baseLength
+
+
+def test_resolve_exit_length_keeps_other_styles_and_invalid_designs():
+    for definition in (_definitions.NozzleDefinition.DEFAULT.value, _definitions.NozzleDefinition.BELL.value,
+                       MINIMUM_LENGTH._replace(gamma=1.0), MINIMUM_LENGTH._replace(exitRadius=1.0)):
+        assert _contour.resolveExitLength(definition) == definition
+
+
+def test_validator_rejects_walls_without_a_net():
+    assert _validator.validateParameters(MINIMUM_LENGTH) == []
+    rules = [violation.rule for violation in _validator.validateParameters(
+        MINIMUM_LENGTH._replace(gamma=1.0, characteristicCount=_characteristics.MINIMUM_CHARACTERISTIC_COUNT - 1))]
+    assert rules == ['gammaMinimum', 'characteristicCountMinimum']
+
+
+def test_minimum_length_scales_with_the_throat():
+    length = _characteristics.getMinimumLength(1.31, 3.275)
+    assert _characteristics.getMinimumLength(2 * 1.31, 2 * 3.275) == pytest.approx(2 * length)
+    assert math.isfinite(length) and length > 0
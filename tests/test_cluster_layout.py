@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib.geometry import ClusterLayout as _clusterLayout
+
+ClusterLayout, ClusterPattern = _clusterLayout.ClusterLayout, _clusterLayout.ClusterPattern
+
+
+@pytest.mark.parametrize('count', range(2, 11))
+def test_grid_rows_are_centred_on_the_axis(count):
+    positions = _clusterLayout.getClusterPositions(ClusterLayout(count, 10.0, ClusterPattern.GRID))
+    assert len(positions) == count
+    for y in np.unique(positions[:, 1]):
+        assert np.mean(positions[positions[:, 1] == y, 0]) == pytest.approx(0.0, abs=1e-12)
+    assert _clusterLayout.getMinimumSpacing(ClusterLayout(count, 10.0, ClusterPattern.GRID)) == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize('pattern', list(ClusterPattern))
+def test_first_engine_is_closest_to_the_axis(pattern):
+    positions = _clusterLayout.getClusterPositions(ClusterLayout(7, 10.0, pattern))
+    distances = np.hypot(*positions.T)
+    assert distances[0] == pytest.approx(distances.min())
+
+
+def test_engines_that_touch_are_reported():
+    layout = ClusterLayout(6, 10.0)
+    assert _clusterLayout.validateClusterLayout(layout, 4.9) == []
+    violation, = _clusterLayout.validateClusterLayout(layout, 6.0)
+    assert violation.field == 'clusterRadius'
+    assert '12' in violation.message
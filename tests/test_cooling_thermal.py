@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from conftest import newSketch
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import CoolingThermal as _thermal
+from NozzleGenerator.lib.geometry import NozzleContour as _contour
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+
+
+def _sizeWallLayers(nozzleParameters, heatTransferCoefficient):
+    coolant = _thermal.DEFAULT_COOLANT._replace(heatTransferCoefficient=heatTransferCoefficient)
+    return _thermal.sizeWallLayers(nozzleParameters, _thermal.DEFAULT_GAS, coolant, _thermal.DEFAULT_MATERIAL,
+                                   _thermal.DEFAULT_COOLANT_VELOCITY, _thermal.DEFAULT_COOLANT_PRESSURE)
+
+
+def test_sized_inner_wall_stays_below_the_material_limit():
+    wallSizing = _sizeWallLayers(DEFAULT, 1.0e5)
+    assert wallSizing.isFeasible is True
+    assert wallSizing.wallLayers.innerWallThickness > _thermal.MINIMUM_WALL_THICKNESS
+    thermal = _thermal.solveContourThermal(DEFAULT, wallSizing.wallLayers, _thermal.DEFAULT_GAS,
+                                           _thermal.DEFAULT_COOLANT, _thermal.DEFAULT_MATERIAL)
+    assert thermal.gasSideWallTemperature.max() == pytest.approx(_thermal.DEFAULT_MATERIAL.maximumTemperature,
+                                                                 rel=0.02)
+
+
+def test_walls_that_cannot_be_cooled_are_reported():
+    wallSizing = _sizeWallLayers(DEFAULT, 2.0e4)
+    assert wallSizing.isFeasible is False
+    assert wallSizing.wallLayers.innerWallThickness == _thermal.MINIMUM_WALL_THICKNESS
+
+
+def test_batched_sizing_matches_single_designs():
+    designs = [DEFAULT, DEFAULT._replace(throatRadius=DEFAULT.throatRadius * 1.5)]
+    batch = _sizeWallLayers(_contour.stackParameters(designs), 1.0e5)
+    for index, design in enumerate(designs):
+        single = _sizeWallLayers(design, 1.0e5)
+        assert batch.isFeasible[index] == single.isFeasible
+        np.testing.assert_allclose([layer[index] for layer in batch.wallLayers], single.wallLayers)
+
+
+def test_size_walls_toggle_fills_the_wall_layers():
+    from adsk.core import Application, InputChangedEventArgs
+    from NozzleGenerator.lib.UserParameters import UserParameters
+    from NozzleGenerator.lib.GenerateNozzleCommand import GenerateNozzleCommand
+    Application.get()._userInterface._commandDefinitions._definitions.clear()
+    newSketch()
+    nozzleCommand = GenerateNozzleCommand()
+    nozzleCommand.execute()
+    command = nozzleCommand._commandDefinition._lastCommand
+
+    def change(parameter, value):
+        commandInput = command.commandInputs.itemById(parameter.value.getId())
+        commandInput.value = value
+        command.inputChanged._fire(InputChangedEventArgs(commandInput, command.commandInputs))
+
+    try:
+        change(UserParameters.SIZE_WALLS, True)
+        wallLayers = UserParameters.getWallLayers()
+        assert wallLayers != _definitions.DEFAULT_WALL_LAYERS
+        assert not [violation for violation in UserParameters.getViolations()
+                    if violation.rule == 'wallTemperatureLimit']
+        change(UserParameters.COOLANT_HEAT_TRANSFER, 2.0e4)
+        assert UserParameters.getWallLayers().innerWallThickness == pytest.approx(0.03)
+        assert 'wallTemperatureLimit' in [violation.rule for violation in UserParameters.getViolations()]
+    finally:
+        change(UserParameters.COOLANT_HEAT_TRANSFER, _thermal.DEFAULT_COOLANT.heatTransferCoefficient)
+        change(UserParameters.SIZE_WALLS, False)
+        for parameter, thickness in zip((UserParameters.INNER_WALL_THICKNESS, UserParameters.CHANNEL_THICKNESS,
+                                         UserParameters.OUTER_WALL_THICKNESS), _definitions.DEFAULT_WALL_LAYERS):
+            parameter.value.setValue(thickness)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import DesignSweep as _sweep
+from NozzleGenerator.lib.catalog import ResultStore as _resultStore
+from NozzleGenerator.lib.geometry import ParameterValidator as _validator
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+BELL = _definitions.NozzleDefinition.BELL.value
+GRID = _sweep.ParameterGrid(throatRadius=np.linspace(1.1, 1.5, 5), convergenceAngle=[20.0, 30.0, 45.0])
+
+
+def test_grid_varies_the_last_field_fastest():
+    columns = GRID.getColumns(0, GRID.getCount())
+    assert GRID.getCount() == 15
+    np.testing.assert_array_equal(columns['convergenceAngle'][:4], [20.0, 30.0, 45.0, 20.0])
+    np.testing.assert_array_equal(columns['throatRadius'][:4], np.linspace(1.1, 1.5, 5)[[0, 0, 0, 1]])
+
+
+def test_samples_do_not_depend_on_the_chunks():
+    ranges = {'exitRadius': (2.0, 4.0), 'throatRadius': (1.0, 1.5)}
+    for sampling in (_sweep.RandomSampling(100, seed=3, **ranges),
+                     _sweep.LatinHypercubeSampling(100, seed=3, **ranges)):
+        whole = sampling.getColumns(0, 100)
+        for field, (minimum, maximum) in ranges.items():
+            chunks = [sampling.getColumns(start, min(start + 30, 100))[field] for start in range(0, 100, 30)]
+            np.testing.assert_array_equal(np.concatenate(chunks), whole[field])
+            assert np.all((whole[field] >= minimum) & (whole[field] < maximum))
+
+
+def test_latin_hypercube_fills_every_stratum_once():
+    count = 64
+    sampling = _sweep.LatinHypercubeSampling(count, seed=1, exitRadius=(2.0, 4.0), chamberRadius=(3.0, 5.0))
+    columns = sampling.getColumns(0, count)
+    for values, (minimum, maximum) in zip((columns['exitRadius'], columns['chamberRadius']), ((2.0, 4.0), (3.0, 5.0))):
+        strata = np.floor((values - minimum) / (maximum - minimum) * count).astype(int)
+        np.testing.assert_array_equal(np.sort(strata), np.arange(count))
+
+
+def test_sweeps_to_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        _sweep.ParameterGrid(gamma=[1.2, 1.3])
+    with pytest.raises(ValueError):
+        _sweep.RandomSampling(10, throatRadius=(2.0, 1.0))
+
+
+@pytest.mark.parametrize('base', [DEFAULT, BELL], ids=lambda base: base.name)
+def test_batched_metrics_match_single_designs(base):
+    columns = GRID.getColumns(0, GRID.getCount())
+    metrics = _sweep.evaluateDesigns(base, columns)
+    for index in (0, 7, 14):
+        design = base._replace(**{field: values[index] for field, values in columns.items()})
+        single = _sweep.evaluateDesigns(design, {field: values[index:index + 1] for field, values in columns.items()})
+        for metric in _sweep.METRICS:
+            np.testing.assert_allclose(metrics[metric.name][index], single[metric.name][0])
+        assert bool(metrics['feasible'][index]) == bool(_validator.isFeasible(design))
+
+
+def test_cylinder_volume_and_area_are_exact():
+    # a longer chamber only lengthens its straight wall, which is sampled exactly
+    metrics = _sweep.evaluateDesigns(DEFAULT, {'chamberLength': DEFAULT.chamberLength + np.array([0.0, 10.0])})
+    np.testing.assert_allclose(np.diff(metrics['chamberCylinderLength']), 10.0)
+    radius = DEFAULT.chamberRadius
+    assert metrics['volume'][1] - metrics['volume'][0] == pytest.approx(np.pi * radius ** 2 * 10.0)
+    assert metrics['wettedArea'][1] - metrics['wettedArea'][0] == pytest.approx(2 * np.pi * radius * 10.0)
+
+
+def test_sweep_results_do_not_depend_on_workers_or_chunks(tmp_path):
+    serial = _sweep.runSweep(GRID, DEFAULT, str(tmp_path / 'serial'), workers=1, chunkSize=4)
+    parallel = _sweep.runSweep(GRID, DEFAULT, str(tmp_path / 'parallel'), workers=2, chunkSize=6)
+    assert _sweep.loadSweepManifest(str(tmp_path / 'parallel'))['isComplete']
+    assert set(serial) == set(GRID.getFields()) | {metric.name for metric in _sweep.METRICS}
+    for name, values in serial.items():
+        np.testing.assert_array_equal(parallel[name], values)
+
+
+def test_stored_sweep_is_read_back(tmp_path):
+    store = _resultStore.ResultStore(str(tmp_path / 'store'))
+    progress = []
+
+    def onProgress(done, count):
+        progress.append(done)
+
+    first = _sweep.runStoredSweep(GRID, DEFAULT, store, workers=1, onProgress=onProgress)
+    second = _sweep.runStoredSweep(GRID, DEFAULT, store, workers=1, onProgress=onProgress)
+    assert progress == [GRID.getCount()]
+    assert store.getCount() == 1
+    np.testing.assert_array_equal(second['volume'], first['volume'])
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from conftest import newSketch
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import EngineSizing as _sizing
+from NozzleGenerator.lib.geometry import ParameterValidator as _validator
+
+DivergenceStyle = _definitions.DivergenceStyle
+TARGETS = _sizing.SizingTargets(thrust=1000.0, chamberPressure=2.0e6, ambientPressure=101325.0, gamma=1.2,
+                                characteristicVelocity=1500.0, characteristicLength=1.0)
+
+
+def _getPerformance(sizing, targets):
+    return _sizing.getPerformance(sizing.nozzleParameters, targets.chamberPressure, targets.ambientPressure,
+                                  targets.gamma, targets.characteristicVelocity)
+
+
+@pytest.mark.parametrize('divergenceStyle', [DivergenceStyle.CONE, DivergenceStyle.BELL])
+def test_sized_designs_deliver_the_targets(divergenceStyle):
+    sizing = _sizing.sizeEngine(TARGETS, divergenceStyle=divergenceStyle)
+    performance = _getPerformance(sizing, TARGETS)
+    assert performance.thrust == pytest.approx(TARGETS.thrust)
+    assert performance.characteristicLength == pytest.approx(TARGETS.characteristicLength, rel=1e-3)
+    assert performance.exitPressure == pytest.approx(sizing.exitPressure)
+    assert _validator.validateParameters(sizing.nozzleParameters) == []
+
+
+def test_bells_are_kept_inside_the_chart_area_ratios():
+    cone = _sizing.sizeEngine(TARGETS)
+    bell = _sizing.sizeEngine(TARGETS, divergenceStyle=DivergenceStyle.BELL)
+    # the default targets expand to an area ratio below the charts, the bell over-expands to the smallest one
+    assert cone.expansionRatio < _validator.BELL_AREA_RATIOS[0]
+    assert cone.exitPressure == TARGETS.ambientPressure
+    assert bell.expansionRatio == _validator.BELL_AREA_RATIOS[0]
+    assert bell.exitPressure < TARGETS.ambientPressure
+    highExpansion = _sizing.sizeEngine(TARGETS._replace(ambientPressure=0.0, exitPressure=100.0),
+                                       divergenceStyle=DivergenceStyle.BELL)
+    assert _getPerformance(highExpansion, TARGETS._replace(ambientPressure=0.0)).thrust == pytest.approx(TARGETS.thrust)
+    assert highExpansion.expansionRatio == _validator.BELL_AREA_RATIOS[1]
+
+
+def test_vacuum_engines_expand_to_the_exit_pressure():
+    targets = TARGETS._replace(ambientPressure=0.0, exitPressure=np.array([2.0e4, 1.0e4]))
+    sizing = _sizing.sizeEngine(targets)
+    assert np.all(np.isfinite(sizing.nozzleParameters.exitRadius))
+    assert np.all(np.diff(sizing.expansionRatio) > 0)
+    np.testing.assert_allclose(_getPerformance(sizing, targets).thrust, TARGETS.thrust)
+
+
+def test_dialog_reports_targets_without_an_exit_pressure():
+    from adsk.core import Application, InputChangedEventArgs
+    from NozzleGenerator.lib.UserParameters import UserParameters
+    from NozzleGenerator.lib.GenerateNozzleCommand import GenerateNozzleCommand
+    Application.get()._userInterface._commandDefinitions._definitions.clear()
+    newSketch()
+    nozzleCommand = GenerateNozzleCommand()
+    nozzleCommand.execute()
+    command = nozzleCommand._commandDefinition._lastCommand
+
+    def change(parameter, value):
+        commandInput = command.commandInputs.itemById(parameter.value.getId())
+        commandInput.value = value
+        command.inputChanged._fire(InputChangedEventArgs(commandInput, command.commandInputs))
+
+    def getRules():
+        return [violation.rule for violation in UserParameters.getViolations()]
+
+    throatRadius = UserParameters.THROAT_RADIUS.value.getValue()
+    try:
+        change(UserParameters.AMBIENT_PRESSURE, 0.0)
+        change(UserParameters.SIZE_FROM_TARGETS, True)
+        assert 'sizingExitPressure' in getRules()
+        assert UserParameters.THROAT_RADIUS.value.getValue() == throatRadius
+        change(UserParameters.EXIT_PRESSURE, 2.0e4)
+        assert getRules() == []
+        assert UserParameters.THROAT_RADIUS.value.getValue() != throatRadius
+    finally:
+        change(UserParameters.SIZE_FROM_TARGETS, False)
+        change(UserParameters.EXIT_PRESSURE, 0.0)
+        change(UserParameters.AMBIENT_PRESSURE, TARGETS.ambientPressure)
+        # back to the geometry of the selected default definition
+        UserParameters.applySelectedNozzleDefinition()
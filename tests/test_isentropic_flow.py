@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import IsentropicFlow as _flow
+from NozzleGenerator.lib.geometry import GasDynamics as _gasDynamics
+from NozzleGenerator.lib.geometry import NozzleContour as _contour
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+
+
+@pytest.mark.parametrize('gamma', [1.15, 1.2, 1.4])
+def test_area_ratio_inversion_round_trips_on_both_branches(gamma):
+    subsonicMach = np.linspace(0.01, 0.99, 50)
+    supersonicMach = np.linspace(1.01, 8.0, 50)
+    mach = np.concatenate([subsonicMach, supersonicMach])
+    ratio = _gasDynamics.areaRatio(mach, gamma)
+    solved = _gasDynamics.machFromAreaRatio(ratio, gamma, mach > 1)
+    np.testing.assert_allclose(solved, mach, rtol=1e-9)
+    assert _gasDynamics.machFromAreaRatio(1.0, gamma) == 1.0
+
+
+def test_prandtl_meyer_inversion_round_trips():
+    mach = np.linspace(1.05, 6.0, 40)
+    nu = _gasDynamics.prandtlMeyerAngle(mach, 1.2)
+    np.testing.assert_allclose(_gasDynamics.machFromPrandtlMeyerAngle(nu, 1.2), mach, rtol=1e-9)
+
+
+def test_flow_is_sonic_at_the_narrowest_station_and_expands_to_the_exit():
+    flow = _flow.solveContourFlow(DEFAULT, 1.2, pointsPerSegment=64)
+    narrowest = np.argmin(flow.radius)
+    assert flow.mach[narrowest] == pytest.approx(1.0, abs=1e-3)
+    assert np.all(flow.mach[flow.isSupersonic] >= 1) and np.all(flow.mach[~flow.isSupersonic] <= 1)
+    # the arc dips below throatRadius before the exit line leaves it, so the area ratio is taken at that dip
+    exitRatio = (DEFAULT.exitRadius / flow.radius[narrowest]) ** 2
+    assert flow.mach[-1] == pytest.approx(float(_gasDynamics.machFromAreaRatio(exitRatio, 1.2)))
+    # pressure, temperature and density only fall along the nozzle
+    for ratio in (flow.pressure, flow.temperature, flow.density):
+        assert np.all(np.diff(ratio) <= 1e-12)
+
+
+def test_batched_flow_matches_single_designs():
+    designs = [DEFAULT, DEFAULT._replace(exitRadius=DEFAULT.exitRadius * 1.2)]
+    batch = _flow.solveContourFlow(_contour.stackParameters(designs), 1.2, pointsPerSegment=16)
+    for index, design in enumerate(designs):
+        single = _flow.solveContourFlow(design, 1.2, pointsPerSegment=16)
+        np.testing.assert_allclose(batch.mach[index], single.mach)
+        np.testing.assert_allclose(batch.pressure[index], single.pressure)
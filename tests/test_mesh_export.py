@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.export import MeshExport as _meshExport
+
+SEGMENTS = 64
+
+
+def _getProfiles(definition):
+    return _meshExport.getEngineProfiles(definition.value, _definitions.DEFAULT_WALL_LAYERS, pointsPerSegment=8)
+
+
+def _getRevolvedVolume(profiles) -> float:
+    # Pappus: the profile area times the distance its centroid travels, scaled to the inscribed polygon the mesh
+    # revolves instead of a circle
+    volume = 0.0
+    for profile in profiles:
+        x, y = profile[:, 0], profile[:, 1]
+        nextX, nextY = np.roll(x, -1), np.roll(y, -1)
+        volume += 2 * math.pi * np.sum((x + nextX) * (x * nextY - nextX * y)) / 6
+    return volume * SEGMENTS / (2 * math.pi) * math.sin(2 * math.pi / SEGMENTS)
+
+
+def _getMeshVolume(triangles: np.ndarray) -> float:
+    return float(np.sum(np.einsum('ij,ij->i', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])))) / 6
+
+
+def _readObj(path):
+    with open(path) as file:
+        lines = [line.split() for line in file if line[0] in 'vf']
+    vertices = np.array([line[1:] for line in lines if line[0] == 'v'], dtype=float)
+    faces = np.array([line[1:] for line in lines if line[0] == 'f'], dtype=int) - 1
+    return vertices, faces
+
+
+@pytest.mark.parametrize('definition', list(_definitions.NozzleDefinition))
+def test_stl_encloses_the_revolved_profiles(tmp_path, definition):
+    profiles = _getProfiles(definition)
+    path = str(tmp_path / 'engine.stl')
+    _meshExport.writeBinaryStl(path, profiles, SEGMENTS, chunkEdges=16)
+    with open(path, 'rb') as file:
+        header, count = file.read(80), int(np.frombuffer(file.read(4), '<u4')[0])
+        facets = np.frombuffer(file.read(), _meshExport.STL_FACET_DTYPE)
+    assert count == len(facets) == _meshExport.getFacetCount(profiles, SEGMENTS)
+    # outward windings give a positive volume, equal to the exact volume of the faceted solid
+    assert _getMeshVolume(facets['vertices'].astype(float)) == pytest.approx(_getRevolvedVolume(profiles), rel=1e-4)
+
+
+def test_obj_does_not_depend_on_the_chunk_size(tmp_path):
+    profiles = _getProfiles(_definitions.NozzleDefinition.BELL)
+    meshes = []
+    for chunkEdges in (7, 64, 10000):
+        path = str(tmp_path / 'engine{}.obj'.format(chunkEdges))
+        _meshExport.writeObj(path, profiles, SEGMENTS, chunkEdges)
+        meshes.append(_readObj(path))
+    vertices, faces = meshes[0]
+    assert len(vertices) == SEGMENTS * sum(len(profile) for profile in profiles)
+    assert len(faces) == _meshExport.getFacetCount(profiles, SEGMENTS)
+    for otherVertices, otherFaces in meshes[1:]:
+        np.testing.assert_array_equal(otherVertices, vertices)
+        np.testing.assert_array_equal(np.unique(otherFaces, axis=0), np.unique(faces, axis=0))
+    # every edge of a closed mesh is shared by exactly two faces, in opposite directions
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    assert len(np.unique(edges, axis=0)) == len(edges)
+    np.testing.assert_array_equal(np.unique(edges, axis=0), np.unique(edges[:, ::-1], axis=0))
+    assert _getMeshVolume(vertices[faces]) == pytest.approx(_getRevolvedVolume(profiles), rel=1e-4)
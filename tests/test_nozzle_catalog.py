@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.catalog import NozzleCatalog as _catalog
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+BUILT_IN_NAMES = [definition.value.name for definition in _definitions.NozzleDefinition]
+
+
+def test_default_catalog_is_outside_the_add_in_folder():
+    addInFolder = _definitions.__file__.rsplit('lib', 1)[0]
+    assert not _catalog.DEFAULT_CATALOG_PATH.startswith(addInFolder)
+
+
+def test_reopening_updates_built_ins_and_keeps_user_definitions(tmp_path):
+    path = str(tmp_path / 'catalog.sqlite')
+    catalog = _catalog.NozzleCatalog(path)
+    userDefinition = DEFAULT._replace(name='user', throatRadius=2.0)
+    catalog.add(userDefinition)
+    catalog.close()
+    # a built-in stored by an older version of the add-in
+    with sqlite3.connect(path) as connection:
+        connection.execute('UPDATE nozzles SET throatRadius = 9.0 WHERE name = ?', (DEFAULT.name,))
+    connection.close()
+    catalog = _catalog.NozzleCatalog(path)
+    try:
+        assert catalog.get(DEFAULT.name) == DEFAULT
+        assert catalog.get('user') == userDefinition
+        assert catalog.getNames() == BUILT_IN_NAMES + ['user']
+    finally:
+        catalog.close()
+
+
+def test_adding_an_existing_name_needs_replace(tmp_path):
+    catalog = _catalog.NozzleCatalog(str(tmp_path / 'catalog.sqlite'))
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            catalog.add(DEFAULT)
+        catalog.add(DEFAULT._replace(exitLength=10.0), replace=True)
+        assert catalog.get(DEFAULT.name).exitLength == 10.0
+        assert catalog.queryNames(expansionRatio=(1.0, None)) == BUILT_IN_NAMES
+    finally:
+        catalog.close()
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.geometry import NozzleContour as _contour
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+
+
+def _getDistance(a, b):
+    return np.hypot(*np.moveaxis(np.asarray(a) - np.asarray(b), -1, 0))
+
+
+def test_tangent_chain_meets_every_arc_at_its_radius():
+    contour = _contour.solveContour(DEFAULT)
+    assert _getDistance(contour.convergenceLineStart, contour.convergenceArcCenter) == pytest.approx(
+        DEFAULT.convergenceRadius)
+    assert _getDistance(contour.convergenceLineEnd, contour.divergenceArcCenter) == pytest.approx(
+        DEFAULT.divergenceRadius)
+    assert _getDistance(contour.throatPoint, contour.divergenceArcCenter) == pytest.approx(DEFAULT.divergenceRadius)
+    # the chamber line is vertical and tangent to the convergence arc
+    assert contour.chamberEnd[1] == pytest.approx(contour.convergenceArcCenter[1])
+    assert contour.chamberStart[0] - contour.convergenceArcCenter[0] == pytest.approx(DEFAULT.convergenceRadius)
+
+
+def test_convergence_line_is_tangent_at_the_convergence_angle():
+    contour = _contour.solveContour(DEFAULT)
+    direction = contour.convergenceLineEnd - contour.convergenceLineStart
+    assert math.degrees(math.atan2(-direction[0], -direction[1])) == pytest.approx(DEFAULT.convergenceAngle)
+    for point, center in ((contour.convergenceLineStart, contour.convergenceArcCenter),
+                          (contour.convergenceLineEnd, contour.divergenceArcCenter)):
+        assert np.dot(direction, point - center) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_cone_ends_on_the_exit_plane():
+    contour = _contour.solveContour(DEFAULT)
+    np.testing.assert_allclose(contour.exitPoint, [DEFAULT.exitRadius, 0.0])
+    np.testing.assert_allclose(contour.throatPoint, [DEFAULT.throatRadius, DEFAULT.exitLength])
+    assert contour.length == pytest.approx(DEFAULT.chamberLength + DEFAULT.exitLength)
+
+
+def test_sampled_contour_is_continuous():
+    points = _contour.sampleContour(_contour.solveContour(DEFAULT), pointsPerSegment=32)
+    assert points.shape == (5 * 31 + 1, 2)
+    steps = _getDistance(points[1:], points[:-1])
+    assert steps.max() < DEFAULT.chamberCylinderLength / 30
+    np.testing.assert_allclose(points[0], [DEFAULT.chamberRadius, DEFAULT.chamberLength + DEFAULT.exitLength])
+    np.testing.assert_allclose(points[-1], [DEFAULT.exitRadius, 0.0], atol=1e-12)
+
+
+def test_stacked_designs_match_single_solves():
+    designs = [DEFAULT._replace(throatRadius=radius, exitRadius=2 * radius) for radius in (1.0, 1.3, 1.6)]
+    batch = _contour.computeMetrics(_contour.solveContour(_contour.stackParameters(designs)))
+    for i, design in enumerate(designs):
+        single = _contour.computeMetrics(_contour.solveContour(design))
+        for field in _contour.ContourMetrics._fields:
+            assert getattr(batch, field)[i] == pytest.approx(getattr(single, field))
+
+
+def test_designs_of_different_styles_cannot_be_stacked():
+    with pytest.raises(ValueError):
+        _contour.stackParameters([DEFAULT, _definitions.NozzleDefinition.BELL.value])
+
+
+def test_internal_units_solve_the_same_contour():
+    internal = DEFAULT._replace(convergenceAngle=math.radians(DEFAULT.convergenceAngle))
+    np.testing.assert_allclose(_contour.sampleContour(_contour.solveContour(internal, degrees=False)),
+                               _contour.sampleContour(_contour.solveContour(DEFAULT)))
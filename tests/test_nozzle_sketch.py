@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import toInternalUnits, newSketch
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.geometry.ContourCache import contourCache as _contourCache
+from NozzleGenerator.lib.sketch import EngineSolid as _engineSolid
+from NozzleGenerator.lib.sketch import NozzleSketch as _nozzleSketch
+
+STYLES = [_definitions.NozzleDefinition.DEFAULT, _definitions.NozzleDefinition.BELL,
+          _definitions.NozzleDefinition.MINIMUM_LENGTH]
+WALL_LAYERS = _definitions.WallLayers(0.03, 0.1, 0.1)
+
+
+@pytest.mark.parametrize('definition', STYLES, ids=lambda definition: definition.value.name)
+def test_regeneration_keeps_the_curve_count(definition):
+    nozzleParameters = toInternalUnits(definition.value)
+    sketch = newSketch()
+    layerCurves = _nozzleSketch.EngineSketch(nozzleParameters, WALL_LAYERS).draw(sketch)
+    assert len(layerCurves) == 4
+    curveCount = sketch.sketchCurves.count
+    regenerations = [
+        (nozzleParameters._replace(chamberRadius=nozzleParameters.chamberRadius * 1.05), WALL_LAYERS),
+        (nozzleParameters, WALL_LAYERS._replace(channelThickness=0.15)),
+        (nozzleParameters._replace(exitRadius=nozzleParameters.exitRadius * 1.1), WALL_LAYERS),
+    ]
+    for changedParameters, wallLayers in regenerations:
+        assert _nozzleSketch.EngineSketch(changedParameters, wallLayers).draw(sketch) is None
+        assert sketch.sketchCurves.count == curveCount
+
+
+def test_layer_thickness_drives_the_offset_distance():
+    nozzleParameters = toInternalUnits(_definitions.NozzleDefinition.BELL.value)
+    sketch = newSketch()
+    _nozzleSketch.EngineSketch(nozzleParameters, WALL_LAYERS).draw(sketch)
+    _nozzleSketch.EngineSketch(nozzleParameters, WALL_LAYERS._replace(channelThickness=0.15)).draw(sketch)
+    dimensions = sketch.sketchDimensions
+    offsets = [dimensions.item(i).parameter.value for i in range(dimensions.count)
+               if type(dimensions.item(i)).__name__ == 'SketchOffsetCurvesDimension']
+    assert offsets == pytest.approx([0.03, 0.18, 0.28])
+
+
+@pytest.mark.parametrize('definition', STYLES, ids=lambda definition: definition.value.name)
+def test_layer_offsets_end_on_the_exit_plane(definition):
+    nozzleParameters = toInternalUnits(definition.value)
+    layerCurves = _nozzleSketch.EngineSketch(nozzleParameters, WALL_LAYERS).draw(newSketch())
+    wallCount = len(layerCurves[0])
+    if definition == _definitions.NozzleDefinition.MINIMUM_LENGTH:
+        # the wall leaves parallel to the axis, its offsets end on the plane without an extension
+        assert [len(curves) for curves in layerCurves] == [wallCount] * 4
+        return
+    assert [len(curves) for curves in layerCurves] == [wallCount] + [wallCount + 1] * 3
+    # each extension ends where the headless layer does, on y = 0
+    layerEnds = _contourCache.getOffsetPoints(nozzleParameters, WALL_LAYERS.getOffsets(), 8, degrees=False)[:, -1]
+    for curves, layerEnd in zip(layerCurves[1:], layerEnds[1:]):
+        extensionEnd = curves[-1].endSketchPoint.geometry
+        assert (extensionEnd.x, extensionEnd.y) == pytest.approx(tuple(layerEnd), abs=1e-9)
+
+
+def test_another_style_replaces_the_engine_and_its_solid():
+    sketch = newSketch()
+    cone = toInternalUnits(_definitions.NozzleDefinition.DEFAULT.value)
+    layerCurves = _nozzleSketch.EngineSketch(cone, WALL_LAYERS).draw(sketch)
+    solid = _engineSolid.EngineSolid(cone, WALL_LAYERS, _definitions.CoolingChannels(4, 0.05))
+    created = solid.generate(sketch, layerCurves)
+    _nozzleSketch.EngineSketch.addDependents(sketch, created)
+    bell = toInternalUnits(_definitions.NozzleDefinition.BELL.value)
+    assert _nozzleSketch.EngineSketch(bell, WALL_LAYERS).draw(sketch) is not None
+    assert not any(entity.isValid for entity in created)
+    bellSketch = newSketch()
+    _nozzleSketch.EngineSketch(bell, WALL_LAYERS).draw(bellSketch)
+    assert sketch.sketchCurves.count == bellSketch.sketchCurves.count
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.catalog import ResultStore as _resultStore
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+
+
+def test_keys_ignore_the_name_and_differences_below_the_tolerance():
+    key = _resultStore.getResultKey('flow', DEFAULT, gamma=1.2)
+    assert _resultStore.getResultKey('flow', DEFAULT._replace(name='other'), gamma=1.2) == key
+    assert _resultStore.getResultKey('flow', DEFAULT._replace(exitRadius=DEFAULT.exitRadius + 1e-12),
+                                     gamma=1.2) == key
+    assert _resultStore.getResultKey('flow', DEFAULT._replace(exitRadius=DEFAULT.exitRadius + 1e-6),
+                                     gamma=1.2) != key
+    assert _resultStore.getResultKey('flow', DEFAULT, gamma=1.3) != key
+    assert _resultStore.getResultKey('thermal', DEFAULT, gamma=1.2) != key
+    with pytest.raises(TypeError):
+        _resultStore.getResultKey('flow', DEFAULT, callback=print)
+
+
+def test_entries_are_read_back_as_read_only_memory_maps(tmp_path):
+    store = _resultStore.ResultStore(str(tmp_path))
+    key = _resultStore.getResultKey('test', DEFAULT)
+    assert store.get(key) is None
+    values = {'x': np.arange(10.0), 'flags': np.arange(10) % 2 == 0}
+    store.put(key, values, 'test')
+    arrays = store.get(key)
+    assert store.contains(key) and store.getCount() == 1
+    for name, expected in values.items():
+        assert isinstance(arrays[name], np.memmap)
+        np.testing.assert_array_equal(arrays[name], expected)
+    with pytest.raises(ValueError):
+        arrays['x'][0] = 1.0
+    with pytest.raises(ValueError):
+        store.put(_resultStore.getResultKey('other', DEFAULT), {'not a name': np.zeros(1)})
+    store.remove(key)
+    assert store.get(key) is None and store.getCount() == 0
+
+
+def test_results_are_computed_once(tmp_path):
+    store = _resultStore.ResultStore(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _definitions.WallLayers(np.zeros(3), np.ones(3), np.full(3, 2.0))
+
+    for _ in range(2):
+        wallLayers = store.getOrCompute('layers', DEFAULT, compute, _definitions.WallLayers, count=3)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(wallLayers.outerWallThickness, 2.0)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    values = {'x': np.zeros(1000)}
+    # two entries of 8000 bytes of values and their .npy headers fit, three do not
+    maxBytes = 20000
+    store = _resultStore.ResultStore(str(tmp_path), maxBytes=maxBytes)
+    keys = [_resultStore.getResultKey('test', DEFAULT, index=index) for index in range(3)]
+    store.put(keys[0], values)
+    store.put(keys[1], values)
+    # the first entry is used again, so the second one is now the oldest
+    os.utime(os.path.join(str(tmp_path), keys[1][:2], keys[1], _resultStore._MANIFEST_NAME), (0, 0))
+    store.get(keys[0])
+    store.put(keys[2], values)
+    assert [store.contains(key) for key in keys] == [True, False, True]
+    assert store.getSize() <= maxBytes
@@ -0,0 +1,73 @@
+import gc
+import math
+import os
+
+import numpy as np
+import pytest
+
+from NozzleGenerator.lib import NozzleDefinitions as _definitions
+from NozzleGenerator.lib.analysis import ToleranceAnalysis as _tolerances
+from NozzleGenerator.lib.geometry import NozzleContour as _contour
+
+DEFAULT = _definitions.NozzleDefinition.DEFAULT.value
+MINIMUM_LENGTH = _definitions.NozzleDefinition.MINIMUM_LENGTH.value
+Tolerance = _tolerances.Tolerance
+
+
+@pytest.fixture
+def columnsPath(tmp_path, monkeypatch):
+    monkeypatch.setattr(_tolerances, 'DEFAULT_COLUMNS_PATH', str(tmp_path))
+    return str(tmp_path)
+
+
+def test_columns_are_memory_mapped_and_independent_of_the_chunks(columnsPath):
+    tolerances = {'throatRadius': Tolerance(0.02), 'exitRadius': Tolerance(0.05, 'uniform', bias=0.01)}
+    whole = _tolerances.runToleranceAnalysis(DEFAULT, count=500, seed=2, chunkSize=500, **tolerances)
+    chunked = _tolerances.runToleranceAnalysis(DEFAULT, count=500, seed=2, chunkSize=64, **tolerances)
+    folders = os.listdir(columnsPath)
+    assert len(folders) == 2
+    for name, column in whole.columns.items():
+        assert isinstance(column, np.memmap)
+        assert os.path.isfile(os.path.join(columnsPath, folders[0], name + '.npy'))
+        np.testing.assert_array_equal(chunked.columns[name], column)
+    exitRadius = whole.columns['exitRadius']
+    assert np.all(np.abs(exitRadius - DEFAULT.exitRadius - 0.01) <= 0.05)
+
+
+def test_default_columns_are_removed_with_their_result(columnsPath):
+    with _tolerances.runToleranceAnalysis(DEFAULT, count=100, throatRadius=Tolerance(0.02)) as result:
+        assert len(os.listdir(columnsPath)) == 1
+    assert result.columns == {} and os.listdir(columnsPath) == []
+    # a result that is never closed takes its folder with it
+    result = _tolerances.runToleranceAnalysis(DEFAULT, count=100, throatRadius=Tolerance(0.02))
+    del result
+    gc.collect()
+    assert os.listdir(columnsPath) == []
+    # columns written to a given path are the caller's
+    path = os.path.join(columnsPath, 'kept')
+    _tolerances.runToleranceAnalysis(DEFAULT, count=100, path=path, throatRadius=Tolerance(0.02)).close()
+    assert os.listdir(columnsPath) == ['kept'] and 'throatArea.npy' in os.listdir(path)
+
+
+def test_sensitivities_follow_the_throat_area(columnsPath):
+    result = _tolerances.runToleranceAnalysis(DEFAULT, count=2000, throatRadius=Tolerance(0.01, 'triangular'))
+    throatArea = result.statistics['throatArea']
+    throatRadius = result.statistics['throatRadius'].nominal
+    assert result.feasibleFraction == 1.0
+    nominalMetrics = _contour.computeMetrics(_contour.solveContour(DEFAULT))
+    assert throatArea.nominal == pytest.approx(float(nominalMetrics.throatArea))
+    assert throatArea.sensitivities['throatRadius'] == pytest.approx(2 * math.pi * throatRadius, rel=1e-2)
+    assert throatArea.varianceContributions['throatRadius'] == pytest.approx(1.0, rel=1e-3)
+    assert sorted(throatArea.percentiles) == list(_tolerances.DEFAULT_PERCENTILES)
+
+
+def test_characteristic_walls_are_as_long_as_their_nets(columnsPath):
+    result = _tolerances.runToleranceAnalysis(MINIMUM_LENGTH, count=20, exitRadius=Tolerance(0.05))
+
+    def getLength(design):
+        return float(_contour.computeMetrics(_contour.solveContour(_contour.resolveExitLength(design))).length)
+
+    assert result.statistics['length'].nominal == pytest.approx(getLength(MINIMUM_LENGTH), rel=1e-6)
+    for index in range(0, 20, 5):
+        design = MINIMUM_LENGTH._replace(exitRadius=float(result.columns['exitRadius'][index]))
+        assert result.columns['length'][index] == pytest.approx(getLength(design), rel=1e-5)
@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import newSketch
+
+from NozzleGenerator.lib import OnExecuteHandler as _onExecuteHandler
+from NozzleGenerator.lib import UserParameters as _userParameters
+from NozzleGenerator.lib.geometry.CharacteristicNozzle import getMinimumLength as _getMinimumLength
+
+UserParameters = _userParameters.UserParameters
+
+
+def _countFeatures(sketch) -> int:
+    features = sketch.parentComponent.features
+    return sum(1 for collection in (features.revolveFeatures, features.sweepFeatures)
+               for i in range(collection.count) if collection.item(i).isValid)
+
+
+def test_changes_are_tracked_per_target():
+    assert UserParameters.getChangesSinceLastGeneration('first')
+    UserParameters.markGenerated('first')
+    assert UserParameters.getChangesSinceLastGeneration('first') == {}
+    # another target has not been generated from these values yet
+    assert UserParameters.getChangesSinceLastGeneration('second')
+    UserParameters.markGenerated('second')
+    UserParameters.RECORD_TIMINGS.value._value = True
+    try:
+        changes = UserParameters.getChangesSinceLastGeneration('first')
+        assert list(changes) == [UserParameters.RECORD_TIMINGS.value.getId()]
+        assert not UserParameters.isEngineChanged(changes) and not UserParameters.isSolidChanged(changes)
+    finally:
+        UserParameters.RECORD_TIMINGS.value._value = False
+
+
+def test_unrelated_inputs_skip_the_engine_and_solid():
+    sketch = newSketch()
+    handler = _onExecuteHandler.OnExecuteHandler()
+    UserParameters.GENERATE_SOLID.value._value = True
+    UserParameters.CHANNEL_COUNT.value._value = 8
+    try:
+        handler.run()
+        curveCount = sketch.sketchCurves.count
+        assert _countFeatures(sketch) == 2
+        UserParameters.CAPTURE_PROFILE.value._value = True
+        handler.run()
+        assert (sketch.sketchCurves.count, _countFeatures(sketch)) == (curveCount, 2)
+        # other channels replace the solid, the engine is left alone
+        UserParameters.CHANNEL_COUNT.value._value = 12
+        UserParameters.CHANNEL_COUNT.value._isDirty = True
+        handler.run()
+        assert (sketch.sketchCurves.count, _countFeatures(sketch)) == (curveCount, 2)
+    finally:
+        UserParameters.GENERATE_SOLID.value._value = False
+        UserParameters.CHANNEL_COUNT.value._value = 0
+        UserParameters.CAPTURE_PROFILE.value._value = False
+
+
+def test_minimum_length_walls_take_their_length_from_the_net():
+    dropdown = UserParameters.NOZZLE_DEFINITION_DROPDOWN.value
+    dropdown._selectedOption = 'minimum length'
+    try:
+        # the inputs still hold the radii of the default cone, in cm
+        nozzleParameters = UserParameters.getNozzleParameters()
+        assert abs(nozzleParameters.exitLength - _getMinimumLength(0.262 / 2, 0.323 / 2)) < 1e-9
+        UserParameters.CHARACTERISTIC_COUNT.value._value = 20
+        assert UserParameters.getNozzleParameters().exitLength < nozzleParameters.exitLength
+    finally:
+        dropdown._selectedOption = 'default'
+        UserParameters.CHARACTERISTIC_COUNT.value._value = 50
+
+
+def test_selecting_a_definition_applies_its_net_and_chamber():
+    from adsk.core import Application
+    from NozzleGenerator.lib.GenerateNozzleCommand import GenerateNozzleCommand
+    from NozzleGenerator.lib.catalog.NozzleCatalog import nozzleCatalog
+    Application.get()._userInterface._commandDefinitions._definitions.clear()
+    newSketch()
+    nozzleCommand = GenerateNozzleCommand()
+    nozzleCommand.execute()
+    commandInputs = nozzleCommand._commandDefinition._lastCommand.commandInputs
+    definition = nozzleCatalog.get('minimum length')._replace(
+        name='coarse net', chamberCylinderLength=40.0, gamma=1.3, characteristicCount=20)
+    nozzleCatalog.add(definition)
+    dropdown = UserParameters.NOZZLE_DEFINITION_DROPDOWN.value
+    try:
+        dropdown._selectedOption = definition.name
+        UserParameters.applySelectedNozzleDefinition()
+        assert commandInputs.itemById(UserParameters.CHARACTERISTIC_COUNT.value.getId()).valueOne == 20
+        assert commandInputs.itemById(UserParameters.GAMMA.value.getId()).value == 1.3
+        nozzleParameters = UserParameters.getNozzleParameters()
+        assert (nozzleParameters.gamma, nozzleParameters.characteristicCount) == (1.3, 20)
+        assert nozzleParameters.chamberCylinderLength == pytest.approx(4.0)
+    finally:
+        nozzleCatalog.remove(definition.name)
+        dropdown._selectedOption = 'default'
+        UserParameters.applySelectedNozzleDefinition()
@@ -0,0 +1,81 @@
+import argparse
+import importlib
+import os
+import sys
+
+# Command-line entry point for generating nozzle artifacts on machines without Fusion 360, e.g.
+#
+#     python tools/batch/NozzleBatch.py engines.csv build/nozzles --mesh stl --workers 8
+#     cat engines.jsonl | python tools/batch/NozzleBatch.py - build/nozzles --format jsonl
+#
+# Every definition gets a folder with its wall layer contours (and meshes), and build/nozzles/metrics.csv holds one row
+# of metrics per definition. The exit status is 1 when any definition failed.
+
+_ADD_IN_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(_ADD_IN_FOLDER))
+
+# the add-in is a package named after its folder; the batch code only needs numpy, not the adsk modules
+_batchGeneration = importlib.import_module('{}.lib.export.BatchGeneration'.format(os.path.basename(_ADD_IN_FOLDER)))
+_nozzleDefinitions = importlib.import_module('{}.lib.NozzleDefinitions'.format(os.path.basename(_ADD_IN_FOLDER)))
+_cfdMesh = importlib.import_module('{}.lib.export.CfdMesh'.format(os.path.basename(_ADD_IN_FOLDER)))
+
+
+def _parseWallLayers(text: str):
+    thicknesses = [float(value) for value in text.split(',')]
+    if len(thicknesses) != 3:
+        raise argparse.ArgumentTypeError('expected inner wall, channel and outer wall thicknesses, e.g. 0.3,1,1')
+    return _nozzleDefinitions.WallLayers(*thicknesses)
+
+
+def _parseMeshSpacing(text: str):
+    try:
+        axialCells, radialCells = (int(value) for value in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected axial and radial cell counts, e.g. 400,100')
+    return _cfdMesh.MeshSpacing(axialCells, radialCells)
+
+
+def main(arguments: [str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Generate nozzle contours, metrics and meshes from a CSV or JSONL '
+                                                 'file of nozzle definitions (mm and degrees).')
+    parser.add_argument('input', help='definitions file, or - to read from standard input')
+    parser.add_argument('output', help='folder the artifacts are written to')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='input format, by default taken from the extension')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--points-per-segment', type=int, default=32, help='contour points per segment')
+    parser.add_argument('--wall-layers', type=_parseWallLayers, default=_nozzleDefinitions.DEFAULT_WALL_LAYERS,
+                        help='inner wall, channel and outer wall thickness in mm, e.g. 0.3,1,1')
+    parser.add_argument('--mesh', choices=('stl', 'obj'), help='also write a revolved mesh of the engine walls')
+    parser.add_argument('--mesh-segments', type=int, default=128, help='segments around the axis of the mesh')
+    parser.add_argument('--cfd-mesh', type=_parseMeshSpacing, metavar='AXIAL,RADIAL',
+                        help='also write an axisymmetric OpenFOAM mesh of the gas with these cell counts, e.g. 400,100')
+    parser.add_argument('--quiet', action='store_true', help='only report failed definitions')
+    options = parser.parse_args(arguments)
+
+    if options.input == '-' and options.format is None:
+        parser.error('--format is required when reading from standard input')
+    fileFormat = options.format or _batchGeneration.getFileFormat(options.input)
+    batchOptions = _batchGeneration.BatchOptions(options.wall_layers, options.points_per_segment, options.mesh,
+                                                 options.mesh_segments, options.cfd_mesh)
+
+    def report(row: dict):
+        if 'error' in row:
+            print('{}: {}'.format(row['name'], row['error']), file=sys.stderr)
+        elif not options.quiet:
+            print(row['name'])
+
+    file = sys.stdin if options.input == '-' else open(options.input, newline='')
+    try:
+        definitions = _batchGeneration.readDefinitions(file, fileFormat)
+        failedCount = _batchGeneration.generateBatch(definitions, options.output, batchOptions, options.workers, report)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    return 1 if failedCount else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import argparse
+import importlib
+import math
+import os
+import statistics
+import sys
+import time
+
+# Runs the add-in's drawing paths against the recording adsk stand-in in tools/fakeadsk and reports, per generation,
+# the wall time and the number of Fusion API calls, broken down by the add-in function that made them. With --check
+# the run fails when a scenario makes more calls than its budget, so a change to the drawing path can be checked on a
+# machine without Fusion 360:
+#
+#     python tools/benchmark/SketchBenchmark.py --check
+
+_TOOLS_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ADD_IN_FOLDER = os.path.dirname(_TOOLS_FOLDER)
+sys.path.insert(0, os.path.join(_TOOLS_FOLDER, 'fakeadsk'))
+sys.path.insert(0, os.path.dirname(_ADD_IN_FOLDER))
+
+from ApiRecorder import recorder  # noqa: E402
+from adsk.core import Application, CommandEventArgs  # noqa: E402
+
+recorder.setSourceRoot(os.path.join(_ADD_IN_FOLDER, 'lib'))
+
+
+def _importAddIn(moduleName: str):
+    # the add-in is a package named after its folder and uses relative imports throughout
+    return importlib.import_module('{}.lib.{}'.format(os.path.basename(_ADD_IN_FOLDER), moduleName))
+
+
+_nozzleDefinitions = _importAddIn('NozzleDefinitions')
+_nozzleSketch = _importAddIn('sketch.NozzleSketch')
+_previewSketch = _importAddIn('sketch.PreviewSketch')
+_contourCache = _importAddIn('geometry.ContourCache')
+_clusterLayout = _importAddIn('geometry.ClusterLayout')
+_engineCluster = _importAddIn('sketch.EngineCluster')
+_engineSolid = _importAddIn('sketch.EngineSolid')
+
+# maximum API calls per generation, '<scenario>:<nozzle definition>', about 10% above the counts when they were set
+CALL_BUDGETS = {
+    'engine:default': 450,
+    'engine:bell': 500,
+    'engine:minimum length': 400,
+    'regenerate:default': 24,
+    'regenerate:bell': 24,
+    'regenerate:minimum length': 24,
+    'preview:default': 620,
+    'preview:bell': 670,
+    'preview:minimum length': 1360,
+    'cluster:default': 510,
+    'solid:default': 750,
+    'command': 1520,
+}
+
+
+class _Result:
+    def __init__(self, name: str, seconds: [float], calls, callers):
+        self.name = name
+        self.seconds = seconds
+        self.calls = calls
+        self.callers = callers
+
+    def getCallCount(self) -> int:
+        return sum(self.calls.values())
+
+
+def _toInternalUnits(nozzleParameters):
+    # definitions are in mm and degrees, the sketch code works in Fusion's internal cm and radians
+    lengths = {field: getattr(nozzleParameters, field) / 10 for field in _nozzleDefinitions.DIMENSION_FIELDS}
+    lengths['convergenceAngle'] = math.radians(nozzleParameters.convergenceAngle)
+    return nozzleParameters._replace(**lengths)
+
+
+def _getWallLayers():
+    return _nozzleDefinitions.WallLayers(*(thickness / 10 for thickness in _nozzleDefinitions.DEFAULT_WALL_LAYERS))
+
+
+def _newSketch():
+    application = Application.get()
+    sketch = application._activeProduct._rootComponent._sketches._add()
+    application._activeEditObject = sketch
+    return sketch
+
+
+def _measure(name: str, prepare, run, repeats: int) -> _Result:
+    # timings are taken with recording off, so they are not inflated by the recorder itself; calls are counted once
+    seconds = []
+    recorder.setEnabled(False)
+    try:
+        for _ in range(repeats):
+            state = prepare()
+            startTime = time.perf_counter()
+            run(state)
+            seconds.append(time.perf_counter() - startTime)
+        state = prepare()
+    finally:
+        recorder.setEnabled(True)
+    recorder.reset()
+    run(state)
+    result = _Result(name, seconds, recorder.getCalls(), recorder.getCallers())
+    recorder.reset()
+    return result
+
+
+def _benchmarkEngine(nozzleParameters, wallLayers, repeats: int) -> _Result:
+    def prepare():
+        return _newSketch()
+
+    def run(sketch):
+        _nozzleSketch.EngineSketch(nozzleParameters, wallLayers).draw()
+
+    return _measure('engine:' + nozzleParameters.name, prepare, run, repeats)
+
+
+def _benchmarkRegeneration(nozzleParameters, wallLayers, repeats: int) -> _Result:
+    # a second generation into the same sketch with a wider chamber, every style handles it by driving one dimension
+    changedParameters = nozzleParameters._replace(chamberRadius=nozzleParameters.chamberRadius * 1.05)
+
+    def prepare():
+        sketch = _newSketch()
+        _nozzleSketch.EngineSketch(nozzleParameters, wallLayers).draw()
+        return sketch
+
+    def run(sketch):
+        _nozzleSketch.EngineSketch(changedParameters, wallLayers).draw()
+
+    return _measure('regenerate:' + nozzleParameters.name, prepare, run, repeats)
+
+
+def _benchmarkPreview(nozzleParameters, wallLayers, repeats: int) -> _Result:
+    def prepare():
+        # every preview draws contours that were computed before, as when the dialog is edited back and forth
+        _contourCache.contourCache.getOffsetPoints(nozzleParameters, wallLayers.getOffsets(), 8, degrees=False)
+        return _newSketch()
+
+    def run(sketch):
+        _previewSketch.EnginePreviewSketch(nozzleParameters, wallLayers).draw()
+
+    return _measure('preview:' + nozzleParameters.name, prepare, run, repeats)
+
+
+def _benchmarkCluster(nozzleParameters, wallLayers, repeats: int) -> _Result:
+    # nine engines should cost one engine and a call per placed occurrence
+    layout = _clusterLayout.ClusterLayout(9, 4 * nozzleParameters.chamberRadius,
+                                          _clusterLayout.ClusterPattern.CENTERED_RING)
+
+    def prepare():
+        return None
+
+    def run(state):
+        _engineCluster.EngineCluster(nozzleParameters, wallLayers, layout).generate()
+
+    return _measure('cluster:' + nozzleParameters.name, prepare, run, repeats)
+
+
+def _benchmarkSolid(nozzleParameters, wallLayers, repeats: int) -> _Result:
+    # a hundred cooling channels should cost the same as one
+    channels = _nozzleDefinitions.CoolingChannels(100, 0.005)
+
+    def prepare():
+        return _newSketch()
+
+    def run(sketch):
+        layerCurves = _nozzleSketch.EngineSketch(nozzleParameters, wallLayers).draw(sketch)
+        _engineSolid.EngineSolid(nozzleParameters, wallLayers, channels).generate(sketch, layerCurves)
+
+    return _measure('solid:' + nozzleParameters.name, prepare, run, repeats)
+
+
+def _benchmarkCommand(repeats: int) -> _Result:
+    # the whole dialog: create the command and its inputs, then preview and execute with the default values
+    generateNozzleCommand = _importAddIn('GenerateNozzleCommand')
+
+    def prepare():
+        # a fresh command definition, otherwise every run adds another commandCreated handler to the same one
+        Application.get()._userInterface._commandDefinitions._definitions.clear()
+        _newSketch()
+        return generateNozzleCommand.GenerateNozzleCommand()
+
+    def run(command):
+        command.execute()
+        fusionCommand = command._commandDefinition._lastCommand
+        fusionCommand._executePreview._fire(CommandEventArgs(fusionCommand._executePreview))
+        fusionCommand._execute._fire(CommandEventArgs(fusionCommand._execute))
+
+    return _measure('command', prepare, run, repeats)
+
+
+def runBenchmarks(repeats: int) -> [_Result]:
+    wallLayers = _getWallLayers()
+    results = []
+    for nozzleDefinition in _nozzleDefinitions.NozzleDefinition:
+        nozzleParameters = _toInternalUnits(nozzleDefinition.value)
+        results.append(_benchmarkEngine(nozzleParameters, wallLayers, repeats))
+        results.append(_benchmarkRegeneration(nozzleParameters, wallLayers, repeats))
+        results.append(_benchmarkPreview(nozzleParameters, wallLayers, repeats))
+    defaultParameters = _toInternalUnits(_nozzleDefinitions.NozzleDefinition.DEFAULT.value)
+    results.append(_benchmarkCluster(defaultParameters, wallLayers, repeats))
+    results.append(_benchmarkSolid(defaultParameters, wallLayers, repeats))
+    results.append(_benchmarkCommand(repeats))
+    return results
+
+
+def printResults(results: [_Result], detailCount: int):
+    print('{:<28} {:>12} {:>10} {:>8}'.format('scenario', 'median ms', 'API calls', 'budget'))
+    for result in results:
+        budget = CALL_BUDGETS.get(result.name)
+        print('{:<28} {:>12.3f} {:>10d} {:>8}'.format(result.name, statistics.median(result.seconds) * 1000,
+                                                     result.getCallCount(), '-' if budget is None else budget))
+    if detailCount <= 0:
+        return
+    for result in results:
+        print('\n{} ({} API calls)'.format(result.name, result.getCallCount()))
+        print('  by add-in function:')
+        for caller, count in result.callers.most_common():
+            print('    {:<44} {:>6d}'.format(caller, count))
+        print('  most called API members:')
+        for call, count in result.calls.most_common(detailCount):
+            print('    {:<44} {:>6d}'.format(call, count))
+
+
+def getBudgetViolations(results: [_Result]) -> [str]:
+    violations = []
+    for result in results:
+        budget = CALL_BUDGETS.get(result.name)
+        if budget is not None and result.getCallCount() > budget:
+            violations.append('{} made {} API calls, over its budget of {}'.format(
+                result.name, result.getCallCount(), budget))
+    return violations
+
+
+def main(arguments: [str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Time the nozzle sketch code and count its Fusion API calls.')
+    parser.add_argument('--repeats', type=int, default=5, help='timed runs per scenario')
+    parser.add_argument('--details', type=int, default=10,
+                        help='API members listed per scenario, 0 prints the summary table only')
+    parser.add_argument('--check', action='store_true', help='exit with an error when a call budget is exceeded')
+    options = parser.parse_args(arguments)
+
+    results = runBenchmarks(options.repeats)
+    printResults(results, options.details)
+    violations = getBudgetViolations(results)
+    for violation in violations:
+        print(violation, file=sys.stderr)
+    return 1 if options.check and violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
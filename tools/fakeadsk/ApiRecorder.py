@@ -0,0 +1,85 @@
+import os
+import sys
+from collections import Counter
+
+
+# Counts every call the add-in makes into the fake adsk modules. Each public attribute read, attribute write or static
+# method lookup on a fake API object is one call, just like every property access crosses into Fusion in the real API.
+# Calls are also attributed to the innermost add-in function on the stack (e.g. SketchUtils.drawLine), so a
+# benchmark can see which drawing helper costs what.
+class ApiRecorder:
+    def __init__(self):
+        self._calls = Counter()
+        self._callers = Counter()
+        self._sourceRoot = None
+        self._isEnabled = True
+
+    def setSourceRoot(self, sourceRoot: str):
+        # calls are attributed to the innermost frame whose file lives under this directory
+        self._sourceRoot = os.path.normcase(os.path.abspath(sourceRoot))
+
+    def setEnabled(self, isEnabled: bool):
+        self._isEnabled = isEnabled
+
+    def isEnabled(self) -> bool:
+        return self._isEnabled
+
+    def record(self, className: str, attribute: str):
+        if not self._isEnabled:
+            return
+        self._calls['{}.{}'.format(className, attribute)] += 1
+        self._callers[self._getCaller()] += 1
+
+    def reset(self):
+        self._calls.clear()
+        self._callers.clear()
+
+    def getCallCount(self) -> int:
+        return sum(self._calls.values())
+
+    def getCalls(self) -> Counter:
+        return Counter(self._calls)
+
+    def getCallers(self) -> Counter:
+        return Counter(self._callers)
+
+    def _getCaller(self) -> str:
+        if self._sourceRoot is None:
+            return '<unattributed>'
+        frame = sys._getframe(2)
+        while frame is not None:
+            fileName = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+            if fileName.startswith(self._sourceRoot):
+                moduleName = os.path.splitext(os.path.basename(fileName))[0]
+                return '{}.{}'.format(moduleName, frame.f_code.co_name)
+            frame = frame.f_back
+        return '<outside add-in>'
+
+
+recorder = ApiRecorder()
+
+
+class _RecordedType(type):
+    # static API methods such as Point3D.create or Application.get are looked up on the class
+    def __getattribute__(cls, name: str):
+        if not name.startswith('_'):
+            recorder.record(type.__getattribute__(cls, '__name__'), name)
+        return type.__getattribute__(cls, name)
+
+
+# Base of every fake API class. Fake implementations keep their state in underscore attributes, so only the add-in's
+# own accesses are recorded.
+class ApiObject(metaclass=_RecordedType):
+    def __getattribute__(self, name: str):
+        if not name.startswith('_'):
+            recorder.record(type(self).__name__, name)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name: str, value):
+        if not name.startswith('_'):
+            recorder.record(type(self).__name__, name + '=')
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
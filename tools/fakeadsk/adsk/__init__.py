@@ -0,0 +1,20 @@
+# Recording stand-in for the Fusion 360 adsk package, so the add-in's sketch code can run and be benchmarked outside
+# Fusion. Put tools/fakeadsk on sys.path ahead of anything else called adsk.
+
+_isAutoTerminate = True
+
+
+def autoTerminate(value: bool):
+    global _isAutoTerminate
+    _isAutoTerminate = value
+
+
+def terminate():
+    pass
+
+
+def doEvents() -> bool:
+    return True
+
+
+from . import core, fusion, cam  # noqa: E402
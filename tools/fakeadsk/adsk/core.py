@@ -0,0 +1,730 @@
+import math
+import queue
+import re
+
+from ApiRecorder import ApiObject
+
+# Recording stand-in for the parts of adsk.core the add-in uses. Values behave like Fusion's (internal units are cm and
+# radians), but nothing is solved or rendered.
+
+_UNIT_SCALES = {
+    'mm': ('cm', 0.1), 'cm': ('cm', 1.0), 'm': ('cm', 100.0), 'in': ('cm', 2.54), 'ft': ('cm', 30.48),
+    'rad': ('rad', 1.0), 'deg': ('rad', math.pi / 180),
+}
+_EXPRESSION = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([a-zA-Z]*)\s*$')
+# markup of formatted text, which Fusion renders as a small subset of HTML
+_TAG = re.compile(r'<[^>]+>')
+
+
+# Geometry -------------------------------------------------------------------------------------------------------------
+
+
+class Point3D(ApiObject):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self._x, self._y, self._z = float(x), float(y), float(z)
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> 'Point3D':
+        return Point3D(x, y, z)
+
+    @property
+    def x(self) -> float:
+        return self._x
+
+    @x.setter
+    def x(self, value: float):
+        self._x = float(value)
+
+    @property
+    def y(self) -> float:
+        return self._y
+
+    @y.setter
+    def y(self, value: float):
+        self._y = float(value)
+
+    @property
+    def z(self) -> float:
+        return self._z
+
+    @z.setter
+    def z(self, value: float):
+        self._z = float(value)
+
+    def isEqualTo(self, other: 'Point3D') -> bool:
+        return math.isclose(self._x, other._x, abs_tol=1e-9) and math.isclose(self._y, other._y, abs_tol=1e-9) and \
+            math.isclose(self._z, other._z, abs_tol=1e-9)
+
+    def distanceTo(self, other: 'Point3D') -> float:
+        return self._distanceTo(other)
+
+    def copy(self) -> 'Point3D':
+        return self._copy()
+
+    # unrecorded versions for the fake's own use, only calls made by the add-in are counted
+    def _distanceTo(self, other: 'Point3D') -> float:
+        return math.sqrt((self._x - other._x) ** 2 + (self._y - other._y) ** 2 + (self._z - other._z) ** 2)
+
+    def _copy(self) -> 'Point3D':
+        return Point3D(self._x, self._y, self._z)
+
+
+class Vector3D(ApiObject):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self._x, self._y, self._z = float(x), float(y), float(z)
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> 'Vector3D':
+        return Vector3D(x, y, z)
+
+    @property
+    def x(self) -> float:
+        return self._x
+
+    @property
+    def y(self) -> float:
+        return self._y
+
+    @property
+    def z(self) -> float:
+        return self._z
+
+
+class Matrix3D(ApiObject):
+    def __init__(self):
+        self._cells = [[1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+    @staticmethod
+    def create() -> 'Matrix3D':
+        return Matrix3D()
+
+    def getCell(self, row: int, column: int) -> float:
+        return self._cells[row][column]
+
+    def setCell(self, row: int, column: int, value: float) -> bool:
+        self._cells[row][column] = float(value)
+        return True
+
+    def setToIdentity(self) -> bool:
+        self._cells = Matrix3D()._cells
+        return True
+
+    @property
+    def translation(self) -> Vector3D:
+        return Vector3D(self._cells[0][3], self._cells[1][3], self._cells[2][3])
+
+    @translation.setter
+    def translation(self, vector: Vector3D):
+        self._cells[0][3], self._cells[1][3], self._cells[2][3] = vector._x, vector._y, vector._z
+
+
+# Values and collections -----------------------------------------------------------------------------------------------
+
+
+class ValueInput(ApiObject):
+    def __init__(self, realValue: float = None, stringValue: str = None):
+        self._realValue = realValue
+        self._stringValue = stringValue
+
+    @staticmethod
+    def createByReal(value: float) -> 'ValueInput':
+        return ValueInput(realValue=float(value))
+
+    @staticmethod
+    def createByString(value: str) -> 'ValueInput':
+        return ValueInput(stringValue=value)
+
+    @property
+    def realValue(self) -> float:
+        return self._realValue
+
+    @property
+    def stringValue(self) -> str:
+        return self._stringValue
+
+
+class ObjectCollection(ApiObject):
+    def __init__(self, items: list = None):
+        self._items = list(items or [])
+
+    @staticmethod
+    def create() -> 'ObjectCollection':
+        return ObjectCollection()
+
+    def add(self, item) -> bool:
+        self._items.append(item)
+        return True
+
+    def item(self, index: int):
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> bool:
+        self._items.clear()
+        return True
+
+
+class NamedValues(ApiObject):
+    def __init__(self):
+        self._values = {}
+
+    @staticmethod
+    def create() -> 'NamedValues':
+        return NamedValues()
+
+    def add(self, name: str, value) -> bool:
+        self._values[name] = value
+        return True
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+
+class UnitsManager(ApiObject):
+    def __init__(self, defaultLengthUnits: str = 'mm'):
+        self._defaultLengthUnits = defaultLengthUnits
+
+    @property
+    def internalUnits(self) -> str:
+        return 'cm'
+
+    @property
+    def defaultLengthUnits(self) -> str:
+        return self._defaultLengthUnits
+
+    def convert(self, valueInInputUnits: float, inputUnits: str, outputUnits: str) -> float:
+        return _toInternal(valueInInputUnits, inputUnits) / _toInternal(1.0, outputUnits)
+
+    def evaluateExpression(self, expression: str, units: str = '') -> float:
+        return self._evaluateExpression(expression, units)
+
+    def formatInternalValue(self, value: float, units: str = '', showUnits: bool = True) -> str:
+        units = units or self._defaultLengthUnits
+        formatted = '{:g}'.format(value / _toInternal(1.0, units))
+        return '{} {}'.format(formatted, units) if showUnits else formatted
+
+    def _evaluateExpression(self, expression: str, units: str = '') -> float:
+        # numbers with an optional unit, e.g. "12.5", "12.5 mm" or "0.3 in"
+        match = _EXPRESSION.match(expression)
+        if match is None:
+            raise RuntimeError('Cannot evaluate expression: {}'.format(expression))
+        value, expressionUnits = float(match.group(1)), match.group(2) or units or self._defaultLengthUnits
+        return _toInternal(value, expressionUnits)
+
+
+def _toInternal(value: float, units: str) -> float:
+    if units in ('internal', 'cm rad'):
+        return value
+    if units not in _UNIT_SCALES:
+        raise RuntimeError('Unknown units: {}'.format(units))
+    return value * _UNIT_SCALES[units][1]
+
+
+# Application ----------------------------------------------------------------------------------------------------------
+
+
+class Event(ApiObject):
+    def __init__(self, sender=None):
+        self._sender = sender
+        self._handlers = []
+
+    @property
+    def sender(self):
+        return self._sender
+
+    def add(self, handler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler) -> bool:
+        self._handlers.remove(handler)
+        return True
+
+    def _fire(self, args):
+        # fake only: what Fusion does when the event happens
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class Application(ApiObject):
+    _instance = None
+
+    def __init__(self):
+        from .fusion import Design
+        self._userInterface = UserInterface()
+        self._activeProduct = Design(UnitsManager())
+        self._activeEditObject = None
+        self._customEvents = {}
+        # events fired from any thread wait here until the "UI thread" dispatches them
+        self._firedCustomEvents = queue.SimpleQueue()
+
+    @staticmethod
+    def get() -> 'Application':
+        return _getApplication()
+
+    @property
+    def userInterface(self) -> 'UserInterface':
+        return self._userInterface
+
+    @property
+    def activeProduct(self):
+        return self._activeProduct
+
+    @property
+    def activeEditObject(self):
+        return self._activeEditObject
+
+    @activeEditObject.setter
+    def activeEditObject(self, editObject):
+        # fake only: Fusion changes the edit object when the user starts editing a sketch
+        self._activeEditObject = editObject
+
+    def registerCustomEvent(self, eventId: str) -> 'CustomEvent':
+        if eventId in self._customEvents:
+            raise RuntimeError('Custom event already registered: {}'.format(eventId))
+        customEvent = CustomEvent(eventId)
+        self._customEvents[eventId] = customEvent
+        return customEvent
+
+    def unregisterCustomEvent(self, eventId: str) -> bool:
+        return self._customEvents.pop(eventId, None) is not None
+
+    def fireCustomEvent(self, eventId: str, additionalInfo: str = '') -> bool:
+        # thread safe like Fusion's: the handlers run later, on the thread that dispatches events
+        if eventId not in self._customEvents:
+            return False
+        self._firedCustomEvents.put((eventId, additionalInfo))
+        return True
+
+    def _dispatchCustomEvents(self) -> int:
+        # fake only: what Fusion's event loop does on the UI thread, returns the number of events handled
+        count = 0
+        while True:
+            try:
+                eventId, additionalInfo = self._firedCustomEvents.get_nowait()
+            except queue.Empty:
+                return count
+            customEvent = self._customEvents.get(eventId)
+            if customEvent is not None:
+                customEvent._fire(CustomEventArgs(customEvent, additionalInfo))
+                count += 1
+
+
+def _getApplication() -> Application:
+    if Application._instance is None:
+        Application._instance = Application()
+    return Application._instance
+
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self._commandDefinitions = CommandDefinitions()
+        self._messages = []
+
+    def messageBox(self, text: str, title: str = '', buttons: int = 0, icon: int = 0) -> int:
+        self._messages.append((title, text))
+        return 0
+
+    @property
+    def commandDefinitions(self) -> 'CommandDefinitions':
+        return self._commandDefinitions
+
+
+class CommandDefinitions(ApiObject):
+    def __init__(self):
+        self._definitions = {}
+
+    def itemById(self, id: str):
+        return self._definitions.get(id)
+
+    def addButtonDefinition(self, id: str, name: str, tooltip: str = '',
+                            resourceFolder: str = '') -> 'CommandDefinition':
+        definition = CommandDefinition(id, name)
+        self._definitions[id] = definition
+        return definition
+
+    @property
+    def count(self) -> int:
+        return len(self._definitions)
+
+
+class CommandDefinition(ApiObject):
+    def __init__(self, id: str, name: str):
+        self._id = id
+        self._name = name
+        self._commandCreated = Event()
+        self._lastCommand = None
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def commandCreated(self) -> Event:
+        return self._commandCreated
+
+    def execute(self, inputs: NamedValues = None) -> bool:
+        # creates the command and lets the add-in fill in its dialog, like Fusion does
+        self._lastCommand = Command()
+        self._commandCreated._fire(CommandCreatedEventArgs(self._lastCommand))
+        return True
+
+
+class Command(ApiObject):
+    def __init__(self):
+        self._commandInputs = CommandInputs(self)
+        self._isRepeatable = True
+        self._inputChanged = Event(self)
+        self._execute = Event(self)
+        self._executePreview = Event(self)
+        self._destroy = Event(self)
+
+    @property
+    def commandInputs(self) -> 'CommandInputs':
+        return self._commandInputs
+
+    @property
+    def isRepeatable(self) -> bool:
+        return self._isRepeatable
+
+    @isRepeatable.setter
+    def isRepeatable(self, value: bool):
+        self._isRepeatable = value
+
+    @property
+    def inputChanged(self) -> Event:
+        return self._inputChanged
+
+    @property
+    def execute(self) -> Event:
+        return self._execute
+
+    @property
+    def executePreview(self) -> Event:
+        return self._executePreview
+
+    @property
+    def destroy(self) -> Event:
+        return self._destroy
+
+    def doExecutePreview(self) -> bool:
+        # Fusion fires executePreview again, as it does after an input changed
+        self._executePreview._fire(CommandEventArgs(self._executePreview))
+        return True
+
+
+# Events -----------------------------------------------------------------------------------------------------------
+
+
+# Handlers are implemented by the add-in, so they are plain classes rather than recorded API objects.
+class CommandCreatedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CommandEventHandler:
+    def notify(self, args):
+        pass
+
+
+class InputChangedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CustomEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CustomEvent(Event):
+    def __init__(self, eventId: str):
+        super().__init__()
+        self._eventId = eventId
+
+    @property
+    def eventId(self) -> str:
+        return self._eventId
+
+
+class CustomEventArgs(ApiObject):
+    def __init__(self, firingEvent: CustomEvent, additionalInfo: str):
+        self._firingEvent = firingEvent
+        self._additionalInfo = additionalInfo
+
+    @property
+    def firingEvent(self) -> CustomEvent:
+        return self._firingEvent
+
+    @property
+    def additionalInfo(self) -> str:
+        return self._additionalInfo
+
+
+class CommandCreatedEventArgs(ApiObject):
+    def __init__(self, command: Command):
+        self._command = command
+
+    @property
+    def command(self) -> Command:
+        return self._command
+
+
+class CommandEventArgs(ApiObject):
+    def __init__(self, firingEvent: Event):
+        self._firingEvent = firingEvent
+        self._isValidResult = False
+
+    @property
+    def firingEvent(self) -> Event:
+        return self._firingEvent
+
+    @property
+    def command(self) -> Command:
+        return self._firingEvent._sender
+
+    @property
+    def isValidResult(self) -> bool:
+        return self._isValidResult
+
+    @isValidResult.setter
+    def isValidResult(self, value: bool):
+        self._isValidResult = value
+
+
+class InputChangedEventArgs(ApiObject):
+    def __init__(self, input: 'CommandInput', inputs: 'CommandInputs'):
+        self._input = input
+        self._inputs = inputs
+
+    @property
+    def input(self) -> 'CommandInput':
+        return self._input
+
+    @property
+    def inputs(self) -> 'CommandInputs':
+        return self._inputs
+
+
+# Command inputs -------------------------------------------------------------------------------------------------------
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    TextListDropDownStyle = 1
+    CheckBoxDropDownStyle = 2
+
+
+class CommandInputs(ApiObject):
+    def __init__(self, command: Command = None):
+        self._command = command
+        self._inputs = []
+
+    def addValueInput(self, id: str, name: str, unitType: str, initialValue: ValueInput) -> 'ValueCommandInput':
+        return self._add(ValueCommandInput(id, name, unitType, initialValue._realValue))
+
+    def addBoolValueInput(self, id: str, name: str, isCheckBox: bool, resourceFolder: str = '',
+                          initialValue: bool = False) -> 'BoolValueCommandInput':
+        return self._add(BoolValueCommandInput(id, name, initialValue))
+
+    def addIntegerSliderCommandInput(self, id: str, name: str, min: int, max: int,
+                                     hasTwoSliders: bool = False) -> 'IntegerSliderCommandInput':
+        return self._add(IntegerSliderCommandInput(id, name, min, max))
+
+    def addDropDownCommandInput(self, id: str, name: str, dropDownStyle: int) -> 'DropDownCommandInput':
+        return self._add(DropDownCommandInput(id, name))
+
+    def addTextBoxCommandInput(self, id: str, name: str, formattedText: str, numRows: int,
+                               isReadOnly: bool) -> 'TextBoxCommandInput':
+        return self._add(TextBoxCommandInput(id, name, formattedText, numRows, isReadOnly))
+
+    def item(self, index: int) -> 'CommandInput':
+        return self._inputs[index]
+
+    def itemById(self, id: str) -> 'CommandInput':
+        return next((commandInput for commandInput in self._inputs if commandInput._id == id), None)
+
+    @property
+    def count(self) -> int:
+        return len(self._inputs)
+
+    @property
+    def command(self) -> Command:
+        return self._command
+
+    def _add(self, commandInput: 'CommandInput') -> 'CommandInput':
+        self._inputs.append(commandInput)
+        return commandInput
+
+
+class CommandInput(ApiObject):
+    def __init__(self, id: str, name: str):
+        self._id = id
+        self._name = name
+        self._isVisible = True
+        self._isEnabled = True
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def isVisible(self) -> bool:
+        return self._isVisible
+
+    @isVisible.setter
+    def isVisible(self, value: bool):
+        self._isVisible = value
+
+    @property
+    def isEnabled(self) -> bool:
+        return self._isEnabled
+
+    @isEnabled.setter
+    def isEnabled(self, value: bool):
+        self._isEnabled = value
+
+
+class ValueCommandInput(CommandInput):
+    def __init__(self, id: str, name: str, unitType: str, value: float):
+        super().__init__(id, name)
+        self._unitType = unitType
+        self._value = value
+
+    @property
+    def unitType(self) -> str:
+        return self._unitType
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, value: float):
+        self._value = float(value)
+
+    @property
+    def expression(self) -> str:
+        return '{:.12g} {}'.format(self._value / _toInternal(1.0, self._unitType), self._unitType)
+
+    @expression.setter
+    def expression(self, expression: str):
+        self._value = _getApplication()._activeProduct._unitsManager._evaluateExpression(expression, self._unitType)
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, id: str, name: str, value: bool):
+        super().__init__(id, name)
+        self._value = value
+
+    @property
+    def value(self) -> bool:
+        return self._value
+
+    @value.setter
+    def value(self, value: bool):
+        self._value = value
+
+
+class IntegerSliderCommandInput(CommandInput):
+    def __init__(self, id: str, name: str, minimumValue: int, maximumValue: int):
+        super().__init__(id, name)
+        self._minimumValue = minimumValue
+        self._maximumValue = maximumValue
+        self._valueOne = minimumValue
+
+    @property
+    def valueOne(self) -> int:
+        return self._valueOne
+
+    @valueOne.setter
+    def valueOne(self, value: int):
+        self._valueOne = max(self._minimumValue, min(self._maximumValue, int(value)))
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, id: str, name: str, formattedText: str, numRows: int, isReadOnly: bool):
+        super().__init__(id, name)
+        self._formattedText = formattedText
+        self._numRows = numRows
+        self._isReadOnly = isReadOnly
+
+    @property
+    def formattedText(self) -> str:
+        return self._formattedText
+
+    @formattedText.setter
+    def formattedText(self, value: str):
+        self._formattedText = value
+
+    @property
+    def text(self) -> str:
+        return _TAG.sub('', self._formattedText.replace('<br>', '\n'))
+
+    @property
+    def numRows(self) -> int:
+        return self._numRows
+
+    @property
+    def isReadOnly(self) -> bool:
+        return self._isReadOnly
+
+
+class ListItem(ApiObject):
+    def __init__(self, name: str, isSelected: bool):
+        self._name = name
+        self._isSelected = isSelected
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def isSelected(self) -> bool:
+        return self._isSelected
+
+    @isSelected.setter
+    def isSelected(self, value: bool):
+        self._isSelected = value
+
+
+class ListItems(ApiObject):
+    def __init__(self):
+        self._items = []
+
+    def add(self, name: str, isSelected: bool, icon: str = '') -> ListItem:
+        item = ListItem(name, isSelected)
+        if isSelected:
+            for other in self._items:
+                other._isSelected = False
+        self._items.append(item)
+        return item
+
+    def item(self, index: int) -> ListItem:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, id: str, name: str):
+        super().__init__(id, name)
+        self._listItems = ListItems()
+
+    @property
+    def listItems(self) -> ListItems:
+        return self._listItems
+
+    @property
+    def selectedItem(self) -> ListItem:
+        return next((item for item in self._listItems._items if item._isSelected), None)
@@ -0,0 +1,1076 @@
+import itertools
+import math
+
+from ApiRecorder import ApiObject
+from .core import Point3D, Vector3D, ObjectCollection, Matrix3D, UnitsManager
+
+# Recording stand-in for the parts of adsk.fusion the add-in uses. Sketch entities keep the geometry they were created
+# with and dimensions measure it, but constraints are only stored: there is no solver, so driving a dimension changes
+# its parameter and nothing else.
+
+_entityTokens = itertools.count(1)
+
+
+class DimensionOrientations:
+    AlignedDimensionOrientation = 0
+    HorizontalDimensionOrientation = 1
+    VerticalDimensionOrientation = 2
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class SweepOrientationTypes:
+    ParallelOrientationType = 0
+    PerpendicularOrientationType = 1
+
+
+class PatternComputeOptions:
+    OptimizedPatternCompute = 0
+    IdenticalPatternCompute = 1
+    AdjustPatternCompute = 2
+
+
+# Design ---------------------------------------------------------------------------------------------------------------
+
+
+class Design(ApiObject):
+    def __init__(self, unitsManager: UnitsManager = None):
+        self._unitsManager = unitsManager or UnitsManager()
+        self._timeline = Timeline()
+        self._rootComponent = Component(self)
+
+    @property
+    def unitsManager(self) -> UnitsManager:
+        return self._unitsManager
+
+    @property
+    def rootComponent(self) -> 'Component':
+        return self._rootComponent
+
+    @property
+    def timeline(self) -> 'Timeline':
+        return self._timeline
+
+
+class TimelineGroup(ApiObject):
+    def __init__(self, startIndex: int, endIndex: int):
+        self._startIndex = startIndex
+        self._endIndex = endIndex
+        self._name = ''
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str):
+        self._name = value
+
+    @property
+    def count(self) -> int:
+        return self._endIndex - self._startIndex + 1
+
+
+class TimelineGroups(ApiObject):
+    def __init__(self):
+        self._groups = []
+
+    def add(self, startIndex: int, endIndex: int) -> TimelineGroup:
+        group = TimelineGroup(startIndex, endIndex)
+        self._groups.append(group)
+        return group
+
+    def item(self, index: int) -> TimelineGroup:
+        return self._groups[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._groups)
+
+
+class Timeline(ApiObject):
+    # only positions are kept: every sketch, construction plane and feature moves the marker past one more item
+    def __init__(self):
+        self._markerPosition = 0
+        self._timelineGroups = TimelineGroups()
+
+    @property
+    def markerPosition(self) -> int:
+        return self._markerPosition
+
+    @property
+    def count(self) -> int:
+        return self._markerPosition
+
+    @property
+    def timelineGroups(self) -> TimelineGroups:
+        return self._timelineGroups
+
+    def _add(self, item):
+        self._markerPosition += 1
+        return item
+
+
+class ConstructionAxis(ApiObject):
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+class ConstructionPlane(ApiObject):
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+class ConstructionPlaneInput(ApiObject):
+    def setByOffset(self, planarEntity, offset) -> bool:
+        return True
+
+    def setByDistanceOnPath(self, pathEntity, distance) -> bool:
+        return True
+
+
+class ConstructionPlanes(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._planes = []
+
+    def createInput(self, occurrenceForCreation=None) -> ConstructionPlaneInput:
+        return ConstructionPlaneInput()
+
+    def add(self, input: ConstructionPlaneInput) -> ConstructionPlane:
+        plane = ConstructionPlane('Plane{}'.format(len(self._planes) + 1))
+        self._planes.append(plane)
+        return self._design._timeline._add(plane)
+
+    @property
+    def count(self) -> int:
+        return len(self._planes)
+
+
+class Component(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._sketches = Sketches(self)
+        self._occurrences = Occurrences(design)
+        self._constructionPlanes = ConstructionPlanes(design)
+        self._features = Features(design)
+        self._xYConstructionPlane = ConstructionPlane('XY')
+        self._xZConstructionPlane = ConstructionPlane('XZ')
+        self._yZConstructionPlane = ConstructionPlane('YZ')
+        self._xConstructionAxis = ConstructionAxis('X')
+        self._yConstructionAxis = ConstructionAxis('Y')
+        self._zConstructionAxis = ConstructionAxis('Z')
+
+    @property
+    def sketches(self) -> 'Sketches':
+        return self._sketches
+
+    @property
+    def occurrences(self) -> 'Occurrences':
+        return self._occurrences
+
+    @property
+    def constructionPlanes(self) -> ConstructionPlanes:
+        return self._constructionPlanes
+
+    @property
+    def features(self) -> 'Features':
+        return self._features
+
+    @property
+    def xYConstructionPlane(self) -> ConstructionPlane:
+        return self._xYConstructionPlane
+
+    @property
+    def xZConstructionPlane(self) -> ConstructionPlane:
+        return self._xZConstructionPlane
+
+    @property
+    def yZConstructionPlane(self) -> ConstructionPlane:
+        return self._yZConstructionPlane
+
+    @property
+    def xConstructionAxis(self) -> ConstructionAxis:
+        return self._xConstructionAxis
+
+    @property
+    def yConstructionAxis(self) -> ConstructionAxis:
+        return self._yConstructionAxis
+
+    @property
+    def zConstructionAxis(self) -> ConstructionAxis:
+        return self._zConstructionAxis
+
+
+class Occurrence(ApiObject):
+    def __init__(self, component: Component, transform: Matrix3D):
+        self._component = component
+        self._transform = transform
+
+    @property
+    def component(self) -> Component:
+        return self._component
+
+    @property
+    def transform(self) -> Matrix3D:
+        return self._transform
+
+    @transform.setter
+    def transform(self, transform: Matrix3D):
+        self._transform = transform
+
+
+class Occurrences(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._occurrences = []
+
+    def addNewComponent(self, transform: Matrix3D) -> Occurrence:
+        occurrence = Occurrence(Component(self._design), transform)
+        self._occurrences.append(occurrence)
+        return occurrence
+
+    def addExistingComponent(self, component: Component, transform: Matrix3D) -> Occurrence:
+        occurrence = Occurrence(component, transform)
+        self._occurrences.append(occurrence)
+        return occurrence
+
+    def item(self, index: int) -> Occurrence:
+        return self._occurrences[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._occurrences)
+
+
+class _Feature(ApiObject):
+    # fake only: features of every kind can be deleted, which leaves them in their collection and the timeline
+    def __init__(self):
+        self._isValid = True
+
+    @property
+    def isValid(self) -> bool:
+        return self._isValid
+
+    def deleteMe(self) -> bool:
+        self._isValid = False
+        return True
+
+
+class ExtrudeFeature(_Feature):
+    pass
+
+
+class ExtrudeFeatureInput(ApiObject):
+    def __init__(self, profile, operation: int):
+        self._profile = profile
+        self._operation = operation
+
+    def setDistanceExtent(self, isSymmetric: bool, distance) -> bool:
+        return True
+
+
+class RevolveFeature(_Feature):
+    pass
+
+
+class RevolveFeatureInput(ApiObject):
+    def __init__(self, profiles, axis, operation: int):
+        self._profiles = profiles
+        self._axis = axis
+        self._operation = operation
+
+    def setAngleExtent(self, isSymmetric: bool, angle) -> bool:
+        return True
+
+
+class Path(ApiObject):
+    def __init__(self, curve):
+        self._curve = curve
+
+
+class SweepFeature(_Feature):
+    pass
+
+
+class SweepFeatureInput(ApiObject):
+    def __init__(self, profile, path: Path, operation: int):
+        self._profile = profile
+        self._path = path
+        self._operation = operation
+        self._orientation = SweepOrientationTypes.ParallelOrientationType
+
+    @property
+    def orientation(self) -> int:
+        return self._orientation
+
+    @orientation.setter
+    def orientation(self, value: int):
+        self._orientation = value
+
+
+class CircularPatternFeature(_Feature):
+    def __init__(self, quantity: int):
+        super().__init__()
+        self._quantity = quantity
+
+    @property
+    def quantity(self) -> int:
+        return self._quantity
+
+
+class CircularPatternFeatureInput(ApiObject):
+    def __init__(self, inputEntities, axis):
+        self._inputEntities = inputEntities
+        self._axis = axis
+        self._quantity = None
+        self._totalAngle = None
+        self._isSymmetric = True
+        self._patternComputeOption = PatternComputeOptions.OptimizedPatternCompute
+
+    @property
+    def quantity(self):
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, value):
+        self._quantity = value
+
+    @property
+    def totalAngle(self):
+        return self._totalAngle
+
+    @totalAngle.setter
+    def totalAngle(self, value):
+        self._totalAngle = value
+
+    @property
+    def isSymmetric(self) -> bool:
+        return self._isSymmetric
+
+    @isSymmetric.setter
+    def isSymmetric(self, value: bool):
+        self._isSymmetric = value
+
+    @property
+    def patternComputeOption(self) -> int:
+        return self._patternComputeOption
+
+    @patternComputeOption.setter
+    def patternComputeOption(self, value: int):
+        self._patternComputeOption = value
+
+
+class _FeatureCollection(ApiObject):
+    # fake only: the list of added features every feature collection keeps, each one is an item of the timeline
+    def __init__(self, design: Design):
+        self._design = design
+        self._features = []
+
+    def item(self, index: int):
+        return self._features[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._features)
+
+    def _add(self, feature):
+        self._features.append(feature)
+        return self._design._timeline._add(feature)
+
+
+class ExtrudeFeatures(_FeatureCollection):
+    def createInput(self, profile, operation: int) -> ExtrudeFeatureInput:
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input: ExtrudeFeatureInput) -> ExtrudeFeature:
+        return self._add(ExtrudeFeature())
+
+
+class RevolveFeatures(_FeatureCollection):
+    def createInput(self, profiles, axis, operation: int) -> RevolveFeatureInput:
+        return RevolveFeatureInput(profiles, axis, operation)
+
+    def add(self, input: RevolveFeatureInput) -> RevolveFeature:
+        return self._add(RevolveFeature())
+
+
+class SweepFeatures(_FeatureCollection):
+    def createInput(self, profile, path: Path, operation: int) -> SweepFeatureInput:
+        return SweepFeatureInput(profile, path, operation)
+
+    def add(self, input: SweepFeatureInput) -> SweepFeature:
+        return self._add(SweepFeature())
+
+
+class CircularPatternFeatures(_FeatureCollection):
+    def createInput(self, inputEntities, axis) -> CircularPatternFeatureInput:
+        return CircularPatternFeatureInput(inputEntities, axis)
+
+    def add(self, input: CircularPatternFeatureInput) -> CircularPatternFeature:
+        quantity = input._quantity._realValue if input._quantity is not None else 0
+        return self._add(CircularPatternFeature(int(round(quantity))))
+
+
+class Features(ApiObject):
+    def __init__(self, design: Design):
+        self._extrudeFeatures = ExtrudeFeatures(design)
+        self._revolveFeatures = RevolveFeatures(design)
+        self._sweepFeatures = SweepFeatures(design)
+        self._circularPatternFeatures = CircularPatternFeatures(design)
+
+    @property
+    def extrudeFeatures(self) -> ExtrudeFeatures:
+        return self._extrudeFeatures
+
+    @property
+    def revolveFeatures(self) -> RevolveFeatures:
+        return self._revolveFeatures
+
+    @property
+    def sweepFeatures(self) -> SweepFeatures:
+        return self._sweepFeatures
+
+    @property
+    def circularPatternFeatures(self) -> CircularPatternFeatures:
+        return self._circularPatternFeatures
+
+    def createPath(self, curve, isChain: bool = True) -> Path:
+        return Path(curve)
+
+
+# Sketch entities ------------------------------------------------------------------------------------------------------
+
+
+class SketchEntity(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._entityToken = 'entity{}'.format(next(_entityTokens))
+        self._isValid = True
+        self._isFixed = False
+
+    @property
+    def parentSketch(self) -> 'Sketch':
+        return self._sketch
+
+    @property
+    def entityToken(self) -> str:
+        return self._entityToken
+
+    @property
+    def isValid(self) -> bool:
+        return self._isValid
+
+    @property
+    def isFixed(self) -> bool:
+        return self._isFixed
+
+    @isFixed.setter
+    def isFixed(self, value: bool):
+        self._isFixed = value
+
+    def deleteMe(self) -> bool:
+        # the entity leaves the sketch's collections, so their counts drop like Fusion's
+        self._isValid = False
+        self._sketch._remove(self)
+        return True
+
+
+class SketchPoint(SketchEntity):
+    def __init__(self, sketch: 'Sketch', geometry: Point3D):
+        super().__init__(sketch)
+        self._geometry = geometry._copy()
+
+    @property
+    def geometry(self) -> Point3D:
+        # Fusion returns a transient copy of the point
+        return self._geometry._copy()
+
+    def move(self, translation: Vector3D) -> bool:
+        self._geometry = Point3D(self._geometry._x + translation._x, self._geometry._y + translation._y,
+                                 self._geometry._z + translation._z)
+        return True
+
+
+class SketchCurve(SketchEntity):
+    def __init__(self, sketch: 'Sketch'):
+        super().__init__(sketch)
+        self._isConstruction = False
+
+    @property
+    def isConstruction(self) -> bool:
+        return self._isConstruction
+
+    @isConstruction.setter
+    def isConstruction(self, value: bool):
+        self._isConstruction = value
+
+
+class SketchLine(SketchCurve):
+    def __init__(self, sketch: 'Sketch', startSketchPoint: SketchPoint, endSketchPoint: SketchPoint):
+        super().__init__(sketch)
+        self._startSketchPoint = startSketchPoint
+        self._endSketchPoint = endSketchPoint
+
+    @property
+    def startSketchPoint(self) -> SketchPoint:
+        return self._startSketchPoint
+
+    @property
+    def endSketchPoint(self) -> SketchPoint:
+        return self._endSketchPoint
+
+    @property
+    def length(self) -> float:
+        return self._startSketchPoint._geometry._distanceTo(self._endSketchPoint._geometry)
+
+
+class SketchArc(SketchCurve):
+    def __init__(self, sketch: 'Sketch', centerSketchPoint: SketchPoint, startSketchPoint: SketchPoint,
+                 endSketchPoint: SketchPoint, radius: float):
+        super().__init__(sketch)
+        self._centerSketchPoint = centerSketchPoint
+        self._startSketchPoint = startSketchPoint
+        self._endSketchPoint = endSketchPoint
+        self._radius = radius
+
+    @property
+    def centerSketchPoint(self) -> SketchPoint:
+        return self._centerSketchPoint
+
+    @property
+    def startSketchPoint(self) -> SketchPoint:
+        return self._startSketchPoint
+
+    @property
+    def endSketchPoint(self) -> SketchPoint:
+        return self._endSketchPoint
+
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+
+class SketchCircle(SketchCurve):
+    def __init__(self, sketch: 'Sketch', centerSketchPoint: SketchPoint, radius: float):
+        super().__init__(sketch)
+        self._centerSketchPoint = centerSketchPoint
+        self._radius = radius
+
+    @property
+    def centerSketchPoint(self) -> SketchPoint:
+        return self._centerSketchPoint
+
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+
+class SketchFittedSpline(SketchCurve):
+    def __init__(self, sketch: 'Sketch', fitPoints: [SketchPoint]):
+        super().__init__(sketch)
+        self._fitPoints = fitPoints
+
+    @property
+    def startSketchPoint(self) -> SketchPoint:
+        return self._fitPoints[0]
+
+    @property
+    def endSketchPoint(self) -> SketchPoint:
+        return self._fitPoints[-1]
+
+    @property
+    def fitPoints(self) -> ObjectCollection:
+        return ObjectCollection(self._fitPoints)
+
+
+# Collections of a sketch ----------------------------------------------------------------------------------------------
+
+
+class SketchPoints(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._points = []
+
+    def add(self, point: Point3D) -> SketchPoint:
+        return self._add(point)
+
+    def item(self, index: int) -> SketchPoint:
+        return self._points[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._points)
+
+    def _add(self, point: Point3D) -> SketchPoint:
+        sketchPoint = SketchPoint(self._sketch, point)
+        self._points.append(sketchPoint)
+        return sketchPoint
+
+    def _resolve(self, point) -> SketchPoint:
+        # curves accept either existing sketch points or coordinates, which create a new point
+        return point if isinstance(point, SketchPoint) else self._add(point)
+
+
+class SketchLines(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._lines = []
+
+    def addByTwoPoints(self, startPoint, endPoint) -> SketchLine:
+        points = self._sketch._sketchPoints
+        line = SketchLine(self._sketch, points._resolve(startPoint), points._resolve(endPoint))
+        self._lines.append(line)
+        return line
+
+    def addTwoPointRectangle(self, pointOne, pointTwo) -> ObjectCollection:
+        # the four lines share their corner points, so they close one profile
+        points = self._sketch._sketchPoints
+        first, third = points._resolve(pointOne), points._resolve(pointTwo)
+        second = points._add(Point3D(third._geometry._x, first._geometry._y, first._geometry._z))
+        fourth = points._add(Point3D(first._geometry._x, third._geometry._y, third._geometry._z))
+        corners = [first, second, third, fourth]
+        lines = [SketchLine(self._sketch, start, end) for start, end in zip(corners, corners[1:] + corners[:1])]
+        self._lines.extend(lines)
+        return ObjectCollection(lines)
+
+    def item(self, index: int) -> SketchLine:
+        return self._lines[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._lines)
+
+
+class SketchArcs(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._arcs = []
+
+    def addByCenterStartSweep(self, centerPoint, startPoint, sweepAngle: float) -> SketchArc:
+        points = self._sketch._sketchPoints
+        center = points._resolve(centerPoint)
+        start = points._resolve(startPoint)
+        centerGeometry, startGeometry = center._geometry, start._geometry
+        radius = centerGeometry._distanceTo(startGeometry)
+        angle = math.atan2(startGeometry._y - centerGeometry._y, startGeometry._x - centerGeometry._x) + sweepAngle
+        end = points._add(Point3D(centerGeometry._x + radius * math.cos(angle),
+                                  centerGeometry._y + radius * math.sin(angle)))
+        # arcs run counter-clockwise, so a negative sweep ends at the given start point
+        arc = SketchArc(self._sketch, center, end, start, radius) if sweepAngle < 0 else \
+            SketchArc(self._sketch, center, start, end, radius)
+        self._arcs.append(arc)
+        return arc
+
+    def item(self, index: int) -> SketchArc:
+        return self._arcs[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._arcs)
+
+
+class SketchCircles(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._circles = []
+
+    def addByCenterRadius(self, centerPoint, radius: float) -> SketchCircle:
+        circle = SketchCircle(self._sketch, self._sketch._sketchPoints._resolve(centerPoint), radius)
+        self._circles.append(circle)
+        return circle
+
+    @property
+    def count(self) -> int:
+        return len(self._circles)
+
+
+class SketchFittedSplines(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._splines = []
+
+    def add(self, fitPoints: ObjectCollection) -> SketchFittedSpline:
+        points = self._sketch._sketchPoints
+        spline = SketchFittedSpline(self._sketch, [points._resolve(point) for point in fitPoints._items])
+        self._splines.append(spline)
+        return spline
+
+    @property
+    def count(self) -> int:
+        return len(self._splines)
+
+
+class SketchCurves(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketchLines = SketchLines(sketch)
+        self._sketchArcs = SketchArcs(sketch)
+        self._sketchCircles = SketchCircles(sketch)
+        self._sketchFittedSplines = SketchFittedSplines(sketch)
+
+    @property
+    def sketchLines(self) -> SketchLines:
+        return self._sketchLines
+
+    @property
+    def sketchArcs(self) -> SketchArcs:
+        return self._sketchArcs
+
+    @property
+    def sketchCircles(self) -> SketchCircles:
+        return self._sketchCircles
+
+    @property
+    def sketchFittedSplines(self) -> SketchFittedSplines:
+        return self._sketchFittedSplines
+
+    @property
+    def count(self) -> int:
+        return self._sketchLines._lines.__len__() + len(self._sketchArcs._arcs) + \
+            len(self._sketchCircles._circles) + len(self._sketchFittedSplines._splines)
+
+
+# Dimensions and constraints -------------------------------------------------------------------------------------------
+
+
+class ModelParameter(ApiObject):
+    def __init__(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, value: float):
+        self._value = float(value)
+
+    @property
+    def expression(self) -> str:
+        return '{:.12g}'.format(self._value)
+
+
+class SketchDimension(ApiObject):
+    def __init__(self, sketch: 'Sketch', value: float, isDriving: bool):
+        self._sketch = sketch
+        self._parameter = ModelParameter(value)
+        self._isDriving = isDriving
+        self._isValid = True
+
+    @property
+    def parameter(self) -> ModelParameter:
+        return self._parameter
+
+    @property
+    def isDriving(self) -> bool:
+        return self._isDriving
+
+    @property
+    def isValid(self) -> bool:
+        return self._isValid
+
+    def deleteMe(self) -> bool:
+        self._isValid = False
+        if self in self._sketch._sketchDimensions._dimensions:
+            self._sketch._sketchDimensions._dimensions.remove(self)
+        return True
+
+
+class SketchLinearDimension(SketchDimension):
+    pass
+
+
+class SketchOffsetCurvesDimension(SketchDimension):
+    pass
+
+
+class SketchAngularDimension(SketchDimension):
+    pass
+
+
+class SketchDimensions(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._dimensions = []
+
+    def addDistanceDimension(self, pointOne: SketchPoint, pointTwo: SketchPoint, orientation: int,
+                             textPoint: Point3D, isDriving: bool = True) -> SketchLinearDimension:
+        distance = pointOne._geometry._distanceTo(pointTwo._geometry)
+        return self._add(SketchLinearDimension(self._sketch, distance, isDriving))
+
+    def addAngularDimension(self, lineOne: SketchLine, lineTwo: SketchLine, textPoint: Point3D,
+                            isDriving: bool = True) -> SketchAngularDimension:
+        return self._add(SketchAngularDimension(self._sketch, _getAngle(lineOne, lineTwo), isDriving))
+
+    def addRadialDimension(self, curve, textPoint: Point3D, isDriving: bool = True) -> SketchLinearDimension:
+        return self._add(SketchLinearDimension(self._sketch, curve._radius, isDriving))
+
+    def item(self, index: int) -> SketchDimension:
+        return self._dimensions[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._dimensions)
+
+    def _add(self, dimension: SketchDimension) -> SketchDimension:
+        self._dimensions.append(dimension)
+        return dimension
+
+
+class GeometricConstraint(ApiObject):
+    def __init__(self, kind: str, entities: tuple):
+        self._kind = kind
+        self._entities = entities
+
+    @property
+    def isValid(self) -> bool:
+        return True
+
+
+class GeometricConstraints(ApiObject):
+    def __init__(self, sketch: 'Sketch'):
+        self._sketch = sketch
+        self._constraints = []
+
+    def addVertical(self, line: SketchLine) -> GeometricConstraint:
+        return self._add('vertical', line)
+
+    def addHorizontal(self, line: SketchLine) -> GeometricConstraint:
+        return self._add('horizontal', line)
+
+    def addTangent(self, curveOne: SketchCurve, curveTwo: SketchCurve) -> GeometricConstraint:
+        return self._add('tangent', curveOne, curveTwo)
+
+    def addCollinear(self, lineOne: SketchLine, lineTwo: SketchLine) -> GeometricConstraint:
+        return self._add('collinear', lineOne, lineTwo)
+
+    def addCoincident(self, point: SketchPoint, entity) -> GeometricConstraint:
+        return self._add('coincident', point, entity)
+
+    def item(self, index: int) -> GeometricConstraint:
+        return self._constraints[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._constraints)
+
+    def _add(self, kind: str, *entities) -> GeometricConstraint:
+        constraint = GeometricConstraint(kind, entities)
+        self._constraints.append(constraint)
+        return constraint
+
+
+class Profile(ApiObject):
+    pass
+
+
+class Profiles(ApiObject):
+    def __init__(self):
+        self._profiles = []
+
+    def item(self, index: int) -> Profile:
+        return self._profiles[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._profiles)
+
+
+# Sketch ---------------------------------------------------------------------------------------------------------------
+
+
+class Sketch(ApiObject):
+    def __init__(self, referencePlane=None, parentComponent: Component = None):
+        self._referencePlane = referencePlane
+        self._parentComponent = parentComponent
+        self._entityToken = 'sketch{}'.format(next(_entityTokens))
+        self._sketchPoints = SketchPoints(self)
+        self._originPoint = SketchPoint(self, Point3D())
+        self._sketchCurves = SketchCurves(self)
+        self._sketchDimensions = SketchDimensions(self)
+        self._geometricConstraints = GeometricConstraints(self)
+        self._profiles = Profiles()
+        self._isComputeDeferred = False
+        self._isVisible = True
+        self._isValid = True
+        self._computeCount = 0
+
+    @property
+    def entityToken(self) -> str:
+        return self._entityToken
+
+    @property
+    def isValid(self) -> bool:
+        return self._isValid
+
+    @property
+    def parentComponent(self) -> Component:
+        return self._parentComponent
+
+    @property
+    def originPoint(self) -> SketchPoint:
+        return self._originPoint
+
+    @property
+    def sketchPoints(self) -> SketchPoints:
+        return self._sketchPoints
+
+    @property
+    def sketchCurves(self) -> SketchCurves:
+        return self._sketchCurves
+
+    @property
+    def sketchDimensions(self) -> SketchDimensions:
+        return self._sketchDimensions
+
+    @property
+    def geometricConstraints(self) -> GeometricConstraints:
+        return self._geometricConstraints
+
+    @property
+    def profiles(self) -> Profiles:
+        # one profile per closed region of the curve graph, earlier profiles keep their identity
+        profiles = self._profiles._profiles
+        regionCount = self._getRegionCount()
+        profiles.extend(Profile() for _ in range(regionCount - len(profiles)))
+        del profiles[regionCount:]
+        return self._profiles
+
+    @property
+    def isComputeDeferred(self) -> bool:
+        return self._isComputeDeferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value: bool):
+        # leaving deferred mode is when Fusion solves the sketch
+        if self._isComputeDeferred and not value:
+            self._computeCount += 1
+        self._isComputeDeferred = value
+
+    @property
+    def isVisible(self) -> bool:
+        return self._isVisible
+
+    @isVisible.setter
+    def isVisible(self, value: bool):
+        self._isVisible = value
+
+    def offset(self, curves: ObjectCollection, directionPoint: Point3D, offset: float) -> ObjectCollection:
+        # copies of the curves; the fake does not move them, only the number of created entities matters. Curves that
+        # share a point share its copy, so an offset chain is connected like the real one.
+        copies = []
+        copiedPoints = {}
+
+        def copyPoint(point: SketchPoint) -> SketchPoint:
+            if point not in copiedPoints:
+                copiedPoints[point] = self._sketchPoints._add(point._geometry)
+            return copiedPoints[point]
+
+        for curve in curves._items:
+            if isinstance(curve, SketchLine):
+                copy = SketchLine(self, copyPoint(curve._startSketchPoint), copyPoint(curve._endSketchPoint))
+                self._sketchCurves._sketchLines._lines.append(copy)
+            elif isinstance(curve, SketchArc):
+                copy = SketchArc(self, self._sketchPoints._add(curve._centerSketchPoint._geometry),
+                                 copyPoint(curve._startSketchPoint), copyPoint(curve._endSketchPoint),
+                                 curve._radius + offset)
+                self._sketchCurves._sketchArcs._arcs.append(copy)
+            else:
+                ends = (curve._fitPoints[0], curve._fitPoints[-1])
+                copy = SketchFittedSpline(self, [copyPoint(point) if point in ends else
+                                                 self._sketchPoints._add(point._geometry) for point in curve._fitPoints])
+                self._sketchCurves._sketchFittedSplines._splines.append(copy)
+            copies.append(copy)
+        self._geometricConstraints._add('offset', *copies)
+        self._sketchDimensions._add(SketchOffsetCurvesDimension(self, offset, True))
+        return ObjectCollection(copies)
+
+    def modelToSketchSpace(self, modelCoordinate: Point3D) -> Point3D:
+        # sketches are not placed in the fake, model and sketch space are the same
+        return modelCoordinate._copy()
+
+    def deleteMe(self) -> bool:
+        self._isValid = False
+        return True
+
+    def _remove(self, entity: SketchEntity):
+        curves = self._sketchCurves
+        for entities in (self._sketchPoints._points, curves._sketchLines._lines, curves._sketchArcs._arcs,
+                         curves._sketchCircles._circles, curves._sketchFittedSplines._splines):
+            if entity in entities:
+                entities.remove(entity)
+
+    def _getRegionCount(self) -> int:
+        # cycle rank of the curves joined at shared sketch points, every circle is a region of its own; curves are
+        # never split where they cross, which the add-in's sketches do not rely on
+        curves = self._sketchCurves
+        edges = [(curve._startSketchPoint, curve._endSketchPoint)
+                 for curve in curves._sketchLines._lines + curves._sketchArcs._arcs if not curve._isConstruction]
+        edges += [(spline._fitPoints[0], spline._fitPoints[-1])
+                  for spline in curves._sketchFittedSplines._splines if not spline._isConstruction]
+        parents = {}
+
+        def find(point):
+            while parents.setdefault(point, point) is not point:
+                point = parents[point]
+            return point
+
+        # an edge that joins two trees closes nothing, every other edge closes a region
+        joiningEdges = 0
+        for start, end in edges:
+            rootStart, rootEnd = find(start), find(end)
+            if rootStart is not rootEnd:
+                parents[rootStart] = rootEnd
+                joiningEdges += 1
+        regionCount = len(edges) - joiningEdges
+        return regionCount + sum(1 for circle in curves._sketchCircles._circles if not circle._isConstruction)
+
+    def _getComputeCount(self) -> int:
+        # fake only: how often the sketch would have been solved after deferred edits
+        return self._computeCount
+
+
+class Sketches(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._sketches = []
+
+    def add(self, planarEntity) -> Sketch:
+        return self._component._design._timeline._add(self._add(planarEntity))
+
+    def item(self, index: int) -> Sketch:
+        return self._sketches[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._sketches)
+
+    def _add(self, planarEntity=None) -> Sketch:
+        # fake only: lets a benchmark create the sketch being edited without recording the call
+        sketch = Sketch(planarEntity, self._component)
+        self._sketches.append(sketch)
+        return sketch
+
+
+def _getAngle(lineOne: SketchLine, lineTwo: SketchLine) -> float:
+    # unsigned angle between the two lines, in [0, pi]
+    def direction(line: SketchLine) -> (float, float):
+        start, end = line._startSketchPoint._geometry, line._endSketchPoint._geometry
+        return end._x - start._x, end._y - start._y
+
+    (ax, ay), (bx, by) = direction(lineOne), direction(lineTwo)
+    return abs(math.atan2(ax * by - ay * bx, ax * bx + ay * by))